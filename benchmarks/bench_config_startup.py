@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк холодного старта ConfigManager на большой конфигурации
+
+Сравнивает загрузку config.yaml без кеша (полный разбор YAML) и с кешем
+разобранной конфигурации. Каждый замер выполняется в отдельном процессе,
+чтобы учесть импорт модулей так же, как при реальном запуске.
+
+Использование:
+  python benchmarks/bench_config_startup.py                 # 3000 источников
+  python benchmarks/bench_config_startup.py --sources 10000 --runs 5
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Код, выполняемый в дочернем процессе: импорт config и загрузка конфигурации
+CHILD_CODE = """
+import time
+start = time.perf_counter()
+from config import ConfigManager
+manager = ConfigManager({config_file!r})
+assert len(manager.get_all_enabled_sources()) == {sources}
+print(time.perf_counter() - start)
+"""
+
+
+def generate_config(path: str, sources: int, per_subscription: int = 50) -> None:
+    """
+    Создает config.yaml с заданным количеством источников
+    """
+    subscriptions = {}
+    for i in range(sources):
+        sub_name = f"subscription_{i // per_subscription}"
+        subscription = subscriptions.setdefault(sub_name, {
+            'enabled': True,
+            'title': f"Подписка {i // per_subscription}",
+            'description': "Сгенерированная подписка для бенчмарка",
+            'category': "News & Politics",
+            'sources': {},
+        })
+        subscription['sources'][f"source_{i}"] = {
+            'enabled': True,
+            'type': 'channel' if i % 2 else 'playlist',
+            'url': f"https://www.youtube.com/@channel_{i}",
+            'custom_title': f"Источник {i} - Подкаст",
+            'custom_description': "Описание источника",
+            'check_interval': 10,
+            'max_videos': 5,
+        }
+
+    data = {
+        'global': {'check_interval': 10, 'max_videos': 5, 'base_url': 'http://localhost'},
+        'subscriptions': subscriptions,
+        'download': {'format': 'bestaudio/best'},
+        'rss': {'version': '2.0'},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.dump(data, f, allow_unicode=True, default_flow_style=False)
+
+
+def run_child(config_file: str, sources: int, use_cache: bool) -> float:
+    """
+    Загружает конфигурацию в отдельном процессе и возвращает время загрузки
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR, YOUTUBE2PODCAST_CONFIG_CACHE='true' if use_cache else 'false')
+    code = CHILD_CODE.format(config_file=config_file, sources=sources)
+    result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк загрузки большой конфигурации')
+    parser.add_argument('--sources', type=int, default=3000, help='Количество источников')
+    parser.add_argument('--runs', type=int, default=3, help='Количество замеров')
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        config_file = os.path.join(temp_dir, 'config.yaml')
+        generate_config(config_file, args.sources)
+
+        no_cache = [run_child(config_file, args.sources, use_cache=False) for _ in range(args.runs)]
+
+        # Первый запуск с кешем создает его; дальше кеш используется.
+        # Сдвигаем mtime назад, чтобы не попасть в окно проверки свежеизмененных файлов.
+        stat = os.stat(config_file)
+        os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 * 10**9))
+        run_child(config_file, args.sources, use_cache=True)
+        with_cache = [run_child(config_file, args.sources, use_cache=True) for _ in range(args.runs)]
+
+        result = {
+            'benchmark': 'config_startup',
+            'sources': args.sources,
+            'config_bytes': os.path.getsize(config_file),
+            'yaml_seconds': statistics.median(no_cache),
+            'cached_seconds': statistics.median(with_cache),
+        }
+        result['speedup'] = round(result['yaml_seconds'] / result['cached_seconds'], 1)
+        print(json.dumps(result, indent=2))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Сквозной бенчмарк main() против локального сервера fake_youtube_server.py
+
+В отличие от bench_pipeline.py работает настоящий yt-dlp: HTTP запросы
+списков и информации о видео, загрузка аудио с ограничением скорости,
+ответы 429 и 500. Конфигурация из N подписок × M источников указывает на
+тестовый сервер, так что на ноутбуке можно прогнать сотни источников.
+
+Результат - JSON: время прогона, источники в секунду, загруженные эпизоды
+и счетчики запросов сервера по типам и кодам ответа.
+
+Использование:
+  python benchmarks/bench_e2e.py
+  python benchmarks/bench_e2e.py --subscriptions 10 --sources 20 --videos 5 --latency-ms 30
+  python benchmarks/bench_e2e.py --rate-limit 0.05 --failures 0.02 --bandwidth-kb 512 --output e2e.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, Any, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_pipeline import generate_config  # noqa: E402
+from fake_youtube_server import FakeYoutubeServer, fake_youtube  # noqa: E402
+
+
+def count_episodes(data_dir: str) -> int:
+    """Количество загруженных mp3 во всех папках подписок"""
+    return sum(1 for _, _, names in os.walk(data_dir) for name in names if name.endswith('.mp3'))
+
+
+def run_benchmark(subscriptions: int = 2, sources: int = 5, videos: int = 5, latency: float = 0.0,
+                  bandwidth: Optional[int] = None, rate_limit_rate: float = 0.0, failure_rate: float = 0.0,
+                  unavailable_rate: float = 0.0, audio_seconds: float = 5.0, seed: int = 0,
+                  work_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Запускает сервер, однократно выполняет main() во временной папке и возвращает результаты
+    """
+    import multi_downloader
+    from config import set_config_file, DEFAULT_CONFIG_FILE
+    from logging_setup import setup_logging
+
+    temp_dir = work_dir or tempfile.mkdtemp(prefix='bench_e2e_')
+    original_cwd = os.getcwd()
+    original_skip = os.environ.pop('SKIP_DOWNLOAD', None)
+    server = FakeYoutubeServer(videos=videos, latency=latency, bandwidth=bandwidth,
+                               rate_limit_rate=rate_limit_rate, failure_rate=failure_rate,
+                               unavailable_rate=unavailable_rate, audio_seconds=audio_seconds, seed=seed)
+    try:
+        os.chdir(temp_dir)
+        server.start()
+        generate_config('config.yaml', subscriptions, sources, videos, base_url=server.url)
+        set_config_file(os.path.abspath('config.yaml'))
+        setup_logging({'level': 'WARNING'}, verbosity=-1)
+
+        with fake_youtube(server):
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            multi_downloader.main()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+        episodes = count_episodes('data')
+    finally:
+        server.stop()
+        os.chdir(original_cwd)
+        set_config_file(DEFAULT_CONFIG_FILE)
+        setup_logging()
+        if original_skip is not None:
+            os.environ['SKIP_DOWNLOAD'] = original_skip
+        if work_dir is None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    total_sources = subscriptions * sources
+    return {
+        'benchmark': 'e2e',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'params': {
+            'subscriptions': subscriptions,
+            'sources_per_subscription': sources,
+            'videos_per_source': videos,
+            'latency_ms': latency * 1000,
+            'bandwidth_bytes_per_second': bandwidth,
+            'rate_limit_rate': rate_limit_rate,
+            'failure_rate': failure_rate,
+            'unavailable_rate': unavailable_rate,
+            'audio_bytes': len(server.audio),
+        },
+        'wall_seconds': round(wall, 6),
+        'cpu_seconds': round(cpu, 6),
+        'sources_per_second': round(total_sources / wall, 3),
+        'episodes_downloaded': episodes,
+        'server': dict(server.stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сквозной бенчмарк main() против локального сервера YouTube')
+    parser.add_argument('--subscriptions', type=int, default=2, help='Количество подписок (N)')
+    parser.add_argument('--sources', type=int, default=5, help='Источников в подписке (M)')
+    parser.add_argument('--videos', type=int, default=5, help='Видео в источнике (K)')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Задержка каждого ответа сервера, мс')
+    parser.add_argument('--bandwidth-kb', type=int, help='Скорость отдачи аудио на соединение, КБ/с')
+    parser.add_argument('--rate-limit', type=float, default=0, help='Доля ответов 429')
+    parser.add_argument('--failures', type=float, default=0, help='Доля ответов 500')
+    parser.add_argument('--unavailable', type=float, default=0, help='Доля недоступных видео')
+    parser.add_argument('--audio-seconds', type=float, default=5, help='Длительность синтетического аудио')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно генератора неполадок')
+    parser.add_argument('--output', help='Сохранить JSON в файл')
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        subscriptions=args.subscriptions,
+        sources=args.sources,
+        videos=args.videos,
+        latency=args.latency_ms / 1000,
+        bandwidth=args.bandwidth_kb * 1024 if args.bandwidth_kb else None,
+        rate_limit_rate=args.rate_limit,
+        failure_rate=args.failures,
+        unavailable_rate=args.unavailable,
+        audio_seconds=args.audio_seconds,
+        seed=args.seed,
+    )
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
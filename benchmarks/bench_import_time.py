@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк времени импорта модулей (python -X importtime)
+
+Каждый модуль импортируется в отдельном холодном процессе; из вывода
+-X importtime берется накопленное время импорта модуля (без site).
+Скрипт завершается с кодом 1, если медиана превышает бюджет или если
+при импорте загружаются тяжелые зависимости (yt_dlp, requests), которые
+должны подгружаться только в функциях, где они нужны.
+
+Использование:
+  python benchmarks/bench_import_time.py                       # config, manage_sources, multi_downloader
+  python benchmarks/bench_import_time.py --budget-ms 100 --runs 7
+  python benchmarks/bench_import_time.py --module config --module feeds
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ['config', 'manage_sources', 'multi_downloader']
+
+# Модули, которые не должны загружаться при импорте пути конфигурации/управления
+HEAVY_MODULES = ['yt_dlp', 'requests', 'xml.etree.ElementTree']
+
+
+def measure_import(module: str) -> dict:
+    """
+    Импортирует модуль в отдельном процессе с -X importtime
+
+    Returns:
+        Словарь с накопленным временем импорта (мс) и списком загруженных модулей
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            env=env, cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+
+    cumulative_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        name_stripped = name.strip()
+        imported.add(name_stripped)
+        # Модуль верхнего уровня записан без отступа после разделителя
+        if name_stripped == module and name == f' {module}':
+            cumulative_us = int(cumulative.strip())
+
+    if cumulative_us is None:
+        raise RuntimeError(f"Не найдено время импорта модуля {module}")
+    return {'ms': cumulative_us / 1000, 'imported': imported}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк времени импорта модулей')
+    parser.add_argument('--module', action='append', help='Модуль для замера (можно указать несколько раз)')
+    parser.add_argument('--runs', type=int, default=5, help='Количество замеров')
+    parser.add_argument('--budget-ms', type=float, default=150.0, help='Бюджет времени импорта одного модуля, мс')
+    args = parser.parse_args()
+
+    results = []
+    failed = False
+    for module in args.module or DEFAULT_MODULES:
+        runs = [measure_import(module) for _ in range(args.runs)]
+        median_ms = statistics.median(run['ms'] for run in runs)
+        heavy = sorted({name for run in runs for name in run['imported']} & set(HEAVY_MODULES))
+        ok = median_ms <= args.budget_ms and not heavy
+        failed = failed or not ok
+        results.append({
+            'module': module,
+            'median_ms': round(median_ms, 1),
+            'min_ms': round(min(run['ms'] for run in runs), 1),
+            'heavy_imports': heavy,
+            'ok': ok,
+        })
+
+    print(json.dumps({
+        'benchmark': 'import_time',
+        'budget_ms': args.budget_ms,
+        'runs': args.runs,
+        'results': results,
+    }, indent=2))
+
+    if failed:
+        print("❌ Превышен бюджет времени импорта или загружены тяжелые модули", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
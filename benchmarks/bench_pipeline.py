@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Офлайн бенчмарк конвейера загрузки с подменным yt_dlp.YoutubeDL
+
+Генерирует конфигурацию из N подписок × M источников × K видео и замеряет
+время (wall и CPU) и пиковую память для сценариев:
+  process_source - обработка всех источников по одному
+  rss            - create_or_update_rss для всех источников (K загруженных файлов в папке)
+  main           - однократный запуск main() целиком
+
+Сеть не используется: списки, информация о видео и загрузки отдает
+benchmarks/fake_yt_dlp.py с настраиваемыми задержками. Результат - JSON,
+который можно сравнивать между запусками.
+
+Использование:
+  python benchmarks/bench_pipeline.py
+  python benchmarks/bench_pipeline.py --subscriptions 5 --sources 20 --videos 10 --latency-ms 20
+  python benchmarks/bench_pipeline.py --scenario rss --videos 500 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Any, List, Optional
+
+import yaml
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_yt_dlp import fake_yt_dlp  # noqa: E402
+
+SCENARIOS = ('process_source', 'rss', 'main')
+
+
+def generate_config(path: str, subscriptions: int, sources: int, videos: int,
+                    base_url: str = "https://www.youtube.com") -> None:
+    """Создает config.yaml с N подписками по M источников (base_url - адрес YouTube или тестового сервера)"""
+    data = {
+        'global': {'check_interval': 10, 'max_videos': videos, 'base_url': 'http://localhost'},
+        'subscriptions': {
+            f"subscription_{s}": {
+                'enabled': True,
+                'title': f"Подписка {s}",
+                'description': "Сгенерированная подписка для бенчмарка",
+                'category': "News & Politics",
+                'sources': {
+                    f"source_{s}_{i}": {
+                        'enabled': True,
+                        'type': 'channel' if i % 2 else 'playlist',
+                        'url': (f"{base_url}/@channel_{s}_{i}" if i % 2
+                                else f"{base_url}/playlist?list=PL_{s}_{i}"),
+                        'max_videos': videos,
+                    }
+                    for i in range(sources)
+                },
+            }
+            for s in range(subscriptions)
+        },
+        'download': {'format': 'bestaudio/best'},
+        'rss': {'version': '2.0', 'formats': ['rss'], 'opml_index': 'data/index.opml'},
+        'logging': {'level': 'WARNING', 'file': ''},
+        'diagnostics': {'enabled': False},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.dump(data, f, allow_unicode=True, default_flow_style=False)
+
+
+def measure(function: Callable[[], None], runs: int, prepare: Callable[[], None] = None,
+            trace_memory: bool = True) -> Dict[str, Any]:
+    """
+    Замеряет функцию runs раз и отдельным прогоном под tracemalloc - пиковую память
+
+    Args:
+        function: Замеряемая функция
+        runs: Количество замеров времени
+        prepare: Подготовка перед каждым прогоном (не входит в замер)
+        trace_memory: Выполнить дополнительный прогон под tracemalloc
+    """
+    wall, cpu = [], []
+    for _ in range(runs):
+        if prepare:
+            prepare()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        function()
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+
+    result = {
+        'runs': runs,
+        'wall_seconds': round(statistics.median(wall), 6),
+        'wall_seconds_min': round(min(wall), 6),
+        'cpu_seconds': round(statistics.median(cpu), 6),
+    }
+    if trace_memory:
+        if prepare:
+            prepare()
+        tracemalloc.start()
+        try:
+            function()
+            result['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_benchmark(subscriptions: int = 2, sources: int = 5, videos: int = 10, latency: float = 0.0,
+                  download_latency: float = 0.0, audio_bytes: int = 64 * 1024, runs: int = 3,
+                  scenarios: List[str] = SCENARIOS, trace_memory: bool = True,
+                  work_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Выполняет сценарии бенчмарка во временной папке и возвращает результаты
+
+    Все пути программы (data/, config.yaml) относительные, поэтому на время
+    бенчмарка меняется текущая папка.
+    """
+    import multi_downloader
+    from config import get_enabled_subscriptions, set_config_file, DEFAULT_CONFIG_FILE
+    from logging_setup import setup_logging
+    from memory_probe import peak_rss
+
+    temp_dir = work_dir or tempfile.mkdtemp(prefix='bench_pipeline_')
+    original_cwd = os.getcwd()
+    original_skip = os.environ.pop('SKIP_DOWNLOAD', None)
+    results: Dict[str, Any] = {}
+    try:
+        os.chdir(temp_dir)
+        generate_config('config.yaml', subscriptions, sources, videos)
+        set_config_file(os.path.abspath('config.yaml'))
+        setup_logging({'level': 'WARNING'}, verbosity=-1)
+        jobs = [(source, subscription) for subscription in get_enabled_subscriptions()
+                for source in subscription.sources if source.enabled]
+
+        def clean_data():
+            shutil.rmtree('data', ignore_errors=True)
+
+        with fake_yt_dlp(entries=videos, latency=latency, download_latency=download_latency,
+                         audio_bytes=audio_bytes) as fake_class:
+            if 'process_source' in scenarios:
+                def process_all():
+                    for source, subscription in jobs:
+                        assert multi_downloader.process_source(source, subscription)
+                results['process_source'] = measure(process_all, runs, clean_data, trace_memory)
+                results['process_source']['per_source_seconds'] = round(
+                    results['process_source']['wall_seconds'] / len(jobs), 6)
+
+            if 'rss' in scenarios:
+                # Все K видео каждого источника уже загружены: лента из K эпизодов на источник
+                clean_data()
+                feeds = []
+                for source, subscription in jobs:
+                    source_videos = multi_downloader.get_videos_from_source(source)
+                    subscription_dir = f"data/{subscription.name}"
+                    os.makedirs(subscription_dir, exist_ok=True)
+                    for video in source_videos:
+                        with open(os.path.join(subscription_dir, f"{multi_downloader.get_file_hash(video['title'])}.mp3"), 'wb') as f:
+                            f.write(b'\0' * 1024)
+                    feeds.append((source_videos, source, subscription, source_videos[0]))
+
+                def write_all_feeds():
+                    for source_videos, source, subscription, latest in feeds:
+                        multi_downloader.create_or_update_rss(source_videos, source, subscription, latest)
+                results['rss'] = measure(write_all_feeds, runs, None, trace_memory)
+
+            if 'main' in scenarios:
+                results['main'] = measure(multi_downloader.main, runs, clean_data, trace_memory)
+
+            calls = dict(fake_class.calls)
+    finally:
+        os.chdir(original_cwd)
+        set_config_file(DEFAULT_CONFIG_FILE)
+        setup_logging()
+        if original_skip is not None:
+            os.environ['SKIP_DOWNLOAD'] = original_skip
+        if work_dir is None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return {
+        'benchmark': 'pipeline',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'params': {
+            'subscriptions': subscriptions,
+            'sources_per_subscription': sources,
+            'videos_per_source': videos,
+            'latency_ms': latency * 1000,
+            'download_latency_ms': download_latency * 1000,
+            'audio_bytes': audio_bytes,
+        },
+        'results': results,
+        'fake_calls': calls,
+        'peak_rss_bytes': peak_rss(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Офлайн бенчмарк конвейера загрузки (подменный YoutubeDL)')
+    parser.add_argument('--subscriptions', type=int, default=2, help='Количество подписок (N)')
+    parser.add_argument('--sources', type=int, default=5, help='Источников в подписке (M)')
+    parser.add_argument('--videos', type=int, default=10, help='Видео в источнике (K)')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Задержка extract_info, мс')
+    parser.add_argument('--download-ms', type=float, default=0, help='Задержка загрузки одного видео, мс')
+    parser.add_argument('--audio-kb', type=int, default=64, help='Размер создаваемого аудио файла, КБ')
+    parser.add_argument('--runs', type=int, default=3, help='Количество замеров каждого сценария')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='Сценарий (можно несколько; по умолчанию все)')
+    parser.add_argument('--no-memory', action='store_true', help='Не замерять пиковую память (tracemalloc)')
+    parser.add_argument('--output', help='Сохранить JSON в файл')
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        subscriptions=args.subscriptions,
+        sources=args.sources,
+        videos=args.videos,
+        latency=args.latency_ms / 1000,
+        download_latency=args.download_ms / 1000,
+        audio_bytes=args.audio_kb * 1024,
+        runs=args.runs,
+        scenarios=args.scenario or list(SCENARIOS),
+        trace_memory=not args.no_memory,
+    )
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк генерации ленты на больших папках подписки (100 - 50 000 эпизодов)
+
+Для каждого размера создается синтетическая папка подписки (mp3 и часть
+обложек webp) и список видео той же длины, затем замеряются время и пиковая
+память этапов:
+  legacy_lookup - исходный алгоритм сопоставления: перебор видео с get_file_hash
+                  для каждого mp3 и os.path.exists/getsize на каждый эпизод
+                  (O(файлы × видео), только до --legacy-max эпизодов)
+  build_feed    - текущий путь: одно сканирование папки и метаданные
+                  эпизодов из episodes.json подписки
+  render_<fmt>  - каждый генератор из feeds.FEED_WRITERS (новые генераторы
+                  попадают в бенчмарк автоматически)
+  total_<fmt>   - build_feed + render_<fmt>
+
+Использование:
+  python benchmarks/bench_rss_scale.py
+  python benchmarks/bench_rss_scale.py --sizes 100 1000 10000 --runs 5
+  python benchmarks/bench_rss_scale.py --sizes 50000 --legacy-max 0 --output rss.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Any, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from config import Subscription  # noqa: E402
+from feeds import FEED_WRITERS, build_feed, load_episode_index, update_episode_index  # noqa: E402
+
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+DEFAULT_LEGACY_MAX = 1000
+BASE_URL = "http://localhost:8080"
+
+
+def get_file_hash(title: str) -> str:
+    """Тот же хеш имени файла, что и multi_downloader.get_file_hash"""
+    return hashlib.md5(title.encode('utf-8')).hexdigest()
+
+
+def make_subscription_dir(root: str, episodes: int) -> tuple:
+    """
+    Создает папку подписки с episodes загруженными эпизодами
+
+    Returns:
+        (папка подписки, список видео, последнее видео)
+    """
+    subscription_dir = os.path.join(root, f"bench_{episodes}")
+    os.makedirs(subscription_dir)
+    videos = []
+    for index in range(episodes):
+        video = {
+            'id': f"video{index:06d}",
+            'title': f"Выпуск {index}: синтетический эпизод для бенчмарка",
+            'duration': 1800 + index % 3600,
+            'uploader': "Бенчмарк",
+            'timestamp': 1_700_000_000 - index * 3600,
+        }
+        videos.append(video)
+        file_hash = get_file_hash(video['title'])
+        with open(os.path.join(subscription_dir, f"{file_hash}.mp3"), 'wb') as f:
+            f.write(b'\0' * (index % 512))
+        if index % 2 == 0:
+            open(os.path.join(subscription_dir, f"{file_hash}.webp"), 'wb').close()
+    return subscription_dir, videos, videos[0]
+
+
+def legacy_lookup(videos: List[Dict[str, Any]], subscription_dir: str) -> List[tuple]:
+    """
+    Сопоставление файлов и видео в исходной реализации create_or_update_rss
+
+    Для каждого mp3 перебираются видео с вычислением хеша, затем для каждого
+    эпизода файл проверяется через os.path.exists и os.path.getsize.
+    """
+    downloaded_videos = []
+    for file in os.listdir(subscription_dir):
+        if file.endswith('.mp3'):
+            file_hash = file.replace('.mp3', '')
+            for video in videos:
+                if get_file_hash(video['title']) == file_hash:
+                    downloaded_videos.append(video)
+                    break
+
+    episodes = []
+    for video in downloaded_videos:
+        mp3_path = os.path.join(subscription_dir, f"{get_file_hash(video['title'])}.mp3")
+        length = os.path.getsize(mp3_path) if os.path.exists(mp3_path) else 0
+        thumbnail_path = os.path.join(subscription_dir, f"{get_file_hash(video['title'])}.webp")
+        episodes.append((video, length, os.path.exists(thumbnail_path)))
+    return episodes
+
+
+def measure(function: Callable[[], Any], runs: int, trace_memory: bool = True) -> Dict[str, Any]:
+    """Медиана времени за runs прогонов и пиковая память отдельного прогона под tracemalloc"""
+    wall, cpu = [], []
+    for _ in range(runs):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        function()
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+    result = {'wall_seconds': round(statistics.median(wall), 6), 'cpu_seconds': round(statistics.median(cpu), 6)}
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            function()
+            result['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def bench_size(root: str, episodes: int, runs: int, legacy_max: int, trace_memory: bool) -> Dict[str, Any]:
+    """Замеры всех этапов для папки из episodes эпизодов"""
+    subscription_dir, videos, latest_video = make_subscription_dir(root, episodes)
+    subscription = Subscription(name=os.path.basename(subscription_dir), title="Бенчмарк",
+                                description="Синтетическая подписка", author="Бенчмарк", sources=[])
+
+    update_episode_index(subscription_dir, videos, get_file_hash)
+
+    def build():
+        return build_feed(subscription, subscription_dir, BASE_URL, load_episode_index(subscription_dir))
+
+    feed = build()
+    assert len(feed.episodes) == episodes
+    result: Dict[str, Any] = {'episodes': episodes, 'stages': {}}
+    stages = result['stages']
+
+    if episodes <= legacy_max:
+        assert len(legacy_lookup(videos, subscription_dir)) == episodes
+        stages['legacy_lookup'] = measure(lambda: legacy_lookup(videos, subscription_dir), runs, trace_memory)
+    stages['build_feed'] = measure(build, runs, trace_memory)
+
+    for name, writer_class in FEED_WRITERS.items():
+        writer = writer_class()
+        render = measure(lambda: writer.render(feed), runs, trace_memory)
+        render['output_bytes'] = len(writer.render(feed))
+        stages[f"render_{name}"] = render
+        stages[f"total_{name}"] = measure(lambda: writer.render(build()), runs, trace_memory)
+
+    if 'legacy_lookup' in stages:
+        result['lookup_speedup'] = round(
+            stages['legacy_lookup']['wall_seconds'] / max(stages['build_feed']['wall_seconds'], 1e-9), 1)
+    shutil.rmtree(subscription_dir)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Микробенчмарк генерации ленты на больших папках подписки')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='Количество эпизодов')
+    parser.add_argument('--runs', type=int, default=3, help='Количество замеров каждого этапа')
+    parser.add_argument('--legacy-max', type=int, default=DEFAULT_LEGACY_MAX,
+                        help=f'Максимальный размер для исходного алгоритма O(файлы × видео) (по умолчанию {DEFAULT_LEGACY_MAX})')
+    parser.add_argument('--no-memory', action='store_true', help='Не замерять пиковую память (tracemalloc)')
+    parser.add_argument('--output', help='Сохранить JSON в файл')
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp(prefix='bench_rss_')
+    try:
+        sizes = [bench_size(temp_dir, size, args.runs, args.legacy_max, not args.no_memory) for size in args.sizes]
+    finally:
+        shutil.rmtree(temp_dir)
+
+    result = {
+        'benchmark': 'rss_scale',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'runs': args.runs,
+        'sizes': sizes,
+    }
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
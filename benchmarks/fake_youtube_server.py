@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Локальный HTTP сервер, изображающий YouTube, для сквозных нагрузочных тестов
+
+В отличие от fake_yt_dlp.py здесь работает настоящий yt-dlp: сеть, форматы,
+HTTP загрузчик и (если есть ffmpeg) постобработка. Сервер отдает:
+  /api/listing/<slug> - список видео канала или плейлиста (JSON)
+  /api/video/<id>     - информацию о видео (JSON, 404 для недоступных)
+  /media/<id>.mp3     - синтетическое аудио (тишина MPEG-1 Layer III)
+
+Два тестовых экстрактора yt-dlp переводят на него адреса программы:
+http://127.0.0.1:<port>/@<slug> и /playlist?list=<slug> - на список,
+https://www.youtube.com/watch?v=<id> - на информацию о видео. Экстракторы
+добавляются в подменный yt_dlp.YoutubeDL перед стандартными (fake_youtube).
+
+Неполадки задаются параметрами сервера: задержка ответа, ограничение
+скорости отдачи аудио, доля ответов 429 и 500, доля недоступных видео.
+
+Пример:
+    with FakeYoutubeServer(videos=5, latency=0.02, rate_limit_rate=0.05) as server:
+        with fake_youtube(server):
+            multi_downloader.main()
+        print(server.stats)
+"""
+
+import hashlib
+import json
+import random
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+
+# Время публикации самого нового видео, остальные - на сутки раньше каждое
+NEWEST_TIMESTAMP = 1_700_000_000
+
+# Кадр MPEG-1 Layer III 128 кбит/с 44.1 кГц без данных - тишина, 1152 сэмпла
+MP3_FRAME = b'\xff\xfb\x90\x64' + b'\0' * 413
+MP3_FRAME_SECONDS = 1152 / 44100
+CHUNK_SIZE = 16 * 1024
+
+
+def synthetic_audio(seconds: float) -> bytes:
+    """Тишина в MP3 заданной длительности"""
+    return MP3_FRAME * max(1, int(seconds / MP3_FRAME_SECONDS))
+
+
+class FakeYoutubeServer:
+    """
+    Сервер в фоновом потоке на 127.0.0.1 со свободным портом
+
+    Args:
+        videos: Видео в каждом источнике (любой slug - существующий источник)
+        latency: Задержка каждого ответа, секунды
+        bandwidth: Скорость отдачи аудио на соединение, байт/с (None - без ограничения)
+        rate_limit_rate: Доля запросов с ответом 429 Too Many Requests
+        failure_rate: Доля запросов с ответом 500
+        unavailable_rate: Доля недоступных видео (постоянно для одного ID)
+        audio_seconds: Длительность синтетического аудио
+        seed: Зерно генератора неполадок (воспроизводимые прогоны)
+    """
+
+    def __init__(self, videos: int = 10, latency: float = 0.0, bandwidth: Optional[int] = None,
+                 rate_limit_rate: float = 0.0, failure_rate: float = 0.0, unavailable_rate: float = 0.0,
+                 audio_seconds: float = 5.0, seed: int = 0):
+        self.videos = videos
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.rate_limit_rate = rate_limit_rate
+        self.failure_rate = failure_rate
+        self.unavailable_rate = unavailable_rate
+        self.audio = synthetic_audio(audio_seconds)
+        self.audio_seconds = audio_seconds
+        self.stats: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def channel_url(self, slug: str) -> str:
+        return f"{self.url}/@{slug}"
+
+    def playlist_url(self, slug: str) -> str:
+        return f"{self.url}/playlist?list={slug}"
+
+    def start(self) -> 'FakeYoutubeServer':
+        server = self
+
+        class Handler(FakeYoutubeHandler):
+            fake = server
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-youtube', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += value
+
+    def fault(self) -> Optional[int]:
+        """Случайная неполадка для очередного запроса: 429, 500 или None"""
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.failure_rate:
+            return 500
+        return None
+
+    def is_unavailable(self, video_id: str) -> bool:
+        digest = int(hashlib.md5(video_id.encode('utf-8')).hexdigest()[:8], 16)
+        return digest / 0xFFFFFFFF < self.unavailable_rate
+
+    def listing(self, slug: str) -> Dict[str, Any]:
+        return {
+            'id': slug,
+            'title': f"Источник {slug}",
+            'uploader': f"Автор {slug}",
+            'entries': [{'id': f"{slug}_{i}", 'title': f"{slug} - выпуск {i}"} for i in range(self.videos)],
+        }
+
+    def video(self, video_id: str) -> Dict[str, Any]:
+        slug, _, index = video_id.rpartition('_')
+        index = int(index) if index.isdigit() else 0
+        timestamp = NEWEST_TIMESTAMP - index * 86400
+        return {
+            'id': video_id,
+            'title': f"{slug} - выпуск {index}",
+            'description': f"Синтетическое видео {index} источника {slug}",
+            'uploader': f"Автор {slug}",
+            'duration': int(self.audio_seconds),
+            'view_count': 1000 - index,
+            'timestamp': timestamp,
+            'upload_date': time.strftime('%Y%m%d', time.gmtime(timestamp)),
+            'media_url': f"{self.url}/media/{video_id}.mp3",
+            'filesize': len(self.audio),
+        }
+
+
+class FakeYoutubeHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов; сервер с настройками - атрибут класса fake"""
+
+    fake: FakeYoutubeServer = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        fake = self.fake
+        path = urlparse(self.path).path
+        kind = path.strip('/').split('/')[1] if path.startswith('/api/') else path.strip('/').split('/')[0]
+        fake.count(f"requests_{kind}")
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        status = fake.fault()
+        if status == 429:
+            fake.count('status_429')
+            return self._send_json(429, {'error': 'Too Many Requests'}, {'Retry-After': '1'})
+        if status == 500:
+            fake.count('status_500')
+            return self._send_json(500, {'error': 'Internal Server Error'})
+
+        match = re.fullmatch(r'/api/listing/([\w-]+)', path)
+        if match:
+            return self._send_json(200, fake.listing(match.group(1)))
+        match = re.fullmatch(r'/api/video/([\w-]+)', path)
+        if match:
+            if fake.is_unavailable(match.group(1)):
+                fake.count('status_404')
+                return self._send_json(404, {'error': 'Video unavailable'})
+            return self._send_json(200, fake.video(match.group(1)))
+        match = re.fullmatch(r'/media/([\w-]+)\.mp3', path)
+        if match:
+            return self._send_audio()
+        fake.count('status_404')
+        self._send_json(404, {'error': 'Not Found'})
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_audio(self):
+        fake = self.fake
+        audio = fake.audio
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/mpeg')
+        self.send_header('Content-Length', str(len(audio)))
+        self.end_headers()
+        start = time.perf_counter()
+        for offset in range(0, len(audio), CHUNK_SIZE):
+            chunk = audio[offset:offset + CHUNK_SIZE]
+            self.wfile.write(chunk)
+            fake.count('bytes_sent', len(chunk))
+            if fake.bandwidth:
+                # Держим среднюю скорость соединения не выше bandwidth
+                ahead = (offset + len(chunk)) / fake.bandwidth - (time.perf_counter() - start)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+def _extractors(server: FakeYoutubeServer):
+    """Тестовые экстракторы yt-dlp, привязанные к серверу"""
+    from yt_dlp.extractor.common import InfoExtractor
+    from yt_dlp.utils import ExtractorError
+
+    base = re.escape(server.url)
+
+    class FakeYoutubeListingIE(InfoExtractor):
+        IE_NAME = 'fake_youtube:listing'
+        _VALID_URL = base + r'/(?:@(?P<channel>[\w-]+)|playlist\?list=(?P<playlist>[\w-]+))'
+
+        def _real_extract(self, url):
+            match = self._match_valid_url(url)
+            slug = match.group('channel') or match.group('playlist')
+            listing = self._download_json(f"{server.url}/api/listing/{slug}", slug)
+            entries = [
+                self.url_result(f"https://www.youtube.com/watch?v={entry['id']}", FakeYoutubeVideoIE,
+                                entry['id'], entry['title'])
+                for entry in listing['entries']
+            ]
+            return self.playlist_result(entries, listing['id'], listing['title'], uploader=listing['uploader'],
+                                        playlist_count=len(entries))
+
+    class FakeYoutubeVideoIE(InfoExtractor):
+        IE_NAME = 'fake_youtube:video'
+        _VALID_URL = r'https?://(?:www\.)?youtube\.com/watch\?v=(?P<id>[\w-]+)'
+
+        def _real_extract(self, url):
+            video_id = self._match_id(url)
+            info = self._download_json(f"{server.url}/api/video/{video_id}", video_id, expected_status=404)
+            if info.get('error'):
+                raise ExtractorError(info['error'], expected=True, video_id=video_id)
+            media_url = info.pop('media_url')
+            filesize = info.pop('filesize')
+            return {
+                **info,
+                'webpage_url': url,
+                'formats': [{'format_id': 'mp3', 'url': media_url, 'ext': 'mp3', 'acodec': 'mp3',
+                             'vcodec': 'none', 'abr': 128, 'filesize': filesize}],
+            }
+
+    return FakeYoutubeListingIE, FakeYoutubeVideoIE
+
+
+@contextmanager
+def fake_youtube(server: FakeYoutubeServer, transcode: Optional[bool] = None):
+    """
+    Подменяет yt_dlp.YoutubeDL подклассом с тестовыми экстракторами сервера
+
+    Args:
+        server: Запущенный сервер
+        transcode: Оставить постобработку ffmpeg (по умолчанию - если ffmpeg найден).
+                   Без нее аудио сохраняется как есть (уже mp3), обложки не загружаются.
+    """
+    import yt_dlp
+
+    if transcode is None:
+        transcode = shutil.which('ffmpeg') is not None
+    extractors = _extractors(server)
+    original = yt_dlp.YoutubeDL
+
+    class FakeServerYoutubeDL(original):
+        def __init__(self, params=None, auto_init=True):
+            params = dict(params or {})
+            if not transcode:
+                params['postprocessors'] = [pp for pp in params.get('postprocessors', [])
+                                            if not pp.get('key', '').startswith('FFmpeg')]
+                params['writethumbnail'] = False
+            super().__init__(params, auto_init=False)
+            # Тестовые экстракторы проверяются раньше стандартных
+            for extractor in extractors:
+                self.add_info_extractor(extractor())
+            if auto_init:
+                self.add_default_info_extractors()
+
+    yt_dlp.YoutubeDL = FakeServerYoutubeDL
+    try:
+        yield FakeServerYoutubeDL
+    finally:
+        yt_dlp.YoutubeDL = original
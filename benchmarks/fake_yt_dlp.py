@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Подменный yt_dlp.YoutubeDL для офлайн бенчмарков
+
+Отвечает на extract_info и download без сети: список источника из
+настраиваемого числа видео, информация о видео и "аудио" файл заданного
+размера. Задержки имитируют время ответа YouTube.
+
+Пример:
+    with fake_yt_dlp(entries=20, latency=0.05):
+        multi_downloader.main()
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+# Время публикации самого нового видео, остальные - на сутки раньше каждое
+NEWEST_TIMESTAMP = 1_700_000_000
+
+
+def _video_id_from_url(url: str) -> Optional[str]:
+    parsed = urlparse(url)
+    if parsed.path == '/watch':
+        return parse_qs(parsed.query).get('v', [None])[0]
+    return None
+
+
+def _source_slug(url: str) -> str:
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    name = query['list'][0] if 'list' in query else parsed.path.rstrip('/').rsplit('/', 1)[-1]
+    return re.sub(r'\W+', '_', name).strip('_') or 'source'
+
+
+def _playlist_count(playlist_items: Optional[str], entries: int) -> int:
+    if not playlist_items:
+        return entries
+    last = str(playlist_items).split(',')[-1].split('-')[-1]
+    return min(int(last), entries) if last.isdigit() else entries
+
+
+class FakeYoutubeDL:
+    """
+    Подмена yt_dlp.YoutubeDL
+
+    Настройки задаются атрибутами класса (см. configure): entries - видео в
+    источнике, latency - задержка extract_info, download_latency - задержка
+    загрузки одного видео, audio_bytes - размер создаваемого файла.
+    """
+
+    entries = 10
+    latency = 0.0
+    download_latency = 0.0
+    audio_bytes = 64 * 1024
+    calls: Counter = Counter()
+    _calls_lock = threading.Lock()
+
+    def __init__(self, params: Dict[str, Any] = None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    @classmethod
+    def configure(cls, **settings) -> type:
+        """Подкласс с заданными настройками и своим счетчиком вызовов"""
+        return type('ConfiguredFakeYoutubeDL', (cls,), {**settings, 'calls': Counter()})
+
+    def _count(self, name: str) -> None:
+        with self._calls_lock:
+            self.calls[name] += 1
+
+    @staticmethod
+    def video_info(video_id: str, index: int = 0, slug: str = None) -> Dict[str, Any]:
+        """Информация о видео в формате extract_info"""
+        slug = slug or video_id.rsplit('_', 1)[0]
+        return {
+            'id': video_id,
+            'title': f"{slug} - выпуск {index}",
+            'webpage_url': f"https://www.youtube.com/watch?v={video_id}",
+            'duration': 1800 + index,
+            'uploader': slug,
+            'view_count': 1000 - index,
+            'upload_date': time.strftime('%Y%m%d', time.gmtime(NEWEST_TIMESTAMP - index * 86400)),
+            'timestamp': NEWEST_TIMESTAMP - index * 86400,
+            'description': f"Описание выпуска {index}",
+        }
+
+    def extract_info(self, url: str, download: bool = False) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        video_id = _video_id_from_url(url)
+        if video_id:
+            self._count('video')
+            slug, _, index = video_id.rpartition('_')
+            return self.video_info(video_id, int(index) if index.isdigit() else 0, slug or None)
+
+        self._count('listing')
+        slug = _source_slug(url)
+        count = _playlist_count(self.params.get('playlist_items'), self.entries)
+        entries: List[Dict[str, Any]] = []
+        for index in range(count):
+            info = self.video_info(f"{slug}_{index}", index, slug)
+            info['playlist_index'] = index + 1
+            entries.append(info)
+        return {
+            'id': slug,
+            'title': f"Источник {slug}",
+            'description': f"Описание источника {slug}",
+            'uploader': slug,
+            'playlist_count': self.entries,
+            'entries': entries,
+        }
+
+    def download(self, urls: List[str]) -> int:
+        outtmpl = self.params.get('outtmpl', '%(id)s.%(ext)s')
+        if isinstance(outtmpl, dict):
+            outtmpl = outtmpl.get('default', '%(id)s.%(ext)s')
+        for url in urls:
+            self._count('download')
+            if self.download_latency:
+                time.sleep(self.download_latency)
+            video_id = _video_id_from_url(url) or 'video'
+            path = outtmpl.replace('%(ext)s', 'mp3').replace('%(id)s', video_id)
+            with open(path, 'wb') as f:
+                f.write(b'\0' * self.audio_bytes)
+            for hook in self.params.get('progress_hooks', []):
+                hook({'status': 'finished', 'downloaded_bytes': self.audio_bytes, 'filename': path})
+            for hook in self.params.get('postprocessor_hooks', []):
+                hook({'status': 'started', 'postprocessor': 'ExtractAudio'})
+                hook({'status': 'finished', 'postprocessor': 'ExtractAudio'})
+        return 0
+
+
+@contextmanager
+def fake_yt_dlp(**settings):
+    """
+    Подменяет yt_dlp.YoutubeDL на FakeYoutubeDL с заданными настройками
+
+    Yields:
+        Класс подмены (счетчик вызовов - атрибут calls)
+    """
+    import yt_dlp
+
+    fake_class = FakeYoutubeDL.configure(**settings)
+    original = yt_dlp.YoutubeDL
+    yt_dlp.YoutubeDL = fake_class
+    try:
+        yield fake_class
+    finally:
+        yt_dlp.YoutubeDL = original
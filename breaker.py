@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Автоматический выключатель (circuit breaker) для источников
+
+Источник, который падает раз за разом (удаленный канал, неверный URL
+плейлиста, геоблокировка), не опрашивается каждую итерацию:
+
+    closed    - источник опрашивается как обычно, неудачи подряд считаются;
+    open      - после failure_threshold неудач подряд опрос пропускается на
+                base_delay секунд, каждая следующая неудача удваивает паузу
+                (не больше max_delay);
+    half_open - пауза истекла: выполняется один пробный опрос. Успех замыкает
+                цепь, неудача снова размыкает ее с удвоенной паузой.
+
+После dead_after неудач подряд источник считается недоступным (отмечается в
+manage_sources.py list), но пробные опросы раз в max_delay продолжаются.
+Состояние хранится в SQLite (data/breaker.db) и переживает перезапуск;
+изменение URL источника сбрасывает его.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+from logging_setup import get_logger
+
+
+logger = get_logger('breaker')
+
+DEFAULT_BREAKER_FILE = "data/breaker.db"
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_BASE_DELAY = 600  # секунды
+DEFAULT_MAX_DELAY = 86400  # секунды
+DEFAULT_DEAD_AFTER = 10
+PROBE_TIMEOUT = 3600  # Пробный опрос, не завершившийся за это время, считается потерянным, секунды
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS breakers (
+    subscription TEXT NOT NULL,
+    source TEXT NOT NULL,
+    url TEXT NOT NULL,
+    state TEXT NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    open_until REAL,
+    probe_started_at REAL,
+    last_failure_at REAL,
+    last_error TEXT,
+    PRIMARY KEY (subscription, source)
+);
+"""
+
+
+def backoff_delay(failures: int, base: float, maximum: float) -> float:
+    """Экспоненциальная пауза: base, 2*base, 4*base... не больше maximum"""
+    return min(base * 2 ** max(failures - 1, 0), maximum)
+
+
+class SourceBreakers:
+    """
+    Выключатели источников в SQLite базе
+
+    Args:
+        path: Путь к базе
+        failure_threshold: Неудач подряд до размыкания цепи
+        base_delay: Первая пауза после размыкания, секунды
+        max_delay: Максимальная пауза, секунды
+        dead_after: Неудач подряд, после которых источник считается недоступным
+        clock: Источник времени (для тестов)
+    """
+
+    def __init__(self, path: str = DEFAULT_BREAKER_FILE, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 base_delay: float = DEFAULT_BASE_DELAY, max_delay: float = DEFAULT_MAX_DELAY,
+                 dead_after: int = DEFAULT_DEAD_AFTER, clock=time.time):
+        self.path = path
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_after = dead_after
+        self._clock = clock
+        self._connection = None
+        self._lock = threading.RLock()
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            import sqlite3
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            if connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                connection.executescript(SCHEMA)
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._connection = connection
+        return self._connection
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            connection = self.connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def allow(self, subscription: str, source: str, url: str) -> bool:
+        """
+        Можно ли опрашивать источник сейчас
+
+        Разомкнутая цепь с истекшей паузой переходит в half_open и пропускает
+        один пробный опрос.
+        """
+        now = self._clock()
+        name = f"{subscription}/{source}"
+        with self._transaction() as db:
+            row = db.execute("SELECT * FROM breakers WHERE subscription = ? AND source = ?",
+                             (subscription, source)).fetchone()
+            if row is None:
+                return True
+            if row['url'] != url:
+                # Источник исправили в конфигурации - начинаем с чистого листа
+                db.execute("DELETE FROM breakers WHERE subscription = ? AND source = ?", (subscription, source))
+                return True
+            if row['state'] == CLOSED:
+                return True
+            if row['state'] == HALF_OPEN and row['probe_started_at'] and now - row['probe_started_at'] < PROBE_TIMEOUT:
+                logger.info(f"⛔ {name}: идет пробный опрос, пропускаем")
+                return False
+            if row['state'] == OPEN and now < row['open_until']:
+                wait = row['open_until'] - now
+                logger.info(f"⛔ {name}: цепь разомкнута после {row['failures']} неудач подряд, "
+                            f"следующая попытка через {wait / 60:.0f} мин")
+                return False
+            db.execute("UPDATE breakers SET state = ?, probe_started_at = ? WHERE subscription = ? AND source = ?",
+                       (HALF_OPEN, now, subscription, source))
+        logger.info(f"🔁 {name}: пробный опрос после {row['failures']} неудач подряд")
+        return True
+
+    def record(self, subscription: str, source: str, url: str, success: bool, error: str = None) -> Optional[str]:
+        """
+        Записывает результат опроса
+
+        Returns:
+            Новое состояние цепи (None, если источник работает и записи нет)
+        """
+        now = self._clock()
+        name = f"{subscription}/{source}"
+        with self._transaction() as db:
+            row = db.execute("SELECT * FROM breakers WHERE subscription = ? AND source = ?",
+                             (subscription, source)).fetchone()
+            if success:
+                if row is not None:
+                    db.execute("DELETE FROM breakers WHERE subscription = ? AND source = ?", (subscription, source))
+                    if row['state'] != CLOSED:
+                        logger.info(f"✅ {name}: источник снова работает, цепь замкнута")
+                return None
+
+            failures = (row['failures'] if row is not None and row['url'] == url else 0) + 1
+            state = CLOSED
+            open_until = None
+            if failures >= self.failure_threshold or (row is not None and row['state'] == HALF_OPEN):
+                state = OPEN
+                delay = backoff_delay(failures - self.failure_threshold + 1, self.base_delay, self.max_delay)
+                open_until = now + delay
+                dead = " - источник считается недоступным" if self.dead_after and failures >= self.dead_after else ''
+                logger.warning(f"⛔ {name}: {failures} неудач подряд, опрос приостановлен на {delay / 60:.0f} мин{dead}")
+            db.execute("INSERT OR REPLACE INTO breakers (subscription, source, url, state, failures, open_until, "
+                       "probe_started_at, last_failure_at, last_error) VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?)",
+                       (subscription, source, url, state, failures, open_until, now, error))
+        return state
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Состояние всех источников с неудачами (для manage_sources.py)"""
+        with self._lock:
+            rows = self.connection.execute("SELECT * FROM breakers ORDER BY subscription, source").fetchall()
+        result = []
+        for row in rows:
+            item = dict(row)
+            item['dead'] = bool(self.dead_after) and row['failures'] >= self.dead_after
+            result.append(item)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# Выключатели текущего процесса (None - отключены)
+_breakers: Optional[SourceBreakers] = None
+
+
+def setup_breaker(settings: Dict[str, Any] = None) -> Optional[SourceBreakers]:
+    """
+    Включает выключатели источников по секции breaker конфигурации
+
+    Args:
+        settings: enabled, file, failure_threshold, base_delay, max_delay, dead_after
+
+    Returns:
+        Выключатели или None, если они отключены
+    """
+    global _breakers
+    settings = settings or {}
+    if _breakers is not None:
+        _breakers.close()
+        _breakers = None
+    if not settings.get('enabled', True):
+        return None
+
+    _breakers = open_breakers(settings)
+    return _breakers
+
+
+def open_breakers(settings: Dict[str, Any] = None) -> SourceBreakers:
+    """Выключатели с параметрами из секции breaker (без включения в процессе)"""
+    settings = settings or {}
+    return SourceBreakers(settings.get('file') or DEFAULT_BREAKER_FILE,
+                          settings.get('failure_threshold', DEFAULT_FAILURE_THRESHOLD),
+                          settings.get('base_delay', DEFAULT_BASE_DELAY),
+                          settings.get('max_delay', DEFAULT_MAX_DELAY),
+                          settings.get('dead_after', DEFAULT_DEAD_AFTER))
+
+
+def source_allowed(subscription: str, source: str, url: str) -> bool:
+    """Можно ли опрашивать источник (True, если выключатели отключены или база недоступна)"""
+    if _breakers is None:
+        return True
+    try:
+        return _breakers.allow(subscription, source, url)
+    except Exception as e:
+        logger.warning(f"⚠️  Не удалось прочитать состояние источника {subscription}/{source} из {_breakers.path}: {e}")
+        return True
+
+
+def record_result(subscription: str, source: str, url: str, success: bool, error: str = None) -> None:
+    """Записывает результат опроса источника, если выключатели включены"""
+    if _breakers is None:
+        return
+    try:
+        _breakers.record(subscription, source, url, success, error)
+    except Exception as e:
+        logger.warning(f"⚠️  Не удалось записать состояние источника {subscription}/{source} в {_breakers.path}: {e}")
@@ -4,20 +4,42 @@
 """
 
 import os
+import sys
+import errno
+import copy
+import time
+import json
+import hashlib
+import tempfile
 import yaml
 from typing import List, Dict, Any, Union, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from contextlib import contextmanager
 from enum import Enum
 from pathlib import Path
 
 
+# Папка с отдельными файлами подписок (относительно файла конфигурации)
+SUBSCRIPTIONS_DIR_NAME = "subscriptions.d"
+
+# Загрузчик YAML: C-реализация (libyaml), если доступна
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Версия формата кеша разобранной конфигурации. В кеше хранятся данные YAML (JSON), а не объекты
+# Source/Subscription/Config, поэтому изменение dataclass-ов версию не меняет
+CONFIG_CACHE_VERSION = 10
+
+# Компактные объекты конфигурации (__slots__) поддерживаются dataclass начиная с Python 3.10
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
 class SourceType(Enum):
     """Типы источников"""
     PLAYLIST = "playlist"
     CHANNEL = "channel"
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class Source:
     """Конфигурация источника"""
     name: str
@@ -32,7 +54,7 @@ class Source:
     author: str = None  # автор
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class Subscription:
     """Конфигурация подписки"""
     name: str
@@ -53,6 +75,80 @@ class Config:
     rss_settings: Dict[str, Any]
     logging_settings: Dict[str, Any]
     diagnostics_settings: Dict[str, Any]
+    metrics_settings: Dict[str, Any] = field(default_factory=dict)
+    memory_settings: Dict[str, Any] = field(default_factory=dict)
+    history_settings: Dict[str, Any] = field(default_factory=dict)
+    cluster_settings: Dict[str, Any] = field(default_factory=dict)
+    control_settings: Dict[str, Any] = field(default_factory=dict)
+    websub_settings: Dict[str, Any] = field(default_factory=dict)
+    breaker_settings: Dict[str, Any] = field(default_factory=dict)
+    ytdlp_cache_settings: Dict[str, Any] = field(default_factory=dict)
+
+
+def _write_in_place(path: str, content: bytes) -> None:
+    """Перезаписать файл на месте (без переименования)"""
+    with open(path, 'wb') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _atomic_write(path: str, content: bytes) -> None:
+    """
+    Записать файл атомарно: во временный файл в той же папке и переименовать
+
+    Файл, смонтированный отдельно (docker-compose монтирует ./config.yaml в
+    /app/config.yaml), переименованием заменить нельзя (EBUSY, EXDEV) - такой
+    файл перезаписывается на месте, как до атомарной записи.
+    """
+    if os.path.ismount(path):
+        _write_in_place(path, content)
+        return
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.replace(tmp_path, path)
+        except OSError as e:
+            if e.errno not in (errno.EBUSY, errno.EXDEV):
+                raise
+            os.unlink(tmp_path)
+            _write_in_place(path, content)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class ConfigIndexes:
+    """Индексы конфигурации для быстрого поиска подписок и источников"""
+    
+    __slots__ = ('subscriptions', 'subscriptions_by_name', 'sources_by_name', 'source_pairs',
+                 'enabled_subscriptions', 'enabled_sources')
+    
+    def __init__(self, subscriptions: List[Subscription]):
+        # Список, по которому построены индексы (для проверки актуальности)
+        self.subscriptions = subscriptions
+        self.subscriptions_by_name: Dict[str, Subscription] = {}
+        self.sources_by_name: Dict[str, Source] = {}
+        self.source_pairs: List[tuple] = []
+        self.enabled_subscriptions: List[Subscription] = []
+        self.enabled_sources: List[Source] = []
+        
+        for subscription in subscriptions:
+            # При совпадении имен побеждает первая запись, как и при линейном поиске
+            self.subscriptions_by_name.setdefault(subscription.name, subscription)
+            if subscription.enabled:
+                self.enabled_subscriptions.append(subscription)
+            for source in subscription.sources:
+                self.sources_by_name.setdefault(source.name, source)
+                self.source_pairs.append((subscription, source))
+                if subscription.enabled and source.enabled:
+                    self.enabled_sources.append(source)
 
 
 class ConfigManager:
@@ -61,60 +157,304 @@ class ConfigManager:
     def __init__(self, config_file: str = "config.yaml"):
         self.config_file = config_file
         self.config = None
+        self.subscriptions_dir = None
+        self._file_state = None
+        self._subscriptions_dir_state = None
+        self._indexes = None
+        # Разобранные файлы subscriptions.d: путь -> (mtime и размер, данные YAML)
+        self._subscription_file_cache: Dict[str, tuple] = {}
+        # Подписки из subscriptions.d: имя подписки -> путь к файлу
+        self._subscription_files: Dict[str, str] = {}
+        # Содержимое файлов на диске на момент загрузки/сохранения: путь -> данные
+        self._saved_data: Dict[str, Any] = {}
+        self._batch_depth = 0
+        self._save_pending = False
         self._load_config()
     
-    def _load_config(self) -> None:
-        """Загрузить конфигурацию из YAML файла"""
+    def _stat_config_file(self) -> Optional[tuple]:
+        """Получить (mtime, размер) файла конфигурации или None, если файла нет"""
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _resolve_subscriptions_dir(self, global_settings: Dict[str, Any]) -> str:
+        """Путь к папке subscriptions.d (относительно файла конфигурации)"""
+        subscriptions_dir = global_settings.get('subscriptions_dir', SUBSCRIPTIONS_DIR_NAME)
+        return os.path.join(os.path.dirname(self.config_file), subscriptions_dir)
+    
+    def _stat_subscriptions_dir(self, subscriptions_dir: Optional[str] = None) -> Optional[tuple]:
+        """Получить (имя, mtime, размер) всех файлов subscriptions.d или None, если папки нет"""
+        subscriptions_dir = subscriptions_dir or self.subscriptions_dir
+        if not subscriptions_dir:
+            return None
+        try:
+            with os.scandir(subscriptions_dir) as entries:
+                states = []
+                for entry in entries:
+                    if entry.name.startswith('.') or not entry.name.endswith(('.yaml', '.yml')):
+                        continue
+                    stat = entry.stat()
+                    states.append((entry.name, stat.st_mtime_ns, stat.st_size))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return tuple(sorted(states))
+    
+    def _config_cache_path(self, config_file: Optional[str] = None) -> Optional[str]:
+        """Путь к кешу разобранной конфигурации (None, если кеш отключен)"""
+        if os.environ.get('YOUTUBE2PODCAST_CONFIG_CACHE', 'true').lower() in ('false', '0', 'no'):
+            return None
+        directory, filename = os.path.split(config_file or self.config_file)
+        return os.path.join(directory, f".{filename}.cache")
+    
+    def _read_config_cache(self, cache_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Прочитать запись кеша конфигурации, если она есть и совместима"""
+        cache_path = cache_path or self._config_cache_path()
+        if not cache_path:
+            return None
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                yaml_data = yaml.safe_load(f)
+            with open(cache_path, 'rb') as f:
+                entry = json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Кеш конфигурации поврежден и будет пересоздан: {e}")
+            return None
+        if not isinstance(entry, dict) or entry.get('version') != CONFIG_CACHE_VERSION:
+            return None
+        return entry
+    
+    def _write_cache_entry(self, cache_path: Optional[str], entry: Dict[str, Any]) -> None:
+        """
+        Атомарно записать запись кеша (ошибки записи не критичны)
+        
+        Кеш - JSON: его чтение не выполняет код, в отличие от pickle. Данные,
+        которые JSON не передает без искажений (даты YAML, нестроковые ключи),
+        не кешируются.
+        """
+        if not cache_path:
+            return
+        entry = dict(entry, version=CONFIG_CACHE_VERSION, cached_at_ns=time.time_ns())
+        try:
+            content = json.dumps(entry, ensure_ascii=False)
+            if json.loads(content) != entry:
+                return
+            _atomic_write(cache_path, content.encode('utf-8'))
+        except (OSError, TypeError, ValueError):
+            pass
+    
+    def _write_config_cache(self, file_state: Optional[tuple], digest: str, yaml_data: Dict[str, Any]) -> None:
+        """Записать кеш разобранного YAML основного файла"""
+        if file_state is None:
+            return
+        self._write_cache_entry(self._config_cache_path(), {
+            'file_state': list(file_state),
+            'sha256': digest,
+            'data': yaml_data,
+        })
+    
+    def _parse_config_file(self, file_state: Optional[tuple] = None) -> Config:
+        """
+        Прочитать и разобрать YAML файл конфигурации (исключения пробрасываются)
+        
+        Разобранные данные YAML кешируются в JSON рядом с файлом, объекты
+        конфигурации строятся из них заново. Если mtime и размер файла не
+        изменились, YAML не читается вовсе; если изменился только mtime,
+        а содержимое (sha256) то же - YAML не разбирается.
+        """
+        if file_state is None:
+            file_state = self._stat_config_file()
+        
+        entry = self._read_config_cache()
+        if entry and file_state is not None and tuple(entry['file_state']) == file_state:
+            # Файл, измененный почти одновременно с записью кеша, проверяем по хешу
+            # (mtime на некоторых файловых системах имеет грубое разрешение)
+            if file_state[0] < entry['cached_at_ns'] - 2 * 10**9:
+                return self._build_config(entry['data'])
+        
+        with open(self.config_file, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        
+        if entry and entry['sha256'] == digest:
+            yaml_data = entry['data']
+        else:
+            yaml_data = yaml.load(raw, Loader=_YAML_LOADER) or {}
+        
+        self._write_config_cache(file_state, digest, yaml_data)
+        return self._build_config(yaml_data)
+    
+    def _build_subscription(self, sub_name: str, sub_data: Dict[str, Any], global_settings: Dict[str, Any]) -> Subscription:
+        """Построить Subscription из данных YAML"""
+        # Глобальные настройки по умолчанию для источников
+        default_check_interval = global_settings.get('check_interval', 10)
+        default_max_videos = global_settings.get('max_videos', 5)
+        
+        # Парсим источники в подписке
+        sources = []
+        for source_name, source_data in (sub_data.get('sources') or {}).items():
+            source = Source(
+                name=source_name,
+                url=source_data['url'],
+                source_type=SourceType(source_data.get('type', 'channel')),
+                enabled=source_data.get('enabled', True),
+                check_interval=source_data.get('check_interval', default_check_interval),
+                max_videos=source_data.get('max_videos', default_max_videos),
+                custom_title=source_data.get('custom_title'),
+                custom_description=source_data.get('custom_description'),
+                category=source_data.get('category', sub_data.get('category', 'News & Politics')),
+                author=source_data.get('author', sub_data.get('author'))
+            )
+            sources.append(source)
+        
+        return Subscription(
+            name=sub_name,
+            title=sub_data.get('title', sub_name.title()),
+            description=sub_data.get('description', ''),
+            enabled=sub_data.get('enabled', True),
+            category=sub_data.get('category', 'News & Politics'),
+            author=sub_data.get('author'),
+            sources=sources
+        )
+    
+    def _build_config(self, yaml_data: Dict[str, Any]) -> Config:
+        """Построить Config из данных YAML"""
+        global_settings = yaml_data.get('global') or {}
+        
+        # Парсим подписки
+        subscriptions = [
+            self._build_subscription(sub_name, sub_data, global_settings)
+            for sub_name, sub_data in (yaml_data.get('subscriptions') or {}).items()
+        ]
+        
+        return Config(
+            global_settings=global_settings,
+            subscriptions=subscriptions,
+            download_settings=yaml_data.get('download', {}),
+            rss_settings=yaml_data.get('rss', {}),
+            logging_settings=yaml_data.get('logging', {}),
+            diagnostics_settings=yaml_data.get('diagnostics', {}),
+            metrics_settings=yaml_data.get('metrics') or {},
+            memory_settings=yaml_data.get('memory') or {},
+            history_settings=yaml_data.get('history') or {},
+            cluster_settings=yaml_data.get('cluster') or {},
+            control_settings=yaml_data.get('control') or {},
+            websub_settings=yaml_data.get('websub') or {},
+            breaker_settings=yaml_data.get('breaker') or {},
+            ytdlp_cache_settings=yaml_data.get('ytdlp_cache') or {}
+        )
+    
+    def _subscription_files_cache_path(self, subscriptions_dir: str) -> Optional[str]:
+        """Путь к кешу разобранных файлов subscriptions.d"""
+        if not self._config_cache_path():
+            return None
+        return os.path.join(subscriptions_dir, '.cache')
+    
+    def _read_subscription_files(self, subscriptions_dir: str, dir_state: tuple) -> Dict[str, Dict[str, Any]]:
+        """
+        Прочитать файлы subscriptions.d, разбирая только изменившиеся
+        
+        Каждый файл описывает одну подписку (имя подписки - имя файла без расширения).
+        Разобранные данные кешируются по mtime и размеру файла в памяти
+        и на диске (subscriptions.d/.cache).
+        
+        Returns:
+            Словарь {путь к файлу: данные подписки}
+        """
+        cache_path = self._subscription_files_cache_path(subscriptions_dir)
+        persisted = {}
+        if not self._subscription_file_cache and cache_path:
+            entry = self._read_config_cache(cache_path)
+            if entry:
+                cached_at_ns = entry['cached_at_ns']
+                for path, (file_state, sub_data) in entry['files'].items():
+                    # Файлы, измененные около момента записи кеша, перечитываем
+                    if file_state[0] < cached_at_ns - 2 * 10**9:
+                        persisted[path] = (tuple(file_state), sub_data)
+        
+        result = {}
+        parsed = 0
+        for filename, mtime_ns, size in dir_state:
+            path = os.path.join(subscriptions_dir, filename)
+            file_state = (mtime_ns, size)
+            cached = self._subscription_file_cache.get(path) or persisted.get(path)
+            if cached and cached[0] == file_state:
+                result[path] = cached[1]
+                self._subscription_file_cache[path] = cached
+                continue
             
-            # Парсим подписки
-            subscriptions = []
-            for sub_name, sub_data in yaml_data.get('subscriptions', {}).items():
-                # Парсим источники в подписке
-                sources = []
-                for source_name, source_data in sub_data.get('sources', {}).items():
-                    source_type = SourceType(source_data.get('type', 'channel'))
-                    
-                    # Применяем глобальные настройки по умолчанию
-                    global_settings = yaml_data.get('global', {})
-                    check_interval = source_data.get('check_interval', global_settings.get('check_interval', 10))
-                    max_videos = source_data.get('max_videos', global_settings.get('max_videos', 5))
-                    
-                    source = Source(
-                        name=source_name,
-                        url=source_data['url'],
-                        source_type=source_type,
-                        enabled=source_data.get('enabled', True),
-                        check_interval=check_interval,
-                        max_videos=max_videos,
-                        custom_title=source_data.get('custom_title'),
-                        custom_description=source_data.get('custom_description'),
-                        category=source_data.get('category', sub_data.get('category', 'News & Politics')),
-                        author=source_data.get('author', sub_data.get('author'))
-                    )
-                    sources.append(source)
-                
-                subscription = Subscription(
-                    name=sub_name,
-                    title=sub_data.get('title', sub_name.title()),
-                    description=sub_data.get('description', ''),
-                    enabled=sub_data.get('enabled', True),
-                    category=sub_data.get('category', 'News & Politics'),
-                    author=sub_data.get('author'),
-                    sources=sources
-                )
-                subscriptions.append(subscription)
+            try:
+                with open(path, 'rb') as f:
+                    sub_data = yaml.load(f.read(), Loader=_YAML_LOADER) or {}
+                if not isinstance(sub_data, dict):
+                    raise ValueError("ожидается словарь с описанием подписки")
+            except Exception as e:
+                if cached:
+                    print(f"❌ Ошибка разбора {path}, используется предыдущая версия: {e}")
+                    result[path] = cached[1]
+                else:
+                    print(f"❌ Ошибка разбора {path}, подписка пропущена: {e}")
+                continue
             
-            self.config = Config(
-                global_settings=yaml_data.get('global', {}),
-                subscriptions=subscriptions,
-                download_settings=yaml_data.get('download', {}),
-                rss_settings=yaml_data.get('rss', {}),
-                logging_settings=yaml_data.get('logging', {}),
-                diagnostics_settings=yaml_data.get('diagnostics', {})
-            )
+            self._subscription_file_cache[path] = (file_state, sub_data)
+            result[path] = sub_data
+            parsed += 1
+        
+        # Удаляем из кеша исчезнувшие файлы
+        removed = len(set(persisted) - set(result))
+        for path in list(self._subscription_file_cache):
+            if path not in result:
+                del self._subscription_file_cache[path]
+                removed += 1
+        
+        # Кеш на диске перезаписывается, только если файлы разобраны заново или удалены
+        if parsed or removed:
+            files = {path: [list(file_state), sub_data]
+                     for path, (file_state, sub_data) in self._subscription_file_cache.items()}
+            self._write_cache_entry(cache_path, {'files': files})
+        return result
+    
+    def _read_all(self, file_state: Optional[tuple]) -> tuple:
+        """
+        Прочитать основной файл и subscriptions.d
+        
+        Returns:
+            (Config, папка subscriptions.d, ее состояние, файлы подписок, сохраненные данные)
+        """
+        main_config = self._parse_config_file(file_state)
+        subscriptions_dir = self._resolve_subscriptions_dir(main_config.global_settings)
+        dir_state = self._stat_subscriptions_dir(subscriptions_dir)
+        
+        subscriptions = list(main_config.subscriptions)
+        subscription_files = {}
+        saved_data = {self.config_file: self._serialize_main(main_config, main_config.subscriptions)}
+        
+        if dir_state is not None:
+            main_names = {sub.name for sub in subscriptions}
+            for path, sub_data in self._read_subscription_files(subscriptions_dir, dir_state).items():
+                sub_name = os.path.splitext(os.path.basename(path))[0]
+                if sub_name in main_names or sub_name in subscription_files:
+                    print(f"⚠️ Подписка '{sub_name}' из {path} уже определена, файл пропущен")
+                    continue
+                subscription = self._build_subscription(sub_name, sub_data, main_config.global_settings)
+                subscriptions.append(subscription)
+                subscription_files[sub_name] = path
+                saved_data[path] = self._serialize_subscription(subscription)
+        
+        config = replace(main_config, subscriptions=subscriptions)
+        return config, subscriptions_dir, dir_state, subscription_files, saved_data
+    
+    def _apply_loaded(self, loaded: tuple) -> None:
+        """Применить результат _read_all"""
+        self.config, self.subscriptions_dir, self._subscriptions_dir_state, \
+            self._subscription_files, self._saved_data = loaded
+    
+    def _load_config(self) -> None:
+        """Загрузить конфигурацию из YAML файла и папки subscriptions.d"""
+        try:
+            self._file_state = self._stat_config_file()
+            self._apply_loaded(self._read_all(self._file_state))
             
         except FileNotFoundError:
             print(f"❌ Файл конфигурации {self.config_file} не найден")
@@ -164,110 +504,285 @@ class ConfigManager:
             logging_settings={'level': 'INFO'},
             diagnostics_settings={'enabled': True}
         )
+        self._subscription_files = {}
+        self._saved_data = {}
+    
+    def _serialize_subscription(self, subscription: Subscription) -> Dict[str, Any]:
+        """Представление подписки для записи в YAML"""
+        return {
+            'enabled': subscription.enabled,
+            'title': subscription.title,
+            'description': subscription.description,
+            'category': subscription.category,
+            'author': subscription.author,
+            'sources': {
+                source.name: {
+                    'enabled': source.enabled,
+                    'type': source.source_type.value,
+                    'url': source.url,
+                    'custom_title': source.custom_title,
+                    'custom_description': source.custom_description,
+                    'check_interval': source.check_interval,
+                    'max_videos': source.max_videos,
+                    'category': source.category,
+                    'author': source.author
+                }
+                for source in subscription.sources
+            }
+        }
+    
+    def _serialize_main(self, config: Config, subscriptions: List[Subscription]) -> Dict[str, Any]:
+        """Представление основного файла конфигурации для записи в YAML"""
+        # Копии настроек, чтобы изменения на месте были видны при сравнении с сохраненными данными
+        data = {
+            'global': copy.deepcopy(config.global_settings),
+            'subscriptions': {sub.name: self._serialize_subscription(sub) for sub in subscriptions},
+            'download': copy.deepcopy(config.download_settings),
+            'rss': copy.deepcopy(config.rss_settings),
+            'logging': copy.deepcopy(config.logging_settings),
+            'diagnostics': copy.deepcopy(config.diagnostics_settings)
+        }
+        # Необязательные секции записываются, только если заданы
+        if config.metrics_settings:
+            data['metrics'] = copy.deepcopy(config.metrics_settings)
+        if config.memory_settings:
+            data['memory'] = copy.deepcopy(config.memory_settings)
+        if config.history_settings:
+            data['history'] = copy.deepcopy(config.history_settings)
+        if config.cluster_settings:
+            data['cluster'] = copy.deepcopy(config.cluster_settings)
+        if config.control_settings:
+            data['control'] = copy.deepcopy(config.control_settings)
+        if config.websub_settings:
+            data['websub'] = copy.deepcopy(config.websub_settings)
+        if config.breaker_settings:
+            data['breaker'] = copy.deepcopy(config.breaker_settings)
+        if config.ytdlp_cache_settings:
+            data['ytdlp_cache'] = copy.deepcopy(config.ytdlp_cache_settings)
+        return data
     
     def save_config(self) -> None:
-        """Сохранить конфигурацию в YAML файл"""
+        """
+        Сохранить конфигурацию
+        
+        Записываются только изменившиеся файлы: основной config.yaml
+        и/или отдельные файлы подписок в subscriptions.d. Новые подписки
+        попадают в subscriptions.d, если эта папка существует.
+        """
+        if self._batch_depth:
+            self._save_pending = True
+            return
+        
         try:
-            yaml_data = {
-                'global': self.config.global_settings,
-                'subscriptions': {},
-                'download': self.config.download_settings,
-                'rss': self.config.rss_settings,
-                'logging': self.config.logging_settings,
-                'diagnostics': self.config.diagnostics_settings
-            }
+            saved_main = self._saved_data.get(self.config_file) or {}
+            use_subscriptions_dir = self.subscriptions_dir and os.path.isdir(self.subscriptions_dir)
             
-            # Сохраняем подписки
+            main_subscriptions = []
+            subscriptions_by_name = {}
             for subscription in self.config.subscriptions:
-                yaml_data['subscriptions'][subscription.name] = {
-                    'enabled': subscription.enabled,
-                    'title': subscription.title,
-                    'description': subscription.description,
-                    'category': subscription.category,
-                    'author': subscription.author,
-                    'sources': {}
-                }
+                subscriptions_by_name[subscription.name] = subscription
+                if (subscription.name not in self._subscription_files and use_subscriptions_dir
+                        and subscription.name not in saved_main.get('subscriptions', {})):
+                    self._subscription_files[subscription.name] = os.path.join(
+                        self.subscriptions_dir, f"{subscription.name}.yaml")
+                if subscription.name not in self._subscription_files:
+                    main_subscriptions.append(subscription)
+            
+            written = []
+            
+            # Файлы подписок из subscriptions.d
+            for sub_name, path in list(self._subscription_files.items()):
+                subscription = subscriptions_by_name.get(sub_name)
+                if subscription is None:
+                    if os.path.exists(path):
+                        os.remove(path)
+                    del self._subscription_files[sub_name]
+                    self._saved_data.pop(path, None)
+                    written.append(path)
+                    continue
                 
-                # Сохраняем источники в подписке
-                for source in subscription.sources:
-                    yaml_data['subscriptions'][subscription.name]['sources'][source.name] = {
-                        'enabled': source.enabled,
-                        'type': source.source_type.value,
-                        'url': source.url,
-                        'custom_title': source.custom_title,
-                        'custom_description': source.custom_description,
-                        'check_interval': source.check_interval,
-                        'max_videos': source.max_videos,
-                        'category': source.category,
-                        'author': source.author
-                    }
+                data = self._serialize_subscription(subscription)
+                if self._saved_data.get(path) == data:
+                    continue
+                _atomic_write(path, self._dump_yaml(data))
+                self._saved_data[path] = data
+                written.append(path)
+            
+            # Основной файл конфигурации
+            data = self._serialize_main(self.config, main_subscriptions)
+            if self._saved_data.get(self.config_file) != data:
+                content = self._dump_yaml(data)
+                _atomic_write(self.config_file, content)
+                self._saved_data[self.config_file] = data
+                self._file_state = self._stat_config_file()
+                self._write_config_cache(self._file_state, hashlib.sha256(content).hexdigest(), data)
+                written.append(self.config_file)
             
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(yaml_data, f, default_flow_style=False, allow_unicode=True, indent=2)
+            self._subscriptions_dir_state = self._stat_subscriptions_dir()
             
-            print(f"✅ Конфигурация сохранена в {self.config_file}")
+            if written:
+                print(f"✅ Конфигурация сохранена в {', '.join(written)}")
+            else:
+                print("✅ Конфигурация не изменилась")
             
         except Exception as e:
             print(f"❌ Ошибка сохранения конфигурации: {e}")
     
+    def _dump_yaml(self, data: Dict[str, Any]) -> bytes:
+        """Сериализовать данные в YAML"""
+        return yaml.dump(data, default_flow_style=False, allow_unicode=True, indent=2).encode('utf-8')
+    
+    @contextmanager
+    def batch(self):
+        """
+        Группировка изменений: все вызовы save_config внутри блока
+        откладываются, и конфигурация записывается один раз при выходе.
+        При исключении внутри блока на диск ничего не записывается.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._save_pending = False
+            raise
+        self._batch_depth -= 1
+        if not self._batch_depth and self._save_pending:
+            self._save_pending = False
+            self.save_config()
+    
+    def invalidate_indexes(self) -> None:
+        """Сбросить индексы после изменения подписок или источников"""
+        self._indexes = None
+    
+    def _get_indexes(self) -> ConfigIndexes:
+        """Получить индексы, перестроив их при изменении конфигурации"""
+        indexes = self._indexes
+        if indexes is None or indexes.subscriptions is not self.config.subscriptions:
+            indexes = ConfigIndexes(self.config.subscriptions)
+            self._indexes = indexes
+        return indexes
+    
     def get_enabled_subscriptions(self) -> List[Subscription]:
         """Получить список активных подписок"""
-        return [sub for sub in self.config.subscriptions if sub.enabled]
+        return list(self._get_indexes().enabled_subscriptions)
 
     def get_subscription_by_name(self, name: str) -> Subscription:
         """Получить подписку по имени"""
-        for subscription in self.config.subscriptions:
-            if subscription.name == name:
-                return subscription
-        raise ValueError(f"Подписка '{name}' не найдена")
+        subscription = self._get_indexes().subscriptions_by_name.get(name)
+        if subscription is None:
+            raise ValueError(f"Подписка '{name}' не найдена")
+        return subscription
 
     def get_all_enabled_sources(self) -> List[Source]:
         """Получить список всех активных источников из всех активных подписок"""
-        sources = []
-        for subscription in self.get_enabled_subscriptions():
-            sources.extend([source for source in subscription.sources if source.enabled])
-        return sources
+        return list(self._get_indexes().enabled_sources)
 
     def get_source_by_name(self, name: str) -> Source:
         """Получить источник по имени из всех подписок"""
-        for subscription in self.config.subscriptions:
-            for source in subscription.sources:
-                if source.name == name:
-                    return source
-        raise ValueError(f"Источник '{name}' не найден")
+        source = self._get_indexes().sources_by_name.get(name)
+        if source is None:
+            raise ValueError(f"Источник '{name}' не найден")
+        return source
 
     def add_subscription(self, subscription: Subscription) -> None:
         """Добавить новую подписку"""
         # Проверяем, что подписка с таким именем не существует
-        for existing_sub in self.config.subscriptions:
-            if existing_sub.name == subscription.name:
-                raise ValueError(f"Подписка '{subscription.name}' уже существует")
+        if subscription.name in self._get_indexes().subscriptions_by_name:
+            raise ValueError(f"Подписка '{subscription.name}' уже существует")
         
+        if subscription.sources is None:
+            subscription.sources = []
         self.config.subscriptions.append(subscription)
+        self.invalidate_indexes()
         self.save_config()
 
     def remove_subscription(self, name: str) -> None:
         """Удалить подписку по имени"""
         self.config.subscriptions = [sub for sub in self.config.subscriptions if sub.name != name]
+        self.invalidate_indexes()
         self.save_config()
 
     def enable_subscription(self, name: str) -> None:
         """Включить подписку"""
         subscription = self.get_subscription_by_name(name)
         subscription.enabled = True
+        self.invalidate_indexes()
         self.save_config()
 
     def disable_subscription(self, name: str) -> None:
         """Отключить подписку"""
         subscription = self.get_subscription_by_name(name)
         subscription.enabled = False
+        self.invalidate_indexes()
+        self.save_config()
+
+    def add_source(self, source: Source, subscription_name: str = None) -> None:
+        """
+        Добавить источник
+        
+        Args:
+            source: Новый источник
+            subscription_name: Подписка для источника (создается, если не существует).
+                По умолчанию - первая активная подписка или подписка "default".
+        """
+        if subscription_name:
+            subscription = self._get_indexes().subscriptions_by_name.get(subscription_name)
+            if subscription is None:
+                self.add_subscription(Subscription(
+                    name=subscription_name,
+                    title=subscription_name.title(),
+                    description="",
+                    sources=[source]
+                ))
+            else:
+                subscription.sources.append(source)
+                self.invalidate_indexes()
+                self.save_config()
+            return
+        
+        enabled_subs = self._get_indexes().enabled_subscriptions
+        if enabled_subs:
+            enabled_subs[0].sources.append(source)
+            self.invalidate_indexes()
+            self.save_config()
+        else:
+            # Создаем новую подписку по умолчанию
+            subscription = Subscription(
+                name="default",
+                title="Default Subscription",
+                description="Default subscription",
+                sources=[source]
+            )
+            self.add_subscription(subscription)
+
+    def remove_source(self, name: str) -> None:
+        """Удалить источник по имени из всех подписок"""
+        for subscription in self.config.subscriptions:
+            subscription.sources = [s for s in subscription.sources if s.name != name]
+        self.invalidate_indexes()
+        self.save_config()
+
+    def enable_source(self, name: str) -> None:
+        """Включить источник"""
+        source = self.get_source_by_name(name)
+        source.enabled = True
+        self.invalidate_indexes()
+        self.save_config()
+
+    def disable_source(self, name: str) -> None:
+        """Отключить источник"""
+        source = self.get_source_by_name(name)
+        source.enabled = False
+        self.invalidate_indexes()
         self.save_config()
 
     def list_subscriptions(self) -> List[Dict[str, Any]]:
         """Получить список всех подписок с их статусом"""
         result = []
         for subscription in self.config.subscriptions:
-            enabled_sources = [source for source in subscription.sources if source.enabled]
+            enabled_sources_count = sum(1 for source in subscription.sources if source.enabled)
             result.append({
                 'name': subscription.name,
                 'title': subscription.title,
@@ -276,29 +791,28 @@ class ConfigManager:
                 'category': subscription.category,
                 'author': subscription.author,
                 'sources_count': len(subscription.sources),
-                'enabled_sources_count': len(enabled_sources)
+                'enabled_sources_count': enabled_sources_count
             })
         return result
 
     def list_sources(self) -> List[Dict[str, Any]]:
         """Получить список всех источников с их статусом и подпиской"""
-        result = []
-        for subscription in self.config.subscriptions:
-            for source in subscription.sources:
-                result.append({
-                    'name': source.name,
-                    'subscription': subscription.name,
-                    'url': source.url,
-                    'type': source.source_type.value,
-                    'enabled': source.enabled and subscription.enabled,
-                    'check_interval': source.check_interval,
-                    'max_videos': source.max_videos,
-                    'custom_title': source.custom_title,
-                    'custom_description': source.custom_description,
-                    'category': source.category,
-                    'author': source.author
-                })
-        return result
+        return [
+            {
+                'name': source.name,
+                'subscription': subscription.name,
+                'url': source.url,
+                'type': source.source_type.value,
+                'enabled': source.enabled and subscription.enabled,
+                'check_interval': source.check_interval,
+                'max_videos': source.max_videos,
+                'custom_title': source.custom_title,
+                'custom_description': source.custom_description,
+                'category': source.category,
+                'author': source.author
+            }
+            for subscription, source in self._get_indexes().source_pairs
+        ]
     
     def get_global_setting(self, key: str, default=None):
         """Получить глобальную настройку"""
@@ -316,9 +830,92 @@ class ConfigManager:
         """Получить базовый URL для RSS ссылок"""
         return self.config.global_settings.get('base_url', 'http://localhost')
 
+    def has_changed_on_disk(self) -> bool:
+        """Проверить, изменились ли файлы конфигурации с момента последней загрузки"""
+        return (self._stat_config_file() != self._file_state
+                or self._stat_subscriptions_dir() != self._subscriptions_dir_state)
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Перечитать конфигурацию, если config.yaml или файлы subscriptions.d изменились
+        
+        Разбираются только изменившиеся файлы. При ошибке разбора
+        продолжаем работать со старой конфигурацией.
+        
+        Returns:
+            True если конфигурация была перезагружена
+        """
+        file_state = self._stat_config_file()
+        dir_state = self._stat_subscriptions_dir()
+        if file_state == self._file_state and dir_state == self._subscriptions_dir_state:
+            return False
+        
+        self._file_state = file_state
+        self._subscriptions_dir_state = dir_state
+        if file_state is None:
+            print(f"⚠️ Файл конфигурации {self.config_file} не найден, продолжаем со старой конфигурацией")
+            return False
+        
+        try:
+            self._apply_loaded(self._read_all(file_state))
+        except Exception as e:
+            print(f"❌ Ошибка перезагрузки конфигурации, продолжаем со старой: {e}")
+            return False
+        
+        print(f"🔄 Конфигурация перезагружена из {self.config_file}")
+        return True
 
-# Глобальный экземпляр менеджера конфигурации
-config_manager = ConfigManager()
+
+# Путь к файлу конфигурации по умолчанию (можно переопределить переменной окружения)
+DEFAULT_CONFIG_FILE = os.environ.get('YOUTUBE2PODCAST_CONFIG', 'config.yaml')
+
+
+class LazyConfigManager:
+    """
+    Ленивый прокси для ConfigManager
+
+    Конфигурация читается с диска только при первом обращении к атрибутам,
+    поэтому импорт модуля не трогает файловую систему.
+    """
+
+    def __init__(self, config_file: str = DEFAULT_CONFIG_FILE):
+        object.__setattr__(self, '_config_file', config_file)
+        object.__setattr__(self, '_manager', None)
+
+    def get_manager(self) -> ConfigManager:
+        """Получить ConfigManager, загрузив конфигурацию при необходимости"""
+        if self._manager is None:
+            object.__setattr__(self, '_manager', ConfigManager(self._config_file))
+        return self._manager
+
+    def set_config_file(self, config_file: str) -> None:
+        """Указать путь к файлу конфигурации; загрузка произойдет при следующем обращении"""
+        object.__setattr__(self, '_config_file', config_file)
+        object.__setattr__(self, '_manager', None)
+
+    def is_loaded(self) -> bool:
+        """Проверить, была ли конфигурация уже загружена"""
+        return self._manager is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get_manager(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.get_manager(), name, value)
+
+
+# Глобальный экземпляр менеджера конфигурации (загружается при первом обращении)
+config_manager = LazyConfigManager()
+
+
+def set_config_file(config_file: str) -> None:
+    """Явно указать файл конфигурации для глобального менеджера"""
+    config_manager.set_config_file(config_file)
+
+
+def get_config_manager() -> ConfigManager:
+    """Получить загруженный глобальный ConfigManager"""
+    return config_manager.get_manager()
 
 
 # Функции для обратной совместимости
@@ -332,44 +929,25 @@ def get_source_by_name(name: str) -> Source:
     return config_manager.get_source_by_name(name)
 
 
-def add_source(name: str, url: str, source_type: SourceType, **kwargs) -> None:
-    """Добавить новый источник в первую активную подписку"""
+def add_source(name: str, url: str, source_type: SourceType, subscription_name: str = None, **kwargs) -> None:
+    """Добавить новый источник в указанную или первую активную подписку"""
     source = Source(name=name, url=url, source_type=source_type, **kwargs)
-    # Добавляем в первую активную подписку или создаем новую
-    enabled_subs = config_manager.get_enabled_subscriptions()
-    if enabled_subs:
-        enabled_subs[0].sources.append(source)
-        config_manager.save_config()
-    else:
-        # Создаем новую подписку по умолчанию
-        subscription = Subscription(
-            name="default",
-            title="Default Subscription",
-            description="Default subscription",
-            sources=[source]
-        )
-        config_manager.add_subscription(subscription)
+    config_manager.add_source(source, subscription_name)
 
 
 def remove_source(name: str) -> None:
     """Удалить источник по имени из всех подписок"""
-    for subscription in config_manager.config.subscriptions:
-        subscription.sources = [s for s in subscription.sources if s.name != name]
-    config_manager.save_config()
+    config_manager.remove_source(name)
 
 
 def enable_source(name: str) -> None:
     """Включить источник"""
-    source = config_manager.get_source_by_name(name)
-    source.enabled = True
-    config_manager.save_config()
+    config_manager.enable_source(name)
 
 
 def disable_source(name: str) -> None:
     """Отключить источник"""
-    source = config_manager.get_source_by_name(name)
-    source.enabled = False
-    config_manager.save_config()
+    config_manager.disable_source(name)
 
 
 def list_sources() -> List[Dict[str, Any]]:
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+API управления работающим циклом --loop (HTTP на localhost)
+
+Эндпоинты:
+    GET  /healthz                          - 200, если последняя успешная итерация была не раньше
+                                             health_max_age секунд назад (или цикл на паузе), иначе 503
+    GET  /status                           - очередь, выполняющиеся источники, пауза, последняя итерация
+    POST /poll?subscription=...&source=... - немедленный опрос источника, подписки или всех источников
+    POST /pause, POST /resume              - приостановить и возобновить запуск новых источников
+
+Запросы из потоков HTTP сервера не меняют расписание напрямую: запросы на
+опрос ставятся в очередь и применяются циклом при синхронизации расписания.
+Клиент - ControlClient (команды manage_sources.py poll, pause, resume,
+daemon-status, health).
+"""
+
+import json
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from logging_setup import get_logger
+from scheduler import SourceScheduler, SourceKey
+
+
+logger = get_logger('control')
+
+DEFAULT_ADDRESS = "127.0.0.1"
+DEFAULT_PORT = 9102
+DEFAULT_HEALTH_MAX_AGE = 1800  # секунды
+
+
+class ControlError(Exception):
+    """Ошибка обращения к API управления"""
+
+
+class DaemonControl:
+    """
+    Состояние цикла для API управления
+
+    Итерация считается успешной, если она завершилась и не все обработанные
+    источники упали (итерация без обработанных источников тоже успешна).
+    Цикл исправен, если успешная итерация была не дольше health_max_age
+    назад или если он просто ждет: последняя итерация успешна, а срок опроса
+    ни одного источника не истек дольше health_max_age назад (каналы с
+    подпиской WebSub опрашиваются раз в несколько часов).
+
+    Args:
+        scheduler: Расписание цикла
+        mode: Режим цикла (loop, async)
+        workers: Сколько источников обрабатывается одновременно
+        health_max_age: Допустимое время с последней успешной итерации, секунды
+    """
+
+    def __init__(self, scheduler: SourceScheduler, mode: str = 'loop', workers: int = 1,
+                 health_max_age: float = DEFAULT_HEALTH_MAX_AGE, clock=time.time):
+        self.scheduler = scheduler
+        self.mode = mode
+        self.workers = workers
+        self.health_max_age = health_max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._polls: List[Tuple[Optional[str], Optional[str]]] = []
+        self._active: Dict[SourceKey, float] = {}
+        self._paused = False
+        self.started_at = clock()
+        self.last_success_at: Optional[float] = None
+        self.last_iteration: Optional[Dict[str, Any]] = None
+        self._last_iteration_ok = True
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def pause(self) -> None:
+        if not self._paused:
+            logger.info("⏸️  Цикл приостановлен через API управления")
+        self._paused = True
+
+    def resume(self) -> None:
+        if self._paused:
+            logger.info("▶️  Цикл возобновлен через API управления")
+        self._paused = False
+
+    def request_poll(self, subscription: str = None, source: str = None) -> int:
+        """
+        Ставит в очередь немедленный опрос
+
+        Returns:
+            Число источников расписания, подходящих под запрос
+        """
+        matched = [job for job in self.scheduler.jobs()
+                   if (not subscription or job.subscription.name == subscription)
+                   and (not source or job.source.name == source)]
+        if matched:
+            with self._lock:
+                self._polls.append((subscription, source))
+        return len(matched)
+
+    def has_polls(self) -> bool:
+        return bool(self._polls)
+
+    def take_polls(self) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Забирает запросы на опрос (вызывается циклом)"""
+        with self._lock:
+            polls, self._polls = self._polls, []
+        return polls
+
+    def source_started(self, key: SourceKey) -> None:
+        with self._lock:
+            self._active[key] = self._clock()
+
+    def source_finished(self, key: SourceKey) -> None:
+        with self._lock:
+            self._active.pop(key, None)
+
+    def iteration_finished(self, sources: int, succeeded: int) -> None:
+        now = self._clock()
+        self.last_iteration = {'finished_at': now, 'sources': sources, 'succeeded': succeeded}
+        self._last_iteration_ok = not sources or bool(succeeded)
+        if self._last_iteration_ok:
+            self.last_success_at = now
+
+    def overdue(self) -> float:
+        """Сколько секунд назад истек самый ранний срок опроса (0, если ни один не истек)"""
+        jobs = self.scheduler.jobs()
+        if not jobs:
+            return 0.0
+        return max(self._clock() - min(job.next_run for job in jobs), 0.0)
+
+    def health(self) -> Dict[str, Any]:
+        """Состояние для /healthz: ok, время с последней успешной итерации, просрочка опроса и пауза"""
+        now = self._clock()
+        age = now - (self.last_success_at or self.started_at)
+        overdue = self.overdue()
+        idle = self._last_iteration_ok and overdue <= self.health_max_age
+        return {
+            'ok': self._paused or age <= self.health_max_age or idle,
+            'paused': self._paused,
+            'idle': idle,
+            'seconds_since_success': round(age, 1),
+            'seconds_overdue': round(overdue, 1),
+            'last_success_at': self.last_success_at,
+            'max_age': self.health_max_age,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Состояние для /status"""
+        now = self._clock()
+        with self._lock:
+            active = dict(self._active)
+        jobs = self.scheduler.jobs()
+        queue = [job for job in jobs if job.next_run <= now and job.key not in active]
+        next_runs = [job.next_run for job in jobs if job.key not in active and job.next_run > now]
+        return {
+            'mode': self.mode,
+            'paused': self._paused,
+            'uptime': round(now - self.started_at, 1),
+            'scheduled': len(jobs),
+            'workers': self.workers,
+            'active': [{'subscription': key[0], 'source': key[1], 'running_for': round(now - started, 1)}
+                       for key, started in sorted(active.items(), key=lambda item: item[1])],
+            'queue': [{'subscription': job.subscription.name, 'source': job.source.name,
+                       'waiting_for': round(now - job.next_run, 1)} for job in queue],
+            'next_run_in': round(min(next_runs) - now, 1) if next_runs else None,
+            'pending_polls': len(self._polls),
+            'last_iteration': self.last_iteration,
+        }
+
+
+def start_http_server(control: DaemonControl, port: int, address: str = DEFAULT_ADDRESS):
+    """Запускает HTTP сервер API управления в фоновом потоке"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlsplit, parse_qs
+
+    class ControlRequestHandler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, data: Dict[str, Any]) -> None:
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == '/healthz':
+                health = control.health()
+                self._reply(200 if health['ok'] else 503, health)
+            elif path == '/status':
+                self._reply(200, control.status())
+            else:
+                self._reply(404, {'error': f"Неизвестный путь {path}"})
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            params = {name: values[0] for name, values in parse_qs(url.query).items()}
+            if url.path == '/poll':
+                subscription, source = params.get('subscription'), params.get('source')
+                matched = control.request_poll(subscription, source)
+                target = '/'.join(name for name in (subscription, source) if name) or 'всех источников'
+                if not matched:
+                    self._reply(404, {'error': f"Нет источников в расписании: {target}"})
+                    return
+                logger.info(f"📨 Запрос через API управления: опрос {target} ({matched} источников)")
+                self._reply(202, {'matched': matched, 'paused': control.paused})
+            elif url.path == '/pause':
+                control.pause()
+                self._reply(200, {'paused': True})
+            elif url.path == '/resume':
+                control.resume()
+                self._reply(200, {'paused': False})
+            else:
+                self._reply(404, {'error': f"Неизвестный путь {url.path}"})
+
+        def log_message(self, format, *args):
+            logger.debug(f"control: {format % args}")
+
+    server = ThreadingHTTPServer((address, port), ControlRequestHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="control-http", daemon=True)
+    thread.start()
+    return server
+
+
+class ControlClient:
+    """Клиент API управления для manage_sources.py"""
+
+    def __init__(self, port: int = DEFAULT_PORT, address: str = DEFAULT_ADDRESS, timeout: float = 10):
+        self.base_url = f"http://{address}:{port}"
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, params: Dict[str, Optional[str]] = None) -> Tuple[int, Dict[str, Any]]:
+        """
+        Выполняет запрос к API
+
+        Returns:
+            HTTP код и разобранный JSON ответа
+
+        Raises:
+            ControlError: Если цикл не отвечает
+        """
+        from urllib.error import HTTPError, URLError
+        from urllib.parse import urlencode
+        from urllib.request import Request, urlopen
+
+        query = urlencode({name: value for name, value in (params or {}).items() if value})
+        url = f"{self.base_url}{path}" + (f"?{query}" if query else '')
+        try:
+            with urlopen(Request(url, method=method), timeout=self.timeout) as response:
+                return response.status, json.loads(response.read() or b'{}')
+        except HTTPError as e:
+            try:
+                return e.code, json.loads(e.read() or b'{}')
+            except ValueError:
+                return e.code, {'error': str(e)}
+        except (URLError, OSError) as e:
+            raise ControlError(f"Цикл --loop не отвечает на {self.base_url}: {getattr(e, 'reason', e)}") from e
+
+    def poll(self, subscription: str = None, source: str = None) -> Tuple[int, Dict[str, Any]]:
+        return self.request('POST', '/poll', {'subscription': subscription, 'source': source})
+
+    def pause(self) -> Tuple[int, Dict[str, Any]]:
+        return self.request('POST', '/pause')
+
+    def resume(self) -> Tuple[int, Dict[str, Any]]:
+        return self.request('POST', '/resume')
+
+    def status(self) -> Tuple[int, Dict[str, Any]]:
+        return self.request('GET', '/status')
+
+    def health(self) -> Tuple[int, Dict[str, Any]]:
+        return self.request('GET', '/healthz')
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any] = None) -> 'ControlClient':
+        settings = settings or {}
+        return cls(int(settings.get('port') or DEFAULT_PORT), settings.get('address') or DEFAULT_ADDRESS)
+
+
+# Состояние цикла текущего процесса (None - API управления отключен)
+_control: Optional[DaemonControl] = None
+_server = None
+
+
+def setup_control(settings: Dict[str, Any], scheduler: SourceScheduler, mode: str = 'loop',
+                  workers: int = 1) -> Optional[DaemonControl]:
+    """
+    Включает API управления циклом по секции control конфигурации
+
+    Args:
+        settings: enabled, port, address, health_max_age
+        scheduler: Расписание цикла
+        mode: Режим цикла (loop, async)
+        workers: Сколько источников обрабатывается одновременно
+
+    Returns:
+        Состояние цикла или None, если API отключен
+    """
+    global _control, _server
+    settings = settings or {}
+    stop_control()
+    if not settings.get('enabled'):
+        return None
+
+    _control = DaemonControl(scheduler, mode, workers,
+                             float(settings.get('health_max_age') or DEFAULT_HEALTH_MAX_AGE))
+    address = settings.get('address') or DEFAULT_ADDRESS
+    port = int(settings.get('port', DEFAULT_PORT) or 0)
+    try:
+        _server = start_http_server(_control, port, address)
+        logger.info(f"🎛️  API управления: http://{address}:{_server.server_address[1]}")
+    except OSError as e:
+        logger.error(f"❌ Не удалось запустить API управления на {address}:{port}: {e}")
+    return _control
+
+
+def stop_control() -> None:
+    """Останавливает HTTP сервер API управления"""
+    global _control, _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+    _control = _server = None
+
+
+def is_paused() -> bool:
+    return _control is not None and _control.paused
+
+
+def has_polls() -> bool:
+    return _control is not None and _control.has_polls()
+
+
+def take_polls() -> List[Tuple[Optional[str], Optional[str]]]:
+    return _control.take_polls() if _control is not None else []
+
+
+def source_started(key: SourceKey) -> None:
+    if _control is not None:
+        _control.source_started(key)
+
+
+def source_finished(key: SourceKey) -> None:
+    if _control is not None:
+        _control.source_finished(key)
+
+
+def iteration_finished(sources: int, succeeded: int) -> None:
+    """Отмечает завершение итерации для /healthz, если API включен"""
+    if _control is not None:
+        _control.iteration_finished(sources, succeeded)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Фоновая диагностика сети с кешированием результата
+"""
+
+import os
+import json
+import time
+import socket
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Any, Optional
+
+from config import config_manager
+from logging_setup import get_logger
+
+
+logger = get_logger('diagnostics')
+
+
+# Значения по умолчанию для секции diagnostics
+DEFAULT_TEST_VIDEO_ID = "dQw4w9WgXcQ"
+DEFAULT_NETWORK_TIMEOUT = 10
+DEFAULT_CACHE_TTL = 3600
+DEFAULT_CACHE_FILE = "data/.diagnostics.json"
+
+
+@dataclass
+class NetworkCheck:
+    """Результат одной проверки"""
+    name: str
+    ok: bool
+    message: str
+
+
+@dataclass
+class DiagnosticsReport:
+    """Результаты диагностики сети"""
+    checked_at: float
+    checks: List[NetworkCheck] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return all(check.ok for check in self.checks)
+
+    def add(self, name: str, ok: bool, message: str) -> None:
+        self.checks.append(NetworkCheck(name, ok, message))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DiagnosticsReport':
+        return cls(checked_at=data['checked_at'], checks=[NetworkCheck(**check) for check in data['checks']])
+
+    def format(self, cached: bool = False) -> str:
+        """Текст отчета для вывода одним блоком"""
+        if cached:
+            age_minutes = int((time.time() - self.checked_at) // 60)
+            header = f"🔍 Диагностика сети (из кеша, {age_minutes} мин назад):"
+        else:
+            header = "🔍 Диагностика сетевых проблем:"
+        lines = [header]
+        for check in self.checks:
+            lines.append(f"{'✅' if check.ok else '❌'} {check.name}: {check.message}")
+        lines.append("=" * 50)
+        return "\n".join(lines)
+
+
+def run_network_diagnostics(test_video_id: str = DEFAULT_TEST_VIDEO_ID,
+                            timeout: float = DEFAULT_NETWORK_TIMEOUT) -> DiagnosticsReport:
+    """
+    Проверяет DNS, HTTP доступ к YouTube и извлечение тестового видео
+
+    Args:
+        test_video_id: ID видео для проверки yt-dlp
+        timeout: Таймаут сетевых операций в секундах
+
+    Returns:
+        Отчет диагностики
+    """
+    import requests
+    import yt_dlp
+
+    report = DiagnosticsReport(checked_at=time.time())
+
+    # Проверка DNS
+    try:
+        report.add("DNS YouTube", True, socket.gethostbyname("www.youtube.com"))
+    except Exception as e:
+        report.add("DNS YouTube", False, str(e))
+
+    # Проверка HTTP соединения
+    try:
+        response = requests.get("https://www.youtube.com", timeout=timeout)
+        report.add("HTTP YouTube", response.ok, str(response.status_code))
+    except Exception as e:
+        report.add("HTTP YouTube", False, str(e))
+
+    report.add("yt-dlp версия", True, yt_dlp.version.__version__)
+
+    # Проверка доступности тестового видео
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': True,
+        'socket_timeout': timeout,
+    }
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(f"https://www.youtube.com/watch?v={test_video_id}", download=False)
+        report.add("Тестовое видео", True, info.get('title', 'Unknown'))
+    except Exception as e:
+        report.add("Тестовое видео", False, str(e))
+
+    return report
+
+
+def load_cached_report(cache_file: str, ttl: float) -> Optional[DiagnosticsReport]:
+    """
+    Загружает успешный отчет из кеша, если он не старше ttl секунд
+
+    Отчеты с ошибками не переиспользуются: после сбоя сеть проверяется заново.
+    """
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            report = DiagnosticsReport.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if not report.ok or time.time() - report.checked_at > ttl:
+        return None
+    return report
+
+
+def save_report(cache_file: str, report: DiagnosticsReport) -> None:
+    """Сохраняет отчет в кеш"""
+    try:
+        directory = os.path.dirname(cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_file = f"{cache_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"⚠️  Не удалось сохранить кеш диагностики: {e}")
+
+
+class NetworkDiagnostics:
+    """
+    Диагностика сети при запуске
+
+    Проверка выполняется в фоновом потоке параллельно с первой итерацией,
+    результат печатается одним блоком и кешируется на cache_ttl секунд,
+    поэтому быстрый перезапуск не ждет сетевых проверок.
+    """
+
+    def __init__(self, settings: Dict[str, Any] = None):
+        settings = settings or {}
+        self.enabled = settings.get('enabled', True)
+        self.test_video_id = settings.get('test_video_id', DEFAULT_TEST_VIDEO_ID)
+        self.timeout = settings.get('network_timeout', DEFAULT_NETWORK_TIMEOUT)
+        self.cache_ttl = settings.get('cache_ttl', DEFAULT_CACHE_TTL)
+        self.cache_file = settings.get('cache_file', DEFAULT_CACHE_FILE)
+        self.report: Optional[DiagnosticsReport] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls) -> 'NetworkDiagnostics':
+        """Создает диагностику с настройками из секции diagnostics"""
+        return cls(config_manager.config.diagnostics_settings)
+
+    def run(self) -> DiagnosticsReport:
+        """Выполняет диагностику синхронно, печатает и кеширует результат"""
+        report = run_network_diagnostics(self.test_video_id, self.timeout)
+        if report.ok:
+            logger.info(report.format())
+        else:
+            logger.warning(report.format())
+        if self.cache_ttl > 0:
+            save_report(self.cache_file, report)
+        self.report = report
+        return report
+
+    def start(self) -> None:
+        """Запускает диагностику в фоне, если она включена и кеш устарел"""
+        if not self.enabled:
+            return
+        if self.cache_ttl > 0:
+            cached = load_cached_report(self.cache_file, self.cache_ttl)
+            if cached:
+                logger.info(cached.format(cached=True))
+                self.report = cached
+                return
+        self._thread = threading.Thread(target=self._run_safely, name="network-diagnostics", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: float = None) -> Optional[DiagnosticsReport]:
+        """Дожидается завершения фоновой диагностики (по умолчанию - не дольше трех таймаутов)"""
+        if self._thread is not None:
+            self._thread.join(timeout if timeout is not None else self.timeout * 3)
+        return self.report
+
+    def _run_safely(self) -> None:
+        try:
+            self.run()
+        except Exception as e:
+            logger.error(f"❌ Ошибка диагностики сети: {e}")
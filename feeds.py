@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Модель ленты подкаста и генераторы выходных форматов (RSS, JSON Feed, OPML)
+"""
+
+import os
+import json
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Iterable
+
+from config import Subscription
+
+
+@dataclass
+class Episode:
+    """Эпизод подкаста (загруженное видео)"""
+    title: str
+    video_id: str
+    guid: str
+    description: str
+    pub_date: datetime
+    enclosure_url: str
+    enclosure_length: int = 0
+    enclosure_type: str = "audio/mpeg"
+    image_url: Optional[str] = None
+    duration: int = 0
+    author: str = None
+    category: str = None
+
+
+@dataclass
+class Feed:
+    """Лента подкаста одной подписки, общая для всех форматов вывода"""
+    subscription_name: str
+    title: str
+    description: str
+    language: str
+    author: str
+    category: str
+    base_url: str
+    image_url: Optional[str] = None
+    rss_version: str = "2.0"
+    namespaces: Dict[str, str] = field(default_factory=dict)
+    episodes: List[Episode] = field(default_factory=list)
+
+    def feed_url(self, filename: str) -> str:
+        """Публичный URL файла ленты в папке подписки"""
+        return f"{self.base_url}/data/{self.subscription_name}/{filename}"
+
+
+def format_duration(duration: int) -> str:
+    """
+    Форматирует длительность в секундах для тега itunes:duration
+    """
+    hours = duration // 3600
+    minutes = (duration % 3600) // 60
+    seconds = duration % 60
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def scan_subscription_dir(subscription_dir: str) -> Dict[str, int]:
+    """
+    Однократно сканирует папку подписки
+
+    Args:
+        subscription_dir: Путь к папке подписки
+
+    Returns:
+        Словарь {имя файла: размер в байтах} для всех файлов папки
+    """
+    files = {}
+    if not os.path.isdir(subscription_dir):
+        return files
+    with os.scandir(subscription_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                files[entry.name] = entry.stat().st_size
+    return files
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Записывает файл через временный файл и os.replace
+
+    Читатели (веб-сервер, другие узлы с общей папкой data/) видят либо
+    старую, либо новую версию файла, но не частично записанную.
+    """
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# Метаданные загруженных эпизодов подписки (все источники): хеш файла -> данные видео
+EPISODES_FILE = "episodes.json"
+
+# Поля видео, сохраняемые в EPISODES_FILE
+EPISODE_FIELDS = ('id', 'title', 'duration', 'uploader', 'timestamp', 'upload_date')
+
+
+def load_episode_index(subscription_dir: str) -> Dict[str, Dict[str, Any]]:
+    """Читает метаданные эпизодов подписки (пустой словарь, если файла нет или он поврежден)"""
+    try:
+        with open(os.path.join(subscription_dir, EPISODES_FILE), encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index if isinstance(index, dict) else {}
+
+
+def update_episode_index(subscription_dir: str, videos: List[Dict[str, Any]], file_hash,
+                         files: Dict[str, int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Дополняет метаданные эпизодов подписки видео источника
+
+    Источники подписки пишут одну ленту, а каждый знает только свои видео,
+    поэтому метаданные всех загруженных эпизодов хранятся в EPISODES_FILE
+    папки подписки. Видео с загруженным mp3 добавляются или обновляются,
+    записи без mp3 (файл удален) - удаляются.
+
+    Args:
+        subscription_dir: Папка подписки
+        videos: Видео источника
+        file_hash: Функция получения хеша имени файла из названия видео
+        files: Результат scan_subscription_dir (по умолчанию папка сканируется)
+
+    Returns:
+        Словарь {хеш файла: метаданные видео}
+    """
+    if files is None:
+        files = scan_subscription_dir(subscription_dir)
+    index = load_episode_index(subscription_dir)
+    updated = {video_hash: meta for video_hash, meta in index.items() if f"{video_hash}.mp3" in files}
+
+    for video in videos:
+        video_hash = file_hash(video['title'])
+        if f"{video_hash}.mp3" not in files:
+            continue
+        meta = {name: video.get(name) for name in EPISODE_FIELDS if video.get(name)}
+        # Полные данные видео не затираем неполными (плоский список без даты)
+        updated[video_hash] = {**updated.get(video_hash, {}), **meta}
+
+    if updated != index:
+        os.makedirs(subscription_dir, exist_ok=True)
+        write_atomic(os.path.join(subscription_dir, EPISODES_FILE),
+                     json.dumps(updated, ensure_ascii=False, indent=1).encode('utf-8'))
+    return updated
+
+
+def episode_pub_date(meta: Dict[str, Any], mp3_path: str) -> datetime:
+    """
+    Дата публикации эпизода в UTC
+
+    timestamp видео, иначе дата загрузки на YouTube (upload_date, YYYYMMDD),
+    иначе время изменения mp3.
+    """
+    if meta.get('timestamp'):
+        return datetime.fromtimestamp(meta['timestamp'], timezone.utc)
+    upload_date = meta.get('upload_date')
+    if upload_date and len(upload_date) == 8 and upload_date.isdigit():
+        return datetime(int(upload_date[:4]), int(upload_date[4:6]), int(upload_date[6:8]), tzinfo=timezone.utc)
+    try:
+        return datetime.fromtimestamp(os.path.getmtime(mp3_path), timezone.utc)
+    except OSError:
+        return datetime.fromtimestamp(0, timezone.utc)
+
+
+def build_feed(subscription: Subscription, subscription_dir: str, base_url: str,
+               episodes: Dict[str, Dict[str, Any]], rss_settings: Dict[str, Any] = None,
+               files: Dict[str, int] = None) -> Feed:
+    """
+    Строит модель ленты подписки по загруженным файлам всех ее источников
+
+    Args:
+        subscription: Конфигурация подписки
+        subscription_dir: Папка подписки с аудио файлами
+        base_url: Базовый URL для ссылок
+        episodes: Метаданные эпизодов {хеш файла: данные видео} (см. update_episode_index)
+        rss_settings: Настройки RSS из конфигурации
+        files: Результат scan_subscription_dir (по умолчанию папка сканируется)
+
+    Returns:
+        Модель ленты с эпизодами, от новых к старым
+    """
+    rss_settings = rss_settings or {}
+    if files is None:
+        files = scan_subscription_dir(subscription_dir)
+    files_url = f"{base_url}/data/{subscription.name}"
+
+    feed = Feed(
+        subscription_name=subscription.name,
+        title=subscription.title or f"{subscription.name.title()} - Подкаст",
+        description=subscription.description or f"Подкаст из подписки {subscription.name}",
+        language=rss_settings.get('default_language') or "ru",
+        author=subscription.author or subscription.name,
+        category=subscription.category,
+        base_url=base_url,
+        rss_version=rss_settings.get('version', '2.0'),
+        namespaces=rss_settings.get('namespaces', {}),
+    )
+
+    for video_hash, meta in episodes.items():
+        filename = f"{video_hash}.mp3"
+        if filename not in files or not meta.get('id'):
+            continue
+        thumbnail_filename = f"{video_hash}.webp"
+        feed.episodes.append(Episode(
+            title=meta.get('title') or video_hash,
+            video_id=meta['id'],
+            guid=f"https://www.youtube.com/watch?v={meta['id']}",
+            description=f"Эпизод из подписки {subscription.name}: {meta.get('title') or ''}",
+            pub_date=episode_pub_date(meta, os.path.join(subscription_dir, filename)),
+            enclosure_url=f"{files_url}/{filename}",
+            enclosure_length=files[filename],
+            image_url=f"{files_url}/{thumbnail_filename}" if thumbnail_filename in files else None,
+            duration=meta.get('duration') or 0,
+            author=meta.get('uploader'),
+            category=subscription.category,
+        ))
+
+    feed.episodes.sort(key=lambda episode: episode.pub_date, reverse=True)
+    # Превью подписки - превью самого нового эпизода
+    feed.image_url = next((episode.image_url for episode in feed.episodes if episode.image_url), None)
+    return feed
+
+
+class FeedWriter:
+    """Базовый генератор формата ленты"""
+
+    name = None
+    filename = None
+    label = None
+
+    def render(self, feed: Feed) -> bytes:
+        """Сериализует ленту в байты целевого формата"""
+        raise NotImplementedError
+
+    def write(self, feed: Feed, directory: str) -> str:
+        """
+        Записывает ленту в папку подписки
+
+        Returns:
+            Путь к записанному файлу
+        """
+        path = os.path.join(directory, self.filename)
+        write_atomic(path, self.render(feed))
+        return path
+
+
+class RSSWriter(FeedWriter):
+    """RSS 2.0 с iTunes метаданными"""
+
+    name = "rss"
+    filename = "podcast.rss"
+    label = "RSS"
+
+    def render(self, feed: Feed) -> bytes:
+        import xml.etree.ElementTree as ET
+        from email.utils import format_datetime
+
+        rss = ET.Element("rss", version=feed.rss_version)
+        for ns_name, ns_url in feed.namespaces.items():
+            rss.set(f"xmlns:{ns_name}", ns_url)
+
+        channel = ET.SubElement(rss, "channel")
+        ET.SubElement(channel, "title").text = feed.title
+        ET.SubElement(channel, "description").text = feed.description
+        ET.SubElement(channel, "language").text = feed.language
+
+        # iTunes метаданные
+        ET.SubElement(channel, "itunes:author").text = feed.author
+        ET.SubElement(channel, "itunes:summary").text = feed.description
+        ET.SubElement(channel, "itunes:category", text=feed.category)
+        ET.SubElement(channel, "itunes:explicit").text = "false"
+        ET.SubElement(channel, "itunes:type").text = "episodic"
+        if feed.image_url:
+            ET.SubElement(channel, "itunes:image").set("href", feed.image_url)
+
+        for episode in feed.episodes:
+            item = ET.SubElement(channel, "item")
+            ET.SubElement(item, "title").text = episode.title
+            ET.SubElement(item, "description").text = episode.description
+            ET.SubElement(item, "pubDate").text = format_datetime(episode.pub_date.astimezone(timezone.utc))
+            ET.SubElement(item, "guid").text = episode.guid
+
+            enclosure = ET.SubElement(item, "enclosure")
+            enclosure.set("url", episode.enclosure_url)
+            enclosure.set("type", episode.enclosure_type)
+            enclosure.set("length", str(episode.enclosure_length))
+
+            if episode.image_url:
+                ET.SubElement(item, "itunes:image").set("href", episode.image_url)
+            if episode.duration:
+                ET.SubElement(item, "itunes:duration").text = format_duration(episode.duration)
+            ET.SubElement(item, "itunes:author").text = episode.author
+            ET.SubElement(item, "itunes:summary").text = episode.description
+            ET.SubElement(item, "itunes:category").text = episode.category
+
+        tree = ET.ElementTree(rss)
+        ET.indent(tree, space="  ")
+        return ET.tostring(rss, encoding='utf-8', xml_declaration=True)
+
+
+class JSONFeedWriter(FeedWriter):
+    """JSON Feed 1.1 (https://www.jsonfeed.org/version/1.1/)"""
+
+    name = "json"
+    filename = "feed.json"
+    label = "JSON Feed"
+
+    def render(self, feed: Feed) -> bytes:
+        data = {
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': feed.title,
+            'description': feed.description,
+            'feed_url': feed.feed_url(self.filename),
+            'language': feed.language,
+            'authors': [{'name': feed.author}],
+            'items': [],
+        }
+        if feed.image_url:
+            data['icon'] = feed.image_url
+
+        for episode in feed.episodes:
+            item = {
+                'id': episode.guid,
+                'url': episode.guid,
+                'title': episode.title,
+                'content_text': episode.description,
+                'date_published': episode.pub_date.astimezone(timezone.utc).isoformat(),
+                'attachments': [{
+                    'url': episode.enclosure_url,
+                    'mime_type': episode.enclosure_type,
+                    'size_in_bytes': episode.enclosure_length,
+                }],
+            }
+            if episode.duration:
+                item['attachments'][0]['duration_in_seconds'] = episode.duration
+            if episode.image_url:
+                item['image'] = episode.image_url
+            if episode.author:
+                item['authors'] = [{'name': episode.author}]
+            if episode.category:
+                item['tags'] = [episode.category]
+            data['items'].append(item)
+
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+# Доступные форматы лент: имя формата из конфигурации -> генератор
+FEED_WRITERS = {
+    RSSWriter.name: RSSWriter,
+    JSONFeedWriter.name: JSONFeedWriter,
+}
+
+
+def get_feed_writers(formats: Iterable[str]) -> List[FeedWriter]:
+    """
+    Возвращает генераторы для указанных форматов
+
+    Raises:
+        ValueError: Если формат неизвестен
+    """
+    writers = []
+    for name in formats:
+        if name not in FEED_WRITERS:
+            raise ValueError(f"Неизвестный формат ленты '{name}'. Доступные: {', '.join(FEED_WRITERS)}")
+        writers.append(FEED_WRITERS[name]())
+    return writers
+
+
+def write_feed(feed: Feed, directory: str, formats: Iterable[str] = ("rss",)) -> List[str]:
+    """
+    Записывает ленту во всех указанных форматах
+
+    Returns:
+        Список путей к записанным файлам
+    """
+    os.makedirs(directory, exist_ok=True)
+    return [writer.write(feed, directory) for writer in get_feed_writers(formats)]
+
+
+def render_opml_index(subscriptions: List[Subscription], base_url: str, formats: Iterable[str] = ("rss",),
+                      title: str = "YouTube2Podcast") -> bytes:
+    """
+    Формирует OPML индекс со ссылками на ленты всех подписок
+
+    Args:
+        subscriptions: Подписки для включения в индекс
+        base_url: Базовый URL для ссылок
+        formats: Форматы лент; для каждого формата добавляется отдельная ссылка
+        title: Заголовок индекса
+
+    Returns:
+        OPML 2.0 документ в байтах
+    """
+    import xml.etree.ElementTree as ET
+    from email.utils import format_datetime
+
+    writers = get_feed_writers(formats)
+
+    opml = ET.Element("opml", version="2.0")
+    head = ET.SubElement(opml, "head")
+    ET.SubElement(head, "title").text = title
+    ET.SubElement(head, "dateCreated").text = format_datetime(datetime.now(timezone.utc))
+    body = ET.SubElement(opml, "body")
+
+    for subscription in subscriptions:
+        for writer in writers:
+            # type="rss" - стандартный тип ленты в OPML, формат виден в названии
+            title = subscription.title or subscription.name
+            if writer is not writers[0]:
+                title = f"{title} ({writer.label})"
+            outline = ET.SubElement(body, "outline")
+            outline.set("type", "rss")
+            outline.set("text", title)
+            outline.set("title", title)
+            if subscription.description:
+                outline.set("description", subscription.description)
+            outline.set("xmlUrl", f"{base_url}/data/{subscription.name}/{writer.filename}")
+
+    tree = ET.ElementTree(opml)
+    ET.indent(tree, space="  ")
+    return ET.tostring(opml, encoding='utf-8', xml_declaration=True)
+
+
+def write_opml_index(subscriptions: List[Subscription], path: str, base_url: str,
+                     formats: Iterable[str] = ("rss",)) -> str:
+    """
+    Записывает OPML индекс всех лент
+
+    Returns:
+        Путь к записанному файлу
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    write_atomic(path, render_opml_index(subscriptions, base_url, formats))
+    return path
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+История запусков в SQLite: итерации и результаты обработки источников
+
+Результаты источников приходят из замеров этапов (record_phase): этапы
+накапливаются по источнику, запись делается по итоговому этапу 'source'.
+Таблица source_status хранит последнее состояние каждого источника, поэтому
+manage_sources.py status не просматривает всю историю.
+"""
+
+import os
+import re
+import time
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from logging_setup import get_logger, add_phase_observer, remove_phase_observer
+
+
+logger = get_logger('history')
+
+DEFAULT_HISTORY_FILE = "data/history.db"
+DEFAULT_RETENTION_DAYS = 90
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS iterations (
+    id INTEGER PRIMARY KEY,
+    mode TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    sources INTEGER,
+    succeeded INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_iterations_started ON iterations(started_at);
+
+CREATE TABLE IF NOT EXISTS source_runs (
+    id INTEGER PRIMARY KEY,
+    iteration_id INTEGER,
+    subscription TEXT NOT NULL,
+    source TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    success INTEGER NOT NULL,
+    video_id TEXT,
+    video_title TEXT,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    error_class TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_source_runs_started ON source_runs(started_at);
+CREATE INDEX IF NOT EXISTS idx_source_runs_source ON source_runs(subscription, source, started_at);
+
+CREATE TABLE IF NOT EXISTS phase_timings (
+    run_id INTEGER NOT NULL,
+    phase TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_phase_timings_run ON phase_timings(run_id);
+
+CREATE TABLE IF NOT EXISTS source_status (
+    subscription TEXT NOT NULL,
+    source TEXT NOT NULL,
+    last_run_id INTEGER NOT NULL,
+    last_success_at REAL,
+    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (subscription, source)
+);
+"""
+
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_duration(value: str) -> float:
+    """
+    Переводит интервал вида '24h', '30m', '7d', '2w' в секунды (число - секунды)
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*', str(value).lower())
+    if not match:
+        raise ValueError(f"Неверный интервал: {value} (примеры: 30m, 24h, 7d)")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2) or 's']
+
+
+class RunHistory:
+    """
+    Хранилище истории запусков
+
+    Пример:
+        history = RunHistory('data/history.db')
+        history.start_iteration('loop')
+        add_phase_observer(history.observe_phase)
+        ...
+        history.finish_iteration(sources=10, succeeded=9)
+    """
+
+    def __init__(self, path: str = DEFAULT_HISTORY_FILE, retention_days: float = DEFAULT_RETENTION_DAYS,
+                 clock=time.time):
+        self.path = path
+        self.retention_days = retention_days
+        self._clock = clock
+        self._connection = None
+        self._lock = threading.RLock()
+        self._iteration_id: Optional[int] = None
+        # Замеры этапов по источнику до итогового этапа 'source'
+        self._pending: Dict[Tuple[str, str], List[Tuple[str, float, str, int]]] = {}
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            import sqlite3
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            if connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                connection.executescript(SCHEMA)
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def start_iteration(self, mode: str) -> int:
+        """Записывает начало итерации; результаты источников привязываются к ней"""
+        with self._lock, self.connection as connection:
+            cursor = connection.execute(
+                "INSERT INTO iterations (mode, started_at) VALUES (?, ?)", (mode, self._clock()))
+            self._iteration_id = cursor.lastrowid
+        return self._iteration_id
+
+    def finish_iteration(self, sources: int, succeeded: int) -> None:
+        """Записывает итоги текущей итерации"""
+        if self._iteration_id is None:
+            return
+        with self._lock, self.connection as connection:
+            connection.execute(
+                "UPDATE iterations SET finished_at = ?, sources = ?, succeeded = ? WHERE id = ?",
+                (self._clock(), sources, succeeded, self._iteration_id))
+            self._iteration_id = None
+
+    def observe_phase(self, phase: str, seconds: float, status: str, fields: Dict[str, Any]) -> None:
+        """Обработчик замеров этапов из logging_setup.record_phase"""
+        subscription, source = fields.get('subscription'), fields.get('source')
+        if not subscription or not source:
+            return
+        key = (subscription, source)
+        with self._lock:
+            if phase != 'source':
+                self._pending.setdefault(key, []).append((phase, seconds, status, fields.get('bytes') or 0))
+                return
+            phases = self._pending.pop(key, [])
+        self.record_source_run(subscription, source, seconds, status == 'ok', phases,
+                               video_id=fields.get('video_id'), video_title=fields.get('video_title'),
+                               error_class=fields.get('error_class'), error=fields.get('error'))
+
+    def record_source_run(self, subscription: str, source: str, duration: float, success: bool,
+                          phases: List[Tuple[str, float, str, int]] = (), video_id: str = None,
+                          video_title: str = None, error_class: str = None, error: str = None) -> int:
+        """
+        Записывает результат обработки источника
+
+        Args:
+            phases: Замеры этапов (этап, секунды, статус, байты)
+
+        Returns:
+            ID записи
+        """
+        finished_at = self._clock()
+        downloaded_bytes = sum(phase[3] for phase in phases)
+        with self._lock, self.connection as connection:
+            cursor = connection.execute(
+                "INSERT INTO source_runs (iteration_id, subscription, source, started_at, finished_at, duration, "
+                "success, video_id, video_title, bytes, error_class, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._iteration_id, subscription, source, finished_at - duration, finished_at, duration,
+                 int(success), video_id, video_title, downloaded_bytes, error_class, error))
+            run_id = cursor.lastrowid
+            connection.executemany(
+                "INSERT INTO phase_timings (run_id, phase, seconds, status) VALUES (?, ?, ?, ?)",
+                [(run_id, phase, seconds, status) for phase, seconds, status, _ in phases])
+            connection.execute(
+                "INSERT INTO source_status (subscription, source, last_run_id, last_success_at, consecutive_failures) "
+                "VALUES (:subscription, :source, :run_id, :success_at, :failures) "
+                "ON CONFLICT (subscription, source) DO UPDATE SET "
+                "last_run_id = excluded.last_run_id, "
+                "last_success_at = COALESCE(excluded.last_success_at, last_success_at), "
+                "consecutive_failures = CASE WHEN :success THEN 0 ELSE consecutive_failures + 1 END",
+                {'subscription': subscription, 'source': source, 'run_id': run_id,
+                 'success_at': finished_at if success else None, 'failures': 0 if success else 1,
+                 'success': int(success)})
+        return run_id
+
+    def prune(self, retention_days: float) -> int:
+        """Удаляет записи старше retention_days дней, возвращает число удаленных запусков источников"""
+        cutoff = self._clock() - retention_days * 86400
+        with self._lock, self.connection as connection:
+            row = connection.execute(
+                "SELECT MAX(id) FROM source_runs WHERE started_at < ?", (cutoff,)).fetchone()
+            if row[0] is None:
+                return 0
+            connection.execute("DELETE FROM phase_timings WHERE run_id <= ?", (row[0],))
+            deleted = connection.execute("DELETE FROM source_runs WHERE id <= ?", (row[0],)).rowcount
+            connection.execute("DELETE FROM iterations WHERE started_at < ?", (cutoff,))
+        return deleted
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Последний результат каждого источника"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT s.subscription, s.source, s.last_success_at, s.consecutive_failures, "
+                "r.started_at, r.duration, r.success, r.video_id, r.video_title, r.error_class, r.error "
+                "FROM source_status s JOIN source_runs r ON r.id = s.last_run_id "
+                "ORDER BY s.subscription, s.source").fetchall()
+        return [dict(row) for row in rows]
+
+    def report(self, since: float) -> Dict[str, Any]:
+        """
+        Сводка за период с момента since (unix time)
+
+        Returns:
+            Словарь iterations (число, средняя длительность) и sources - по источнику:
+            запуски, ошибки, средняя и максимальная длительность, байты,
+            последняя ошибка и среднее время этапов
+        """
+        with self._lock:
+            connection = self.connection
+            iterations = dict(connection.execute(
+                "SELECT COUNT(*) AS count, AVG(finished_at - started_at) AS avg_duration, "
+                "SUM(sources) AS sources, SUM(succeeded) AS succeeded "
+                "FROM iterations WHERE started_at >= ?", (since,)).fetchone())
+            sources = {}
+            for row in connection.execute(
+                    "SELECT subscription, source, COUNT(*) AS runs, SUM(1 - success) AS failures, "
+                    "AVG(duration) AS avg_duration, MAX(duration) AS max_duration, SUM(bytes) AS bytes "
+                    "FROM source_runs WHERE started_at >= ? GROUP BY subscription, source", (since,)):
+                sources[(row['subscription'], row['source'])] = dict(row, last_error_class=None, phases={})
+            for row in connection.execute(
+                    "SELECT subscription, source, error_class, MAX(id) FROM source_runs "
+                    "WHERE started_at >= ? AND success = 0 GROUP BY subscription, source", (since,)):
+                sources[(row['subscription'], row['source'])]['last_error_class'] = row['error_class']
+            for row in connection.execute(
+                    "SELECT r.subscription, r.source, p.phase, AVG(p.seconds) AS avg_seconds "
+                    "FROM source_runs r JOIN phase_timings p ON p.run_id = r.id "
+                    "WHERE r.started_at >= ? GROUP BY r.subscription, r.source, p.phase", (since,)):
+                sources[(row['subscription'], row['source'])]['phases'][row['phase']] = row['avg_seconds']
+
+        ordered = sorted(sources.values(), key=lambda item: (-item['failures'], -(item['avg_duration'] or 0)))
+        return {'since': since, 'iterations': iterations, 'sources': ordered}
+
+
+# История текущего процесса (None - история отключена)
+_history: Optional[RunHistory] = None
+
+
+def setup_history(settings: Dict[str, Any] = None) -> Optional[RunHistory]:
+    """
+    Включает запись истории по секции history конфигурации
+
+    Args:
+        settings: enabled, file, retention_days
+
+    Returns:
+        Хранилище истории или None, если история отключена
+    """
+    global _history
+    settings = settings or {}
+    if _history is not None:
+        remove_phase_observer(_history.observe_phase)
+        _history.close()
+        _history = None
+    if not settings.get('enabled', True):
+        return None
+
+    _history = RunHistory(settings.get('file') or DEFAULT_HISTORY_FILE,
+                          settings.get('retention_days', DEFAULT_RETENTION_DAYS))
+    add_phase_observer(_history.observe_phase)
+    return _history
+
+
+def iteration_started(mode: str) -> None:
+    """Отмечает начало итерации в истории, если она включена"""
+    if _history is None:
+        return
+    try:
+        if _history.retention_days:
+            _history.prune(_history.retention_days)
+        _history.start_iteration(mode)
+    except Exception as e:
+        logger.warning(f"⚠️  Не удалось записать историю запусков в {_history.path}: {e}")
+
+
+def iteration_finished(sources: int, succeeded: int) -> None:
+    """Записывает итоги итерации в историю, если она включена"""
+    if _history is None:
+        return
+    try:
+        _history.finish_iteration(sources, succeeded)
+    except Exception as e:
+        logger.warning(f"⚠️  Не удалось записать историю запусков в {_history.path}: {e}")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Защита от одновременных запусков с одной папкой data/
+
+Блокировка экземпляра (data/.instance.lock) держит процесс, работающий с
+папкой данных; повторный запуск ее не получает и завершается либо, если
+работает цикл --loop, передает ему запрос на опрос через файл запросов.
+В кластере (секция cluster) у каждого узла своя блокировка
+data/.instance.<узел>.lock: общую папку делят узлы, а не процессы узла.
+Блокировки источников (data/.locks/) не дают двум процессам одновременно
+обрабатывать один источник, если блокировка экземпляра обойдена (--force).
+
+Используются блокировки fcntl.flock: они снимаются ядром при завершении
+процесса, поэтому после падения не остается "зависших" блокировок.
+"""
+
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+from logging_setup import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировки не поддерживаются
+    fcntl = None
+
+
+logger = get_logger('instance')
+
+DEFAULT_LOCK_FILE = "data/.instance.lock"
+DEFAULT_SOURCE_LOCKS_DIR = "data/.locks"
+
+
+def instance_lock_path(node_id: str = None) -> str:
+    """Файл блокировки экземпляра: общий или отдельный для узла кластера"""
+    if not node_id:
+        return DEFAULT_LOCK_FILE
+    name = re.sub(r'[^\w.-]+', '_', node_id)
+    return os.path.join(os.path.dirname(DEFAULT_LOCK_FILE), f".instance.{name}.lock")
+
+
+def _try_flock(fd: int) -> bool:
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+def _read_info(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.loads(f.read() or '{}')
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_info(fd: int, info: Dict[str, Any]) -> None:
+    data = json.dumps(info, ensure_ascii=False).encode('utf-8')
+    os.ftruncate(fd, 0)
+    os.pwrite(fd, data, 0)
+
+
+class InstanceLock:
+    """
+    Блокировка экземпляра программы
+
+    В файле блокировки хранятся PID, режим и время запуска владельца - их
+    выводит повторный запуск. Рядом лежит файл запросов (.requests): по
+    строке JSON на запрос опроса, переданный циклу --loop.
+    """
+
+    def __init__(self, path: str = DEFAULT_LOCK_FILE):
+        self.path = path
+        self.requests_path = f"{os.path.splitext(path)[0]}.requests"
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self, mode: str) -> bool:
+        """
+        Пытается получить блокировку без ожидания
+
+        Args:
+            mode: Режим запуска (loop, once) - виден повторным запускам
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not _try_flock(fd):
+            os.close(fd)
+            return False
+        _write_info(fd, {'pid': os.getpid(), 'mode': mode, 'started_at': time.time()})
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            os.ftruncate(self._fd, 0)
+            os.close(self._fd)
+            self._fd = None
+
+    def holder(self) -> Dict[str, Any]:
+        """PID, режим и время запуска процесса, держащего блокировку"""
+        return _read_info(self.path)
+
+    def submit_request(self, subscription: str = None, source: str = None) -> None:
+        """Передает циклу --loop запрос на немедленный опрос (все источники, если фильтры не заданы)"""
+        request = {'pid': os.getpid(), 'subscription': subscription, 'source': source, 'submitted_at': time.time()}
+        with open(self.requests_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(request, ensure_ascii=False) + '\n')
+
+    def has_requests(self) -> bool:
+        return os.path.exists(self.requests_path)
+
+    def take_requests(self) -> List[Dict[str, Any]]:
+        """Забирает переданные запросы (файл запросов удаляется)"""
+        if not self.has_requests():
+            return []
+        taken_path = f"{self.requests_path}.{os.getpid()}"
+        try:
+            os.replace(self.requests_path, taken_path)
+        except FileNotFoundError:
+            return []
+        requests = []
+        with open(taken_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    requests.append(json.loads(line))
+                except ValueError:
+                    logger.warning(f"⚠️  Неверный запрос в {self.requests_path}: {line.strip()}")
+        os.remove(taken_path)
+        return requests
+
+
+def describe_holder(info: Dict[str, Any]) -> str:
+    """Описание владельца блокировки для лога"""
+    if not info.get('pid'):
+        return "другой процесс"
+    started = info.get('started_at')
+    since = f", запущен {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started))}" if started else ''
+    return f"PID {info['pid']} (режим {info.get('mode', '?')}{since})"
+
+
+def _source_lock_path(directory: str, subscription: str, source: str) -> str:
+    name = re.sub(r'[^\w.-]+', '_', f"{subscription}__{source}")
+    return os.path.join(directory, f"{name}.lock")
+
+
+@contextmanager
+def source_lock(subscription: str, source: str, directory: str = DEFAULT_SOURCE_LOCKS_DIR):
+    """
+    Блокировка источника на время обработки
+
+    Возвращает True, если источник можно обрабатывать, и False, если его
+    уже обрабатывает другой процесс (это записывается в лог).
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = _source_lock_path(directory, subscription, source)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if not _try_flock(fd):
+            holder = _read_info(path)
+            logger.warning(f"⏭️  {subscription}/{source}: уже обрабатывается процессом {describe_holder(holder)}, пропускаем")
+            yield False
+            return
+        _write_info(fd, {'pid': os.getpid(), 'mode': 'source', 'started_at': time.time()})
+        yield True
+    finally:
+        os.close(fd)
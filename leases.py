@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Аренда источников для нескольких узлов с общей папкой data/ (секция cluster)
+
+Перед обработкой источника узел берет аренду в SQLite базе на общем томе.
+Аренда не выдается, пока ее держит другой узел и срок не истек, и пока с
+последней обработки источника любым узлом не прошел его check_interval -
+так каждый источник обрабатывается одним узлом за интервал. Пока аренда
+держится, фоновый поток продлевает ее (heartbeat); аренду умершего узла
+по истечении срока перехватывает другой узел.
+"""
+
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+from logging_setup import get_logger
+
+
+logger = get_logger('leases')
+
+DEFAULT_LEASES_FILE = "data/leases.db"
+DEFAULT_LEASE_TTL = 300  # секунды
+DEFAULT_HEARTBEAT_INTERVAL = 60  # секунды
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    subscription TEXT NOT NULL,
+    source TEXT NOT NULL,
+    owner TEXT,
+    acquired_at REAL,
+    expires_at REAL,
+    heartbeat_at REAL,
+    last_run_at REAL,
+    last_owner TEXT,
+    PRIMARY KEY (subscription, source)
+);
+CREATE INDEX IF NOT EXISTS idx_leases_owner ON leases(owner);
+"""
+
+
+def default_node_id() -> str:
+    """Имя узла по умолчанию: хост и PID"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@dataclass
+class Lease:
+    """Аренда источника текущим узлом"""
+    subscription: str
+    source: str
+    owner: str
+    expires_at: float
+    taken_over_from: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.subscription, self.source)
+
+
+class LeaseManager:
+    """
+    Аренда источников в SQLite базе на общем томе
+
+    Используется обычный журнал (не WAL): WAL требует общей памяти, которой
+    может не быть у узлов на разных файловых системах.
+
+    Args:
+        path: Путь к базе аренд
+        node_id: Имя узла (уникальное среди узлов)
+        ttl: Срок аренды без продления, секунды
+        heartbeat_interval: Период продления аренд, секунды (0 - без фонового потока)
+        clock: Источник времени (для тестов)
+    """
+
+    def __init__(self, path: str = DEFAULT_LEASES_FILE, node_id: str = None, ttl: float = DEFAULT_LEASE_TTL,
+                 heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL, clock=time.time):
+        self.path = path
+        self.node_id = node_id or default_node_id()
+        self.ttl = ttl
+        self.heartbeat_interval = heartbeat_interval
+        self._clock = clock
+        self._connection = None
+        self._lock = threading.RLock()
+        self._held: Dict[Tuple[str, str], Lease] = {}
+        self._stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            import sqlite3
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            if connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                connection.executescript(SCHEMA)
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._connection = connection
+        return self._connection
+
+    @contextmanager
+    def _transaction(self):
+        """Транзакция с блокировкой записи на время проверки и изменения аренды"""
+        with self._lock:
+            connection = self.connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def held(self) -> List[Lease]:
+        """Аренды, которые держит этот узел"""
+        with self._lock:
+            return list(self._held.values())
+
+    def acquire(self, subscription: str, source: str, interval: float = 0) -> Optional[Lease]:
+        """
+        Берет аренду источника
+
+        Args:
+            interval: Минимальный интервал между обработками источника любыми узлами, секунды
+
+        Returns:
+            Аренда или None, если источник обрабатывает другой узел или он уже обработан в этом интервале
+        """
+        now = self._clock()
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT owner, expires_at, last_run_at, last_owner FROM leases WHERE subscription = ? AND source = ?",
+                (subscription, source)).fetchone()
+            taken_over_from = None
+            if row is not None:
+                if row['owner'] and row['owner'] != self.node_id:
+                    if row['expires_at'] and row['expires_at'] > now:
+                        logger.info(f"⏭️  {subscription}/{source}: обрабатывается узлом {row['owner']}")
+                        return None
+                    taken_over_from = row['owner']
+                elif interval and row['last_run_at'] and now - row['last_run_at'] < interval:
+                    if row['last_owner'] != self.node_id:
+                        logger.info(f"⏭️  {subscription}/{source}: уже обработан узлом {row['last_owner']} "
+                                    f"{int(now - row['last_run_at'])} сек назад")
+                    return None
+            connection.execute(
+                """
+                INSERT INTO leases (subscription, source, owner, acquired_at, expires_at, heartbeat_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (subscription, source) DO UPDATE SET
+                    owner = excluded.owner, acquired_at = excluded.acquired_at,
+                    expires_at = excluded.expires_at, heartbeat_at = excluded.heartbeat_at
+                """,
+                (subscription, source, self.node_id, now, now + self.ttl, now))
+
+        if taken_over_from:
+            logger.warning(f"♻️  {subscription}/{source}: аренда узла {taken_over_from} истекла, перехвачена")
+        lease = Lease(subscription, source, self.node_id, now + self.ttl, taken_over_from)
+        with self._lock:
+            self._held[lease.key] = lease
+        self._start_heartbeat()
+        return lease
+
+    def release(self, lease: Lease) -> None:
+        """Освобождает аренду и отмечает время обработки источника"""
+        now = self._clock()
+        with self._lock:
+            self._held.pop(lease.key, None)
+        with self._transaction() as connection:
+            connection.execute(
+                """
+                UPDATE leases SET owner = NULL, expires_at = NULL, last_run_at = ?, last_owner = ?
+                WHERE subscription = ? AND source = ? AND owner = ?
+                """,
+                (now, self.node_id, lease.subscription, lease.source, self.node_id))
+
+    def heartbeat(self) -> int:
+        """
+        Продлевает все аренды узла
+
+        Returns:
+            Количество продленных аренд (аренды, перехваченные другими узлами, не продлеваются)
+        """
+        now = self._clock()
+        with self._lock:
+            if not self._held:
+                return 0
+            with self._transaction() as connection:
+                renewed = connection.execute(
+                    "UPDATE leases SET expires_at = ?, heartbeat_at = ? WHERE owner = ?",
+                    (now + self.ttl, now, self.node_id)).rowcount
+            for lease in self._held.values():
+                lease.expires_at = now + self.ttl
+        return renewed
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Состояние всех аренд (для manage_sources.py leases)"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT * FROM leases ORDER BY subscription, source").fetchall()
+        return [dict(row) for row in rows]
+
+    def _start_heartbeat(self) -> None:
+        if not self.heartbeat_interval or (self._heartbeat_thread and self._heartbeat_thread.is_alive()):
+            return
+        self._stop.clear()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name='lease-heartbeat', daemon=True)
+        self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.warning(f"⚠️  Не удалось продлить аренды в {self.path}: {e}")
+
+    def close(self) -> None:
+        """Останавливает продление и освобождает аренды узла"""
+        self._stop.set()
+        if self._heartbeat_thread:
+            self._heartbeat_thread.join()
+            self._heartbeat_thread = None
+        with self._lock:
+            if self._connection is not None:
+                for lease in list(self._held.values()):
+                    self.release(lease)
+                self._connection.close()
+                self._connection = None
+
+
+_manager: Optional[LeaseManager] = None
+
+
+def configured_node_id(settings: Dict[str, Any] = None) -> Optional[str]:
+    """Имя узла из секции cluster или переменной YOUTUBE2PODCAST_NODE_ID (None, если не задано)"""
+    return (settings or {}).get('node_id') or os.environ.get('YOUTUBE2PODCAST_NODE_ID')
+
+
+def setup_leases(settings: Dict[str, Any] = None) -> Optional[LeaseManager]:
+    """
+    Включает аренду источников по секции cluster конфигурации
+
+    Args:
+        settings: enabled, node_id, file, lease_ttl, heartbeat_interval
+
+    Returns:
+        Менеджер аренд или None, если работа в кластере отключена
+    """
+    global _manager
+    settings = settings or {}
+    if _manager is not None:
+        _manager.close()
+        _manager = None
+    if not settings.get('enabled', False):
+        return None
+
+    _manager = LeaseManager(settings.get('file') or DEFAULT_LEASES_FILE,
+                            configured_node_id(settings),
+                            settings.get('lease_ttl', DEFAULT_LEASE_TTL),
+                            settings.get('heartbeat_interval', DEFAULT_HEARTBEAT_INTERVAL))
+    logger.info(f"🔗 Работа в кластере: узел {_manager.node_id}, аренды в {_manager.path}")
+    return _manager
+
+
+@contextmanager
+def source_lease(subscription: str, source: str, interval: float = 0):
+    """
+    Аренда источника на время обработки
+
+    Возвращает True, если источник можно обрабатывать (аренда получена или
+    работа в кластере отключена), и False, если его обрабатывает другой узел.
+    Ошибка базы аренд не останавливает обработку.
+    """
+    if _manager is None:
+        yield True
+        return
+    try:
+        lease = _manager.acquire(subscription, source, interval)
+    except Exception as e:
+        logger.warning(f"⚠️  Не удалось получить аренду {subscription}/{source} в {_manager.path}: {e}")
+        yield True
+        return
+    if lease is None:
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        try:
+            _manager.release(lease)
+        except Exception as e:
+            logger.warning(f"⚠️  Не удалось освободить аренду {subscription}/{source}: {e}")
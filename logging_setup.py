@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Настройка логирования: консоль, ротация файла, JSON формат и замеры этапов
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Any, Callable, List
+
+
+LOGGER_NAME = "youtube2podcast"
+TIMING_LOGGER_NAME = f"{LOGGER_NAME}.timing"
+
+DEFAULT_TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Поля контекста (подписка, источник), добавляемые ко всем записям
+_log_context: contextvars.ContextVar = contextvars.ContextVar('log_context', default={})
+
+# Стандартные атрибуты LogRecord, которые не выводятся как дополнительные поля
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_SIZE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+# Подписчики на замеры этапов: observer(phase, seconds, status, fields)
+PhaseObserver = Callable[[str, float, str, Dict[str, Any]], None]
+_phase_observers: List[PhaseObserver] = []
+
+
+def get_logger(name: str = None) -> logging.Logger:
+    """Логгер приложения (дочерний для youtube2podcast)"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+
+def parse_size(value) -> int:
+    """
+    Переводит размер вида '10MB' в байты (число возвращается как есть)
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().upper()
+    for unit in ('GB', 'MB', 'KB', 'B'):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)].strip()) * _SIZE_UNITS[unit])
+    return int(text)
+
+
+@contextmanager
+def log_context(**fields):
+    """Добавляет поля ко всем записям лога внутри блока"""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Добавляет к записи поля текущего контекста (subscription, source)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class TimingFilter(logging.Filter):
+    """Скрывает записи замеров этапов (для консоли без -v)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not record.name.startswith(TIMING_LOGGER_NAME)
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON запись на строку с дополнительными полями записи"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class StdoutHandler(logging.StreamHandler):
+    """Вывод в текущий sys.stdout (учитывает его подмену, например в тестах)"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def _create_console_handler(level: int, formatter: logging.Formatter, show_timings: bool) -> logging.Handler:
+    handler = StdoutHandler()
+    handler.setLevel(level)
+    handler.setFormatter(formatter)
+    handler.addFilter(ContextFilter())
+    if not show_timings:
+        handler.addFilter(TimingFilter())
+    return handler
+
+
+def setup_logging(settings: Dict[str, Any] = None, verbosity: int = 0) -> logging.Logger:
+    """
+    Настраивает логирование по секции logging конфигурации
+
+    Args:
+        settings: Секция logging (level, format, file, max_size, backup_count, json, console_format)
+        verbosity: Уровень подробности консоли: -1 только предупреждения и ошибки,
+            0 уровень из конфигурации, 1 и выше - подробный вывод и замеры этапов
+
+    Returns:
+        Корневой логгер приложения
+    """
+    settings = settings or {}
+    level = logging.getLevelName(str(settings.get('level', 'INFO')).upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    if verbosity < 0:
+        console_level = logging.WARNING
+    elif verbosity > 0:
+        console_level = logging.DEBUG
+    else:
+        console_level = level
+
+    logger = get_logger()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.propagate = False
+
+    console_formatter = JsonFormatter() if settings.get('console_format') == 'json' else logging.Formatter("%(message)s")
+    logger.addHandler(_create_console_handler(console_level, console_formatter, show_timings=verbosity > 0))
+    handler_levels = [console_level]
+
+    log_file = settings.get('file')
+    if log_file:
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            log_file,
+            maxBytes=parse_size(settings.get('max_size', '10MB')),
+            backupCount=int(settings.get('backup_count', 5)),
+            encoding='utf-8'
+        )
+        file_handler.setLevel(level)
+        if settings.get('json'):
+            file_handler.setFormatter(JsonFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter(settings.get('format', DEFAULT_TEXT_FORMAT)))
+        file_handler.addFilter(ContextFilter())
+        logger.addHandler(file_handler)
+        handler_levels.append(level)
+
+    logger.setLevel(min(handler_levels))
+    return logger
+
+
+def add_phase_observer(observer: PhaseObserver) -> None:
+    """Подписаться на замеры этапов (метрики, история запусков)"""
+    if observer not in _phase_observers:
+        _phase_observers.append(observer)
+
+
+def remove_phase_observer(observer: PhaseObserver) -> None:
+    """Отписаться от замеров этапов"""
+    if observer in _phase_observers:
+        _phase_observers.remove(observer)
+
+
+def record_phase(phase: str, seconds: float, status: str = 'ok', **fields) -> None:
+    """
+    Записывает длительность этапа обработки в лог и передает подписчикам
+
+    Подписчики получают поля замера вместе с полями текущего контекста (subscription, source).
+    """
+    get_logger('timing').info(
+        f"⏱️  {phase}: {seconds:.2f} сек",
+        extra={'phase': phase, 'duration_ms': round(seconds * 1000, 1), 'status': status, **fields}
+    )
+    if _phase_observers:
+        observed_fields = {**_log_context.get(), **fields}
+        for observer in list(_phase_observers):
+            try:
+                observer(phase, seconds, status, observed_fields)
+            except Exception:
+                get_logger().exception(f"Ошибка обработчика замера этапа {phase}")
+
+
+@contextmanager
+def phase_timer(phase: str, **fields):
+    """
+    Замеряет длительность этапа (list, metadata, availability, download, transcode, rss)
+
+    Пример:
+        with phase_timer('list', url=source.url):
+            info = ydl.extract_info(source.url, download=False)
+    """
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        yield
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        record_phase(phase, time.perf_counter() - start, status, **fields)
+
+
+# До вызова setup_logging (например, в тестовых скриптах) сообщения уровня INFO
+# выводятся в консоль так же, как раньше выводились через print()
+if not get_logger().handlers:
+    _default_logger = get_logger()
+    _default_logger.addHandler(_create_console_handler(logging.INFO, logging.Formatter("%(message)s"), show_timings=False))
+    _default_logger.setLevel(logging.INFO)
+    _default_logger.propagate = False
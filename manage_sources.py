@@ -3,32 +3,73 @@
 Утилита для управления источниками YouTube2Podcast
 """
 
+import os
 import sys
+import re
+import csv
+import time
 import argparse
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+from urllib.parse import urlparse, parse_qs
 from config import (
     Source, SourceType, Subscription, get_enabled_sources, get_enabled_subscriptions, get_source_by_name,
     add_source, remove_source, enable_source, disable_source, list_sources,
-    add_subscription, remove_subscription, enable_subscription, disable_subscription, list_subscriptions
+    add_subscription, remove_subscription, enable_subscription, disable_subscription, list_subscriptions,
+    set_config_file, config_manager
 )
 
+if TYPE_CHECKING:
+    from history import RunHistory
+
+
+# Колонки CSV при импорте/экспорте источников
+CSV_FIELDS = ['name', 'url', 'type', 'subscription', 'enabled', 'custom_title', 'custom_description',
+              'check_interval', 'max_videos', 'category', 'author']
+
+
+def print_sources(sources, breakers: Dict[tuple, Dict[str, Any]] = None):
+    """
+    Выводит список источников в табличном формате
+    
+    Args:
+        sources: Источники из list_sources()
+        breakers: Состояние выключателей по (подписка, источник): источники на паузе
+                  после неудач подряд и недоступные источники отмечаются в статусе
+    """
+    from breaker import CLOSED
 
-def print_sources(sources):
-    """Выводит список источников в табличном формате"""
     if not sources:
         print("❌ Нет источников")
         return
+    breakers = breakers or {}
     
     print(f"\n📋 Найдено {len(sources)} источников:")
     print("=" * 120)
     print(f"{'Имя':<20} {'Подписка':<15} {'Тип':<10} {'Статус':<8} {'Интервал':<8} {'Макс.видео':<10} {'URL'}")
     print("-" * 120)
     
+    dead = []
     for source in sources:
         status = "✅ Активен" if source['enabled'] else "❌ Отключен"
         subscription = source.get('subscription', 'N/A')
+        breaker = breakers.get((subscription, source['name']))
+        if breaker and breaker['url'] == source['url']:
+            if breaker['dead']:
+                status = "💀 Недоступен"
+                dead.append((f"{subscription}/{source['name']}", breaker))
+            elif breaker['state'] != CLOSED:
+                status = "⛔ Пауза"
         print(f"{source['name']:<20} {subscription:<15} {source['type']:<10} {status:<8} {source['check_interval']:<8} {source['max_videos']:<10} {source['url']}")
     
     print("=" * 120)
+    if dead:
+        print(f"💀 Недоступные источники ({len(dead)}) - проверьте URL или отключите их:")
+        for name, breaker in dead:
+            print(f"   - {name}: {breaker['failures']} неудач подряд, последняя ошибка {breaker['last_error'] or '-'}, "
+                  f"следующая проверка {_format_time(breaker['open_until'])}")
 
 
 def print_subscriptions(subscriptions):
@@ -50,6 +91,459 @@ def print_subscriptions(subscriptions):
     print("=" * 100)
 
 
+def _format_time(timestamp: Optional[float]) -> str:
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M') if timestamp else '-'
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    return f"{seconds:.1f}с" if seconds is not None else '-'
+
+
+def load_breakers() -> Dict[tuple, Dict[str, Any]]:
+    """Состояние выключателей источников из секции breaker конфигурации"""
+    from breaker import open_breakers, DEFAULT_BREAKER_FILE
+
+    settings = config_manager.config.breaker_settings
+    if not os.path.exists(settings.get('file') or DEFAULT_BREAKER_FILE):
+        return {}
+    breakers = open_breakers(settings)
+    try:
+        return {(row['subscription'], row['source']): row for row in breakers.snapshot()}
+    finally:
+        breakers.close()
+
+
+def open_history() -> Optional['RunHistory']:
+    """История запусков из секции history конфигурации (None, если записей еще нет)"""
+    from history import RunHistory, DEFAULT_HISTORY_FILE
+
+    path = config_manager.config.history_settings.get('file') or DEFAULT_HISTORY_FILE
+    if not os.path.exists(path):
+        return None
+    return RunHistory(path)
+
+
+def print_status(rows: List[Dict[str, Any]]):
+    """Выводит последний результат каждого источника"""
+    if not rows:
+        print("❌ История запусков пуста")
+        return
+    
+    print(f"\n📊 Последние результаты {len(rows)} источников:")
+    print("=" * 120)
+    print(f"{'Подписка/источник':<35} {'Запуск':<17} {'Статус':<10} {'Время':<8} {'Успех':<17} {'Ошибок':<7} {'Видео / ошибка'}")
+    print("-" * 120)
+    
+    for row in rows:
+        status = "✅ OK" if row['success'] else "❌ Ошибка"
+        details = (row['video_title'] if row['success'] else row['error_class']) or ''
+        name = f"{row['subscription']}/{row['source']}"
+        print(f"{name:<35} {_format_time(row['started_at']):<17} {status:<10} {_format_seconds(row['duration']):<8} "
+              f"{_format_time(row['last_success_at']):<17} {row['consecutive_failures']:<7} {details}")
+    
+    print("=" * 120)
+
+
+def print_leases(rows: List[Dict[str, Any]]):
+    """Выводит аренды источников узлами кластера"""
+    if not rows:
+        print("❌ Аренд нет")
+        return
+    
+    now = time.time()
+    print(f"\n🔗 Аренды {len(rows)} источников:")
+    print("=" * 120)
+    print(f"{'Подписка/источник':<35} {'Узел':<25} {'Истекает через':<15} {'Посл. обработка':<17} {'Посл. узел'}")
+    print("-" * 120)
+    
+    for row in rows:
+        name = f"{row['subscription']}/{row['source']}"
+        if row['owner']:
+            remaining = row['expires_at'] - now
+            expires = _format_seconds(remaining) if remaining > 0 else "истекла"
+        else:
+            expires = ''
+        print(f"{name:<35} {row['owner'] or '-':<25} {expires:<15} {_format_time(row['last_run_at']):<17} "
+              f"{row['last_owner'] or '-'}")
+    
+    print("=" * 120)
+
+
+def print_cache(stats: Dict[str, Any]):
+    """Выводит размер и возраст кеша yt-dlp"""
+    if not stats['files']:
+        print(f"❌ Кеш yt-dlp {stats['path']} пуст")
+        return
+    
+    age = time.time() - stats['newest']
+    print(f"\n🗄️  Кеш yt-dlp {stats['path']}:")
+    print(f"   Файлов: {stats['files']}, размер: {stats['size'] / 1024:.0f} КБ")
+    print(f"   Обновлен: {_format_time(stats['newest'])} ({age / 3600:.1f} ч назад), "
+          f"самый старый файл: {_format_time(stats['oldest'])}")
+    for section, count in sorted(stats['sections'].items()):
+        print(f"   - {section}: {count}")
+
+
+def print_daemon_status(status: Dict[str, Any]):
+    """Выводит состояние работающего цикла --loop"""
+    state = "⏸️  на паузе" if status['paused'] else "▶️  работает"
+    print(f"\n🎛️  Цикл ({status['mode']}) {state}, работает {_format_seconds(status['uptime'])}")
+    print(f"   Источников в расписании: {status['scheduled']}, обработчиков: {status['workers']}")
+    last = status.get('last_iteration')
+    if last:
+        print(f"   Последняя итерация: {_format_time(last['finished_at'])}, "
+              f"успешно {last['succeeded']}/{last['sources']}")
+    if status['pending_polls']:
+        print(f"   Запросов на опрос в очереди: {status['pending_polls']}")
+    
+    print(f"\n⚙️  Выполняются ({len(status['active'])}):")
+    for item in status['active']:
+        print(f"   - {item['subscription']}/{item['source']} ({_format_seconds(item['running_for'])})")
+    print(f"⏳ В очереди ({len(status['queue'])}):")
+    for item in status['queue']:
+        print(f"   - {item['subscription']}/{item['source']} (ждет {_format_seconds(item['waiting_for'])})")
+    if status['next_run_in'] is not None:
+        print(f"⏰ Следующий опрос через {_format_seconds(status['next_run_in'])}")
+
+
+def print_report(report: Dict[str, Any], period: str):
+    """Выводит сводку истории за период: медленные и нестабильные источники первыми"""
+    iterations = report['iterations']
+    print(f"\n📈 Отчет за {period} (с {_format_time(report['since'])}):")
+    print(f"   Итераций: {iterations['count']}, средняя длительность: {_format_seconds(iterations['avg_duration'])}, "
+          f"успешно источников: {iterations['succeeded'] or 0}/{iterations['sources'] or 0}")
+    if not report['sources']:
+        print("❌ Нет запусков источников за период")
+        return
+    
+    print("=" * 120)
+    print(f"{'Подписка/источник':<35} {'Запусков':<9} {'Ошибок':<7} {'Сред.':<8} {'Макс.':<8} {'МБ':<8} {'Посл. ошибка':<18} {'Этапы (сред.)'}")
+    print("-" * 120)
+    
+    for item in report['sources']:
+        name = f"{item['subscription']}/{item['source']}"
+        phases = ', '.join(f"{phase} {_format_seconds(seconds)}" for phase, seconds in sorted(item['phases'].items()))
+        megabytes = (item['bytes'] or 0) / 1024 / 1024
+        print(f"{name:<35} {item['runs']:<9} {item['failures']:<7} {_format_seconds(item['avg_duration']):<8} "
+              f"{_format_seconds(item['max_duration']):<8} {megabytes:<8.1f} {item['last_error_class'] or '-':<18} {phases}")
+    
+    print("=" * 120)
+
+
+def detect_source_type(url: str) -> Optional[SourceType]:
+    """Определяет тип источника по URL (None, если определить не удалось)"""
+    if "playlist" in url or "list=" in url:
+        return SourceType.PLAYLIST
+    if "@" in url or "channel" in url or "/c/" in url or "/user/" in url:
+        return SourceType.CHANNEL
+    return None
+
+
+def normalize_youtube_url(url: str) -> str:
+    """
+    Преобразует ссылку на RSS ленту YouTube (из экспорта подписок) в ссылку на канал или плейлист
+    """
+    parsed = urlparse(url)
+    if parsed.path.endswith('/feeds/videos.xml'):
+        query = parse_qs(parsed.query)
+        if 'channel_id' in query:
+            return f"https://www.youtube.com/channel/{query['channel_id'][0]}"
+        if 'playlist_id' in query:
+            return f"https://www.youtube.com/playlist?list={query['playlist_id'][0]}"
+    return url
+
+
+def make_source_name(title: str, taken: set) -> str:
+    """Формирует уникальное имя источника из названия"""
+    base = re.sub(r'\W+', '_', title.strip().lower()).strip('_') or 'source'
+    name = base
+    counter = 2
+    while name in taken:
+        name = f"{base}_{counter}"
+        counter += 1
+    taken.add(name)
+    return name
+
+
+def read_opml_sources(path: str) -> List[Dict[str, Any]]:
+    """
+    Читает источники из OPML файла (например, экспорт подписок YouTube)
+    
+    Returns:
+        Список словарей с ключами title и url
+    """
+    import xml.etree.ElementTree as ET
+    
+    tree = ET.parse(path)
+    entries = []
+    for outline in tree.iter('outline'):
+        url = outline.get('xmlUrl') or outline.get('htmlUrl') or outline.get('url')
+        if not url:
+            continue
+        entries.append({
+            'title': outline.get('title') or outline.get('text') or '',
+            'url': normalize_youtube_url(url),
+        })
+    return entries
+
+
+def read_csv_sources(path: str) -> List[Dict[str, Any]]:
+    """
+    Читает источники из CSV файла с заголовком (обязательна колонка url)
+    
+    Returns:
+        Список словарей с колонками файла
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        if not reader.fieldnames or 'url' not in reader.fieldnames:
+            raise ValueError("CSV файл должен содержать заголовок с колонкой 'url'")
+        entries = []
+        for row in reader:
+            row = {key: (value or '').strip() for key, value in row.items() if key}
+            if row.get('url'):
+                row['url'] = normalize_youtube_url(row['url'])
+                entries.append(row)
+    return entries
+
+
+def validate_source_url(url: str) -> Optional[str]:
+    """
+    Проверяет, что URL источника открывается через yt-dlp
+    
+    yt-dlp создается через create_ydl: проверка использует постоянный кеш
+    yt-dlp и режимы записи/воспроизведения (см. ytdlp_cache.py, replay.py).
+    
+    Returns:
+        None если источник доступен, иначе текст ошибки
+    """
+    from multi_downloader import create_ydl
+    
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': True,
+        'playlist_items': '1',
+    }
+    try:
+        with create_ydl(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+        if not info:
+            return "нет данных"
+        return None
+    except Exception as e:
+        return str(e)
+
+
+def validate_urls(urls: List[str], workers: int = 8) -> Dict[str, Optional[str]]:
+    """
+    Параллельно проверяет URL источников
+    
+    Returns:
+        Словарь {url: текст ошибки или None}
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(unique_urls)))) as executor:
+        return dict(zip(unique_urls, executor.map(validate_source_url, unique_urls)))
+
+
+def source_from_entry(entry: Dict[str, Any]) -> Source:
+    """
+    Создает источник из строки CSV или записи OPML
+    
+    Raises:
+        ValueError: Неверный тип источника или число в колонках
+    """
+    source_type = entry.get('type') or None
+    source_type = SourceType(source_type) if source_type else detect_source_type(entry['url']) or SourceType.CHANNEL
+    kwargs = {
+        'enabled': entry.get('enabled', '').lower() not in ('false', '0', 'no'),
+        'custom_title': entry.get('custom_title') or entry.get('title') or None,
+        'custom_description': entry.get('custom_description') or None,
+    }
+    for key in ('check_interval', 'max_videos'):
+        if entry.get(key):
+            kwargs[key] = int(entry[key])
+    for key in ('category', 'author'):
+        if entry.get(key):
+            kwargs[key] = entry[key]
+    return Source(name=entry['name'], url=entry['url'], source_type=source_type, **kwargs)
+
+
+def import_sources(path: str, file_format: str = None, subscription_name: str = None,
+                   validate: bool = True, workers: int = 8) -> Dict[str, int]:
+    """
+    Импортирует источники из OPML или CSV файла одной записью конфигурации
+    
+    Все изменения применяются в памяти, конфигурация сохраняется один раз.
+    Источники с уже существующими именами или URL пропускаются.
+    
+    Args:
+        path: Путь к файлу
+        file_format: opml или csv (по умолчанию - по расширению файла)
+        subscription_name: Подписка для источников без явно указанной подписки
+        validate: Проверять URL через yt-dlp перед импортом
+        workers: Количество параллельных проверок
+        
+    Returns:
+        Статистика: added, skipped, invalid
+    """
+    file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'opml')
+    entries = read_csv_sources(path) if file_format == 'csv' else read_opml_sources(path)
+    
+    existing = config_manager.list_sources()
+    taken_names = {source['name'] for source in existing}
+    taken_urls = {source['url'] for source in existing}
+    stats = {'added': 0, 'skipped': 0, 'invalid': 0}
+    
+    candidates = []
+    for entry in entries:
+        if entry['url'] in taken_urls:
+            print(f"⏭️  Уже есть: {entry['url']}")
+            stats['skipped'] += 1
+            continue
+        if entry.get('name'):
+            if entry['name'] in taken_names:
+                print(f"⏭️  Имя '{entry['name']}' уже занято: {entry['url']}")
+                stats['skipped'] += 1
+                continue
+            taken_names.add(entry['name'])
+        else:
+            entry['name'] = make_source_name(entry.get('title') or entry['url'], taken_names)
+        taken_urls.add(entry['url'])
+        candidates.append(entry)
+    
+    if validate and candidates:
+        print(f"🔍 Проверка {len(candidates)} URL ({workers} потоков)...")
+        errors = validate_urls([entry['url'] for entry in candidates], workers)
+        valid = []
+        for entry in candidates:
+            error = errors.get(entry['url'])
+            if error:
+                print(f"❌ {entry['name']}: {entry['url']} - {error}")
+                stats['invalid'] += 1
+            else:
+                valid.append(entry)
+        candidates = valid
+    
+    with config_manager.batch():
+        for entry in candidates:
+            try:
+                source = source_from_entry(entry)
+            except ValueError as e:
+                # Одна неверная строка не отменяет импорт остальных
+                print(f"❌ {entry['name']}: {entry['url']} - {e}")
+                stats['invalid'] += 1
+                continue
+            
+            config_manager.add_source(source, entry.get('subscription') or subscription_name)
+            print(f"➕ {entry['name']}: {entry['url']}")
+            stats['added'] += 1
+    
+    return stats
+
+
+def export_sources(path: str, file_format: str = None) -> int:
+    """
+    Экспортирует все источники в OPML или CSV файл
+    
+    Returns:
+        Количество экспортированных источников
+    """
+    file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'opml')
+    sources = config_manager.list_sources()
+    
+    if file_format == 'csv':
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for source in sources:
+                writer.writerow({key: '' if source.get(key) is None else source.get(key) for key in CSV_FIELDS})
+    else:
+        import xml.etree.ElementTree as ET
+        
+        opml = ET.Element('opml', version='2.0')
+        head = ET.SubElement(opml, 'head')
+        ET.SubElement(head, 'title').text = 'YouTube2Podcast sources'
+        body = ET.SubElement(opml, 'body')
+        groups = {}
+        for source in sources:
+            group = groups.get(source['subscription'])
+            if group is None:
+                group = ET.SubElement(body, 'outline', text=source['subscription'], title=source['subscription'])
+                groups[source['subscription']] = group
+            ET.SubElement(group, 'outline', type='link', text=source['custom_title'] or source['name'],
+                          title=source['name'], htmlUrl=source['url'])
+        tree = ET.ElementTree(opml)
+        ET.indent(tree, space='  ')
+        tree.write(path, encoding='utf-8', xml_declaration=True)
+    
+    return len(sources)
+
+
+def set_sources_enabled(pattern: str, enabled: bool, subscription_name: str = None) -> List[str]:
+    """
+    Включает или отключает все источники, имя или URL которых подходит под шаблон
+    
+    Args:
+        pattern: Шаблон в стиле shell (например, 'news_*')
+        enabled: Новое состояние
+        subscription_name: Ограничить изменения одной подпиской
+        
+    Returns:
+        Имена измененных источников
+    """
+    changed = []
+    with config_manager.batch():
+        for subscription in config_manager.config.subscriptions:
+            if subscription_name and subscription.name != subscription_name:
+                continue
+            for source in subscription.sources:
+                if source.enabled == enabled:
+                    continue
+                if fnmatch.fnmatchcase(source.name, pattern) or fnmatch.fnmatchcase(source.url, pattern):
+                    source.enabled = enabled
+                    changed.append(source.name)
+        if changed:
+            config_manager.invalidate_indexes()
+            config_manager.save_config()
+    return changed
+
+
+def run_control_command(args) -> None:
+    """Выполняет команду API управления работающим циклом --loop"""
+    from control import ControlClient
+
+    client = ControlClient.from_settings(config_manager.config.control_settings)
+    
+    if args.command == 'poll':
+        code, data = client.poll(args.subscription, args.source)
+        if code != 202:
+            raise ValueError(data.get('error', f"HTTP {code}"))
+        note = " (цикл на паузе, опрос начнется после resume)" if data.get('paused') else ''
+        print(f"✅ Опрос запрошен: {data['matched']} источников{note}")
+    
+    elif args.command in ('pause', 'resume'):
+        getattr(client, args.command)()
+        print("✅ Цикл приостановлен" if args.command == 'pause' else "✅ Цикл возобновлен")
+    
+    elif args.command == 'daemon-status':
+        print_daemon_status(client.status()[1])
+    
+    else:
+        code, health = client.health()
+        since = _format_seconds(health.get('seconds_since_success'))
+        last = f"успешная итерация {since} назад" if health.get('last_success_at') else f"успешных итераций нет, запущен {since} назад"
+        if code == 200:
+            paused = ", на паузе" if health.get('paused') else ''
+            print(f"✅ Исправен: {last}{paused}")
+        else:
+            print(f"❌ Неисправен: {last} (допустимо {_format_seconds(health.get('max_age'))})")
+            sys.exit(1)
+
+
 def add_source_interactive():
     """Интерактивное добавление источника"""
     print("\n➕ Добавление нового источника")
@@ -67,11 +561,8 @@ def add_source_interactive():
         return
     
     # Определяем тип источника
-    if "playlist" in url:
-        source_type = SourceType.PLAYLIST
-    elif "@" in url or "channel" in url:
-        source_type = SourceType.CHANNEL
-    else:
+    source_type = detect_source_type(url)
+    if source_type is None:
         print("❌ Не удалось определить тип источника. Укажите явно:")
         print("1. Плейлист")
         print("2. Канал")
@@ -161,9 +652,18 @@ def main():
   python manage_sources.py disable-subscription news_politics  # Отключить подписку
   python manage_sources.py remove-subscription news_politics  # Удалить подписку
   python manage_sources.py add-source "test" "https://youtube.com/..." playlist  # Добавить программно
+  python manage_sources.py import subscriptions.opml --subscription news  # Импорт из OPML/CSV
+  python manage_sources.py export sources.csv      # Экспорт источников в CSV/OPML
+  python manage_sources.py bulk-disable "news_*"   # Отключить источники по шаблону
+  python manage_sources.py status                  # Последний результат каждого источника
+  python manage_sources.py report --since 24h      # Сводка по истории запусков за сутки
+  python manage_sources.py poll --source news      # Опросить источник в работающем --loop сейчас
+  python manage_sources.py daemon-status           # Очередь и выполняющиеся источники --loop
         """
     )
     
+    parser.add_argument('--config', help='Путь к файлу конфигурации (по умолчанию config.yaml)')
+    
     subparsers = parser.add_subparsers(dest='command', help='Доступные команды')
     
     # Команда list
@@ -212,16 +712,55 @@ def main():
     remove_subscription_parser = subparsers.add_parser('remove-subscription', help='Удалить подписку')
     remove_subscription_parser.add_argument('name', help='Имя подписки')
     
+    # Команда import
+    import_parser = subparsers.add_parser('import', help='Импорт источников из OPML или CSV одной записью')
+    import_parser.add_argument('file', help='Путь к OPML или CSV файлу')
+    import_parser.add_argument('--format', choices=['opml', 'csv'], help='Формат файла (по умолчанию по расширению)')
+    import_parser.add_argument('--subscription', help='Подписка для импортируемых источников')
+    import_parser.add_argument('--no-validate', action='store_true', help='Не проверять URL через yt-dlp')
+    import_parser.add_argument('--workers', type=int, default=8, help='Количество параллельных проверок URL')
+    
+    # Команда export
+    export_parser = subparsers.add_parser('export', help='Экспорт источников в OPML или CSV')
+    export_parser.add_argument('file', help='Путь к файлу')
+    export_parser.add_argument('--format', choices=['opml', 'csv'], help='Формат файла (по умолчанию по расширению)')
+    
+    # Команды bulk-enable / bulk-disable
+    for command, help_text in (('bulk-enable', 'Включить источники по шаблону'),
+                               ('bulk-disable', 'Отключить источники по шаблону')):
+        bulk_parser = subparsers.add_parser(command, help=help_text)
+        bulk_parser.add_argument('pattern', help="Шаблон имени или URL источника, например 'news_*'")
+        bulk_parser.add_argument('--subscription', help='Ограничить одной подпиской')
+    
+    # Команды истории запусков
+    subparsers.add_parser('status', help='Последний результат обработки каждого источника')
+    report_parser = subparsers.add_parser('report', help='Сводка по истории запусков за период')
+    report_parser.add_argument('--since', default='24h', help='Период: 30m, 24h, 7d (по умолчанию 24h)')
+    subparsers.add_parser('leases', help='Аренды источников узлами кластера (секция cluster)')
+    subparsers.add_parser('cache', help='Размер и возраст кеша yt-dlp (секция ytdlp_cache)')
+    
+    # Команды API управления работающим циклом --loop (секция control)
+    poll_parser = subparsers.add_parser('poll', help='Немедленный опрос в работающем --loop')
+    poll_parser.add_argument('--subscription', help='Только источники подписки')
+    poll_parser.add_argument('--source', help='Только источник с этим именем')
+    subparsers.add_parser('pause', help='Приостановить запуск новых источников в --loop')
+    subparsers.add_parser('resume', help='Возобновить --loop после паузы')
+    subparsers.add_parser('daemon-status', help='Очередь и выполняющиеся источники --loop')
+    subparsers.add_parser('health', help='Проверка /healthz работающего --loop (код выхода 1, если неисправен)')
+    
     args = parser.parse_args()
     
     if not args.command:
         parser.print_help()
         return
     
+    if args.config:
+        set_config_file(args.config)
+    
     try:
         if args.command == 'list':
             sources = list_sources()
-            print_sources(sources)
+            print_sources(sources, load_breakers())
             
         elif args.command == 'list-subscriptions':
             subscriptions = list_subscriptions()
@@ -269,6 +808,58 @@ def main():
         elif args.command == 'remove-subscription':
             remove_subscription(args.name)
             print(f"✅ Подписка '{args.name}' удалена")
+        
+        elif args.command == 'import':
+            if not args.no_validate:
+                # Проверка URL через yt-dlp использует постоянный кеш, как и загрузчик
+                from ytdlp_cache import setup_ytdlp_cache
+                setup_ytdlp_cache(config_manager.config.ytdlp_cache_settings)
+            stats = import_sources(args.file, args.format, args.subscription,
+                                   validate=not args.no_validate, workers=args.workers)
+            print(f"✅ Импорт завершен: добавлено {stats['added']}, пропущено {stats['skipped']}, "
+                  f"с ошибками {stats['invalid']}")
+            
+        elif args.command == 'export':
+            count = export_sources(args.file, args.format)
+            print(f"✅ Экспортировано {count} источников в {args.file}")
+            
+        elif args.command in ('bulk-enable', 'bulk-disable'):
+            enabled = args.command == 'bulk-enable'
+            changed = set_sources_enabled(args.pattern, enabled, args.subscription)
+            action = "включено" if enabled else "отключено"
+            print(f"✅ Источников {action}: {len(changed)}")
+            for name in changed:
+                print(f"   - {name}")
+        
+        elif args.command in ('status', 'report'):
+            history = open_history()
+            if history is None:
+                print("❌ История запусков пуста")
+            elif args.command == 'status':
+                print_status(history.status())
+            else:
+                from history import parse_duration
+                print_report(history.report(time.time() - parse_duration(args.since)), args.since)
+        
+        elif args.command == 'leases':
+            from leases import LeaseManager, DEFAULT_LEASES_FILE
+            path = config_manager.config.cluster_settings.get('file') or DEFAULT_LEASES_FILE
+            if not os.path.exists(path):
+                print("❌ Аренд нет")
+            else:
+                print_leases(LeaseManager(path, heartbeat_interval=0).snapshot())
+        
+        elif args.command == 'cache':
+            from ytdlp_cache import cache_stats, DEFAULT_CACHE_DIR
+            print_cache(cache_stats(config_manager.config.ytdlp_cache_settings.get('dir') or DEFAULT_CACHE_DIR))
+        
+        elif args.command in ('poll', 'pause', 'resume', 'daemon-status', 'health'):
+            from control import ControlError
+            try:
+                run_control_command(args)
+            except ControlError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
             
     except ValueError as e:
         print(f"❌ Ошибка: {e}")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Контроль памяти в режиме --loop: рост выделений между итерациями (tracemalloc),
+пиковый RSS и перезапуск процесса при превышении потолка памяти
+"""
+
+import os
+import sys
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+from logging_setup import get_logger, parse_size
+
+
+logger = get_logger('memory')
+
+DEFAULT_TOP = 10
+DEFAULT_FRAMES = 1
+
+# Переменная окружения с числом перезапусков по потолку памяти
+RESTART_COUNT_ENV = "YOUTUBE2PODCAST_MEMORY_RESTARTS"
+
+
+def current_rss() -> Optional[int]:
+    """Текущий RSS процесса в байтах (Linux, /proc/self/statm)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss() -> Optional[int]:
+    """Пиковый RSS процесса в байтах"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux возвращает килобайты, macOS - байты
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def format_bytes(size: float) -> str:
+    """Размер в удобных единицах (со знаком для приростов)"""
+    sign = '-' if size < 0 else ''
+    size = abs(size)
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{sign}{size:.0f} {unit}" if unit == 'B' else f"{sign}{size:.1f} {unit}"
+        size /= 1024
+    return f"{sign}{size:.2f} GB"
+
+
+@dataclass
+class AllocationDiff:
+    """Изменение выделенной памяти в одном месте кода"""
+    location: str
+    size_diff: int
+    size: int
+    count_diff: int
+
+
+@dataclass
+class MemoryReport:
+    """Состояние памяти после итерации"""
+    iteration: int
+    rss: Optional[int]
+    peak_rss: Optional[int]
+    traced_current: Optional[int] = None
+    traced_peak: Optional[int] = None
+    top_diffs: List[AllocationDiff] = field(default_factory=list)
+    ceiling_exceeded: bool = False
+
+    def format(self) -> str:
+        """Текст отчета для вывода одним блоком"""
+        parts = [f"🧠 Память после итерации {self.iteration}:"]
+        if self.rss is not None:
+            parts.append(f"RSS {format_bytes(self.rss)}")
+        if self.peak_rss is not None:
+            parts.append(f"пик RSS {format_bytes(self.peak_rss)}")
+        if self.traced_current is not None:
+            parts.append(f"tracemalloc {format_bytes(self.traced_current)} (пик {format_bytes(self.traced_peak)})")
+        lines = [f"{parts[0]} {', '.join(parts[1:])}"]
+        for diff in self.top_diffs:
+            lines.append(f"   {format_bytes(diff.size_diff):>10} ({diff.count_diff:+d} блоков, всего "
+                         f"{format_bytes(diff.size)})  {diff.location}")
+        return '\n'.join(lines)
+
+
+class MemoryProbe:
+    """
+    Замер памяти в конце каждой итерации main_loop
+
+    С enabled: true включается tracemalloc и после итерации выводятся места
+    выделения памяти с наибольшим ростом относительно предыдущей итерации.
+    Потолок max_rss проверяется и без tracemalloc (это дешево): при превышении
+    main_loop перезапускает процесс через restart().
+    """
+
+    def __init__(self, settings: Dict[str, Any] = None):
+        settings = settings or {}
+        self.enabled = bool(settings.get('enabled', False))
+        self.top = int(settings.get('top', DEFAULT_TOP))
+        self.frames = int(settings.get('frames', DEFAULT_FRAMES))
+        max_rss = settings.get('max_rss')
+        self.max_rss = parse_size(max_rss) if max_rss else None
+        self.iteration = 0
+        self._snapshot = None
+
+    @property
+    def active(self) -> bool:
+        return self.enabled or self.max_rss is not None
+
+    def start(self) -> None:
+        """Включает tracemalloc и запоминает исходный снимок"""
+        if not self.enabled:
+            return
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._snapshot = self._take_snapshot()
+        limit = f", потолок RSS {format_bytes(self.max_rss)}" if self.max_rss else ""
+        logger.info(f"🧠 Контроль памяти включен (tracemalloc, {self.frames} кадр(ов) стека{limit})")
+
+    def stop(self) -> None:
+        if self.enabled:
+            import tracemalloc
+
+            tracemalloc.stop()
+            self._snapshot = None
+
+    def _take_snapshot(self):
+        import tracemalloc
+
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def check(self) -> MemoryReport:
+        """
+        Снимает состояние памяти после итерации и выводит отчет
+
+        Returns:
+            Отчет; ceiling_exceeded означает, что процесс пора перезапустить
+        """
+        self.iteration += 1
+        report = MemoryReport(iteration=self.iteration, rss=current_rss(), peak_rss=peak_rss())
+
+        if self.enabled:
+            import tracemalloc
+
+            report.traced_current, report.traced_peak = tracemalloc.get_traced_memory()
+            snapshot = self._take_snapshot()
+            if self._snapshot is not None:
+                for stat in snapshot.compare_to(self._snapshot, 'lineno')[:self.top]:
+                    frame = stat.traceback[0]
+                    report.top_diffs.append(AllocationDiff(
+                        f"{frame.filename}:{frame.lineno}", stat.size_diff, stat.size, stat.count_diff))
+            self._snapshot = snapshot
+            tracemalloc.reset_peak()
+
+        rss = report.rss if report.rss is not None else report.peak_rss
+        report.ceiling_exceeded = self.max_rss is not None and rss is not None and rss > self.max_rss
+
+        if self.enabled:
+            logger.info(report.format())
+        if report.ceiling_exceeded:
+            logger.warning(f"⚠️  RSS {format_bytes(rss)} превышает потолок {format_bytes(self.max_rss)}")
+        return report
+
+    def restart(self) -> None:
+        """Перезапускает процесс с теми же аргументами (os.execv)"""
+        restarts = int(os.environ.get(RESTART_COUNT_ENV, '0')) + 1
+        os.environ[RESTART_COUNT_ENV] = str(restarts)
+        logger.warning(f"♻️  Перезапуск процесса для освобождения памяти (перезапуск №{restarts})")
+        for handler in logging.getLogger().handlers + get_logger().handlers:
+            handler.flush()
+        os.execv(sys.executable, [sys.executable] + sys.argv)
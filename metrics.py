@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Метрики загрузчика в формате Prometheus (HTTP /metrics или textfile для node_exporter)
+"""
+
+import os
+import math
+import time
+import threading
+from typing import Dict, Any, List, Tuple, Optional, Iterable
+
+from logging_setup import get_logger, add_phase_observer
+
+
+logger = get_logger('metrics')
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Границы корзин гистограмм, секунды
+EXTRACTION_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+DOWNLOAD_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Базовая метрика с набором меток"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Метрика {self.name} ожидает метки {self.label_names}, получены {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """Строки метрики: (имя, метки, значение)"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.label_names:
+            items = [((), 0)]
+        return [(self.name, _format_labels(self.label_names, key), value) for key, value in items]
+
+
+class Gauge(Metric):
+    """Значение, которое может расти и уменьшаться"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels) -> Optional[float]:
+        return self._values.get(self._key(labels))
+
+    def items(self) -> List[Tuple[LabelValues, float]]:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def samples(self):
+        items = self.items()
+        if not items and not self.label_names:
+            items = [((), 0)]
+        return [(self.name, _format_labels(self.label_names, key), value) for key, value in items]
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets: Iterable[float] = ()):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-1] += value
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[len(self.buckets) - 1] if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        result = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                labels = _format_labels(self.label_names + ('le',), key + (_format_value(bound),))
+                result.append((f"{self.name}_bucket", labels, count))
+            labels = _format_labels(self.label_names, key)
+            result.append((f"{self.name}_sum", labels, state[-1]))
+            result.append((f"{self.name}_count", labels, state[len(self.buckets) - 1]))
+        return result
+
+
+class DownloaderMetrics:
+    """
+    Набор метрик загрузчика
+
+    Метрики этапов (извлечение, загрузка, перекодирование) приходят из
+    record_phase через observe_phase, остальные обновляются в main_loop,
+    process_source и при ответах 429 от YouTube.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        source_labels = ('subscription', 'source')
+        self.sources_processed = Counter(
+            "youtube2podcast_sources_processed_total", "Обработано источников", source_labels)
+        self.sources_succeeded = Counter(
+            "youtube2podcast_sources_succeeded_total", "Успешно обработано источников", source_labels)
+        self.sources_failed = Counter(
+            "youtube2podcast_sources_failed_total", "Источников с ошибкой обработки", source_labels)
+        self.extraction_seconds = Histogram(
+            "youtube2podcast_extraction_seconds", "Время извлечения информации (list, metadata, availability)",
+            ('phase',), EXTRACTION_BUCKETS)
+        self.download_seconds = Histogram(
+            "youtube2podcast_download_seconds", "Время загрузки аудио без постобработки", (), DOWNLOAD_BUCKETS)
+        self.downloaded_bytes = Counter(
+            "youtube2podcast_downloaded_bytes_total", "Загружено байт")
+        self.transcode_seconds = Counter(
+            "youtube2podcast_transcode_seconds_total", "Суммарное время постобработки (ffmpeg)")
+        self.rate_limited = Counter(
+            "youtube2podcast_rate_limited_total", "Ответов HTTP 429 от YouTube")
+        self.queue_depth = Gauge(
+            "youtube2podcast_queue_depth", "Источников в очереди текущей итерации")
+        self.scheduled_sources = Gauge(
+            "youtube2podcast_scheduled_sources", "Источников в расписании")
+        self.iterations = Counter(
+            "youtube2podcast_iterations_total", "Завершенных итераций цикла")
+        self.last_success = Gauge(
+            "youtube2podcast_source_last_success_timestamp_seconds",
+            "Время последней успешной обработки источника (unix time)", source_labels)
+        self.seconds_since_success = Gauge(
+            "youtube2podcast_source_seconds_since_last_success",
+            "Секунд с последней успешной обработки источника", source_labels)
+        self.ytdlp_cache_bytes = Gauge(
+            "youtube2podcast_ytdlp_cache_bytes", "Размер кеша yt-dlp (player JS, функции подписей)")
+        self.ytdlp_cache_files = Gauge(
+            "youtube2podcast_ytdlp_cache_files", "Файлов в кеше yt-dlp")
+        self.ytdlp_cache_updated = Gauge(
+            "youtube2podcast_ytdlp_cache_updated_timestamp_seconds",
+            "Время последнего обновления кеша yt-dlp (unix time)")
+
+    def all_metrics(self) -> List[Metric]:
+        return [value for value in vars(self).values() if isinstance(value, Metric)]
+
+    def observe_phase(self, phase: str, seconds: float, status: str, fields: Dict[str, Any]) -> None:
+        """Обработчик замеров этапов из logging_setup.record_phase"""
+        if phase in ('list', 'metadata', 'availability'):
+            self.extraction_seconds.observe(seconds, phase=phase)
+        elif phase == 'download':
+            self.download_seconds.observe(seconds)
+            self.downloaded_bytes.inc(fields.get('bytes') or 0)
+        elif phase == 'transcode':
+            self.transcode_seconds.inc(seconds)
+
+    def source_finished(self, subscription: str, source: str, success: bool) -> None:
+        """Учитывает результат обработки источника"""
+        labels = {'subscription': subscription, 'source': source}
+        self.sources_processed.inc(**labels)
+        if success:
+            self.sources_succeeded.inc(**labels)
+            self.last_success.set(self._clock(), **labels)
+        else:
+            self.sources_failed.inc(**labels)
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        now = self._clock()
+        for key, timestamp in self.last_success.items():
+            self.seconds_since_success.set(round(now - timestamp, 3), **dict(zip(self.last_success.label_names, key)))
+        return '\n'.join(metric.render() for metric in self.all_metrics()) + '\n'
+
+
+# Глобальные метрики процесса
+metrics = DownloaderMetrics()
+
+_textfile: Optional[str] = None
+_server = None
+
+
+def write_textfile(path: str, content: str = None) -> None:
+    """
+    Записывает метрики в файл для textfile collector node_exporter
+
+    Запись атомарная (временный файл и переименование), чтобы node_exporter
+    не прочитал файл наполовину.
+    """
+    content = content if content is not None else metrics.render()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+
+def start_http_server(port: int, address: str = '127.0.0.1'):
+    """Запускает HTTP сервер метрик (GET /metrics) в фоновом потоке"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"metrics: {format % args}")
+
+    server = ThreadingHTTPServer((address, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    return server
+
+
+def setup_metrics(settings: Dict[str, Any] = None) -> bool:
+    """
+    Включает экспорт метрик по секции metrics конфигурации
+
+    Args:
+        settings: enabled, port, address, textfile
+
+    Returns:
+        True если экспорт метрик включен
+    """
+    global _textfile, _server
+    settings = settings or {}
+    if not settings.get('enabled'):
+        return False
+
+    add_phase_observer(metrics.observe_phase)
+    _textfile = settings.get('textfile') or None
+
+    port = settings.get('port')
+    if port and _server is None:
+        address = settings.get('address', '127.0.0.1')
+        try:
+            _server = start_http_server(int(port), address)
+            logger.info(f"📈 Метрики Prometheus: http://{address}:{port}/metrics")
+        except OSError as e:
+            logger.error(f"❌ Не удалось запустить HTTP сервер метрик на {address}:{port}: {e}")
+    if _textfile:
+        logger.info(f"📈 Метрики Prometheus записываются в {_textfile}")
+    return True
+
+
+def flush_metrics() -> None:
+    """Обновляет textfile метрик, если он настроен"""
+    if not _textfile:
+        return
+    try:
+        write_textfile(_textfile)
+    except OSError as e:
+        logger.warning(f"⚠️  Не удалось записать метрики в {_textfile}: {e}")
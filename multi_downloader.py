@@ -3,31 +3,47 @@
 Универсальная программа для загрузки аудио с множественных YouTube источников
 """
 
-import yt_dlp
 import sys
 import os
-import xml.etree.ElementTree as ET
 from datetime import datetime
 import re
-import requests
-import socket
 import hashlib
 import time
 import signal
+import socket
+import logging
 import argparse
-from typing import List, Dict, Any
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+
+from config import Source, SourceType, Subscription, get_enabled_sources, get_enabled_subscriptions, get_source_by_name, config_manager, set_config_file
+from scheduler import SourceScheduler, ScheduledSource, ScheduleDiff
+from logging_setup import get_logger, setup_logging, log_context, phase_timer, record_phase
+from metrics import metrics, setup_metrics, flush_metrics
 
-from config import Source, SourceType, Subscription, get_enabled_sources, get_enabled_subscriptions, get_source_by_name, config_manager
+if TYPE_CHECKING:
+    from diagnostics import NetworkDiagnostics
 
 
+logger = get_logger('downloader')
+
 running = True
 dry_run = False  # Глобальная переменная для dry-run режима
+profiler = None  # Профилировщик итераций (--profile)
+download_slots = None  # Ограничение одновременных загрузок в --async (threading.BoundedSemaphore)
+instance_lock = None  # Блокировка экземпляра (data/.instance.lock)
+_feed_locks: Dict[str, threading.Lock] = {}
+_feed_locks_guard = threading.Lock()
 
 
 def parse_arguments():
     """
     Парсит аргументы командной строки
     """
+    from profiling import PROFILE_MODES, DEFAULT_PROFILE_DIR, DEFAULT_TOP
+
     parser = argparse.ArgumentParser(
         description='YouTube2Podcast - Загрузка аудио с YouTube источников',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -37,6 +53,14 @@ def parse_arguments():
   python multi_downloader.py --dry-run          # Dry-run режим
   python multi_downloader.py --loop             # Запуск в цикле
   python multi_downloader.py --dry-run --loop   # Dry-run в цикле
+  python multi_downloader.py --loop -q          # Только предупреждения и ошибки в консоли
+  python multi_downloader.py -v                 # Подробный вывод и время этапов
+  python multi_downloader.py --profile --source tech_channel  # cProfile одного источника
+  python multi_downloader.py --loop --profile sample          # Дешевое сэмплирование каждой итерации
+  python multi_downloader.py --loop --async     # Параллельный опрос источников (asyncio)
+  python multi_downloader.py --source news      # При работающем --loop: передать ему опрос источника
+  python multi_downloader.py --record fixtures/     # Записать ответы yt-dlp в фикстуры
+  python multi_downloader.py --replay fixtures/ --replay-latency 0  # Офлайн прогон по фикстурам
         """
     )
     
@@ -52,6 +76,19 @@ def parse_arguments():
         help='Запустить в бесконечном цикле с интервалом 10 минут'
     )
     
+    parser.add_argument(
+        '--async',
+        dest='use_async',
+        action='store_true',
+        help='С --loop: асинхронный оркестратор, опрашивающий до global.max_concurrent_sources источников одновременно'
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Запустить, даже если работает другой экземпляр (источники, которые он обрабатывает, пропускаются)'
+    )
+    
     parser.add_argument(
         '--subscription',
         type=str,
@@ -64,14 +101,129 @@ def parse_arguments():
         help='Обработать только указанный источник'
     )
     
+    parser.add_argument(
+        '--config',
+        type=str,
+        help='Путь к файлу конфигурации (по умолчанию config.yaml)'
+    )
+    
+    parser.add_argument(
+        '-v', '--verbose',
+        action='count',
+        default=0,
+        help='Подробный вывод: список видео, проверки доступности и время этапов'
+    )
+    
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Выводить в консоль только предупреждения и ошибки'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='full',
+        choices=PROFILE_MODES,
+        help='Профилировать каждую итерацию (или источник из --source): full - cProfile и .pstats, '
+             'sample - сэмплирование стека, достаточно дешевое для продакшена'
+    )
+    
+    parser.add_argument(
+        '--profile-dir',
+        type=str,
+        default=DEFAULT_PROFILE_DIR,
+        help=f'Папка для файлов профилей (по умолчанию {DEFAULT_PROFILE_DIR})'
+    )
+    
+    parser.add_argument(
+        '--profile-top',
+        type=int,
+        default=DEFAULT_TOP,
+        help=f'Сколько функций выводить в сводке профиля (по умолчанию {DEFAULT_TOP})'
+    )
+    
+    fixtures = parser.add_mutually_exclusive_group()
+    fixtures.add_argument(
+        '--record',
+        type=str,
+        metavar='DIR',
+        help='Записывать ответы yt-dlp (info dict, ошибки, задержки) в папку фикстур'
+    )
+    fixtures.add_argument(
+        '--replay',
+        type=str,
+        metavar='DIR',
+        help='Отдавать записанные ответы yt-dlp из папки фикстур вместо обращения к YouTube'
+    )
+    
+    parser.add_argument(
+        '--replay-latency',
+        type=float,
+        default=1.0,
+        metavar='SCALE',
+        help='Множитель записанных задержек при --replay (0 - без задержек, по умолчанию 1)'
+    )
+    
     return parser.parse_args()
 
 def signal_handler(signum, frame):
     global running
-    print(f"\nПолучен сигнал {signum}. Завершение работы...")
+    logger.info(f"Получен сигнал {signum}. Завершение работы...")
     running = False
 
 
+class YtDlpLogger:
+    """
+    Перенаправляет сообщения yt-dlp в logging и считает ответы HTTP 429
+    """
+    
+    RATE_LIMIT_MARKERS = ("HTTP Error 429", "Too Many Requests")
+    
+    def __init__(self):
+        self._logger = get_logger('yt_dlp')
+    
+    def _count_rate_limit(self, msg: str) -> None:
+        if any(marker in msg for marker in self.RATE_LIMIT_MARKERS):
+            metrics.rate_limited.inc()
+    
+    def debug(self, msg: str) -> None:
+        self._logger.debug(msg)
+    
+    def info(self, msg: str) -> None:
+        self._logger.debug(msg)
+    
+    def warning(self, msg: str) -> None:
+        self._count_rate_limit(msg)
+        self._logger.warning(msg)
+    
+    def error(self, msg: str) -> None:
+        self._count_rate_limit(msg)
+        self._logger.error(msg)
+
+
+ytdlp_logger = YtDlpLogger()
+
+
+def create_ydl(ydl_opts: Dict[str, Any]):
+    """
+    Создает yt_dlp.YoutubeDL с общими для всех вызовов настройками
+    
+    Сообщения yt-dlp идут в logging (логгер youtube2podcast.yt_dlp),
+    ответы 429 учитываются в метриках, кеш yt-dlp хранится в data/
+    (см. ytdlp_cache.py). В режимах --record и --replay экземпляр
+    оборачивается или подменяется (см. replay.py).
+    """
+    import ytdlp_cache
+    import replay
+
+    def youtube_dl_class():
+        import yt_dlp
+        return yt_dlp.YoutubeDL
+    
+    return replay.wrap_ydl({'logger': ytdlp_logger, **ytdlp_cache.ydl_options(), **ydl_opts}, youtube_dl_class)
+
+
 def get_file_hash(title: str) -> str:
     """
     Создает MD5 хеш из названия видео для использования в имени файла
@@ -89,6 +241,8 @@ def check_video_availability(video_id: str) -> bool:
     Returns:
         True если видео доступно, False если нет
     """
+    import yt_dlp
+    
     ydl_opts = {
         'quiet': True,
         'no_warnings': True,
@@ -97,7 +251,7 @@ def check_video_availability(video_id: str) -> bool:
     }
     
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with create_ydl(ydl_opts) as ydl:
             # Пытаемся извлечь информацию о видео
             result = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
             if result and result.get('title'):
@@ -106,62 +260,43 @@ def check_video_availability(video_id: str) -> bool:
     except yt_dlp.utils.DownloadError as e:
         error_msg = str(e)
         if "Video unavailable" in error_msg:
-            print(f"   ❌ Видео недоступно (ID: {video_id})")
+            logger.warning(f"   ❌ Видео недоступно (ID: {video_id})")
         elif "Private video" in error_msg:
-            print(f"   ❌ Приватное видео (ID: {video_id})")
+            logger.warning(f"   ❌ Приватное видео (ID: {video_id})")
         elif "This video is not available" in error_msg:
-            print(f"   ❌ Видео недоступно в регионе (ID: {video_id})")
+            logger.warning(f"   ❌ Видео недоступно в регионе (ID: {video_id})")
         else:
-            print(f"   ❌ Ошибка доступа: {error_msg}")
+            logger.warning(f"   ❌ Ошибка доступа: {error_msg}")
         return False
     except Exception as e:
-        print(f"   ❌ Неожиданная ошибка при проверке видео {video_id}: {e}")
+        logger.error(f"   ❌ Неожиданная ошибка при проверке видео {video_id}: {e}")
         return False
 
 
+def start_network_diagnostics() -> 'NetworkDiagnostics':
+    """
+    Запускает диагностику сети в фоне
+    
+    При записи и воспроизведении фикстур (--record, --replay) диагностика не
+    выполняется: она обращается к сети напрямую, мимо create_ydl.
+    """
+    from diagnostics import NetworkDiagnostics
+    import replay
+
+    diagnostics = NetworkDiagnostics.from_config()
+    if replay.active():
+        diagnostics.enabled = False
+    diagnostics.start()
+    return diagnostics
+
+
 def diagnose_network_issues():
     """
-    Диагностирует проблемы с сетью и доступом к YouTube
+    Диагностирует проблемы с сетью и доступом к YouTube (синхронно, без кеша)
     """
-    print("🔍 Диагностика сетевых проблем...")
-    
-    # Проверка DNS
-    try:
-        ip = socket.gethostbyname("www.youtube.com")
-        print(f"✅ DNS YouTube: {ip}")
-    except Exception as e:
-        print(f"❌ DNS YouTube: {e}")
-    
-    # Проверка HTTP соединения
-    try:
-        response = requests.get("https://www.youtube.com", timeout=10)
-        print(f"✅ HTTP YouTube: {response.status_code}")
-    except Exception as e:
-        print(f"❌ HTTP YouTube: {e}")
-    
-    # Проверка yt-dlp версии
-    try:
-        import yt_dlp
-        print(f"✅ yt-dlp версия: {yt_dlp.version.__version__}")
-    except Exception as e:
-        print(f"❌ yt-dlp версия: {e}")
-    
-    # Проверка доступности тестового видео
-    test_video_id = "dQw4w9WgXcQ"  # Rick Roll
-    try:
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': True,
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            video_url = f"https://www.youtube.com/watch?v={test_video_id}"
-            info = ydl.extract_info(video_url, download=False)
-            print(f"✅ Тестовое видео доступно: {info.get('title', 'Unknown')}")
-    except Exception as e:
-        print(f"❌ Тестовое видео недоступно: {e}")
-    
-    print("=" * 50)
+    from diagnostics import NetworkDiagnostics
+
+    return NetworkDiagnostics.from_config().run()
 
 
 def clean_filename(filename: str) -> str:
@@ -183,9 +318,11 @@ def diagnose_video_issue(video_id: str, video_title: str = ""):
         video_id: ID видео на YouTube
         video_title: Название видео (опционально)
     """
-    print(f"🔍 Диагностика видео: {video_title or video_id}")
-    print(f"   ID: {video_id}")
-    print(f"   URL: https://www.youtube.com/watch?v={video_id}")
+    import yt_dlp
+    
+    logger.info(f"🔍 Диагностика видео: {video_title or video_id}")
+    logger.info(f"   ID: {video_id}")
+    logger.info(f"   URL: https://www.youtube.com/watch?v={video_id}")
     
     # Проверяем доступность через разные методы
     ydl_opts = {
@@ -195,39 +332,39 @@ def diagnose_video_issue(video_id: str, video_title: str = ""):
     }
     
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with create_ydl(ydl_opts) as ydl:
             # Пробуем извлечь полную информацию
             info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
             if info:
-                print(f"   ✅ Видео доступно")
-                print(f"   📺 Название: {info.get('title', 'Неизвестно')}")
-                print(f"   👤 Автор: {info.get('uploader', 'Неизвестно')}")
-                print(f"   ⏱️ Длительность: {info.get('duration', 0)} сек")
-                print(f"   👀 Просмотры: {info.get('view_count', 'Неизвестно')}")
+                logger.info(f"   ✅ Видео доступно")
+                logger.info(f"   📺 Название: {info.get('title', 'Неизвестно')}")
+                logger.info(f"   👤 Автор: {info.get('uploader', 'Неизвестно')}")
+                logger.info(f"   ⏱️ Длительность: {info.get('duration', 0)} сек")
+                logger.info(f"   👀 Просмотры: {info.get('view_count', 'Неизвестно')}")
                 return True
             else:
-                print(f"   ❌ Видео недоступно")
+                logger.error(f"   ❌ Видео недоступно")
                 return False
     except yt_dlp.utils.DownloadError as e:
         error_msg = str(e)
-        print(f"   ❌ Ошибка yt-dlp: {error_msg}")
+        logger.error(f"   ❌ Ошибка yt-dlp: {error_msg}")
         
         if "Video unavailable" in error_msg:
-            print(f"   💡 Возможные причины:")
-            print(f"      - Видео удалено автором")
-            print(f"      - Видео приватное")
-            print(f"      - Видео ограничено по возрасту")
-            print(f"      - Видео заблокировано в вашем регионе")
+            logger.info(f"   💡 Возможные причины:")
+            logger.info(f"      - Видео удалено автором")
+            logger.info(f"      - Видео приватное")
+            logger.info(f"      - Видео ограничено по возрасту")
+            logger.info(f"      - Видео заблокировано в вашем регионе")
         elif "Private video" in error_msg:
-            print(f"   💡 Видео приватное - требуется авторизация")
+            logger.info(f"   💡 Видео приватное - требуется авторизация")
         elif "This video is not available" in error_msg:
-            print(f"   💡 Видео недоступно в вашем регионе")
+            logger.info(f"   💡 Видео недоступно в вашем регионе")
         elif "Sign in to confirm your age" in error_msg:
-            print(f"   💡 Требуется подтверждение возраста")
+            logger.info(f"   💡 Требуется подтверждение возраста")
         
         return False
     except Exception as e:
-        print(f"   ❌ Неожиданная ошибка: {e}")
+        logger.error(f"   ❌ Неожиданная ошибка: {e}")
         return False
 
 
@@ -250,12 +387,13 @@ def get_playlist_info_and_videos(source: Source) -> Dict[str, Any]:
     }
     
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with create_ydl(ydl_opts) as ydl:
             # Извлекаем информацию о плейлисте
-            playlist_info = ydl.extract_info(source.url, download=False)
+            with phase_timer('list', url=source.url):
+                playlist_info = ydl.extract_info(source.url, download=False)
             
             if not playlist_info:
-                print(f"❌ Не удалось получить информацию о плейлисте: {source.name}")
+                logger.error(f"❌ Не удалось получить информацию о плейлисте: {source.name}")
                 return {}
             
             # Информация о плейлисте
@@ -269,66 +407,67 @@ def get_playlist_info_and_videos(source: Source) -> Dict[str, Any]:
                 'entries': []
             }
             
-            print(f"📋 Плейлист: {playlist_data['title']}")
-            print(f"👤 Автор: {playlist_data['uploader']}")
-            print(f"📊 Всего видео: {playlist_data['video_count']}")
+            logger.info(f"📋 Плейлист: {playlist_data['title']}")
+            logger.debug(f"👤 Автор: {playlist_data['uploader']}")
+            logger.debug(f"📊 Всего видео: {playlist_data['video_count']}")
             if playlist_data.get('last_updated'):
-                print(f"🔄 Последнее обновление: {playlist_data['last_updated']}")
+                logger.debug(f"🔄 Последнее обновление: {playlist_data['last_updated']}")
             
             # Обрабатываем видео в плейлисте
             if 'entries' in playlist_info and playlist_info['entries']:
                 videos = []
-                for entry in playlist_info['entries']:
-                    if entry:  # Проверяем, что запись не пустая
-                        # Получаем полную информацию о видео
-                        try:
-                            video_url = f"https://www.youtube.com/watch?v={entry.get('id', '')}"
-                            video_info = ydl.extract_info(video_url, download=False)
+                with phase_timer('metadata', entries=len(playlist_info['entries'])):
+                    for entry in playlist_info['entries']:
+                        if entry:  # Проверяем, что запись не пустая
+                            # Получаем полную информацию о видео
+                            try:
+                                video_url = f"https://www.youtube.com/watch?v={entry.get('id', '')}"
+                                video_info = ydl.extract_info(video_url, download=False)
                             
-                            if video_info:
+                                if video_info:
+                                    video_data = {
+                                        'title': video_info.get('title', 'Без названия'),
+                                        'url': video_info.get('webpage_url', ''),
+                                        'id': video_info.get('id', ''),
+                                        'duration': video_info.get('duration', 0),
+                                        'uploader': video_info.get('uploader', 'Неизвестно'),
+                                        'view_count': video_info.get('view_count', 0),
+                                        'upload_date': video_info.get('upload_date', ''),
+                                        'timestamp': video_info.get('timestamp', 0),
+                                        'playlist_position': entry.get('playlist_index', 0)
+                                    }
+                                    videos.append(video_data)
+                            except Exception as video_error:
+                                # Если не удалось получить полную информацию, используем базовую
                                 video_data = {
-                                    'title': video_info.get('title', 'Без названия'),
-                                    'url': video_info.get('webpage_url', ''),
-                                    'id': video_info.get('id', ''),
-                                    'duration': video_info.get('duration', 0),
-                                    'uploader': video_info.get('uploader', 'Неизвестно'),
-                                    'view_count': video_info.get('view_count', 0),
-                                    'upload_date': video_info.get('upload_date', ''),
-                                    'timestamp': video_info.get('timestamp', 0),
+                                    'title': entry.get('title', 'Без названия'),
+                                    'url': entry.get('url', ''),
+                                    'id': entry.get('id', ''),
+                                    'duration': entry.get('duration', 0),
+                                    'uploader': entry.get('uploader', 'Неизвестно'),
+                                    'view_count': entry.get('view_count', 0),
+                                    'upload_date': entry.get('upload_date', ''),
+                                    'timestamp': entry.get('timestamp', 0),
                                     'playlist_position': entry.get('playlist_index', 0)
                                 }
                                 videos.append(video_data)
-                        except Exception as video_error:
-                            # Если не удалось получить полную информацию, используем базовую
-                            video_data = {
-                                'title': entry.get('title', 'Без названия'),
-                                'url': entry.get('url', ''),
-                                'id': entry.get('id', ''),
-                                'duration': entry.get('duration', 0),
-                                'uploader': entry.get('uploader', 'Неизвестно'),
-                                'view_count': entry.get('view_count', 0),
-                                'upload_date': entry.get('upload_date', ''),
-                                'timestamp': entry.get('timestamp', 0),
-                                'playlist_position': entry.get('playlist_index', 0)
-                            }
-                            videos.append(video_data)
                 
                 # Сортируем видео по дате загрузки (новые сначала)
                 videos.sort(key=lambda x: x.get('timestamp', 0) or x.get('upload_date', ''), reverse=True)
                 playlist_data['entries'] = videos
                 
-                print(f"✅ Найдено {len(videos)} последних видео в плейлисте")
+                logger.info(f"✅ Найдено {len(videos)} последних видео в плейлисте")
                 if videos:
-                    print(f"📅 Последнее видео: {videos[0]['title']}")
+                    logger.info(f"📅 Последнее видео: {videos[0]['title']}")
                     if videos[0].get('upload_date'):
                         upload_date = videos[0]['upload_date']
                         formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-                        print(f"📅 Дата загрузки: {formatted_date}")
+                        logger.debug(f"📅 Дата загрузки: {formatted_date}")
             
             return playlist_data
             
     except Exception as e:
-        print(f"❌ Ошибка при извлечении информации о плейлисте {source.name}: {e}")
+        logger.error(f"❌ Ошибка при извлечении информации о плейлисте {source.name}: {e}")
         return {}
 
 
@@ -342,6 +481,8 @@ def get_videos_from_source(source: Source) -> List[Dict[str, Any]]:
     Returns:
         Список словарей с информацией о последних видео, отсортированный по дате загрузки
     """
+    import websub
+
     # Для плейлистов используем специальную функцию
     if source.source_type == SourceType.PLAYLIST:
         playlist_data = get_playlist_info_and_videos(source)
@@ -357,63 +498,66 @@ def get_videos_from_source(source: Source) -> List[Dict[str, Any]]:
     }
     
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with create_ydl(ydl_opts) as ydl:
             # Извлекаем информацию об источнике (только последние видео)
-            source_info = ydl.extract_info(source.url, download=False)
+            with phase_timer('list', url=source.url):
+                source_info = ydl.extract_info(source.url, download=False)
             
             if not source_info or 'entries' not in source_info:
-                print(f"❌ Не удалось получить информацию об источнике: {source.name}")
+                logger.error(f"❌ Не удалось получить информацию об источнике: {source.name}")
                 return []
+            websub.note_channel(source.url, source_info.get('channel_id'))
             
             videos = []
-            for entry in source_info['entries']:
-                if entry:  # Проверяем, что запись не пустая
-                    # Получаем полную информацию о видео
-                    try:
-                        video_url = f"https://www.youtube.com/watch?v={entry.get('id', '')}"
-                        video_info = ydl.extract_info(video_url, download=False)
+            with phase_timer('metadata', entries=len(source_info['entries'])):
+                for entry in source_info['entries']:
+                    if entry:  # Проверяем, что запись не пустая
+                        # Получаем полную информацию о видео
+                        try:
+                            video_url = f"https://www.youtube.com/watch?v={entry.get('id', '')}"
+                            video_info = ydl.extract_info(video_url, download=False)
                         
-                        if video_info:
+                            if video_info:
+                                video_data = {
+                                    'title': video_info.get('title', 'Без названия'),
+                                    'url': video_info.get('webpage_url', ''),
+                                    'id': video_info.get('id', ''),
+                                    'duration': video_info.get('duration', 0),
+                                    'uploader': video_info.get('uploader', 'Неизвестно'),
+                                    'view_count': video_info.get('view_count', 0),
+                                    'upload_date': video_info.get('upload_date', ''),
+                                    'timestamp': video_info.get('timestamp', 0)
+                                }
+                                videos.append(video_data)
+                        except Exception as video_error:
+                            # Если не удалось получить полную информацию, используем базовую
                             video_data = {
-                                'title': video_info.get('title', 'Без названия'),
-                                'url': video_info.get('webpage_url', ''),
-                                'id': video_info.get('id', ''),
-                                'duration': video_info.get('duration', 0),
-                                'uploader': video_info.get('uploader', 'Неизвестно'),
-                                'view_count': video_info.get('view_count', 0),
-                                'upload_date': video_info.get('upload_date', ''),
-                                'timestamp': video_info.get('timestamp', 0)
+                                'title': entry.get('title', 'Без названия'),
+                                'url': entry.get('url', ''),
+                                'id': entry.get('id', ''),
+                                'duration': entry.get('duration', 0),
+                                'uploader': entry.get('uploader', 'Неизвестно'),
+                                'view_count': entry.get('view_count', 0),
+                                'upload_date': entry.get('upload_date', ''),
+                                'timestamp': entry.get('timestamp', 0)
                             }
                             videos.append(video_data)
-                    except Exception as video_error:
-                        # Если не удалось получить полную информацию, используем базовую
-                        video_data = {
-                            'title': entry.get('title', 'Без названия'),
-                            'url': entry.get('url', ''),
-                            'id': entry.get('id', ''),
-                            'duration': entry.get('duration', 0),
-                            'uploader': entry.get('uploader', 'Неизвестно'),
-                            'view_count': entry.get('view_count', 0),
-                            'upload_date': entry.get('upload_date', ''),
-                            'timestamp': entry.get('timestamp', 0)
-                        }
-                        videos.append(video_data)
             
             # Сортируем видео по дате загрузки (новые сначала)
             videos.sort(key=lambda x: x.get('timestamp', 0) or x.get('upload_date', ''), reverse=True)
             
-            print(f"✅ Найдено {len(videos)} последних видео в источнике: {source.name}")
+            logger.info(f"✅ Найдено {len(videos)} последних видео в источнике: {source.name}")
             if videos:
-                print(f"📅 Последнее видео: {videos[0]['title']}")
+                logger.info(f"📅 Последнее видео: {videos[0]['title']}")
                 if videos[0].get('upload_date'):
                     upload_date = videos[0]['upload_date']
                     formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-                    print(f"📅 Дата загрузки: {formatted_date}")
+                    logger.debug(f"📅 Дата загрузки: {formatted_date}")
             
             return videos
             
     except Exception as e:
-        print(f"❌ Ошибка при извлечении информации из источника {source.name}: {e}")
+        logger.error(f"❌ Ошибка при извлечении информации из источника {source.name}: {e}")
         return []
 
 
@@ -433,15 +577,15 @@ def get_latest_video_from_source(source: Source) -> Dict[str, Any]:
         videos = playlist_data.get('entries', [])
         if videos:
             latest_video = videos[0]  # Первое видео уже отсортировано по дате
-            print(f"✅ Найдено последнее видео в плейлисте: {source.name}")
-            print(f"📺 Название: {latest_video['title']}")
+            logger.info(f"✅ Найдено последнее видео в плейлисте: {source.name}")
+            logger.info(f"📺 Название: {latest_video['title']}")
             if latest_video.get('upload_date'):
                 upload_date = latest_video['upload_date']
                 formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-                print(f"📅 Дата загрузки: {formatted_date}")
+                logger.debug(f"📅 Дата загрузки: {formatted_date}")
             return latest_video
         else:
-            print(f"❌ Не удалось получить последнее видео из плейлиста: {source.name}")
+            logger.error(f"❌ Не удалось получить последнее видео из плейлиста: {source.name}")
             return {}
     
     # Для каналов используем стандартную логику
@@ -454,24 +598,26 @@ def get_latest_video_from_source(source: Source) -> Dict[str, Any]:
     }
     
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with create_ydl(ydl_opts) as ydl:
             # Извлекаем информацию об источнике (только последнее видео)
-            source_info = ydl.extract_info(source.url, download=False)
+            with phase_timer('list', url=source.url):
+                source_info = ydl.extract_info(source.url, download=False)
             
             if not source_info or 'entries' not in source_info or not source_info['entries']:
-                print(f"❌ Не удалось получить информацию об источнике: {source.name}")
+                logger.error(f"❌ Не удалось получить информацию об источнике: {source.name}")
                 return {}
             
             # Берем первое видео (самое последнее)
             entry = source_info['entries'][0]
             if not entry:
-                print(f"❌ Не удалось получить последнее видео из источника: {source.name}")
+                logger.error(f"❌ Не удалось получить последнее видео из источника: {source.name}")
                 return {}
             
             # Получаем полную информацию о видео
             try:
                 video_url = f"https://www.youtube.com/watch?v={entry.get('id', '')}"
-                video_info = ydl.extract_info(video_url, download=False)
+                with phase_timer('metadata', entries=1):
+                    video_info = ydl.extract_info(video_url, download=False)
                 
                 if video_info:
                     video_data = {
@@ -485,61 +631,87 @@ def get_latest_video_from_source(source: Source) -> Dict[str, Any]:
                         'timestamp': video_info.get('timestamp', 0)
                     }
                     
-                    print(f"✅ Найдено последнее видео в источнике: {source.name}")
-                    print(f"📺 Название: {video_data['title']}")
+                    logger.info(f"✅ Найдено последнее видео в источнике: {source.name}")
+                    logger.info(f"📺 Название: {video_data['title']}")
                     if video_data.get('upload_date'):
                         upload_date = video_data['upload_date']
                         formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-                        print(f"📅 Дата загрузки: {formatted_date}")
+                        logger.debug(f"📅 Дата загрузки: {formatted_date}")
                     
                     return video_data
                 else:
-                    print(f"❌ Не удалось получить информацию о последнем видео: {source.name}")
+                    logger.error(f"❌ Не удалось получить информацию о последнем видео: {source.name}")
                     return {}
                     
             except Exception as video_error:
-                print(f"❌ Ошибка при получении информации о последнем видео: {video_error}")
+                logger.error(f"❌ Ошибка при получении информации о последнем видео: {video_error}")
                 return {}
             
     except Exception as e:
-        print(f"❌ Ошибка при извлечении информации из источника {source.name}: {e}")
+        logger.error(f"❌ Ошибка при извлечении информации из источника {source.name}: {e}")
         return {}
 
 
-def print_video_links(videos: List[Dict[str, Any]], source_name: str) -> None:
+def print_video_links(videos: List[Dict[str, Any]], source_name: str, level: int = logging.INFO) -> None:
     """
     Выводит ссылки на видео в удобном формате
     
     Args:
         videos: Список словарей с информацией о видео
         source_name: Название источника
+        level: Уровень логирования (при обработке источников - DEBUG)
     """
+    if not logger.isEnabledFor(level):
+        return
+    
     if not videos:
-        print(f"Видео не найдены в источнике: {source_name}")
+        logger.log(level, f"Видео не найдены в источнике: {source_name}")
         return
     
-    print(f"\nНайдено {len(videos)} видео в источнике '{source_name}':\n")
-    print("=" * 80)
+    logger.log(level, f"Найдено {len(videos)} видео в источнике '{source_name}':")
+    logger.log(level, "=" * 80)
     
     for i, video in enumerate(videos, 1):
-        print(f"{i:2d}. {video['title']}")
-        print(f"    Ссылка: https://www.youtube.com/watch?v={video['id']}")
-        print(f"    Автор: {video['uploader']}")
+        logger.log(level, f"{i:2d}. {video['title']}")
+        logger.log(level, f"    Ссылка: https://www.youtube.com/watch?v={video['id']}")
+        logger.log(level, f"    Автор: {video['uploader']}")
         if video['duration']:
             minutes = video['duration'] // 60
             seconds = video['duration'] % 60
-            print(f"    Длительность: {minutes}:{seconds:02d}")
+            logger.log(level, f"    Длительность: {minutes}:{seconds:02d}")
         if video['view_count']:
-            print(f"    Просмотров: {video['view_count']:,}")
+            logger.log(level, f"    Просмотров: {video['view_count']:,}")
         else:
-            print(f"    Просмотров: Недоступно")
+            logger.log(level, f"    Просмотров: Недоступно")
         if video.get('upload_date'):
             upload_date = video['upload_date']
             formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-            print(f"    📅 Дата загрузки: {formatted_date}")
+            logger.log(level, f"    📅 Дата загрузки: {formatted_date}")
         if video.get('playlist_position'):
-            print(f"    📋 Позиция в плейлисте: {video['playlist_position']}")
-        print("-" * 80)
+            logger.log(level, f"    📋 Позиция в плейлисте: {video['playlist_position']}")
+        logger.log(level, "-" * 80)
+
+
+class DownloadStats:
+    """
+    Статистика загрузки по хукам yt-dlp: загруженные байты и время постобработки
+    """
+    
+    def __init__(self):
+        self.downloaded_bytes = 0
+        self.transcode_seconds = 0.0
+        self._postprocessor_started = {}
+    
+    def progress_hook(self, d: Dict[str, Any]) -> None:
+        if d.get('status') == 'finished':
+            self.downloaded_bytes += d.get('downloaded_bytes') or d.get('total_bytes') or 0
+    
+    def postprocessor_hook(self, d: Dict[str, Any]) -> None:
+        name = d.get('postprocessor')
+        if d.get('status') == 'started':
+            self._postprocessor_started[name] = time.perf_counter()
+        elif d.get('status') == 'finished' and name in self._postprocessor_started:
+            self.transcode_seconds += time.perf_counter() - self._postprocessor_started.pop(name)
 
 
 def download_latest_audio(videos: List[Dict[str, Any]], source: Source, subscription: Subscription) -> Dict[str, Any]:
@@ -554,39 +726,42 @@ def download_latest_audio(videos: List[Dict[str, Any]], source: Source, subscrip
     Returns:
         Словарь с информацией о загруженном видео или пустой словарь
     """
+    import yt_dlp
+    
     # Проверяем переменную окружения для предотвращения загрузки в тестах
     if os.environ.get('SKIP_DOWNLOAD', 'false').lower() in ('true', '1', 'yes'):
-        print(f"🚫 Загрузка пропущена (SKIP_DOWNLOAD=true) для источника: {source.name}")
+        logger.info(f"🚫 Загрузка пропущена (SKIP_DOWNLOAD=true) для источника: {source.name}")
         return {}
     # Если videos пустой, получаем только последнее видео
     if not videos:
-        print(f"📡 Получаем только последнее видео из источника: {source.name}")
+        logger.info(f"📡 Получаем только последнее видео из источника: {source.name}")
         latest_video = get_latest_video_from_source(source)
         if not latest_video:
-            print(f"❌ Не удалось получить последнее видео из источника: {source.name}")
+            logger.error(f"❌ Не удалось получить последнее видео из источника: {source.name}")
             return {}
     else:
         # Ищем первое доступное видео среди последних N
         latest_video = None
         max_check = min(source.max_videos, len(videos))
         
-        for i, video in enumerate(videos[:max_check]):
-            print(f"Проверяю доступность видео {i+1}: {video['title']}")
-            
-            # Проверяем доступность видео
-            if check_video_availability(video['id']):
-                latest_video = video
-                print(f"✅ Видео доступно: {video['title']}")
-                break
-            else:
-                print(f"❌ Видео недоступно: {video['title']}")
-                # Если это последнее видео и оно недоступно, запускаем подробную диагностику
-                if i == max_check - 1:
-                    print(f"\n🔍 Запускаем подробную диагностику последнего видео...")
-                    diagnose_video_issue(video['id'], video['title'])
+        with phase_timer('availability', checked=max_check):
+            for i, video in enumerate(videos[:max_check]):
+                logger.debug(f"Проверяю доступность видео {i+1}: {video['title']}")
+                
+                # Проверяем доступность видео
+                if check_video_availability(video['id']):
+                    latest_video = video
+                    logger.info(f"✅ Видео доступно: {video['title']}")
+                    break
+                else:
+                    logger.warning(f"❌ Видео недоступно: {video['title']}")
+                    # Если это последнее видео и оно недоступно, запускаем подробную диагностику
+                    if i == max_check - 1:
+                        logger.info(f"🔍 Запускаем подробную диагностику последнего видео...")
+                        diagnose_video_issue(video['id'], video['title'])
         
         if not latest_video:
-            print(f"❌ Не найдено доступных видео для загрузки в источнике: {source.name}")
+            logger.error(f"❌ Не найдено доступных видео для загрузки в источнике: {source.name}")
             return {}
     
     # Создаем папку для подписки
@@ -599,13 +774,13 @@ def download_latest_audio(videos: List[Dict[str, Any]], source: Source, subscrip
     mp3_path = os.path.join(subscription_dir, mp3_filename)
     
     if os.path.exists(mp3_path):
-        print(f"\nАудио файл уже существует: {mp3_filename}")
-        print(f"Пропускаю загрузку для видео: {latest_video['title']}")
+        logger.info(f"Аудио файл уже существует: {mp3_filename}")
+        logger.debug(f"Пропускаю загрузку для видео: {latest_video['title']}")
         return latest_video
     
-    print(f"\nЗагрузка аудио из последнего видео источника '{source.name}' (подписка '{subscription.name}'):")
-    print(f"Название: {latest_video['title']}")
-    print(f"ID: {latest_video['id']}")
+    logger.info(f"Загрузка аудио из последнего видео источника '{source.name}' (подписка '{subscription.name}'):")
+    logger.info(f"Название: {latest_video['title']}")
+    logger.debug(f"ID: {latest_video['id']}")
     
     # Настройки для загрузки только аудио
     download_settings = config_manager.get_download_setting('format', 'bestaudio/best')
@@ -634,255 +809,239 @@ def download_latest_audio(videos: List[Dict[str, Any]], source: Source, subscrip
         'writeautomaticsub': write_automatic_subtitles,
         'ignoreerrors': True,
     }
+    stats = DownloadStats()
+    ydl_opts['progress_hooks'] = [stats.progress_hook]
+    ydl_opts['postprocessor_hooks'] = [stats.postprocessor_hook]
     
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with create_ydl(ydl_opts) as ydl:
             video_url = f"https://www.youtube.com/watch?v={latest_video['id']}"
-            print(f"Начинаю загрузку: {video_url}")
+            logger.info(f"Начинаю загрузку: {video_url}")
             
             # Сначала проверяем доступность видео перед загрузкой
             try:
-                info = ydl.extract_info(video_url, download=False)
+                with phase_timer('availability', checked=1):
+                    info = ydl.extract_info(video_url, download=False)
                 if not info:
-                    print(f"❌ Видео недоступно для загрузки: {latest_video['title']}")
+                    logger.error(f"❌ Видео недоступно для загрузки: {latest_video['title']}")
                     return {}
-                print(f"✅ Видео доступно для загрузки: {info.get('title', latest_video['title'])}")
+                logger.debug(f"✅ Видео доступно для загрузки: {info.get('title', latest_video['title'])}")
             except Exception as extract_error:
-                print(f"❌ Ошибка при проверке доступности видео: {extract_error}")
-                print(f"Пробуем следующее видео...")
+                logger.error(f"❌ Ошибка при проверке доступности видео: {extract_error}")
+                logger.info(f"Пробуем следующее видео...")
                 return {}
             
-            # Загружаем видео
-            ydl.download([video_url])
-            print(f"✅ Аудио успешно загружено в папку: {subscription_dir}")
+            # Загружаем видео; время постобработки (ffmpeg) учитывается отдельно
+            start = time.perf_counter()
+            try:
+                with download_slots or nullcontext():
+                    ydl.download([video_url])
+            finally:
+                elapsed = time.perf_counter() - start
+                record_phase('download', max(elapsed - stats.transcode_seconds, 0), bytes=stats.downloaded_bytes)
+                record_phase('transcode', stats.transcode_seconds)
+            logger.info(f"✅ Аудио успешно загружено в папку: {subscription_dir}")
             return latest_video
             
     except yt_dlp.utils.DownloadError as e:
         error_msg = str(e)
         if "Video unavailable" in error_msg:
-            print(f"❌ Видео недоступно: {latest_video['title']}")
-            print(f"   ID: {latest_video['id']}")
-            print(f"   Возможные причины: видео удалено, приватное, ограничено по возрасту или региону")
+            logger.error(f"❌ Видео недоступно: {latest_video['title']}")
+            logger.info(f"   ID: {latest_video['id']}")
+            logger.info(f"   Возможные причины: видео удалено, приватное, ограничено по возрасту или региону")
         elif "Private video" in error_msg:
-            print(f"❌ Приватное видео: {latest_video['title']}")
+            logger.error(f"❌ Приватное видео: {latest_video['title']}")
         elif "This video is not available" in error_msg:
-            print(f"❌ Видео недоступно в вашем регионе: {latest_video['title']}")
+            logger.error(f"❌ Видео недоступно в вашем регионе: {latest_video['title']}")
         else:
-            print(f"❌ Ошибка загрузки: {error_msg}")
+            logger.error(f"❌ Ошибка загрузки: {error_msg}")
         return {}
     except Exception as e:
-        print(f"❌ Неожиданная ошибка при загрузке аудио из источника '{source.name}': {e}")
+        logger.error(f"❌ Неожиданная ошибка при загрузке аудио из источника '{source.name}': {e}")
         return {}
 
 
 def create_or_update_rss(videos: List[Dict[str, Any]], source: Source, subscription: Subscription, latest_video: Dict[str, Any]) -> None:
     """
-    Создает или обновляет RSS файл для подкастов
+    Создает или обновляет ленты подкаста (RSS и другие форматы из rss.formats)
     
     Args:
-        videos: Список всех видео из источника
+        videos: Список всех видео из источника (метаданные загруженных
+            добавляются в episodes.json подписки)
         source: Конфигурация источника
         subscription: Конфигурация подписки
         latest_video: Информация о последнем загруженном видео
     """
+    from feeds import build_feed, write_feed, scan_subscription_dir, update_episode_index
+
     # Проверяем, что latest_video не пустой
     if not latest_video or latest_video == {}:
-        print(f"❌ Нет информации о видео для создания RSS в источнике: {source.name}")
+        logger.error(f"❌ Нет информации о видео для создания RSS в источнике: {source.name}")
         return
         
-    rss_file = f"data/{subscription.name}/podcast.rss"
     subscription_dir = f"data/{subscription.name}"
     
     # Создаем папку если её нет
     os.makedirs(subscription_dir, exist_ok=True)
     
-    # Получаем настройки RSS из конфигурации
-    rss_version = config_manager.get_rss_setting('version', '2.0')
-    namespaces = config_manager.get_rss_setting('namespaces', {})
-    default_language = config_manager.get_rss_setting('default_language', 'ru')
-    
-    # Создаем корневой элемент RSS
-    rss = ET.Element("rss", version=rss_version)
-    for ns_name, ns_url in namespaces.items():
-        rss.set(f"xmlns:{ns_name}", ns_url)
-    
-    # Создаем канал
-    channel = ET.SubElement(rss, "channel")
-    
-    # Метаданные канала
-    title = ET.SubElement(channel, "title")
-    title.text = subscription.title or f"{subscription.name.title()} - Подкаст"
-    
-    description = ET.SubElement(channel, "description")
-    description.text = subscription.description or f"Подкаст из подписки {subscription.name}"
-    
-    language = ET.SubElement(channel, "language")
-    language.text = "ru"
-    
-    # iTunes метаданные
-    itunes_author = ET.SubElement(channel, "itunes:author")
-    itunes_author.text = subscription.author or subscription.name
-    
-    itunes_summary = ET.SubElement(channel, "itunes:summary")
-    itunes_summary.text = subscription.description or f"Подкаст из подписки {subscription.name}"
-    
-    itunes_category = ET.SubElement(channel, "itunes:category", text=subscription.category)
-    
-    # Дополнительные метаданные канала
-    itunes_explicit = ET.SubElement(channel, "itunes:explicit")
-    itunes_explicit.text = "false"
-    
-    itunes_type = ET.SubElement(channel, "itunes:type")
-    itunes_type.text = "episodic"
-    
-    # Получаем базовый URL для RSS ссылок
-    base_url = config_manager.get_base_url()
-    
-    # Добавляем превью канала (используем превью последнего видео)
-    itunes_image = ET.SubElement(channel, "itunes:image")
-    thumbnail_filename = f"{get_file_hash(latest_video['title'])}.webp"
-    thumbnail_url = f"{base_url}/{subscription.name}/{thumbnail_filename}"
-    itunes_image.set("href", thumbnail_url)
-    
-    # Находим все загруженные аудио файлы в папке подписки
-    downloaded_videos = []
-    if os.path.exists(subscription_dir):
-        for file in os.listdir(subscription_dir):
-            if file.endswith('.mp3'):
-                # Извлекаем хеш из имени файла
-                file_hash = file.replace('.mp3', '')
-                
-                # Ищем соответствующее видео в списке
-                for video in videos:
-                    if get_file_hash(video['title']) == file_hash:
-                        downloaded_videos.append(video)
-                        break
-    
-    # Добавляем элементы для каждого загруженного видео
-    for video in downloaded_videos:
-        item = ET.SubElement(channel, "item")
-        
-        # Заголовок
-        item_title = ET.SubElement(item, "title")
-        item_title.text = video['title']
-        
-        # Описание
-        item_description = ET.SubElement(item, "description")
-        item_description.text = f"Эпизод из подписки {subscription.name}: {video['title']}"
-        
-        # Дата публикации
-        pub_date = ET.SubElement(item, "pubDate")
-        pub_date.text = datetime.now().strftime("%a, %d %b %Y %H:%M:%S +0000")
-        
-        # GUID
-        guid = ET.SubElement(item, "guid")
-        guid.text = f"https://www.youtube.com/watch?v={video['id']}"
-        
-        # Ссылка на аудио файл
-        enclosure = ET.SubElement(item, "enclosure")
-        mp3_filename = f"{get_file_hash(video['title'])}.mp3"
-        mp3_url = f"{base_url}/data/{subscription.name}/{mp3_filename}"
-        enclosure.set("url", mp3_url)
-        enclosure.set("type", "audio/mpeg")
-        mp3_path = f"data/{subscription.name}/{mp3_filename}"
-        if os.path.exists(mp3_path):
-            enclosure.set("length", str(os.path.getsize(mp3_path)))
-        else:
-            enclosure.set("length", "0")
-        
-        # Превью для эпизода
-        thumbnail_filename = f"{get_file_hash(video['title'])}.webp"
-        thumbnail_path = f"data/{subscription.name}/{thumbnail_filename}"
-        if os.path.exists(thumbnail_path):
-            itunes_item_image = ET.SubElement(item, "itunes:image")
-            thumbnail_url = f"{base_url}/data/{subscription.name}/{thumbnail_filename}"
-            itunes_item_image.set("href", thumbnail_url)
-        
-        # Длительность для iTunes
-        if video['duration']:
-            itunes_duration = ET.SubElement(item, "itunes:duration")
-            hours = video['duration'] // 3600
-            minutes = (video['duration'] % 3600) // 60
-            seconds = video['duration'] % 60
-            if hours > 0:
-                duration_str = f"{hours}:{minutes:02d}:{seconds:02d}"
-            else:
-                duration_str = f"{minutes}:{seconds:02d}"
-            itunes_duration.text = duration_str
-        
-        # Автор для iTunes
-        itunes_item_author = ET.SubElement(item, "itunes:author")
-        itunes_item_author.text = video['uploader']
-        
-        # Дополнительные iTunes теги
-        itunes_item_summary = ET.SubElement(item, "itunes:summary")
-        itunes_item_summary.text = f"Эпизод из подписки {subscription.name}: {video['title']}"
-        
-        # Категория эпизода
-        itunes_item_category = ET.SubElement(item, "itunes:category")
-        itunes_item_category.text = subscription.category
-    
-    # Записываем RSS файл
-    tree = ET.ElementTree(rss)
-    ET.indent(tree, space="  ")
-    tree.write(rss_file, encoding='utf-8', xml_declaration=True)
+    formats = config_manager.get_rss_setting('formats', ['rss'])
+    
+    # Источники одной подписки пишут одни и те же файлы лент: лента строится
+    # по всем загруженным эпизодам подписки, а не по видео одного источника
+    with feed_lock(subscription.name):
+        files = scan_subscription_dir(subscription_dir)
+        episodes = update_episode_index(subscription_dir, videos, get_file_hash, files)
+        feed = build_feed(
+            subscription,
+            subscription_dir,
+            base_url=config_manager.get_base_url(),
+            episodes=episodes,
+            rss_settings=config_manager.config.rss_settings,
+            files=files
+        )
+        for feed_file in write_feed(feed, subscription_dir, formats):
+            logger.debug(f"RSS файл обновлен: {feed_file}")
+    logger.info(f"В RSS подписки {subscription.name}: {len(feed.episodes)} загруженных эпизодов")
+
+
+def feed_lock(subscription_name: str) -> threading.Lock:
+    """
+    Блокировка записи лент подписки (источники обрабатываются параллельно в --async)
+    """
+    with _feed_locks_guard:
+        return _feed_locks.setdefault(subscription_name, threading.Lock())
+
+
+def update_feed_index() -> None:
+    """
+    Обновляет OPML индекс со ссылками на ленты всех активных подписок
+    """
+    from feeds import write_opml_index
+
+    opml_file = config_manager.get_rss_setting('opml_index', 'data/index.opml')
+    if not opml_file:
+        return
     
-    print(f"RSS файл обновлен: {rss_file}")
-    print(f"Добавлено {len(downloaded_videos)} загруженных эпизодов в RSS")
+    formats = config_manager.get_rss_setting('formats', ['rss'])
+    try:
+        write_opml_index(get_enabled_subscriptions(), opml_file, config_manager.get_base_url(), formats)
+        logger.info(f"📇 OPML индекс обновлен: {opml_file}")
+    except Exception as e:
+        logger.error(f"❌ Ошибка при обновлении OPML индекса: {e}")
 
 
-def process_source(source: Source, subscription: Subscription) -> bool:
+def process_source(source: Source, subscription: Subscription, triggered: bool = False) -> Optional[bool]:
     """
     Обрабатывает один источник в рамках подписки
     
+    Все записи лога внутри обработки содержат поля subscription и source,
+    длительность этапов записывается в логгер youtube2podcast.timing.
+    Итоговый этап 'source' содержит выбранное видео или класс ошибки
+    (их сохраняет история запусков). Источник обрабатывается под блокировкой
+    источника, а при работе в кластере (секция cluster) - и под арендой.
+    Источник, который падает раз за разом, временно пропускается
+    (секция breaker, см. breaker.py); в dry-run выключатели не применяются.
+    
     Args:
         source: Конфигурация источника
         subscription: Конфигурация подписки
+        triggered: Опрос запрошен явно (API управления, повторный запуск,
+            WebSub): аренда берется без проверки check_interval
         
     Returns:
-        True если обработка прошла успешно, False если нет
+        True если обработка прошла успешно, False если нет,
+        None если источник обрабатывает другой узел или процесс
+        или опрос приостановлен после неудач подряд
     """
-    print(f"\n🔄 Обработка источника: {source.name} (подписка: {subscription.name})")
-    print(f"📋 Тип: {source.source_type.value}")
-    print(f"🔗 URL: {source.url}")
-    print("-" * 50)
+    from leases import source_lease
+    from breaker import source_allowed, record_result
+    from instance_lock import source_lock
+
+    with log_context(subscription=subscription.name, source=source.name):
+        interval = 0 if triggered else max(source.check_interval or 0, 0) * 60
+        with source_lease(subscription.name, source.name, interval) as owned:
+            if not owned:
+                return None
+            with source_lock(subscription.name, source.name) as locked:
+                if not locked:
+                    return None
+                # Выключатель проверяется под арендой и блокировкой: разрешение
+                # переводит его в пробный опрос, результат которого должен быть записан
+                if not dry_run and not source_allowed(subscription.name, source.name, source.url):
+                    return None
+                start = time.perf_counter()
+                result = _process_source(source, subscription)
+                record_phase('source', time.perf_counter() - start, 'ok' if result.success else 'error', **result.fields())
+                metrics.source_finished(subscription.name, source.name, result.success)
+                if not dry_run:
+                    record_result(subscription.name, source.name, source.url, result.success, result.error_class)
+                return result.success
+
+
+@dataclass
+class SourceResult:
+    """Результат обработки источника"""
+    success: bool
+    video: Dict[str, Any] = field(default_factory=dict)
+    error_class: Optional[str] = None
+    error: Optional[str] = None
+
+    def fields(self) -> Dict[str, Any]:
+        """Поля для замера этапа 'source' (только заданные)"""
+        values = {
+            'video_id': self.video.get('id'),
+            'video_title': self.video.get('title'),
+            'error_class': self.error_class,
+            'error': self.error,
+        }
+        return {key: value for key, value in values.items() if value is not None}
+
+
+def _process_source(source: Source, subscription: Subscription) -> SourceResult:
+    """Обработка источника без замера общего времени (см. process_source)"""
+    logger.info(f"🔄 Обработка источника: {source.name} (подписка: {subscription.name})")
+    logger.debug(f"📋 Тип: {source.source_type.value}")
+    logger.debug(f"🔗 URL: {source.url}")
     
     try:
         # Проверяем переменную окружения для предотвращения загрузки в тестах
         if os.environ.get('SKIP_DOWNLOAD', 'false').lower() in ('true', '1', 'yes'):
-            print(f"🚫 Обработка пропущена (SKIP_DOWNLOAD=true) для источника: {source.name}")
-            return True
+            logger.info(f"🚫 Обработка пропущена (SKIP_DOWNLOAD=true) для источника: {source.name}")
+            return SourceResult(True)
         
         # Если включен dry-run режим, выполняем анализ
         if dry_run:
             analysis_result = dry_run_analysis(source, subscription)
-            return analysis_result.get('will_download') is not None
+            will_download = analysis_result.get('will_download')
+            if will_download is None:
+                return SourceResult(False, error_class='NoAvailableVideo')
+            return SourceResult(True, will_download)
         
         # Получаем информацию о видео
         videos = get_videos_from_source(source)
         
         if not videos:
-            print(f"❌ Не удалось получить видео из источника: {source.name}")
-            return False
+            logger.error(f"❌ Не удалось получить видео из источника: {source.name}")
+            return SourceResult(False, error_class='NoVideos')
         
-        # Выводим информацию о видео (если есть)
-        if videos:
-            print_video_links(videos, source.name)
+        # Выводим информацию о видео (только в подробном режиме)
+        print_video_links(videos, source.name, level=logging.DEBUG)
         
         # Загружаем аудио из последнего видео
         latest_video = download_latest_audio(videos, source, subscription)
         
         # Создаем/обновляем RSS файл
         if latest_video and latest_video != {}:
-            create_or_update_rss(videos, source, subscription, latest_video)
-            return True
+            with phase_timer('rss'):
+                create_or_update_rss(videos, source, subscription, latest_video)
+            return SourceResult(True, latest_video)
         else:
-            print(f"❌ Не удалось загрузить видео для RSS из источника: {source.name}")
-            return False
+            logger.error(f"❌ Не удалось загрузить видео для RSS из источника: {source.name}")
+            return SourceResult(False, error_class='NoAvailableVideo')
             
     except Exception as e:
-        print(f"❌ Ошибка при обработке источника '{source.name}': {e}")
-        return False
+        logger.error(f"❌ Ошибка при обработке источника '{source.name}': {e}")
+        return SourceResult(False, error_class=type(e).__name__, error=str(e))
 
 
 def dry_run_analysis(source: Source, subscription: Subscription) -> Dict[str, Any]:
@@ -896,8 +1055,8 @@ def dry_run_analysis(source: Source, subscription: Subscription) -> Dict[str, An
     Returns:
         Словарь с информацией о том, что будет загружено
     """
-    print(f"\n🔍 DRY-RUN: Анализ источника '{source.name}' в подписке '{subscription.name}'")
-    print("=" * 80)
+    logger.info(f"🔍 DRY-RUN: Анализ источника '{source.name}' в подписке '{subscription.name}'")
+    logger.info("=" * 80)
     
     # Получаем видео из источника
     if source.source_type == SourceType.PLAYLIST:
@@ -905,21 +1064,21 @@ def dry_run_analysis(source: Source, subscription: Subscription) -> Dict[str, An
         videos = playlist_data.get('entries', [])
         
         if playlist_data:
-            print(f"📋 Плейлист: {playlist_data.get('title', 'Неизвестно')}")
-            print(f"👤 Автор: {playlist_data.get('uploader', 'Неизвестно')}")
-            print(f"📊 Всего видео: {playlist_data.get('video_count', 0)}")
+            logger.info(f"📋 Плейлист: {playlist_data.get('title', 'Неизвестно')}")
+            logger.info(f"👤 Автор: {playlist_data.get('uploader', 'Неизвестно')}")
+            logger.info(f"📊 Всего видео: {playlist_data.get('video_count', 0)}")
             if playlist_data.get('last_updated'):
-                print(f"🔄 Последнее обновление: {playlist_data['last_updated']}")
+                logger.info(f"🔄 Последнее обновление: {playlist_data['last_updated']}")
     else:
         videos = get_videos_from_source(source)
     
     if not videos:
-        print("❌ DRY-RUN: Нет видео для анализа")
+        logger.error("❌ DRY-RUN: Нет видео для анализа")
         return {}
     
     # Анализируем последние видео
-    print(f"\n📺 DRY-RUN: Анализ последних {min(source.max_videos, len(videos))} видео:")
-    print("-" * 80)
+    logger.info(f"📺 DRY-RUN: Анализ последних {min(source.max_videos, len(videos))} видео:")
+    logger.info("-" * 80)
     
     analysis_result = {
         'source_name': source.name,
@@ -933,27 +1092,27 @@ def dry_run_analysis(source: Source, subscription: Subscription) -> Dict[str, An
     
     # Проверяем доступность видео
     for i, video in enumerate(videos[:source.max_videos]):
-        print(f"\n{i+1}. {video['title']}")
-        print(f"   ID: {video['id']}")
-        print(f"   URL: https://www.youtube.com/watch?v={video['id']}")
-        print(f"   Автор: {video['uploader']}")
+        logger.info(f"{i+1}. {video['title']}")
+        logger.info(f"   ID: {video['id']}")
+        logger.info(f"   URL: https://www.youtube.com/watch?v={video['id']}")
+        logger.info(f"   Автор: {video['uploader']}")
         
         if video.get('upload_date'):
             upload_date = video['upload_date']
             formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-            print(f"   📅 Дата загрузки: {formatted_date}")
+            logger.info(f"   📅 Дата загрузки: {formatted_date}")
         
         if video.get('playlist_position'):
-            print(f"   📋 Позиция в плейлисте: {video['playlist_position']}")
+            logger.info(f"   📋 Позиция в плейлисте: {video['playlist_position']}")
         
         # Проверяем доступность
         is_available = check_video_availability(video['id'])
         
         if is_available:
-            print(f"   ✅ Доступно")
+            logger.info(f"   ✅ Доступно")
             analysis_result['available_videos'].append(video)
         else:
-            print(f"   ❌ Недоступно")
+            logger.error(f"   ❌ Недоступно")
             analysis_result['unavailable_videos'].append(video)
     
     # Определяем какое видео будет загружено
@@ -961,10 +1120,10 @@ def dry_run_analysis(source: Source, subscription: Subscription) -> Dict[str, An
         will_download = analysis_result['available_videos'][0]  # Первое доступное
         analysis_result['will_download'] = will_download
         
-        print(f"\n🎯 DRY-RUN: Будет загружено видео:")
-        print(f"   Название: {will_download['title']}")
-        print(f"   ID: {will_download['id']}")
-        print(f"   URL: https://www.youtube.com/watch?v={will_download['id']}")
+        logger.info(f"🎯 DRY-RUN: Будет загружено видео:")
+        logger.info(f"   Название: {will_download['title']}")
+        logger.info(f"   ID: {will_download['id']}")
+        logger.info(f"   URL: https://www.youtube.com/watch?v={will_download['id']}")
         
         # Проверяем, существует ли уже файл
         file_hash = get_file_hash(will_download['title'])
@@ -973,12 +1132,12 @@ def dry_run_analysis(source: Source, subscription: Subscription) -> Dict[str, An
         mp3_path = os.path.join(subscription_dir, mp3_filename)
         
         if os.path.exists(mp3_path):
-            print(f"   ⚠️  Файл уже существует: {mp3_filename}")
-            print(f"   📁 Путь: {mp3_path}")
+            logger.warning(f"   ⚠️  Файл уже существует: {mp3_filename}")
+            logger.info(f"   📁 Путь: {mp3_path}")
             analysis_result['file_exists'] = True
         else:
-            print(f"   📁 Файл будет создан: {mp3_filename}")
-            print(f"   📁 Путь: {mp3_path}")
+            logger.info(f"   📁 Файл будет создан: {mp3_filename}")
+            logger.info(f"   📁 Путь: {mp3_path}")
             analysis_result['file_exists'] = False
         
         # Показываем настройки загрузки
@@ -986,109 +1145,366 @@ def dry_run_analysis(source: Source, subscription: Subscription) -> Dict[str, An
         audio_codec = config_manager.get_download_setting('audio_codec', 'mp3')
         audio_quality = config_manager.get_download_setting('audio_quality', '192')
         
-        print(f"\n⚙️  DRY-RUN: Настройки загрузки:")
-        print(f"   Формат: {download_settings}")
-        print(f"   Кодек: {audio_codec}")
-        print(f"   Качество: {audio_quality}")
+        logger.info(f"⚙️  DRY-RUN: Настройки загрузки:")
+        logger.info(f"   Формат: {download_settings}")
+        logger.info(f"   Кодек: {audio_codec}")
+        logger.info(f"   Качество: {audio_quality}")
         
     else:
-        print(f"\n❌ DRY-RUN: Нет доступных видео для загрузки")
+        logger.error(f"❌ DRY-RUN: Нет доступных видео для загрузки")
         analysis_result['will_download'] = None
     
     # Статистика
-    print(f"\n📊 DRY-RUN: Статистика:")
-    print(f"   Всего найдено видео: {analysis_result['total_videos_found']}")
-    print(f"   Проверено видео: {analysis_result['videos_to_check']}")
-    print(f"   Доступных видео: {len(analysis_result['available_videos'])}")
-    print(f"   Недоступных видео: {len(analysis_result['unavailable_videos'])}")
+    logger.info(f"📊 DRY-RUN: Статистика:")
+    logger.info(f"   Всего найдено видео: {analysis_result['total_videos_found']}")
+    logger.info(f"   Проверено видео: {analysis_result['videos_to_check']}")
+    logger.info(f"   Доступных видео: {len(analysis_result['available_videos'])}")
+    logger.info(f"   Недоступных видео: {len(analysis_result['unavailable_videos'])}")
     
     return analysis_result
 
 
+def format_wait(seconds: float) -> str:
+    """
+    Форматирует время ожидания для вывода
+    """
+    seconds = int(seconds)
+    if seconds >= 60:
+        return f"{seconds // 60} мин {seconds % 60:02d} сек"
+    return f"{seconds} сек"
+
+
+def sync_schedule(scheduler: SourceScheduler, subscription_filter: str = None, source_filter: str = None) -> ScheduleDiff:
+    """
+    Перечитывает конфигурацию, если файл изменился, и синхронизирует расписание источников
+    
+    Args:
+        scheduler: Расписание источников
+        subscription_filter: Фильтр по названию подписки (опционально)
+        source_filter: Фильтр по названию источника (опционально)
+        
+    Returns:
+        Изменения расписания
+    """
+    import websub
+
+    first_sync = len(scheduler) == 0
+    config_manager.reload_if_changed()
+    
+    enabled_subscriptions = get_enabled_subscriptions()
+    if subscription_filter:
+        enabled_subscriptions = [sub for sub in enabled_subscriptions if sub.name == subscription_filter]
+    
+    diff = scheduler.sync(enabled_subscriptions, source_filter)
+    websub.sync(scheduler)
+    apply_poll_requests(scheduler)
+    if diff and not first_sync:
+        logger.info(f"🔄 Расписание обновлено ({diff.summary()})")
+        for subscription_name, source_name in diff.added:
+            logger.info(f"   ➕ {subscription_name}/{source_name}")
+        for subscription_name, source_name in diff.changed:
+            logger.info(f"   ✏️  {subscription_name}/{source_name}")
+        for subscription_name, source_name in diff.removed:
+            logger.info(f"   ➖ {subscription_name}/{source_name}")
+    return diff
+
+
+def apply_poll_requests(scheduler: SourceScheduler) -> None:
+    """
+    Делает наступившими источники, опрос которых запросили повторные запуски
+    программы, API управления или уведомления WebSub
+    """
+    import control
+    import websub
+
+    for subscription_name, source_name in control.take_polls() + websub.take_notifications():
+        scheduler.trigger(subscription_name, source_name)
+    if instance_lock is None:
+        return
+    for request in instance_lock.take_requests():
+        target = '/'.join(name for name in (request.get('subscription'), request.get('source')) if name) or 'всех источников'
+        triggered = scheduler.trigger(request.get('subscription'), request.get('source'))
+        logger.info(f"📨 Запрос от PID {request.get('pid')}: опрос {target} ({len(triggered)} источников)")
+
+
+def wait_for_next_run(seconds: float) -> None:
+    """
+    Ждет до следующего запуска, прерываясь при остановке, изменении конфигурации,
+    запросе на опрос (от повторного запуска, API управления или WebSub) и снятии паузы
+    """
+    import control
+    import websub
+
+    paused = control.is_paused()
+    deadline = time.time() + seconds
+    while running and time.time() < deadline:
+        time.sleep(min(1, max(deadline - time.time(), 0)))
+        if config_manager.has_changed_on_disk():
+            logger.info("📝 Обнаружено изменение конфигурации")
+            break
+        if instance_lock is not None and instance_lock.has_requests():
+            break
+        if control.has_polls() or websub.has_notifications() or control.is_paused() != paused:
+            break
+
+
+def run_iteration(scheduler: SourceScheduler, due_sources: List[ScheduledSource],
+                  subscription_filter: str = None, source_filter: str = None) -> None:
+    """
+    Обрабатывает источники, срок опроса которых наступил
+    
+    Args:
+        scheduler: Расписание источников
+        due_sources: Источники к обработке
+        subscription_filter: Фильтр по названию подписки (опционально)
+        source_filter: Фильтр по названию источника (опционально)
+    """
+    from history import iteration_started, iteration_finished
+    import control
+    import ytdlp_cache
+
+    logger.info(f"🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Запуск итерации")
+    logger.info(f"📋 Источников к обработке: {len(due_sources)} из {len(scheduler)}")
+    iteration_started('dry-run' if dry_run else 'loop')
+    
+    total_success_count = 0
+    total_sources_count = 0
+    current_subscription = None
+    metrics.scheduled_sources.set(len(scheduler))
+    
+    for position, job in enumerate(due_sources):
+        if not running or control.is_paused():
+            break
+        metrics.queue_depth.set(len(due_sources) - position)
+        
+        # Конфигурация могла измениться, пока обрабатывались предыдущие источники
+        sync_schedule(scheduler, subscription_filter, source_filter)
+        if scheduler.get(job.key) is not job:
+            # Источник удален или изменен - новая версия будет обработана отдельно
+            continue
+        
+        if job.subscription.name != current_subscription:
+            current_subscription = job.subscription.name
+            logger.info(f"📦 Обработка подписки: {job.subscription.title}")
+            logger.debug(f"📝 Описание: {job.subscription.description}")
+        
+        control.source_started(job.key)
+        try:
+            result = process_source(job.source, job.subscription, job.triggered)
+        finally:
+            control.source_finished(job.key)
+        if result is not None:
+            total_success_count += 1 if result else 0
+            total_sources_count += 1
+        scheduler.mark_done(job.key)
+        flush_metrics()
+    
+    update_feed_index()
+    iteration_finished(total_sources_count, total_success_count)
+    control.iteration_finished(total_sources_count, total_success_count)
+    metrics.queue_depth.set(0)
+    metrics.iterations.inc()
+    ytdlp_cache.update_metrics()
+    flush_metrics()
+    
+    logger.info(f"✅ Итерация завершена в {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info(f"📊 Успешно обработано: {total_success_count}/{total_sources_count} источников")
+
+
 def main_loop(subscription_filter: str = None, source_filter: str = None):
     """
     Основной цикл программы с автоматическим запуском
     
+    Каждый источник опрашивается со своим интервалом check_interval.
+    Изменения config.yaml подхватываются без перезапуска: перепланируются
+    только добавленные, удаленные и измененные источники.
+    После итерации проверяется память (секция memory): при превышении
+    потолка max_rss процесс перезапускает себя с теми же аргументами.
+    С секцией control цикл принимает команды API управления (опрос,
+    пауза, состояние, /healthz), с секцией websub - уведомления YouTube
+    о новых видео, а каналы с подпиской опрашиваются редко.
+    
     Args:
         subscription_filter: Фильтр по названию подписки (опционально)
         source_filter: Фильтр по названию источника (опционально)
     """
     global running
+    from memory_probe import MemoryProbe
+    from breaker import backoff_delay
+    import control
+    import websub
+    from profiling import maybe_profile
+    from orchestrator import ERROR_RETRY_BASE, ERROR_RETRY_MAX
     
     # Регистрируем обработчики сигналов
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
     mode_text = "DRY-RUN" if dry_run else "Обычный"
-    print(f"🎙️  YouTube2Podcast Multi-Source загрузчик запущен ({mode_text} режим)")
-    print("⏰ Программа будет обрабатывать все источники каждые 10 минут")
+    logger.info(f"🎙️  YouTube2Podcast Multi-Source загрузчик запущен ({mode_text} режим)")
+    logger.info("⏰ Источники опрашиваются с интервалом check_interval (по умолчанию 10 минут)")
     if subscription_filter:
-        print(f"📋 Фильтр подписки: {subscription_filter}")
+        logger.info(f"📋 Фильтр подписки: {subscription_filter}")
     if source_filter:
-        print(f"📋 Фильтр источника: {source_filter}")
-    print("🛑 Для остановки нажмите Ctrl+C")
-    print("=" * 50)
+        logger.info(f"📋 Фильтр источника: {source_filter}")
+    logger.info("🛑 Для остановки нажмите Ctrl+C")
+    logger.info("=" * 50)
+    
+    # Диагностика сети выполняется в фоне параллельно с первой итерацией
+    start_network_diagnostics()
     
-    # Запускаем диагностику сетевых проблем
-    diagnose_network_issues()
+    # Замер памяти после каждой итерации (секция memory)
+    memory_probe = MemoryProbe(config_manager.config.memory_settings)
+    memory_probe.start()
+    
+    scheduler = SourceScheduler()
+    control.setup_control(config_manager.config.control_settings, scheduler, 'loop')
+    websub.setup_websub(config_manager.config.websub_settings)
+    errors = 0
     
     while running:
         try:
-            print(f"\n🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Запуск итерации")
-            
-            # Получаем активные подписки
-            enabled_subscriptions = get_enabled_subscriptions()
+            sync_schedule(scheduler, subscription_filter, source_filter)
             
-            if not enabled_subscriptions:
-                print("❌ Нет активных подписок для обработки")
-                break
-            
-            print(f"📋 Найдено {len(enabled_subscriptions)} активных подписок")
+            if not len(scheduler):
+                logger.warning("❌ Нет активных подписок для обработки, ожидаем изменения конфигурации...")
+                wait_for_next_run(600)
+                continue
             
-            # Обрабатываем каждую подписку
-            total_success_count = 0
-            total_sources_count = 0
+            if control.is_paused():
+                wait_for_next_run(600)
+                continue
             
-            for subscription in enabled_subscriptions:
-                print(f"\n📦 Обработка подписки: {subscription.title}")
-                print(f"📝 Описание: {subscription.description}")
-                print(f"📊 Источников в подписке: {len(subscription.sources)}")
-                print("-" * 50)
-                
-                # Обрабатываем источники в подписке
-                subscription_success_count = 0
-                enabled_sources = [source for source in subscription.sources if source.enabled]
-                
-                for source in enabled_sources:
-                    if process_source(source, subscription):
-                        subscription_success_count += 1
-                    total_sources_count += 1
-                    print()  # Пустая строка между источниками
+            due_sources = scheduler.due()
+            if due_sources:
+                with maybe_profile(profiler, source_filter or 'iteration'):
+                    run_iteration(scheduler, due_sources, subscription_filter, source_filter)
                 
-                total_success_count += subscription_success_count
-                print(f"✅ Подписка '{subscription.title}' завершена. Успешно: {subscription_success_count}/{len(enabled_sources)} источников")
+                if memory_probe.active and memory_probe.check().ceiling_exceeded and running:
+                    # Контролируемый перезапуск между итерациями: состояние хранится на диске
+                    flush_metrics()
+                    memory_probe.restart()
             
-            print(f"✅ Итерация завершена в {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"📊 Успешно обработано: {total_success_count}/{total_sources_count} источников")
-            
-            if running:
-                print("⏳ Ожидание 10 минут до следующего запуска...")
-                # Ждем 10 минут (600 секунд)
-                for i in range(600):
-                    if not running:
-                        break
-                    time.sleep(1)
+            errors = 0
+            wait_seconds = scheduler.seconds_until_next()
+            if running and wait_seconds:
+                logger.info(f"⏳ Ожидание {format_wait(wait_seconds)} до следующего запуска...")
+                wait_for_next_run(wait_seconds)
                     
         except KeyboardInterrupt:
-            print("\n🛑 Получен сигнал прерывания")
+            logger.info("🛑 Получен сигнал прерывания")
             running = False
         except Exception as e:
-            print(f"❌ Ошибка в основной программе: {e}")
+            errors += 1
+            logger.error(f"❌ Ошибка в основной программе: {e}")
             if running:
-                print("⏳ Ожидание 10 минут перед повторной попыткой...")
-                time.sleep(600)
+                # Пауза растет вдвое с каждой ошибкой подряд
+                delay = backoff_delay(errors, ERROR_RETRY_BASE, ERROR_RETRY_MAX)
+                logger.info(f"⏳ Ожидание {format_wait(delay)} перед повторной попыткой (ошибок подряд: {errors})...")
+                wait_for_next_run(delay)
+    
+    control.stop_control()
+    websub.stop_websub()
+    logger.info("👋 Программа завершена")
+
+
+def async_main_loop(subscription_filter: str = None, source_filter: str = None):
+    """
+    Основной цикл на asyncio (--loop --async)
     
-    print("👋 Программа завершена")
+    Расписание то же, что в main_loop, но наступившие источники обрабатываются
+    параллельно в пуле потоков: не больше global.max_concurrent_sources
+    одновременно, загрузок и перекодирования - не больше
+    global.max_concurrent_downloads. SIGINT и SIGTERM обрабатывает цикл событий:
+    новые источники не запускаются, начатые дорабатывают.
+    
+    Args:
+        subscription_filter: Фильтр по названию подписки (опционально)
+        source_filter: Фильтр по названию источника (опционально)
+    """
+    global running, download_slots
+    from memory_probe import MemoryProbe
+    from history import iteration_started, iteration_finished
+    import control
+    import websub
+    import ytdlp_cache
+    from orchestrator import AsyncOrchestrator, DEFAULT_MAX_CONCURRENT
+    
+    max_sources = config_manager.get_global_setting('max_concurrent_sources', DEFAULT_MAX_CONCURRENT)
+    max_downloads = config_manager.get_global_setting('max_concurrent_downloads', 2)
+    download_slots = threading.BoundedSemaphore(max(int(max_downloads), 1)) if max_downloads else None
+    
+    mode_text = "DRY-RUN" if dry_run else "Обычный"
+    logger.info(f"🎙️  YouTube2Podcast Multi-Source загрузчик запущен ({mode_text} режим, asyncio)")
+    logger.info("⏰ Источники опрашиваются с интервалом check_interval (по умолчанию 10 минут)")
+    if subscription_filter:
+        logger.info(f"📋 Фильтр подписки: {subscription_filter}")
+    if source_filter:
+        logger.info(f"📋 Фильтр источника: {source_filter}")
+    logger.info("🛑 Для остановки нажмите Ctrl+C")
+    logger.info("=" * 50)
+    
+    start_network_diagnostics()
+    memory_probe = MemoryProbe(config_manager.config.memory_settings)
+    memory_probe.start()
+    restart_requested = False
+    
+    scheduler = SourceScheduler()
+    orchestrator = None
+    warned_empty = False
+    
+    def sync():
+        nonlocal warned_empty
+        sync_schedule(scheduler, subscription_filter, source_filter)
+        metrics.scheduled_sources.set(len(scheduler))
+        if not len(scheduler) and not warned_empty:
+            logger.warning("❌ Нет активных подписок для обработки, ожидаем изменения конфигурации...")
+        warned_empty = not len(scheduler)
+    
+    def process(job: ScheduledSource) -> Optional[bool]:
+        metrics.queue_depth.set(orchestrator.waiting)
+        control.source_started(job.key)
+        try:
+            success = process_source(job.source, job.subscription, job.triggered)
+        finally:
+            control.source_finished(job.key)
+        flush_metrics()
+        return success
+    
+    def wave_started():
+        logger.info(f"🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - Запуск итерации")
+        iteration_started('dry-run' if dry_run else 'loop')
+    
+    def wave_finished(total: int, success: int):
+        nonlocal restart_requested
+        update_feed_index()
+        iteration_finished(total, success)
+        control.iteration_finished(total, success)
+        metrics.queue_depth.set(0)
+        metrics.iterations.inc()
+        ytdlp_cache.update_metrics()
+        flush_metrics()
+        logger.info(f"✅ Итерация завершена в {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info(f"📊 Успешно обработано: {success}/{total} источников")
+        if memory_probe.active and memory_probe.check().ceiling_exceeded and orchestrator.running:
+            # Перезапуск после остановки цикла, когда начатые источники доработают
+            restart_requested = True
+            orchestrator.stop()
+    
+    control.setup_control(config_manager.config.control_settings, scheduler, 'async', max_sources)
+    websub.setup_websub(config_manager.config.websub_settings)
+    orchestrator = AsyncOrchestrator(scheduler, process, sync=sync, max_concurrent=max_sources,
+                                     on_wave_start=wave_started, on_wave_end=wave_finished,
+                                     paused=control.is_paused)
+    orchestrator.run_forever()
+    running = False
+    control.stop_control()
+    websub.stop_websub()
+    
+    if restart_requested:
+        flush_metrics()
+        memory_probe.restart()
+    logger.info("👋 Программа завершена")
 
 
 def main(subscription_filter: str = None, source_filter: str = None):
@@ -1099,81 +1515,165 @@ def main(subscription_filter: str = None, source_filter: str = None):
         subscription_filter: Фильтр по названию подписки (опционально)
         source_filter: Фильтр по названию источника (опционально)
     """
-    # Запускаем диагностику сетевых проблем
-    diagnose_network_issues()
+    from history import iteration_started, iteration_finished
+
+    # Диагностика сети выполняется в фоне параллельно с обработкой источников
+    diagnostics = start_network_diagnostics()
     
     mode_text = "DRY-RUN" if dry_run else "Обычный"
-    print(f"🎙️  YouTube2Podcast Multi-Source - Однократный запуск ({mode_text} режим)")
-    print("=" * 50)
+    logger.info(f"🎙️  YouTube2Podcast Multi-Source - Однократный запуск ({mode_text} режим)")
+    logger.info("=" * 50)
     
     # Получаем активные подписки
     enabled_subscriptions = get_enabled_subscriptions()
     
     if not enabled_subscriptions:
-        print("❌ Нет активных подписок для обработки")
+        logger.error("❌ Нет активных подписок для обработки")
         return
     
     # Фильтруем подписки если указан фильтр
     if subscription_filter:
         enabled_subscriptions = [sub for sub in enabled_subscriptions if sub.name == subscription_filter]
         if not enabled_subscriptions:
-            print(f"❌ Подписка '{subscription_filter}' не найдена или неактивна")
+            logger.error(f"❌ Подписка '{subscription_filter}' не найдена или неактивна")
             return
-        print(f"📋 Фильтр подписки: {subscription_filter}")
+        logger.info(f"📋 Фильтр подписки: {subscription_filter}")
     
-    print(f"📋 Найдено {len(enabled_subscriptions)} активных подписок")
+    logger.info(f"📋 Найдено {len(enabled_subscriptions)} активных подписок")
     
     # Обрабатываем каждую подписку
     total_success_count = 0
     total_sources_count = 0
+    iteration_started('dry-run' if dry_run else 'once')
     
     for subscription in enabled_subscriptions:
-        print(f"\n📦 Обработка подписки: {subscription.title}")
-        print(f"📝 Описание: {subscription.description}")
-        print(f"📊 Источников в подписке: {len(subscription.sources)}")
-        print("-" * 50)
+        logger.info(f"📦 Обработка подписки: {subscription.title}")
+        logger.debug(f"📝 Описание: {subscription.description}")
+        logger.info(f"📊 Источников в подписке: {len(subscription.sources)}")
         
         # Обрабатываем источники в подписке
         subscription_success_count = 0
+        subscription_sources_count = 0
         enabled_sources = [source for source in subscription.sources if source.enabled]
         
         # Фильтруем источники если указан фильтр
         if source_filter:
             enabled_sources = [source for source in enabled_sources if source.name == source_filter]
             if not enabled_sources:
-                print(f"❌ Источник '{source_filter}' не найден или неактивен в подписке '{subscription.name}'")
+                logger.error(f"❌ Источник '{source_filter}' не найден или неактивен в подписке '{subscription.name}'")
                 continue
-            print(f"📋 Фильтр источника: {source_filter}")
+            logger.info(f"📋 Фильтр источника: {source_filter}")
         
         for source in enabled_sources:
-            if process_source(source, subscription):
-                subscription_success_count += 1
-            total_sources_count += 1
-            print()  # Пустая строка между источниками
+            result = process_source(source, subscription)
+            if result is not None:
+                subscription_success_count += 1 if result else 0
+                subscription_sources_count += 1
         
         total_success_count += subscription_success_count
-        print(f"✅ Подписка '{subscription.title}' завершена. Успешно: {subscription_success_count}/{len(enabled_sources)} источников")
+        total_sources_count += subscription_sources_count
+        logger.info(f"✅ Подписка '{subscription.title}' завершена. Успешно: {subscription_success_count}/{subscription_sources_count} источников")
+    
+    update_feed_index()
+    iteration_finished(total_sources_count, total_success_count)
+    flush_metrics()
+    diagnostics.wait()
+    
+    logger.info(f"📊 Общая обработка завершена. Успешно: {total_success_count}/{total_sources_count} источников")
+
+
+def acquire_instance_lock(args) -> bool:
+    """
+    Получает блокировку экземпляра или разбирается с уже работающим процессом
+    
+    Однократный запуск при работающем --loop передает ему запрос на опрос
+    (с фильтрами --subscription/--source) и завершается. Остальные повторные
+    запуски завершаются сразу; с --force работают параллельно, пропуская
+    источники, которые обрабатывает другой процесс. В кластере блокировка
+    своя у каждого узла (node_id, по умолчанию имя хоста): узлы делят
+    источники через аренды.
     
-    print(f"\n📊 Общая обработка завершена. Успешно: {total_success_count}/{total_sources_count} источников")
+    Returns:
+        True если можно продолжать работу
+    """
+    global instance_lock
+    from leases import configured_node_id
+    from instance_lock import InstanceLock, describe_holder, instance_lock_path
+    
+    node_id = None
+    cluster_settings = config_manager.config.cluster_settings
+    if cluster_settings.get('enabled', False):
+        node_id = configured_node_id(cluster_settings) or socket.gethostname()
+    lock = InstanceLock(instance_lock_path(node_id))
+    if lock.acquire('loop' if args.loop else 'once'):
+        instance_lock = lock
+        return True
+    
+    holder = lock.holder()
+    if args.force:
+        logger.warning(f"⚠️  Уже работает {describe_holder(holder)}; --force: запуск параллельно")
+        return True
+    if not args.loop and holder.get('mode') == 'loop':
+        lock.submit_request(args.subscription, args.source)
+        target = '/'.join(name for name in (args.subscription, args.source) if name) or 'всех источников'
+        logger.info(f"📨 Уже работает {describe_holder(holder)}: опрос {target} передан ему")
+        return False
+    logger.warning(f"⚠️  Уже работает {describe_holder(holder)}; повторный запуск пропущен")
+    return False
 
 
 def init_application():
     """
     Инициализирует приложение с аргументами командной строки
     """
-    global dry_run
+    global dry_run, profiler
+    from history import setup_history
+    from leases import setup_leases
+    from breaker import setup_breaker
+    import ytdlp_cache
+    from profiling import IterationProfiler, maybe_profile
+    import replay
     
     # Парсим аргументы командной строки
     args = parse_arguments()
     
     # Устанавливаем глобальные переменные
     dry_run = args.dry_run
+    if args.config:
+        set_config_file(args.config)
+    
+    # Логирование, метрики и история запусков настраиваются по секциям logging, metrics и history
+    setup_logging(config_manager.config.logging_settings, verbosity=-1 if args.quiet else args.verbose)
+    setup_metrics(config_manager.config.metrics_settings)
+    setup_history(config_manager.config.history_settings)
+    setup_leases(config_manager.config.cluster_settings)
+    setup_breaker(config_manager.config.breaker_settings)
+    ytdlp_cache.setup_ytdlp_cache(config_manager.config.ytdlp_cache_settings)
+    
+    if not dry_run and not acquire_instance_lock(args):
+        return
+    
+    if args.profile:
+        profiler = IterationProfiler(args.profile, args.profile_dir, args.profile_top)
+    
+    if args.record:
+        replay.start_recording(args.record)
+    elif args.replay:
+        replay.start_replay(args.replay, args.replay_latency)
+    else:
+        # Прогрев не должен попадать в фикстуры, а при воспроизведении запросов к YouTube нет
+        ytdlp_cache.start_warmup(create_ydl)
     
     # Запускаем в зависимости от аргументов
-    if args.loop:
+    if args.loop and args.use_async:
+        if profiler:
+            logger.warning("⚠️  --profile профилирует один поток и в режиме --async не применяется")
+        async_main_loop(args.subscription, args.source)
+    elif args.loop:
         main_loop(args.subscription, args.source)
     else:
-        main(args.subscription, args.source)
+        with maybe_profile(profiler, args.source or 'run'):
+            main(args.subscription, args.source)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Асинхронный оркестратор опроса источников для режима --loop --async
+
+Цикл событий asyncio следит за расписанием (SourceScheduler) и запускает
+опрос каждого источника, срок которого наступил, как отдельную задачу.
+Блокирующая работа (yt-dlp, ffmpeg, запись лент) выполняется в пуле потоков,
+одновременно выполняется не больше max_concurrent источников, остальные ждут
+на семафоре - так в расписании могут быть сотни источников.
+
+Волна - период от запуска первого источника до завершения последнего из
+одновременно обрабатываемых; в начале и в конце волны вызываются
+обработчики (история запусков, OPML индекс, метрики, контроль памяти).
+"""
+
+import asyncio
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Any
+
+from breaker import backoff_delay
+from logging_setup import get_logger
+from scheduler import SourceScheduler, ScheduledSource, SourceKey
+
+
+logger = get_logger('orchestrator')
+
+DEFAULT_MAX_CONCURRENT = 4
+IDLE_INTERVAL = 1.0  # Как часто проверять конфигурацию и расписание, секунды
+ERROR_RETRY_BASE = 60  # Пауза после ошибки цикла, удваивается с каждой ошибкой подряд, секунды
+ERROR_RETRY_MAX = 1800  # Максимальная пауза после ошибок цикла, секунды
+
+
+class AsyncOrchestrator:
+    """
+    Асинхронный цикл опроса источников
+
+    Args:
+        scheduler: Расписание источников
+        process: Блокирующая обработка источника: True при успехе, None - источник пропущен
+        sync: Синхронизация расписания с конфигурацией (вызывается в пуле потоков)
+        max_concurrent: Сколько источников обрабатывается одновременно
+        on_wave_start: Вызывается перед первым источником волны (в пуле потоков)
+        on_wave_end: Вызывается с (обработано, успешно) после последнего источника волны
+        idle_interval: Период проверки расписания и конфигурации, секунды
+        paused: Возвращает True, пока запуск новых источников приостановлен
+    """
+
+    def __init__(self, scheduler: SourceScheduler, process: Callable[[ScheduledSource], Optional[bool]],
+                 sync: Callable[[], Any] = None, max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+                 on_wave_start: Callable[[], None] = None, on_wave_end: Callable[[int, int], None] = None,
+                 idle_interval: float = IDLE_INTERVAL, paused: Callable[[], bool] = None):
+        self.scheduler = scheduler
+        self.process = process
+        self.sync = sync
+        self.max_concurrent = max(int(max_concurrent or 1), 1)
+        self.on_wave_start = on_wave_start
+        self.on_wave_end = on_wave_end
+        self.idle_interval = idle_interval
+        self.paused = paused
+        self.running = False
+        self._tasks: Dict[SourceKey, asyncio.Task] = {}
+        self._active: Dict[SourceKey, float] = {}
+        self._wave_total = 0
+        self._wave_success = 0
+        self._stop_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def in_flight(self) -> int:
+        """Источники в работе (выполняются и ждут свободного места)"""
+        return len(self._tasks)
+
+    @property
+    def active(self) -> int:
+        """Источники, которые выполняются прямо сейчас"""
+        return len(self._active)
+
+    @property
+    def waiting(self) -> int:
+        """Источники, ожидающие свободного места на семафоре"""
+        return len(self._tasks) - len(self._active)
+
+    def stop(self) -> None:
+        """Останавливает цикл: ожидающие источники отменяются, выполняющиеся дорабатывают"""
+        self.running = False
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def run_forever(self) -> None:
+        """Запускает цикл событий и работает до stop() или SIGINT/SIGTERM"""
+        asyncio.run(self.run())
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix='source')
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.running = True
+        self._install_signal_handlers()
+        logger.info(f"⚙️  Асинхронный режим: до {self.max_concurrent} источников одновременно")
+        errors = 0
+        try:
+            while self.running:
+                try:
+                    await self._tick(semaphore)
+                    errors = 0
+                except Exception as e:
+                    errors += 1
+                    logger.error(f"❌ Ошибка в основной программе: {e}")
+                    if self.running:
+                        delay = backoff_delay(errors, ERROR_RETRY_BASE, ERROR_RETRY_MAX)
+                        logger.info(f"⏳ Ожидание {delay:.0f} сек перед повторной попыткой (ошибок подряд: {errors})...")
+                        await self._sleep(delay)
+        finally:
+            await self._shutdown()
+
+    async def _tick(self, semaphore: asyncio.Semaphore) -> None:
+        """Один шаг цикла: синхронизация, запуск наступивших источников и ожидание"""
+        if self.sync:
+            await self._in_thread(self.sync)
+
+        if not len(self.scheduler) and not self._tasks:
+            await self._sleep(self.idle_interval)
+            return
+
+        paused = self.paused is not None and self.paused()
+        for job in [] if paused else self.scheduler.due():
+            if job.key not in self._tasks and self.running:
+                if not self._tasks:
+                    await self._wave_started()
+                self._tasks[job.key] = asyncio.create_task(self._run_job(job, semaphore))
+
+        # Обрабатываемые источники остаются наступившими до mark_done: их не
+        # учитываем, иначе цикл крутится без паузы, пока идет загрузка, - о
+        # завершении источника будит wake_on_tasks
+        wait_seconds = None if paused else self.scheduler.seconds_until_next(exclude=self._tasks)
+        timeout = self.idle_interval if wait_seconds is None else min(max(wait_seconds, 0.01), self.idle_interval)
+        await self._sleep(timeout, wake_on_tasks=True)
+
+    async def _run_job(self, job: ScheduledSource, semaphore: asyncio.Semaphore) -> None:
+        success: Optional[bool] = False
+        try:
+            async with semaphore:
+                if not self.running or self.scheduler.get(job.key) is not job:
+                    return
+                self._active[job.key] = time.time()
+                try:
+                    success = await self._loop.run_in_executor(self._executor, self.process, job)
+                except Exception as e:
+                    logger.error(f"❌ Ошибка при обработке источника '{job.source.name}': {e}")
+                if success is not None:
+                    self._wave_total += 1
+                    self._wave_success += 1 if success else 0
+                # Источник мог измениться во время обработки - новая версия опрашивается отдельно
+                if self.scheduler.get(job.key) is job:
+                    self.scheduler.mark_done(job.key)
+        finally:
+            self._active.pop(job.key, None)
+            self._tasks.pop(job.key, None)
+            if not self._tasks:
+                await self._wave_finished()
+
+    async def _wave_started(self) -> None:
+        self._wave_total = self._wave_success = 0
+        if self.on_wave_start:
+            await self._in_thread(self.on_wave_start)
+
+    async def _wave_finished(self) -> None:
+        if self.on_wave_end:
+            try:
+                await self._in_thread(self.on_wave_end, self._wave_total, self._wave_success)
+            except Exception as e:
+                logger.error(f"❌ Ошибка при завершении итерации: {e}")
+
+    async def _in_thread(self, func: Callable, *args) -> Any:
+        """Выполняет блокирующий вызов в пуле потоков по умолчанию (asyncio.to_thread есть только с Python 3.9)"""
+        return await self._loop.run_in_executor(None, func, *args)
+
+    async def _sleep(self, seconds: float, wake_on_tasks: bool = False) -> None:
+        """Ждет seconds, прерываясь при остановке (и завершении источника, если wake_on_tasks)"""
+        waiters = [asyncio.ensure_future(self._stop_event.wait())]
+        if wake_on_tasks:
+            waiters.extend(self._tasks.values())
+        try:
+            await asyncio.wait(waiters, timeout=seconds, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiters[0].cancel()
+
+    def _install_signal_handlers(self) -> None:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(signum, self._on_signal, signum)
+            except (NotImplementedError, RuntimeError):
+                # Не главный поток или платформа без поддержки - остановка только через stop()
+                pass
+
+    def _on_signal(self, signum: int) -> None:
+        logger.info(f"Получен сигнал {signum}. Завершение работы...")
+        self.stop()
+
+    async def _shutdown(self) -> None:
+        """Дожидается выполняющихся источников и освобождает ресурсы"""
+        if self._tasks:
+            logger.info(f"⏳ Ожидание завершения {self.active} источников...")
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.remove_signal_handler(signum)
+            except (NotImplementedError, RuntimeError):
+                pass
+        self._executor.shutdown(wait=True)
+        self._loop = None
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Профилирование итераций загрузчика (--profile)
+
+Режим full оборачивает итерацию в cProfile и сохраняет .pstats, режим sample
+периодически снимает стек основного потока из фонового потока: накладные
+расходы почти не зависят от количества вызовов, поэтому его можно держать
+включенным в продакшене.
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from logging_setup import get_logger
+
+
+logger = get_logger('profiling')
+
+PROFILE_MODES = ('full', 'sample')
+DEFAULT_PROFILE_DIR = "data/profiles"
+DEFAULT_TOP = 25
+DEFAULT_SAMPLE_INTERVAL = 0.01
+
+# Функция в стеке: (файл, строка определения, имя)
+FrameKey = Tuple[str, int, str]
+
+
+def profile_file_name(label: str, extension: str, now: datetime = None) -> str:
+    """Имя файла профиля: <метка>-<дата>-<время>.<расширение>"""
+    safe_label = re.sub(r'[^\w.-]+', '_', label).strip('_') or 'profile'
+    timestamp = (now or datetime.now()).strftime('%Y%m%d-%H%M%S-%f')
+    return f"{safe_label}-{timestamp}.{extension}"
+
+
+def _frame_name(key: FrameKey) -> str:
+    filename, line, name = key
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+class StackSampler:
+    """
+    Сэмплирующий профилировщик одного потока
+
+    Фоновый поток раз в interval секунд читает стек целевого потока через
+    sys._current_frames() и считает, сколько раз каждая функция была на вершине
+    стека (self) и где-либо в стеке (cumulative).
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL, thread_id: int = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.samples = 0
+        self.self_counts: Counter = Counter()
+        self.cumulative_counts: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        """Снимает один стек целевого потока"""
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack: List[FrameKey] = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        stack.reverse()
+
+        self.samples += 1
+        self.self_counts[stack[-1]] += 1
+        self.cumulative_counts.update(set(stack))
+        self.stacks[';'.join(_frame_name(key) for key in stack)] += 1
+
+    def top(self, limit: int = DEFAULT_TOP) -> List[Tuple[FrameKey, int, int]]:
+        """Функции с наибольшим числом попаданий в стек: (функция, cumulative, self)"""
+        return [(key, count, self.self_counts[key]) for key, count in self.cumulative_counts.most_common(limit)]
+
+    def format_top(self, limit: int = DEFAULT_TOP) -> str:
+        lines = [f"{self.samples} сэмплов с интервалом {self.interval * 1000:g} мс",
+                 f"{'cumul %':>8} {'self %':>8}  функция"]
+        total = max(self.samples, 1)
+        for key, cumulative, own in self.top(limit):
+            lines.append(f"{cumulative * 100 / total:8.1f} {own * 100 / total:8.1f}  {_frame_name(key)}")
+        return '\n'.join(lines)
+
+    def write_folded(self, path: str) -> None:
+        """Сохраняет стеки в формате collapsed stacks (flamegraph.pl, speedscope)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class IterationProfiler:
+    """
+    Профилирование итераций по флагу --profile
+
+    Пример:
+        profiler = IterationProfiler('full', top=20)
+        with profiler.profile('iteration'):
+            run_iteration()
+    """
+
+    def __init__(self, mode: str = 'full', directory: str = DEFAULT_PROFILE_DIR, top: int = DEFAULT_TOP,
+                 interval: float = DEFAULT_SAMPLE_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Неизвестный режим профилирования: {mode} (доступны: {', '.join(PROFILE_MODES)})")
+        self.mode = mode
+        self.directory = directory
+        self.top = top
+        self.interval = interval
+        self.files: List[str] = []
+
+    @contextmanager
+    def profile(self, label: str):
+        """Профилирует блок и сохраняет результат в файл с меткой времени"""
+        os.makedirs(self.directory, exist_ok=True)
+        start = time.perf_counter()
+        if self.mode == 'full':
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                self._save_cprofile(profiler, label, time.perf_counter() - start)
+        else:
+            sampler = StackSampler(self.interval)
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                self._save_samples(sampler, label, time.perf_counter() - start)
+
+    def _save_cprofile(self, profiler, label: str, seconds: float) -> None:
+        import pstats
+
+        path = os.path.join(self.directory, profile_file_name(label, 'pstats'))
+        try:
+            profiler.dump_stats(path)
+        except OSError as e:
+            logger.warning(f"⚠️  Не удалось сохранить профиль {path}: {e}")
+            return
+        self.files.append(path)
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(self.top)
+        logger.info(f"🔬 Профиль '{label}' ({seconds:.2f} сек) сохранен в {path}\n{stream.getvalue().rstrip()}")
+
+    def _save_samples(self, sampler: StackSampler, label: str, seconds: float) -> None:
+        path = os.path.join(self.directory, profile_file_name(label, 'folded'))
+        try:
+            sampler.write_folded(path)
+        except OSError as e:
+            logger.warning(f"⚠️  Не удалось сохранить профиль {path}: {e}")
+            return
+        self.files.append(path)
+        logger.info(f"🔬 Профиль '{label}' ({seconds:.2f} сек) сохранен в {path}\n{sampler.format_top(self.top)}")
+
+
+@contextmanager
+def maybe_profile(profiler: Optional[IterationProfiler], label: str):
+    """Профилирует блок, если профилирование включено"""
+    if profiler is None:
+        yield
+    else:
+        with profiler.profile(label):
+            yield
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Запись и воспроизведение ответов yt-dlp (--record / --replay)
+
+При записи каждый вызов extract_info и download проходит через настоящий
+YoutubeDL, а результат (info dict или ошибка) и время ответа сохраняются в
+папку фикстур. При воспроизведении create_ydl возвращает ReplayYoutubeDL,
+который отдает сохраненные ответы с записанными задержками без сети - так
+весь конвейер можно гонять офлайн и детерминированно.
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional, Callable
+
+from logging_setup import get_logger
+
+
+logger = get_logger('replay')
+
+FIXTURE_VERSION = 1
+
+# Параметры YoutubeDL, от которых зависит ответ extract_info
+KEY_OPTIONS = ('playlist_items', 'extract_flat')
+
+
+def request_key(kind: str, url: str, params: Dict[str, Any]) -> str:
+    """Ключ фикстуры: тип вызова, URL и влияющие на ответ параметры"""
+    options = ','.join(f"{name}={params.get(name)!r}" for name in KEY_OPTIONS if params.get(name) is not None)
+    return f"{kind} {url} {options}".rstrip()
+
+
+def _to_json(value):
+    """Приводит info dict к JSON-совместимому виду (генераторы, LazyList, объекты)"""
+    if isinstance(value, dict):
+        return {str(key): _to_json(item) for key, item in value.items()}
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple, set)) or hasattr(value, '__iter__'):
+        return [_to_json(item) for item in value]
+    return repr(value)
+
+
+def _media_path(params: Dict[str, Any], url: str) -> str:
+    """Путь итогового аудио файла по outtmpl и кодеку постобработки"""
+    outtmpl = params.get('outtmpl', '%(id)s.%(ext)s')
+    if isinstance(outtmpl, dict):
+        outtmpl = outtmpl.get('default', '%(id)s.%(ext)s')
+    extension = 'mp3'
+    for postprocessor in params.get('postprocessors', []):
+        if postprocessor.get('key') == 'FFmpegExtractAudio':
+            extension = postprocessor.get('preferredcodec') or extension
+    video_id = url.rsplit('v=', 1)[-1]
+    return outtmpl.replace('%(ext)s', extension).replace('%(id)s', video_id)
+
+
+class FixtureStore:
+    """
+    Папка фикстур: один сжатый JSON файл на запрос
+
+    Имя файла - хеш ключа запроса, ключ хранится внутри файла для наглядности.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+        return os.path.join(self.directory, f"{digest}.json.gz")
+
+    def save(self, key: str, record: Dict[str, Any]) -> None:
+        record = {'version': FIXTURE_VERSION, 'key': key, **record}
+        data = gzip.compress(json.dumps(record, ensure_ascii=False).encode('utf-8'))
+        path = self.path(key)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with gzip.open(self.path(key), 'rt', encoding='utf-8') as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        if record.get('version') != FIXTURE_VERSION or record.get('key') != key:
+            return None
+        return record
+
+    def __len__(self) -> int:
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(1 for name in os.listdir(self.directory) if name.endswith('.json.gz'))
+
+
+class RecordingYoutubeDL:
+    """Обертка над настоящим YoutubeDL, сохраняющая ответы в фикстуры"""
+
+    def __init__(self, ydl, params: Dict[str, Any], store: FixtureStore):
+        self._ydl = ydl
+        self.params = params
+        self.store = store
+
+    def __enter__(self):
+        self._ydl.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._ydl.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._ydl, name)
+
+    def extract_info(self, url: str, download: bool = False, **kwargs):
+        key = request_key('extract_info', url, self.params)
+        start = time.perf_counter()
+        try:
+            info = self._ydl.extract_info(url, download=download, **kwargs)
+        except Exception as e:
+            self.store.save(key, {'latency': time.perf_counter() - start,
+                                  'error': {'class': type(e).__name__, 'message': str(e)}})
+            raise
+        if isinstance(info, dict) and 'entries' in info and not isinstance(info['entries'], list):
+            info['entries'] = list(info['entries'])
+        self.store.save(key, {'latency': time.perf_counter() - start, 'info': _to_json(info)})
+        return info
+
+    def download(self, urls: List[str]) -> int:
+        for url in urls:
+            key = request_key('download', url, {})
+            start = time.perf_counter()
+            try:
+                code = self._ydl.download([url])
+            except Exception as e:
+                self.store.save(key, {'latency': time.perf_counter() - start,
+                                      'error': {'class': type(e).__name__, 'message': str(e)}})
+                raise
+            path = _media_path(self.params, url)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            self.store.save(key, {'latency': time.perf_counter() - start, 'bytes': size, 'code': code})
+        return 0
+
+
+class ReplayYoutubeDL:
+    """
+    Замена YoutubeDL, отдающая записанные ответы
+
+    Задержки ответов умножаются на latency_scale (0 - без задержек).
+    Загрузка создает разреженный файл записанного размера и вызывает хуки
+    прогресса и постобработки, как настоящий YoutubeDL.
+    """
+
+    def __init__(self, params: Dict[str, Any], store: FixtureStore, latency_scale: float = 1.0):
+        self.params = params
+        self.store = store
+        self.latency_scale = latency_scale
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def _load(self, key: str) -> Dict[str, Any]:
+        record = self.store.load(key)
+        if record is None:
+            raise_download_error(f"Нет записанного ответа для запроса: {key}")
+        if self.latency_scale and record.get('latency'):
+            time.sleep(record['latency'] * self.latency_scale)
+        if record.get('error'):
+            raise_download_error(record['error']['message'])
+        return record
+
+    def extract_info(self, url: str, download: bool = False, **kwargs):
+        return self._load(request_key('extract_info', url, self.params)).get('info')
+
+    def download(self, urls: List[str]) -> int:
+        for url in urls:
+            record = self._load(request_key('download', url, {}))
+            path = _media_path(self.params, url)
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.truncate(record.get('bytes', 0))
+            for hook in self.params.get('progress_hooks', []):
+                hook({'status': 'finished', 'downloaded_bytes': record.get('bytes', 0), 'filename': path})
+            for hook in self.params.get('postprocessor_hooks', []):
+                hook({'status': 'started', 'postprocessor': 'ExtractAudio'})
+                hook({'status': 'finished', 'postprocessor': 'ExtractAudio'})
+        return 0
+
+
+def raise_download_error(message: str):
+    """Ошибка в том же виде, что у yt-dlp, чтобы сработала обычная обработка ошибок"""
+    import yt_dlp
+
+    raise yt_dlp.utils.DownloadError(message)
+
+
+# Текущий режим процесса: None, 'record' или 'replay'
+_mode: Optional[str] = None
+_store: Optional[FixtureStore] = None
+_latency_scale = 1.0
+
+
+def start_recording(directory: str) -> FixtureStore:
+    """Включает запись ответов yt-dlp в папку фикстур"""
+    global _mode, _store
+    _mode, _store = 'record', FixtureStore(directory)
+    logger.info(f"⏺️  Запись ответов yt-dlp в {directory}")
+    return _store
+
+
+def start_replay(directory: str, latency_scale: float = 1.0) -> FixtureStore:
+    """Включает воспроизведение ответов yt-dlp из папки фикстур"""
+    global _mode, _store, _latency_scale
+    if not os.path.isdir(directory):
+        raise ValueError(f"Папка фикстур не найдена: {directory}")
+    _mode, _store, _latency_scale = 'replay', FixtureStore(directory), latency_scale
+    logger.info(f"▶️  Воспроизведение ответов yt-dlp из {directory} ({len(_store)} записей, "
+                f"задержки ×{latency_scale:g})")
+    return _store
+
+
+def active() -> Optional[str]:
+    """Текущий режим: 'record', 'replay' или None"""
+    return _mode
+
+
+def stop() -> None:
+    """Возвращает обычную работу с yt-dlp"""
+    global _mode, _store
+    _mode, _store = None, None
+
+
+def wrap_ydl(params: Dict[str, Any], factory: Callable[[], type]):
+    """
+    Создает YoutubeDL с учетом режима записи или воспроизведения
+
+    Args:
+        params: Параметры YoutubeDL
+        factory: Возвращает класс настоящего YoutubeDL (не вызывается при воспроизведении)
+    """
+    if _mode == 'replay':
+        return ReplayYoutubeDL(params, _store, _latency_scale)
+    ydl = factory()(params)
+    if _mode == 'record':
+        return RecordingYoutubeDL(ydl, params, _store)
+    return ydl
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Планировщик опроса источников для режима --loop
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Iterable, Optional, Tuple, Callable
+
+from config import Source, Subscription
+
+
+# Ключ источника: (имя подписки, имя источника)
+SourceKey = Tuple[str, str]
+
+
+@dataclass
+class ScheduledSource:
+    """Источник в расписании"""
+    source: Source
+    subscription: Subscription
+    next_run: float
+    last_run: Optional[float] = None
+    interval_override: Optional[float] = None  # Секунды; например, редкий опрос источников с WebSub
+    triggered: bool = False  # Опрос запрошен явно (API управления, повторный запуск, WebSub)
+
+    @property
+    def key(self) -> SourceKey:
+        return (self.subscription.name, self.source.name)
+
+    @property
+    def interval(self) -> float:
+        """Интервал опроса в секундах"""
+        if self.interval_override is not None:
+            return self.interval_override
+        return max(self.source.check_interval or 0, 0) * 60
+
+
+@dataclass
+class ScheduleDiff:
+    """Изменения расписания после синхронизации с конфигурацией"""
+    added: List[SourceKey] = field(default_factory=list)
+    removed: List[SourceKey] = field(default_factory=list)
+    changed: List[SourceKey] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        """Краткое описание изменений для вывода"""
+        return (f"добавлено: {len(self.added)}, удалено: {len(self.removed)}, "
+                f"изменено: {len(self.changed)}")
+
+
+class SourceScheduler:
+    """
+    Расписание опроса источников
+
+    Каждый источник опрашивается с собственным интервалом check_interval.
+    При синхронизации с новой конфигурацией перепланируются только
+    добавленные и измененные источники, остальные сохраняют свое время запуска.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._jobs: Dict[SourceKey, ScheduledSource] = {}
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __contains__(self, key: SourceKey) -> bool:
+        return key in self._jobs
+
+    def get(self, key: SourceKey) -> Optional[ScheduledSource]:
+        """Получить запись расписания по ключу"""
+        return self._jobs.get(key)
+
+    def jobs(self) -> List[ScheduledSource]:
+        """Все источники в расписании в порядке конфигурации"""
+        return list(self._jobs.values())
+
+    def sync(self, subscriptions: List[Subscription], source_filter: str = None) -> ScheduleDiff:
+        """
+        Синхронизирует расписание с активными подписками
+
+        Args:
+            subscriptions: Активные подписки
+            source_filter: Фильтр по названию источника (опционально)
+
+        Returns:
+            Изменения расписания
+        """
+        now = self._clock()
+        diff = ScheduleDiff()
+        jobs = {}
+
+        for subscription in subscriptions:
+            for source in subscription.sources:
+                if not source.enabled:
+                    continue
+                if source_filter and source.name != source_filter:
+                    continue
+
+                key = (subscription.name, source.name)
+                existing = self._jobs.get(key)
+                if existing is None:
+                    jobs[key] = ScheduledSource(source=source, subscription=subscription, next_run=now)
+                    diff.added.append(key)
+                elif existing.source != source:
+                    jobs[key] = ScheduledSource(source=source, subscription=subscription, next_run=now,
+                                                last_run=existing.last_run)
+                    diff.changed.append(key)
+                else:
+                    # Источник не изменился: обновляем ссылки, время запуска сохраняем
+                    existing.source = source
+                    existing.subscription = subscription
+                    jobs[key] = existing
+
+        diff.removed = [key for key in self._jobs if key not in jobs]
+        self._jobs = jobs
+        return diff
+
+    def due(self) -> List[ScheduledSource]:
+        """Источники, время опроса которых наступило"""
+        now = self._clock()
+        return [job for job in self._jobs.values() if job.next_run <= now]
+
+    def mark_done(self, key: SourceKey) -> None:
+        """Отметить завершение опроса и запланировать следующий"""
+        job = self._jobs.get(key)
+        if job is None:
+            # Источник удален из конфигурации во время обработки
+            return
+        now = self._clock()
+        job.last_run = now
+        job.next_run = now + job.interval
+        job.triggered = False
+
+    def trigger(self, subscription: str = None, source: str = None) -> List[ScheduledSource]:
+        """
+        Делает источники наступившими немедленно
+
+        Args:
+            subscription: Только источники подписки (все, если не задано)
+            source: Только источник с этим именем (все, если не задано)
+
+        Returns:
+            Затронутые источники
+        """
+        now = self._clock()
+        triggered = []
+        for job in self._jobs.values():
+            if subscription and job.subscription.name != subscription:
+                continue
+            if source and job.source.name != source:
+                continue
+            job.next_run = min(job.next_run, now)
+            job.triggered = True
+            triggered.append(job)
+        return triggered
+
+    def seconds_until_next(self, exclude: Iterable[SourceKey] = ()) -> Optional[float]:
+        """
+        Секунд до ближайшего запланированного опроса (None, если расписание пусто)
+
+        Args:
+            exclude: Источники, которые не учитываются (например, уже обрабатываются
+                     и остаются наступившими до mark_done)
+        """
+        exclude = set(exclude)
+        next_runs = [job.next_run for key, job in self._jobs.items() if key not in exclude]
+        if not next_runs:
+            return None
+        return max(min(next_runs) - self._clock(), 0)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Smoke tests for benchmarks/
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# Добавляем корневую директорию и папку бенчмарков в путь для импорта
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from fake_yt_dlp import FakeYoutubeDL, fake_yt_dlp
+from fake_youtube_server import FakeYoutubeServer
+import bench_e2e
+import bench_pipeline
+import bench_rss_scale
+
+
+class TestBenchmarks:
+    """Бенчмарки работают офлайн и выдают сравнимые результаты"""
+
+    def test_fake_youtube_dl_listing_and_video(self):
+        """Тест: список источника учитывает playlist_items, видео - по ID"""
+        fake_class = FakeYoutubeDL.configure(entries=7)
+        with fake_class({'playlist_items': '1-3'}) as ydl:
+            listing = ydl.extract_info("https://www.youtube.com/@news", download=False)
+            video = ydl.extract_info("https://www.youtube.com/watch?v=news_2", download=False)
+
+        assert [entry['id'] for entry in listing['entries']] == ['news_0', 'news_1', 'news_2']
+        assert listing['playlist_count'] == 7
+        assert video['title'] == listing['entries'][2]['title']
+        assert fake_class.calls == {'listing': 1, 'video': 1}
+
+    def test_fake_replaces_yt_dlp(self):
+        """Тест: подмена действует только внутри блока"""
+        import yt_dlp
+
+        original = yt_dlp.YoutubeDL
+        with fake_yt_dlp(entries=1) as fake_class:
+            assert yt_dlp.YoutubeDL is fake_class
+        assert yt_dlp.YoutubeDL is original
+
+    def test_pipeline_benchmark(self):
+        """Тест: все сценарии бенчмарка конвейера на маленькой конфигурации"""
+        result = bench_pipeline.run_benchmark(subscriptions=1, sources=2, videos=3, runs=1)
+
+        assert set(result['results']) == {'process_source', 'rss', 'main'}
+        for scenario in result['results'].values():
+            assert scenario['wall_seconds'] > 0
+            assert scenario['peak_traced_bytes'] > 0
+        assert result['fake_calls']['download'] > 0
+        assert not os.path.exists(os.path.join(os.getcwd(), 'data', 'subscription_0'))
+
+    def test_rss_scale_benchmark(self):
+        """Тест: исходный и текущий пути находят одинаковое число эпизодов, замерены все форматы"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            result = bench_rss_scale.bench_size(temp_dir, 30, runs=1, legacy_max=30, trace_memory=False)
+        finally:
+            shutil.rmtree(temp_dir)
+
+        assert result['episodes'] == 30
+        assert {'legacy_lookup', 'build_feed', 'render_rss', 'total_rss', 'render_json'} <= set(result['stages'])
+        assert result['stages']['render_rss']['output_bytes'] > 0
+        assert 'lookup_speedup' in result
+
+    def test_fake_server_faults(self):
+        """Тест: сервер отдает 429 с Retry-After и постоянные 404 для недоступных видео"""
+        import urllib.error
+        import urllib.request
+
+        with FakeYoutubeServer(videos=2, rate_limit_rate=1.0) as server:
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(f"{server.url}/api/listing/news")
+            assert error.value.code == 429
+            assert error.value.headers['Retry-After'] == '1'
+
+        with FakeYoutubeServer(videos=2, unavailable_rate=1.0) as server:
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(f"{server.url}/api/video/news_0")
+            assert error.value.code == 404
+            with urllib.request.urlopen(f"{server.url}/media/news_0.mp3") as response:
+                assert response.read() == server.audio
+        assert server.stats['status_404'] == 1
+
+    def test_e2e_benchmark(self):
+        """Тест: настоящий yt-dlp через тестовые экстракторы загружает по эпизоду на источник"""
+        result = bench_e2e.run_benchmark(subscriptions=1, sources=2, videos=2, audio_seconds=1)
+
+        assert result['episodes_downloaded'] == 2
+        assert result['server']['requests_listing'] == 2
+        assert result['server']['requests_media'] == 2
+        assert result['server']['bytes_sent'] == 2 * result['params']['audio_bytes']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
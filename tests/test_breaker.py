@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Tests for breaker.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from breaker import SourceBreakers, setup_breaker, backoff_delay, OPEN, HALF_OPEN, CLOSED
+from config import Source, SourceType, Subscription
+from leases import LeaseManager, setup_leases
+from manage_sources import print_sources
+import multi_downloader
+from multi_downloader import SourceResult
+
+
+URL = "https://www.youtube.com/@gone"
+
+
+class FakeClock:
+    """Управляемые часы для тестов"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSourceBreakers:
+    """Тесты выключателей источников"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'data', 'breaker.db')
+        self.clock = FakeClock()
+        self.breakers = SourceBreakers(self.path, failure_threshold=3, base_delay=600, max_delay=3600,
+                                       dead_after=5, clock=self.clock)
+
+    def teardown_method(self):
+        self.breakers.close()
+        shutil.rmtree(self.temp_dir)
+
+    def fail(self, times: int = 1):
+        for _ in range(times):
+            state = self.breakers.record('sub', 'gone', URL, False, 'DownloadError')
+        return state
+
+    def test_backoff_delay(self):
+        """Тест: пауза удваивается и ограничена сверху"""
+        assert [backoff_delay(n, 60, 1800) for n in range(1, 7)] == [60, 120, 240, 480, 960, 1800]
+
+    def test_open_half_open_closed(self):
+        """Тест: цепь размыкается после порога, пробный опрос замыкает ее"""
+        assert self.fail(2) == CLOSED
+        assert self.breakers.allow('sub', 'gone', URL)
+        assert self.fail() == OPEN
+        assert not self.breakers.allow('sub', 'gone', URL)
+
+        self.clock.now += 600
+        assert self.breakers.allow('sub', 'gone', URL)
+        # Пока идет пробный опрос, второй не запускается
+        assert not self.breakers.allow('sub', 'gone', URL)
+        assert self.breakers.snapshot()[0]['state'] == HALF_OPEN
+
+        self.breakers.record('sub', 'gone', URL, True)
+        assert self.breakers.snapshot() == []
+        assert self.breakers.allow('sub', 'gone', URL)
+
+    def test_failed_probe_doubles_delay(self):
+        """Тест: неудачный пробный опрос размыкает цепь с удвоенной паузой"""
+        self.fail(3)
+        self.clock.now += 600
+        assert self.breakers.allow('sub', 'gone', URL)
+        assert self.fail() == OPEN
+
+        self.clock.now += 1199
+        assert not self.breakers.allow('sub', 'gone', URL)
+        self.clock.now += 1
+        assert self.breakers.allow('sub', 'gone', URL)
+
+    def test_state_survives_restart_and_url_change_resets(self):
+        """Тест: состояние хранится в базе, новый URL источника сбрасывает его"""
+        self.fail(3)
+        self.breakers.close()
+        restarted = SourceBreakers(self.path, failure_threshold=3, base_delay=600, clock=self.clock)
+        try:
+            assert not restarted.allow('sub', 'gone', URL)
+            assert restarted.allow('sub', 'gone', "https://www.youtube.com/@moved")
+            assert restarted.snapshot() == []
+        finally:
+            restarted.close()
+
+    def test_dead_source_is_flagged_in_list(self, capsys):
+        """Тест: после dead_after неудач источник отмечается в manage_sources.py list"""
+        for _ in range(5):
+            self.clock.now += 3600
+            self.breakers.allow('sub', 'gone', URL)
+            self.fail()
+        rows = {(row['subscription'], row['source']): row for row in self.breakers.snapshot()}
+        assert rows[('sub', 'gone')]['dead']
+
+        print_sources([{'name': 'gone', 'subscription': 'sub', 'url': URL, 'type': 'channel', 'enabled': True,
+                        'check_interval': 10, 'max_videos': 5}], rows)
+        output = capsys.readouterr().out
+        assert 'Недоступен' in output
+        assert 'DownloadError' in output
+
+
+class TestProcessSourceBreaker:
+    """Тесты пропуска источников в process_source"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        self.breakers = setup_breaker({'file': os.path.join('data', 'breaker.db'), 'failure_threshold': 2})
+        self.source = Source(name='gone', url=URL, source_type=SourceType.CHANNEL)
+        self.subscription = Subscription(name='sub', title='sub', description='', sources=[self.source])
+
+    def teardown_method(self):
+        setup_breaker({'enabled': False})
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir)
+
+    def test_failing_source_is_skipped(self, monkeypatch):
+        """Тест: после порога неудач источник пропускается без обработки"""
+        calls = []
+
+        def failing(source, subscription):
+            calls.append(source.name)
+            return SourceResult(False, error_class='DownloadError')
+
+        monkeypatch.setattr(multi_downloader, '_process_source', failing)
+        assert multi_downloader.process_source(self.source, self.subscription) is False
+        assert multi_downloader.process_source(self.source, self.subscription) is False
+        assert multi_downloader.process_source(self.source, self.subscription) is None
+        assert calls == ['gone', 'gone']
+        assert self.breakers.snapshot()[0]['last_error'] == 'DownloadError'
+
+    def test_denied_lease_keeps_breaker_open(self, monkeypatch):
+        """Тест: если аренду держит другой узел, пробный опрос не начинается и не зависает"""
+        self.breakers = setup_breaker({'file': os.path.join('data', 'breaker.db'), 'failure_threshold': 1,
+                                       'base_delay': 0})
+        self.breakers.record('sub', 'gone', URL, False, 'DownloadError')
+        other = LeaseManager(os.path.join('data', 'leases.db'), 'other-node', heartbeat_interval=0)
+        setup_leases({'enabled': True, 'file': os.path.join('data', 'leases.db'), 'node_id': 'this-node',
+                      'heartbeat_interval': 0})
+        calls = []
+        monkeypatch.setattr(multi_downloader, '_process_source',
+                            lambda source, subscription: calls.append(source.name) or SourceResult(True))
+        try:
+            lease = other.acquire('sub', 'gone')
+            assert multi_downloader.process_source(self.source, self.subscription) is None
+            assert self.breakers.snapshot()[0]['state'] == OPEN
+
+            other.release(lease)
+            assert multi_downloader.process_source(self.source, self.subscription, triggered=True) is True
+            assert calls == ['gone']
+            assert self.breakers.snapshot() == []
+        finally:
+            setup_leases({'enabled': False})
+            other.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
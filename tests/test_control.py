@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for control.py
+"""
+
+import argparse
+import os
+import sys
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import control
+from control import DaemonControl, ControlClient, ControlError, setup_control, stop_control
+from config import Source, SourceType, Subscription, config_manager
+from scheduler import SourceScheduler
+from manage_sources import print_daemon_status, run_control_command
+import multi_downloader
+
+
+class FakeClock:
+    """Управляемые часы для тестов"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(clock=None) -> SourceScheduler:
+    sources = [Source(name=name, url=f"https://www.youtube.com/@{name}", source_type=SourceType.CHANNEL)
+               for name in ('news', 'tech')]
+    scheduler = SourceScheduler(clock) if clock else SourceScheduler()
+    scheduler.sync([Subscription(name='sub', title='sub', description='', sources=sources)])
+    return scheduler
+
+
+class TestDaemonControl:
+    """Тесты состояния цикла для API управления"""
+
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.scheduler = make_scheduler(self.clock)
+        self.control = DaemonControl(self.scheduler, health_max_age=600, clock=self.clock)
+
+    def test_health_tracks_last_successful_iteration(self):
+        """Тест: /healthz неисправен, если успешной итерации не было дольше health_max_age"""
+        assert self.control.health()['ok']
+        self.clock.now += 601
+        assert not self.control.health()['ok']
+
+        self.control.iteration_finished(2, 0)
+        assert not self.control.health()['ok']
+        self.control.iteration_finished(2, 1)
+        assert self.control.health()['ok']
+
+        self.clock.now += 601
+        self.control.pause()
+        assert self.control.health()['ok']
+
+    def test_idle_loop_is_healthy(self):
+        """Тест: цикл без источников к опросу исправен, пока срок опроса не просрочен"""
+        self.control.iteration_finished(2, 2)
+        for job in self.scheduler.jobs():
+            job.interval_override = 360 * 60  # Канал с подпиской WebSub
+            self.scheduler.mark_done(job.key)
+
+        self.clock.now += 3 * 3600
+        health = self.control.health()
+        assert health['ok'] and health['idle']
+        assert health['seconds_since_success'] > self.control.health_max_age
+
+        # Итерация зависла: срок опроса просрочен дольше health_max_age
+        self.clock.now += 3 * 3600 + 601
+        assert not self.control.health()['ok']
+
+    def test_status_reports_queue_and_active_sources(self):
+        """Тест: выполняющийся источник не попадает в очередь"""
+        self.control.source_started(('sub', 'news'))
+        self.clock.now += 5
+        status = self.control.status()
+        assert [item['source'] for item in status['active']] == ['news']
+        assert status['active'][0]['running_for'] == 5
+        assert [item['source'] for item in status['queue']] == ['tech']
+
+        self.control.source_finished(('sub', 'news'))
+        for job in self.scheduler.jobs():
+            self.scheduler.mark_done(job.key)
+        status = self.control.status()
+        assert status['active'] == [] and status['queue'] == []
+        assert status['next_run_in'] == 600
+
+
+class TestControlAPI:
+    """Тесты HTTP API управления и клиента manage_sources.py"""
+
+    def setup_method(self):
+        self.scheduler = make_scheduler()
+        for job in self.scheduler.jobs():
+            self.scheduler.mark_done(job.key)
+        self.control = setup_control({'enabled': True, 'port': 0}, self.scheduler)
+        self.port = control._server.server_address[1]
+        self.client = ControlClient(self.port)
+
+    def teardown_method(self):
+        stop_control()
+
+    def test_poll_is_applied_by_loop(self):
+        """Тест: запрос на опрос применяется при синхронизации расписания"""
+        code, data = self.client.poll(source='missing')
+        assert code == 404
+        assert 'missing' in data['error']
+
+        code, data = self.client.poll(source='news')
+        assert (code, data['matched']) == (202, 1)
+        assert control.has_polls()
+
+        multi_downloader.apply_poll_requests(self.scheduler)
+        assert [job.source.name for job in self.scheduler.due()] == ['news']
+        assert not control.has_polls()
+
+    def test_pause_resume_and_status(self, capsys, monkeypatch):
+        """Тест: пауза видна в /status и /healthz, команды manage_sources.py"""
+        monkeypatch.setattr(config_manager.config, 'control_settings', {'port': self.port})
+        assert self.client.pause() == (200, {'paused': True})
+        assert control.is_paused()
+        code, health = self.client.health()
+        assert code == 200 and health['paused']
+
+        run_control_command(argparse.Namespace(command='resume'))
+        assert not control.is_paused()
+
+        code, status = self.client.status()
+        assert code == 200
+        assert status['scheduled'] == 2
+        print_daemon_status(status)
+        output = capsys.readouterr().out
+        assert 'Цикл возобновлен' in output
+        assert 'работает' in output
+
+    def test_unhealthy_loop(self, monkeypatch):
+        """Тест: 503 и код выхода 1 у manage_sources.py health"""
+        monkeypatch.setattr(config_manager.config, 'control_settings', {'port': self.port})
+        self.control.health_max_age = 0
+        self.control.started_at -= 1
+        self.control.iteration_finished(2, 0)
+        assert self.client.health()[0] == 503
+        with pytest.raises(SystemExit):
+            run_control_command(argparse.Namespace(command='health'))
+
+    def test_client_without_daemon(self):
+        """Тест: если цикл не запущен, клиент сообщает об этом"""
+        stop_control()
+        with pytest.raises(ControlError):
+            self.client.status()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
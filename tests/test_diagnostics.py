@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for diagnostics.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import diagnostics
+from diagnostics import DiagnosticsReport, NetworkDiagnostics, load_cached_report, save_report
+
+
+def make_report(ok=True, checked_at=None):
+    report = DiagnosticsReport(checked_at=checked_at or time.time())
+    report.add("DNS YouTube", True, "127.0.0.1")
+    report.add("Тестовое видео", ok, "title" if ok else "timeout")
+    return report
+
+
+class TestNetworkDiagnostics:
+    """Тесты фоновой диагностики и кеша"""
+
+    def setup_method(self):
+        """Создаем временную папку для кеша"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.temp_dir, 'data', '.diagnostics.json')
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        shutil.rmtree(self.temp_dir)
+
+    def _diagnostics(self, **settings):
+        return NetworkDiagnostics({'cache_file': self.cache_file, **settings})
+
+    def test_cache_respects_ttl(self):
+        """Тест: кеш используется только в пределах TTL"""
+        save_report(self.cache_file, make_report(checked_at=time.time() - 100))
+
+        assert load_cached_report(self.cache_file, ttl=3600).ok
+        assert load_cached_report(self.cache_file, ttl=10) is None
+
+    def test_failed_report_is_not_reused(self):
+        """Тест: отчет с ошибками не берется из кеша"""
+        save_report(self.cache_file, make_report(ok=False))
+        assert load_cached_report(self.cache_file, ttl=3600) is None
+
+    def test_settings_from_diagnostics_section(self):
+        """Тест: ID тестового видео и таймаут берутся из настроек"""
+        checker = self._diagnostics(test_video_id="abc", network_timeout=3, cache_ttl=0)
+        with patch.object(diagnostics, 'run_network_diagnostics', return_value=make_report()) as run:
+            checker.start()
+            assert checker.wait(5).ok
+        run.assert_called_once_with("abc", 3)
+        assert not os.path.exists(self.cache_file)
+
+    def test_start_runs_in_background_and_caches(self):
+        """Тест: диагностика не блокирует запуск, результат кешируется"""
+        def slow_diagnostics(video_id, timeout):
+            time.sleep(0.3)
+            return make_report()
+
+        checker = self._diagnostics()
+        with patch.object(diagnostics, 'run_network_diagnostics', side_effect=slow_diagnostics):
+            started = time.perf_counter()
+            checker.start()
+            assert time.perf_counter() - started < 0.2
+            checker.wait(5)
+        assert load_cached_report(self.cache_file, ttl=3600) is not None
+
+        restarted = self._diagnostics()
+        with patch.object(diagnostics, 'run_network_diagnostics', side_effect=AssertionError("повторная проверка")):
+            restarted.start()
+            assert restarted.wait() is not None
+
+    def test_disabled(self):
+        """Тест: отключенная диагностика не запускается"""
+        checker = self._diagnostics(enabled=False)
+        with patch.object(diagnostics, 'run_network_diagnostics', side_effect=AssertionError("запуск")):
+            checker.start()
+        assert checker.wait() is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
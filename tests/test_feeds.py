@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tests for feeds.py
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Source, SourceType, Subscription
+from feeds import (build_feed, write_feed, render_opml_index, get_feed_writers, format_duration,
+                   update_episode_index, load_episode_index, EPISODES_FILE)
+from multi_downloader import get_file_hash
+
+
+ITUNES_NS = {'itunes': 'http://www.itunes.com/dtds/podcast-1.0.dtd'}
+
+
+class TestFeeds:
+    """Тесты модели ленты и генераторов форматов"""
+
+    def setup_method(self):
+        """Создаем папку подписки с загруженными файлами"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.subscription = Subscription(
+            name="test_subscription",
+            title="Test Subscription",
+            description="Test Description",
+            category="Test",
+            author="test_author",
+            sources=[Source(name="src", url="https://www.youtube.com/@test", source_type=SourceType.CHANNEL)]
+        )
+        self.videos = [
+            {'title': 'Video 1', 'id': 'id1', 'uploader': 'Uploader', 'duration': 3725, 'timestamp': 1700000000},
+            {'title': 'Video 2', 'id': 'id2', 'uploader': 'Uploader', 'duration': 90, 'upload_date': '20231201'},
+            {'title': 'Video 3', 'id': 'id3', 'uploader': 'Uploader', 'duration': 0},
+        ]
+        for video in self.videos[:2]:
+            file_hash = get_file_hash(video['title'])
+            with open(os.path.join(self.temp_dir, f"{file_hash}.mp3"), 'wb') as f:
+                f.write(b"x" * 10)
+        with open(os.path.join(self.temp_dir, f"{get_file_hash('Video 1')}.webp"), 'wb') as f:
+            f.write(b"img")
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        shutil.rmtree(self.temp_dir)
+
+    def _build(self, videos=None):
+        episodes = update_episode_index(self.temp_dir, self.videos if videos is None else videos, get_file_hash)
+        return build_feed(
+            self.subscription,
+            self.temp_dir,
+            base_url="http://test.domain.com",
+            episodes=episodes,
+            rss_settings={'namespaces': ITUNES_NS}
+        )
+
+    def _download(self, video):
+        with open(os.path.join(self.temp_dir, f"{get_file_hash(video['title'])}.mp3"), 'wb') as f:
+            f.write(b"x" * 10)
+
+    def test_build_feed_includes_only_downloaded_videos(self):
+        """Тест: в ленту попадают только видео с загруженным mp3"""
+        feed = self._build()
+
+        assert sorted(e.video_id for e in feed.episodes) == ['id1', 'id2']
+        episode = next(e for e in feed.episodes if e.video_id == 'id1')
+        assert episode.enclosure_length == 10
+        assert episode.image_url == f"http://test.domain.com/data/test_subscription/{get_file_hash('Video 1')}.webp"
+        assert episode.enclosure_url == f"http://test.domain.com/data/test_subscription/{get_file_hash('Video 1')}.mp3"
+        assert next(e for e in feed.episodes if e.video_id == 'id2').image_url is None
+        assert feed.image_url == episode.image_url
+
+    def test_feed_keeps_episodes_of_every_source(self):
+        """Тест: лента подписки содержит эпизоды всех источников, а не последнего обработанного"""
+        self._build(self.videos[:1])
+        other_source = [{'title': 'Other 1', 'id': 'other1', 'uploader': 'Other', 'timestamp': 1700100000}]
+        self._download(other_source[0])
+        self._build(other_source)
+
+        # Видео 2 загружено, но его источник еще не обрабатывался
+        feed = self._build([])
+        assert [e.video_id for e in feed.episodes] == ['other1', 'id1']
+
+        feed = self._build(self.videos)
+        assert [e.video_id for e in feed.episodes] == ['id2', 'other1', 'id1']
+
+        os.remove(os.path.join(self.temp_dir, f"{get_file_hash('Other 1')}.mp3"))
+        feed = self._build([])
+        assert [e.video_id for e in feed.episodes] == ['id2', 'id1']
+        assert get_file_hash('Other 1') not in load_episode_index(self.temp_dir)
+        assert os.path.exists(os.path.join(self.temp_dir, EPISODES_FILE))
+
+    def test_language_from_rss_settings(self):
+        """Тест: язык ленты берется из rss.default_language"""
+        assert self._build().language == "ru"
+
+        episodes = update_episode_index(self.temp_dir, self.videos, get_file_hash)
+        feed = build_feed(self.subscription, self.temp_dir, "http://test.domain.com", episodes,
+                          rss_settings={'default_language': 'en', 'namespaces': ITUNES_NS})
+        root = ET.parse(write_feed(feed, self.temp_dir, ['rss'])[0]).getroot()
+        assert root.find('channel/language').text == "en"
+
+    def test_pub_date_is_utc_from_metadata(self):
+        """Тест: дата публикации берется из timestamp или upload_date видео, в UTC"""
+        feed = self._build()
+        root = ET.parse(write_feed(feed, self.temp_dir, ['rss'])[0]).getroot()
+        pub_dates = {item.find('guid').text[-3:]: item.find('pubDate').text for item in root.findall('channel/item')}
+        assert pub_dates == {'id1': 'Tue, 14 Nov 2023 22:13:20 +0000', 'id2': 'Fri, 01 Dec 2023 00:00:00 +0000'}
+
+        # Неполные данные видео (плоский список) не затирают дату
+        feed = self._build([{'title': 'Video 1', 'id': 'id1'}])
+        assert next(e for e in feed.episodes if e.video_id == 'id1').pub_date.timestamp() == 1700000000
+
+    def test_rss_and_json_from_one_model(self):
+        """Тест: RSS и JSON Feed строятся из одной модели"""
+        feed = self._build()
+        paths = write_feed(feed, self.temp_dir, ['rss', 'json'])
+
+        assert [os.path.basename(p) for p in paths] == ['podcast.rss', 'feed.json']
+
+        root = ET.parse(paths[0]).getroot()
+        assert root.find('channel/title').text == "Test Subscription"
+        assert len(root.findall('channel/item')) == 2
+
+        with open(paths[1], encoding='utf-8') as f:
+            data = json.load(f)
+        assert data['version'] == 'https://jsonfeed.org/version/1.1'
+        assert data['feed_url'] == "http://test.domain.com/data/test_subscription/feed.json"
+        assert len(data['items']) == 2
+        attachment = next(i for i in data['items'] if i['id'].endswith('id1'))['attachments'][0]
+        assert attachment['size_in_bytes'] == 10
+        assert attachment['duration_in_seconds'] == 3725
+
+    def test_opml_index_lists_every_feed(self):
+        """Тест: OPML индекс содержит ссылку на каждую ленту"""
+        other = Subscription(name="other", title="Other", description="", sources=[])
+        root = ET.fromstring(render_opml_index([self.subscription, other], "http://host", ['rss', 'json']))
+
+        outlines = root.findall('body/outline')
+        assert {o.get('type') for o in outlines} == {'rss'}
+        assert [o.get('text') for o in outlines[:2]] == ["Test Subscription", "Test Subscription (JSON Feed)"]
+        urls = [o.get('xmlUrl') for o in outlines]
+        assert urls == [
+            "http://host/data/test_subscription/podcast.rss",
+            "http://host/data/test_subscription/feed.json",
+            "http://host/data/other/podcast.rss",
+            "http://host/data/other/feed.json",
+        ]
+
+    def test_unknown_format(self):
+        """Тест: неизвестный формат ленты"""
+        with pytest.raises(ValueError):
+            get_feed_writers(['atom'])
+
+    def test_format_duration(self):
+        """Тест форматирования длительности"""
+        assert format_duration(3725) == "1:02:05"
+        assert format_duration(90) == "1:30"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for history.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history as history_module
+from history import RunHistory, parse_duration, setup_history, iteration_started, iteration_finished
+from logging_setup import log_context, record_phase
+from multi_downloader import SourceResult
+
+
+class FakeClock:
+    """Управляемые часы для тестов"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRunHistory:
+    """Тесты истории запусков"""
+
+    def setup_method(self):
+        """Создаем временную базу истории"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'data', 'history.db')
+        self.clock = FakeClock()
+        self.history = RunHistory(self.db_path, clock=self.clock)
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        self.history.close()
+        setup_history({'enabled': False})
+        shutil.rmtree(self.temp_dir)
+
+    def test_parse_duration(self):
+        """Тест разбора периода --since"""
+        assert parse_duration('24h') == 86400
+        assert parse_duration('30m') == 1800
+        assert parse_duration('7d') == 7 * 86400
+        assert parse_duration('90') == 90
+        with pytest.raises(ValueError):
+            parse_duration('yesterday')
+
+    def test_phases_collected_until_source_phase(self):
+        """Тест: этапы источника записываются вместе с итоговым этапом 'source'"""
+        self.history.start_iteration('loop')
+        for phase, seconds, extra in (('list', 1.5, {}), ('download', 10.0, {'bytes': 2048}), ('rss', 0.2, {})):
+            self.history.observe_phase(phase, seconds, 'ok', {'subscription': 'tech', 'source': 'channel', **extra})
+        self.history.observe_phase('source', 12.0, 'ok', {
+            'subscription': 'tech', 'source': 'channel', 'video_id': 'abc', 'video_title': 'Episode 1'})
+        self.history.finish_iteration(sources=1, succeeded=1)
+
+        status, = self.history.status()
+        assert status['video_id'] == 'abc'
+        assert status['success'] == 1
+        assert status['consecutive_failures'] == 0
+
+        report = self.history.report(since=0)
+        assert report['iterations']['count'] == 1
+        assert report['iterations']['succeeded'] == 1
+        source_report, = report['sources']
+        assert source_report['bytes'] == 2048
+        assert source_report['phases'] == {'list': 1.5, 'download': 10.0, 'rss': 0.2}
+
+    def test_status_tracks_failures_and_last_success(self):
+        """Тест: ошибки подряд и время последнего успеха"""
+        self.history.record_source_run('tech', 'flaky', 3.0, True, video_id='v1')
+        success_time = self.clock.now
+        for _ in range(2):
+            self.clock.now += 600
+            self.history.record_source_run('tech', 'flaky', 30.0, False, error_class='DownloadError')
+
+        status, = self.history.status()
+        assert status['consecutive_failures'] == 2
+        assert status['last_success_at'] == success_time
+        assert status['error_class'] == 'DownloadError'
+
+        self.history.record_source_run('tech', 'flaky', 3.0, True)
+        assert self.history.status()[0]['consecutive_failures'] == 0
+
+    def test_report_since_and_ordering(self):
+        """Тест: отчет учитывает только период, нестабильные источники первыми"""
+        self.history.record_source_run('tech', 'old', 1.0, False, error_class='OldError')
+        self.clock.now += 2 * 86400
+        since = self.clock.now - 86400
+        self.history.record_source_run('tech', 'stable', 1.0, True)
+        self.history.record_source_run('tech', 'flaky', 5.0, False, error_class='ExtractorError')
+        self.history.record_source_run('tech', 'flaky', 4.0, True)
+
+        sources = self.history.report(since)['sources']
+        assert [item['source'] for item in sources] == ['flaky', 'stable']
+        assert sources[0]['runs'] == 2
+        assert sources[0]['failures'] == 1
+        assert sources[0]['last_error_class'] == 'ExtractorError'
+        assert sources[0]['max_duration'] == 5.0
+
+    def test_prune(self):
+        """Тест: удаление записей старше срока хранения"""
+        self.history.record_source_run('tech', 'channel', 1.0, True, phases=[('list', 1.0, 'ok', 0)])
+        self.clock.now += 10 * 86400
+        self.history.record_source_run('tech', 'channel', 1.0, True)
+
+        assert self.history.prune(retention_days=5) == 1
+        assert self.history.report(since=0)['sources'][0]['runs'] == 1
+        assert self.history.connection.execute("SELECT COUNT(*) FROM phase_timings").fetchone()[0] == 0
+
+    def test_report_query_uses_index(self):
+        """Тест: отчет за период использует индекс по времени запуска"""
+        plan = self.history.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM source_runs WHERE started_at >= ?", (0,)).fetchall()
+        assert any('idx_source_runs_started' in row[-1] for row in plan)
+
+    def test_process_source_fields_reach_history(self):
+        """Тест: результат process_source через record_phase попадает в историю"""
+        store = setup_history({'file': self.db_path, 'retention_days': 0})
+        iteration_started('once')
+        with log_context(subscription='news', source='daily'):
+            record_phase('list', 0.5)
+            result = SourceResult(False, error_class='NoVideos')
+            record_phase('source', 0.6, 'error', **result.fields())
+        iteration_finished(1, 0)
+
+        status, = store.status()
+        assert status['error_class'] == 'NoVideos'
+        assert store.report(since=time.time() - 60)['iterations']['sources'] == 1
+
+        assert setup_history({'enabled': False}) is None
+        assert history_module._history is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
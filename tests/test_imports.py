@@ -41,10 +41,34 @@ def test_import_test_config():
     except ImportError as e:
         assert False, f"Failed to import test_config: {e}"
 
+def test_heavy_modules_are_imported_lazily():
+    """Тест: yt_dlp, requests и xml.etree не загружаются при импорте модулей"""
+    import subprocess
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = ("import sys, config, feeds, manage_sources, multi_downloader; "
+            "print([m for m in ('yt_dlp', 'requests', 'xml.etree.ElementTree') if m in sys.modules])")
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True,
+                            env={**os.environ, 'PYTHONPATH': root})
+    assert result.stdout.strip() == "[]", result.stderr
+
+def test_loop_modules_are_imported_lazily():
+    """Тест: модули цикла --loop, кластера и API управления не загружаются при импорте"""
+    import subprocess
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    lazy = ('asyncio', 'orchestrator', 'control', 'websub', 'replay', 'diagnostics', 'leases', 'breaker',
+            'history', 'instance_lock', 'profiling', 'memory_probe', 'ytdlp_cache', 'feeds')
+    code = (f"import sys, manage_sources, multi_downloader; "
+            f"print([m for m in {lazy!r} if m in sys.modules])")
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True,
+                            env={**os.environ, 'PYTHONPATH': root})
+    assert result.stdout.strip() == "[]", result.stderr or result.stdout
+
 if __name__ == "__main__":
     # Запускаем все тесты
     test_import_config()
     test_import_multi_downloader()
     test_import_manage_sources()
     test_import_test_config()
+    test_heavy_modules_are_imported_lazily()
+    test_loop_modules_are_imported_lazily()
     print("✅ All import tests passed!")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for instance_lock.py
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from instance_lock import InstanceLock, source_lock, instance_lock_path
+from config import Source, SourceType, Subscription, config_manager
+from scheduler import SourceScheduler
+import multi_downloader
+
+
+def make_args(**overrides):
+    values = {'loop': False, 'force': False, 'subscription': None, 'source': None}
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+class TestInstanceLock:
+    """Тесты блокировки экземпляра и блокировок источников"""
+
+    def setup_method(self):
+        """Временная рабочая папка: пути блокировок относительные (data/)"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        self.lock_path = os.path.join('data', '.instance.lock')
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        if multi_downloader.instance_lock is not None:
+            multi_downloader.instance_lock.release()
+            multi_downloader.instance_lock = None
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir)
+
+    def test_second_instance_is_refused(self):
+        """Тест: вторая блокировка не выдается, владелец виден в файле"""
+        first = InstanceLock(self.lock_path)
+        assert first.acquire('loop')
+
+        second = InstanceLock(self.lock_path)
+        assert not second.acquire('once')
+        assert second.holder()['pid'] == os.getpid()
+        assert second.holder()['mode'] == 'loop'
+
+        first.release()
+        assert second.acquire('once')
+        second.release()
+
+    def test_lock_is_exclusive_between_processes(self):
+        """Тест: другой процесс не получает блокировку, пока она занята"""
+        lock = InstanceLock(self.lock_path)
+        assert lock.acquire('loop')
+        code = ("import sys; sys.path.insert(0, sys.argv[1]); from instance_lock import InstanceLock; "
+                "sys.exit(0 if not InstanceLock(sys.argv[2]).acquire('once') else 1)")
+        try:
+            result = subprocess.run([sys.executable, '-c', code, ROOT_DIR, self.lock_path])
+        finally:
+            lock.release()
+        assert result.returncode == 0
+
+    def test_source_lock_skips_busy_source(self):
+        """Тест: источник, который уже обрабатывается, пропускается"""
+        with source_lock('sub', 'news') as first:
+            assert first
+            with source_lock('sub', 'news') as second:
+                assert not second
+            with source_lock('sub', 'other') as other:
+                assert other
+        with source_lock('sub', 'news') as again:
+            assert again
+
+    def test_handoff_to_running_loop(self):
+        """Тест: однократный запуск при работающем цикле передает ему опрос источника"""
+        daemon = InstanceLock(self.lock_path)
+        assert daemon.acquire('loop')
+
+        assert not multi_downloader.acquire_instance_lock(make_args(source='news'))
+        assert daemon.has_requests()
+
+        source = Source(name='news', url='https://www.youtube.com/@news', source_type=SourceType.CHANNEL)
+        other = Source(name='other', url='https://www.youtube.com/@other', source_type=SourceType.CHANNEL)
+        scheduler = SourceScheduler()
+        scheduler.sync([Subscription(name='sub', title='sub', description='', sources=[source, other])])
+        for job in scheduler.jobs():
+            scheduler.mark_done(job.key)
+
+        multi_downloader.instance_lock = daemon
+        multi_downloader.apply_poll_requests(scheduler)
+
+        assert [job.source.name for job in scheduler.due()] == ['news']
+        assert not daemon.has_requests()
+
+    def test_second_loop_and_force(self):
+        """Тест: второй цикл завершается, с --force запуск продолжается без блокировки"""
+        daemon = InstanceLock(self.lock_path)
+        assert daemon.acquire('loop')
+        try:
+            assert not multi_downloader.acquire_instance_lock(make_args(loop=True))
+            assert not daemon.has_requests()
+            assert multi_downloader.acquire_instance_lock(make_args(force=True))
+            assert multi_downloader.instance_lock is None
+        finally:
+            daemon.release()
+
+        assert multi_downloader.acquire_instance_lock(make_args())
+        assert multi_downloader.instance_lock.held
+
+    def test_cluster_nodes_start_together(self, monkeypatch):
+        """Тест: узлы кластера с общей папкой data/ запускаются одновременно, узел - только один раз"""
+        monkeypatch.setattr(config_manager.config, 'cluster_settings', {'enabled': True, 'node_id': 'node-a'})
+        assert multi_downloader.acquire_instance_lock(make_args(loop=True))
+        node_a = multi_downloader.instance_lock
+        assert node_a.path == instance_lock_path('node-a') == os.path.join('data', '.instance.node-a.lock')
+        try:
+            assert not multi_downloader.acquire_instance_lock(make_args(loop=True))
+
+            monkeypatch.setattr(config_manager.config, 'cluster_settings', {'enabled': True, 'node_id': 'node-b'})
+            assert multi_downloader.acquire_instance_lock(make_args(loop=True))
+            assert multi_downloader.instance_lock is not node_a
+            assert multi_downloader.instance_lock.held
+        finally:
+            node_a.release()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for leases.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import leases as leases_module
+from leases import LeaseManager, setup_leases, source_lease
+from config import Source, SourceType, Subscription
+from manage_sources import print_leases
+import multi_downloader
+from multi_downloader import SourceResult
+from scheduler import SourceScheduler
+
+
+class FakeClock:
+    """Управляемые часы для тестов"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLeaseManager:
+    """Тесты аренды источников узлами"""
+
+    def setup_method(self):
+        """Два узла с общей базой аренд"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'data', 'leases.db')
+        self.clock = FakeClock()
+        self.node_a = LeaseManager(self.db_path, 'node-a', ttl=300, heartbeat_interval=0, clock=self.clock)
+        self.node_b = LeaseManager(self.db_path, 'node-b', ttl=300, heartbeat_interval=0, clock=self.clock)
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        self.node_a.close()
+        self.node_b.close()
+        setup_leases({'enabled': False})
+        shutil.rmtree(self.temp_dir)
+
+    def test_one_owner_per_interval(self):
+        """Тест: источник держит один узел, после обработки - никто до конца интервала"""
+        lease = self.node_a.acquire('sub', 'news', interval=600)
+        assert lease is not None
+        assert self.node_b.acquire('sub', 'news', interval=600) is None
+        assert self.node_b.acquire('sub', 'other', interval=600) is not None
+
+        self.clock.now += 30
+        self.node_a.release(lease)
+        assert self.node_b.acquire('sub', 'news', interval=600) is None
+        assert self.node_a.acquire('sub', 'news', interval=600) is None
+
+        self.clock.now += 600
+        assert self.node_b.acquire('sub', 'news', interval=600) is not None
+
+    def test_expired_lease_is_taken_over(self):
+        """Тест: аренда умершего узла перехватывается после истечения срока"""
+        self.node_a.acquire('sub', 'news')
+        self.clock.now += 301
+
+        lease = self.node_b.acquire('sub', 'news')
+        assert lease is not None
+        assert lease.taken_over_from == 'node-a'
+        # Узел A больше не продлевает перехваченную аренду
+        assert self.node_a.heartbeat() == 0
+
+    def test_heartbeat_extends_lease(self):
+        """Тест: продление не дает перехватить аренду работающего узла"""
+        self.node_a.acquire('sub', 'news')
+        self.clock.now += 290
+        assert self.node_a.heartbeat() == 1
+        self.clock.now += 200
+        assert self.node_b.acquire('sub', 'news') is None
+
+    def test_close_releases_leases(self):
+        """Тест: при остановке узла аренды освобождаются"""
+        self.node_a.acquire('sub', 'news')
+        self.node_a.close()
+        assert self.node_b.acquire('sub', 'news') is not None
+        rows = self.node_b.snapshot()
+        assert [(row['source'], row['owner'], row['last_owner']) for row in rows] == [('news', 'node-b', 'node-a')]
+
+    def test_print_leases(self, capsys):
+        """Тест: вывод manage_sources.py leases"""
+        self.node_a.acquire('sub', 'news')
+        print_leases(self.node_a.snapshot())
+        output = capsys.readouterr().out
+        assert 'sub/news' in output
+        assert 'node-a' in output
+
+
+class TestSourceLease:
+    """Тесты обработки источников под арендой"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'leases.db')
+
+    def teardown_method(self):
+        setup_leases({'enabled': False})
+        shutil.rmtree(self.temp_dir)
+
+    def test_disabled_cluster_always_owns(self):
+        """Тест: без секции cluster источник обрабатывается всегда"""
+        setup_leases({})
+        with source_lease('sub', 'news', 600) as owned:
+            assert owned
+
+    def test_process_source_skips_leased_source(self):
+        """Тест: источник, который держит другой узел, пропускается без записи результата"""
+        other = LeaseManager(self.db_path, 'other-node', heartbeat_interval=0)
+        other.acquire('sub', 'news')
+        manager = setup_leases({'enabled': True, 'file': self.db_path, 'node_id': 'this-node',
+                                'heartbeat_interval': 0})
+        assert manager is leases_module._manager
+
+        source = Source(name='news', url='https://www.youtube.com/@news', source_type=SourceType.CHANNEL)
+        subscription = Subscription(name='sub', title='sub', description='', sources=[source])
+        try:
+            assert multi_downloader.process_source(source, subscription) is None
+        finally:
+            other.close()
+
+    def test_triggered_poll_skips_interval(self, monkeypatch):
+        """Тест: явный опрос (API управления, WebSub) не ждет check_interval, но берет аренду"""
+        monkeypatch.chdir(self.temp_dir)
+        setup_leases({'enabled': True, 'file': self.db_path, 'node_id': 'this-node', 'heartbeat_interval': 0})
+        source = Source(name='news', url='https://www.youtube.com/@news', source_type=SourceType.CHANNEL,
+                        check_interval=60)
+        subscription = Subscription(name='sub', title='sub', description='', sources=[source])
+        scheduler = SourceScheduler()
+        scheduler.sync([subscription])
+        job = scheduler.get(('sub', 'news'))
+        monkeypatch.setattr(multi_downloader, '_process_source', lambda source, subscription: SourceResult(True))
+
+        assert multi_downloader.process_source(job.source, job.subscription, job.triggered) is True
+        scheduler.mark_done(job.key)
+        # Плановый опрос до конца интервала пропускается
+        assert multi_downloader.process_source(job.source, job.subscription, job.triggered) is None
+
+        scheduler.trigger('sub', 'news')
+        assert job.triggered
+        assert multi_downloader.process_source(job.source, job.subscription, job.triggered) is True
+        scheduler.mark_done(job.key)
+        assert not job.triggered
+
+        # Аренду другого узла явный опрос не перехватывает
+        other = LeaseManager(self.db_path, 'other-node', heartbeat_interval=0)
+        try:
+            other.acquire('sub', 'news')
+            scheduler.trigger('sub', 'news')
+            assert multi_downloader.process_source(job.source, job.subscription, job.triggered) is None
+        finally:
+            other.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
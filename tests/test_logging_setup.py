@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for logging_setup.py
+"""
+
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logging_setup import get_logger, setup_logging, log_context, phase_timer, parse_size
+from multi_downloader import DownloadStats
+
+
+class TestLoggingSetup:
+    """Тесты настройки логирования и замеров этапов"""
+
+    def setup_method(self):
+        """Создаем временную папку для файла лога"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.log_file = os.path.join(self.temp_dir, 'logs', 'app.log')
+
+    def teardown_method(self):
+        """Возвращаем консольное логирование по умолчанию"""
+        setup_logging()
+        shutil.rmtree(self.temp_dir)
+
+    def _read_json_lines(self):
+        with open(self.log_file, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_parse_size(self):
+        """Тест разбора размера файла"""
+        assert parse_size("10MB") == 10 * 1024 * 1024
+        assert parse_size("512 KB") == 512 * 1024
+        assert parse_size(1000) == 1000
+
+    def test_json_file_with_context_and_timings(self):
+        """Тест: JSON записи содержат поля источника и длительность этапов"""
+        setup_logging({'level': 'INFO', 'file': self.log_file, 'json': True})
+        logger = get_logger('test')
+
+        with log_context(subscription='sub', source='src'):
+            logger.info("hello")
+            with phase_timer('list', url='https://example.com'):
+                pass
+        logger.info("outside")
+
+        records = self._read_json_lines()
+        assert records[0]['message'] == "hello"
+        assert records[0]['source'] == 'src'
+        assert records[1]['phase'] == 'list'
+        assert records[1]['status'] == 'ok'
+        assert records[1]['subscription'] == 'sub'
+        assert isinstance(records[1]['duration_ms'], float)
+        assert 'source' not in records[2]
+
+    def test_phase_timer_marks_errors(self):
+        """Тест: этап с исключением записывается со статусом error"""
+        setup_logging({'file': self.log_file, 'json': True})
+        with pytest.raises(ValueError):
+            with phase_timer('download'):
+                raise ValueError("boom")
+
+        assert self._read_json_lines()[-1]['status'] == 'error'
+
+    def test_console_verbosity(self):
+        """Тест: -q скрывает INFO, замеры этапов в консоли только с -v"""
+        stdout = io.StringIO()
+        with patch.object(sys, 'stdout', stdout):
+            setup_logging({'file': self.log_file}, verbosity=-1)
+            get_logger('test').info("info message")
+            get_logger('test').warning("warning message")
+
+            setup_logging({'file': self.log_file})
+            with phase_timer('rss'):
+                pass
+            get_logger('test').debug("debug message")
+
+            setup_logging({'file': self.log_file}, verbosity=1)
+            with phase_timer('transcode'):
+                pass
+            get_logger('test').debug("verbose debug")
+
+        output = stdout.getvalue()
+        assert "info message" not in output
+        assert "warning message" in output
+        assert "rss" not in output
+        assert "debug message" not in output
+        assert "transcode" in output
+        assert "verbose debug" in output
+
+        # В файл замеры пишутся независимо от консоли, DEBUG - нет
+        with open(self.log_file, encoding='utf-8') as f:
+            content = f.read()
+        assert "info message" in content
+        assert "rss" in content
+        assert "verbose debug" not in content
+
+    def test_download_stats_hooks(self):
+        """Тест: байты загрузки и время постобработки из хуков yt-dlp"""
+        stats = DownloadStats()
+        stats.progress_hook({'status': 'downloading', 'downloaded_bytes': 10})
+        stats.progress_hook({'status': 'finished', 'downloaded_bytes': 2048})
+        stats.postprocessor_hook({'status': 'started', 'postprocessor': 'ExtractAudio'})
+        stats.postprocessor_hook({'status': 'finished', 'postprocessor': 'ExtractAudio'})
+
+        assert stats.downloaded_bytes == 2048
+        assert stats.transcode_seconds >= 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -4,6 +4,7 @@ Tests for multi_downloader.py and config.py
 """
 
 import pytest
+import hashlib
 import os
 import tempfile
 import shutil
@@ -14,6 +15,7 @@ from unittest.mock import patch, MagicMock
 # Добавляем корневую директорию в путь для импорта
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import config
 from config import Source, SourceType, Subscription, Config, ConfigManager
 
 
@@ -241,6 +243,206 @@ class TestConfigManager:
         assert enabled_sources[0].name == "test_source1"
 
 
+class TestConfigIndexes:
+    """Тесты индексов ConfigManager"""
+
+    def setup_method(self):
+        """Создаем временный config.yaml с несколькими подписками"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.temp_dir, 'config.yaml')
+        test_config = {
+            'global': {'check_interval': 7, 'max_videos': 2},
+            'subscriptions': {
+                'news': {'sources': {
+                    'a': {'url': 'https://www.youtube.com/@a'},
+                    'b': {'url': 'https://www.youtube.com/@b', 'enabled': False},
+                }},
+                'off': {'enabled': False, 'sources': {
+                    'c': {'url': 'https://www.youtube.com/@c', 'check_interval': 30},
+                }},
+            }
+        }
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            yaml.dump(test_config, f)
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_lookups_and_enabled_views(self):
+        """Тест поиска по имени и представлений активных объектов"""
+        manager = ConfigManager(self.config_file)
+
+        assert manager.get_source_by_name('c').check_interval == 30
+        assert manager.get_source_by_name('a').check_interval == 7
+        assert manager.get_source_by_name('a').max_videos == 2
+        assert manager.get_subscription_by_name('off').enabled is False
+        assert [s.name for s in manager.get_all_enabled_sources()] == ['a']
+        assert [s.name for s in manager.get_enabled_subscriptions()] == ['news']
+        assert [s['subscription'] for s in manager.list_sources()] == ['news', 'news', 'off']
+
+        with pytest.raises(ValueError):
+            manager.get_source_by_name('missing')
+        with pytest.raises(ValueError):
+            manager.get_subscription_by_name('missing')
+
+    def test_indexes_follow_changes(self):
+        """Тест: индексы перестраиваются после изменений конфигурации"""
+        manager = ConfigManager(self.config_file)
+        assert [s.name for s in manager.get_all_enabled_sources()] == ['a']
+
+        manager.enable_source('b')
+        manager.enable_subscription('off')
+        assert [s.name for s in manager.get_all_enabled_sources()] == ['a', 'b', 'c']
+
+        manager.remove_source('a')
+        with pytest.raises(ValueError):
+            manager.get_source_by_name('a')
+
+    def test_slots(self):
+        """Тест: Source и Subscription не хранят __dict__ (Python 3.10+)"""
+        if sys.version_info < (3, 10):
+            pytest.skip("dataclass(slots=True) требует Python 3.10+")
+        source = Source(name="a", url="u", source_type=SourceType.CHANNEL)
+        assert not hasattr(source, '__dict__')
+        assert not hasattr(Subscription(name="s", title="t", description=""), '__dict__')
+
+
+class TestConfigCache:
+    """Тесты кеша разобранной конфигурации"""
+
+    def setup_method(self):
+        """Создаем временный config.yaml со старым mtime"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.temp_dir, 'config.yaml')
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            yaml.dump({'subscriptions': {'news': {'sources': {'a': {'url': 'https://www.youtube.com/@a'}}}}}, f)
+        stat = os.stat(self.config_file)
+        os.utime(self.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 * 10**9))
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_second_load_skips_yaml(self):
+        """Тест: повторная загрузка неизмененного файла не разбирает YAML"""
+        ConfigManager(self.config_file)
+        assert os.path.exists(os.path.join(self.temp_dir, '.config.yaml.cache'))
+
+        with patch.object(config.yaml, 'load', side_effect=AssertionError("YAML разобран повторно")):
+            manager = ConfigManager(self.config_file)
+        assert manager.get_source_by_name('a').url == 'https://www.youtube.com/@a'
+
+    def test_touched_file_reuses_cache_by_hash(self):
+        """Тест: изменение только mtime не приводит к разбору YAML"""
+        ConfigManager(self.config_file)
+        os.utime(self.config_file)
+
+        with patch.object(config.yaml, 'load', side_effect=AssertionError("YAML разобран повторно")):
+            manager = ConfigManager(self.config_file)
+        assert manager.get_source_by_name('a') is not None
+
+    def test_changed_file_invalidates_cache(self):
+        """Тест: измененный файл разбирается заново"""
+        ConfigManager(self.config_file)
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            yaml.dump({'subscriptions': {'news': {'sources': {'b': {'url': 'https://www.youtube.com/@b'}}}}}, f)
+
+        manager = ConfigManager(self.config_file)
+        assert [s.name for s in manager.get_all_enabled_sources()] == ['b']
+
+    def test_corrupted_cache_is_ignored(self):
+        """Тест: поврежденный кеш не мешает загрузке"""
+        with open(os.path.join(self.temp_dir, '.config.yaml.cache'), 'wb') as f:
+            f.write(b'not a json')
+
+        manager = ConfigManager(self.config_file)
+        assert [s.name for s in manager.get_all_enabled_sources()] == ['a']
+
+    def test_cache_is_plain_json(self):
+        """Тест: кеш хранит данные YAML в JSON, pickle из кеша не загружается"""
+        import json
+        import pickle
+        
+        ConfigManager(self.config_file)
+        cache_path = os.path.join(self.temp_dir, '.config.yaml.cache')
+        with open(cache_path, encoding='utf-8') as f:
+            entry = json.load(f)
+        assert entry['data']['subscriptions']['news']['sources']['a']['url'] == 'https://www.youtube.com/@a'
+        
+        marker = os.path.join(self.temp_dir, 'executed')
+        with open(cache_path, 'wb') as f:
+            f.write(pickle.dumps(PickledCommand(marker)))
+        manager = ConfigManager(self.config_file)
+        assert not os.path.exists(marker)
+        assert [s.name for s in manager.get_all_enabled_sources()] == ['a']
+
+    def test_cache_is_written_after_save(self):
+        """Тест: после save_config кеш соответствует записанному файлу и используется при загрузке"""
+        import json
+
+        manager = ConfigManager(self.config_file)
+        manager.config.global_settings['check_interval'] = 30
+        manager.save_config()
+
+        with open(self.config_file, 'rb') as f:
+            raw = f.read()
+        with open(os.path.join(self.temp_dir, '.config.yaml.cache'), encoding='utf-8') as f:
+            entry = json.load(f)
+        assert entry['sha256'] == hashlib.sha256(raw).hexdigest()
+        assert entry['data'] == yaml.safe_load(raw)
+
+        with patch.object(config.yaml, 'load', side_effect=AssertionError("YAML разобран повторно")):
+            manager = ConfigManager(self.config_file)
+        assert manager.config.global_settings['check_interval'] == 30
+
+
+class PickledCommand:
+    """Объект, который при распаковке pickle создает файл"""
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def __reduce__(self):
+        return (open, (self.path, 'w'))
+
+
+class TestLazyConfigManager:
+    """Тесты ленивой загрузки конфигурации"""
+
+    def setup_method(self):
+        """Создаем временную папку с config.yaml"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.temp_dir, 'custom.yaml')
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            yaml.dump({'global': {'base_url': 'http://lazy.example.com'}, 'subscriptions': {}}, f)
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_import_does_not_load_config(self):
+        """Тест: импорт config не читает файл конфигурации"""
+        import subprocess
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = "import config; print(config.config_manager.is_loaded())"
+        result = subprocess.run([sys.executable, "-c", code], cwd=self.temp_dir, capture_output=True, text=True,
+                                env={**os.environ, 'PYTHONPATH': root})
+        assert result.stdout.strip() == "False"
+
+    def test_loads_on_first_access_from_explicit_path(self):
+        """Тест: конфигурация загружается при первом обращении по указанному пути"""
+        from config import LazyConfigManager
+
+        manager = LazyConfigManager()
+        manager.set_config_file(self.config_file)
+        assert not manager.is_loaded()
+
+        assert manager.get_base_url() == 'http://lazy.example.com'
+        assert manager.is_loaded()
+        assert manager.config_file == self.config_file
+
+
 class TestSourceType:
     """Тесты для SourceType enum"""
 
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Tests for bulk commands in manage_sources.py
+"""
+
+import errno
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+import yaml
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import manage_sources
+from config import config_manager, set_config_file, DEFAULT_CONFIG_FILE
+
+
+OPML = """<?xml version="1.0" encoding="UTF-8"?>
+<opml version="1.1">
+  <body>
+    <outline text="YouTube Subscriptions" title="YouTube Subscriptions">
+      <outline text="Some Channel" title="Some Channel" type="rss"
+               xmlUrl="https://www.youtube.com/feeds/videos.xml?channel_id=UC123"/>
+      <outline text="Some Playlist" title="Some Playlist" type="rss"
+               xmlUrl="https://www.youtube.com/feeds/videos.xml?playlist_id=PL456"/>
+      <outline text="Existing" title="Existing" type="rss" xmlUrl="https://www.youtube.com/@existing"/>
+    </outline>
+  </body>
+</opml>
+"""
+
+
+class TestBulkCommands:
+    """Тесты массового импорта, экспорта и включения/отключения источников"""
+
+    def setup_method(self):
+        """Создаем временный config.yaml и считаем записи на диск"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.temp_dir, 'config.yaml')
+        data = {
+            'global': {},
+            'subscriptions': {
+                'main': {'title': 'Main', 'sources': {
+                    'existing': {'url': 'https://www.youtube.com/@existing'},
+                    'news_one': {'url': 'https://www.youtube.com/@news_one'},
+                    'news_two': {'url': 'https://www.youtube.com/@news_two'},
+                }},
+            },
+        }
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            yaml.dump(data, f)
+        set_config_file(self.config_file)
+
+        # Считаем записи файлов конфигурации (кеш разбора не учитываем)
+        self.writes = []
+        self._atomic_write = config._atomic_write
+
+        def counting_write(path, content):
+            if not path.endswith('.cache'):
+                self.writes.append(path)
+            self._atomic_write(path, content)
+        config._atomic_write = counting_write
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        config._atomic_write = self._atomic_write
+        set_config_file(DEFAULT_CONFIG_FILE)
+        shutil.rmtree(self.temp_dir)
+
+    def _write_file(self, name, content):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def _saved_sources(self):
+        with open(self.config_file, encoding='utf-8') as f:
+            data = yaml.safe_load(f)
+        return {name: source for sub in data['subscriptions'].values() for name, source in sub['sources'].items()}
+
+    def test_import_opml_single_save(self):
+        """Тест: импорт OPML записывает конфигурацию один раз"""
+        path = self._write_file('subs.opml', OPML)
+        stats = manage_sources.import_sources(path, subscription_name='imported', validate=False)
+
+        assert stats == {'added': 2, 'skipped': 1, 'invalid': 0}
+        assert self.writes == [self.config_file]
+        sources = self._saved_sources()
+        assert sources['some_channel']['url'] == 'https://www.youtube.com/channel/UC123'
+        assert sources['some_playlist']['url'] == 'https://www.youtube.com/playlist?list=PL456'
+        assert sources['some_playlist']['type'] == 'playlist'
+        assert [s.name for s in config_manager.get_subscription_by_name('imported').sources] == \
+            ['some_channel', 'some_playlist']
+
+    def test_import_csv(self):
+        """Тест: импорт CSV с подпиской и параметрами в колонках"""
+        path = self._write_file('sources.csv',
+                                "url,name,subscription,max_videos\n"
+                                "https://www.youtube.com/@a,a,main,3\n"
+                                "https://www.youtube.com/@b,news_one,main,\n"
+                                "https://www.youtube.com/@c,,main,\n")
+        stats = manage_sources.import_sources(path, validate=False)
+
+        assert stats['added'] == 2
+        assert stats['skipped'] == 1
+        sources = self._saved_sources()
+        assert sources['a']['max_videos'] == 3
+        assert 'https_www_youtube_com_c' in sources
+
+    def test_import_validation_failures_are_skipped(self):
+        """Тест: источники, не прошедшие проверку, не импортируются"""
+        path = self._write_file('sources.csv', "url\nhttps://www.youtube.com/@good\nhttps://www.youtube.com/@bad\n")
+        original = manage_sources.validate_source_url
+        manage_sources.validate_source_url = lambda url: "not found" if url.endswith('bad') else None
+        try:
+            stats = manage_sources.import_sources(path, subscription_name='main', workers=2)
+        finally:
+            manage_sources.validate_source_url = original
+
+        assert stats == {'added': 1, 'skipped': 0, 'invalid': 1}
+        assert 'https_www_youtube_com_good' in self._saved_sources()
+
+    def test_invalid_csv_rows_are_skipped(self):
+        """Тест: строка с неверным типом или числом пропускается, остальные импортируются"""
+        path = self._write_file('sources.csv',
+                                "url,name,type,max_videos\n"
+                                "https://www.youtube.com/@ok,ok,channel,3\n"
+                                "https://www.youtube.com/@bad_type,bad_type,podcast,\n"
+                                "https://www.youtube.com/@bad_number,bad_number,,many\n")
+        stats = manage_sources.import_sources(path, subscription_name='main', validate=False)
+
+        assert stats == {'added': 1, 'skipped': 0, 'invalid': 2}
+        assert self.writes == [self.config_file]
+        sources = self._saved_sources()
+        assert 'ok' in sources
+        assert 'bad_type' not in sources and 'bad_number' not in sources
+
+    def test_validation_uses_create_ydl(self, monkeypatch):
+        """Тест: проверка URL идет через create_ydl с постоянным кешем yt-dlp"""
+        import yt_dlp
+        import ytdlp_cache
+        created = []
+
+        class FakeYoutubeDL:
+            def __init__(self, params):
+                created.append(params)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def extract_info(self, url, download=True):
+                return {'id': url}
+
+        cache_dir = os.path.join(self.temp_dir, 'data', '.yt-dlp-cache')
+        monkeypatch.setattr(yt_dlp, 'YoutubeDL', FakeYoutubeDL)
+        ytdlp_cache.setup_ytdlp_cache({'dir': cache_dir})
+        try:
+            assert manage_sources.validate_urls(["https://www.youtube.com/@good"]) == \
+                {"https://www.youtube.com/@good": None}
+        finally:
+            ytdlp_cache.setup_ytdlp_cache({'enabled': False})
+        assert created[0]['cachedir'] == cache_dir
+        assert created[0]['playlist_items'] == '1'
+
+    def test_export_and_reimport(self):
+        """Тест: экспортированный CSV повторно не создает дубликатов"""
+        path = os.path.join(self.temp_dir, 'export.csv')
+        assert manage_sources.export_sources(path) == 3
+        assert manage_sources.export_sources(os.path.join(self.temp_dir, 'export.opml')) == 3
+
+        self.writes.clear()
+        stats = manage_sources.import_sources(path, validate=False)
+        assert stats == {'added': 0, 'skipped': 3, 'invalid': 0}
+        assert self.writes == []
+
+    def test_bulk_disable_by_pattern(self):
+        """Тест: массовое отключение по шаблону одной записью"""
+        changed = manage_sources.set_sources_enabled('news_*', False)
+
+        assert changed == ['news_one', 'news_two']
+        assert self.writes == [self.config_file]
+        sources = self._saved_sources()
+        assert sources['news_one']['enabled'] is False
+        assert sources['existing']['enabled'] is True
+
+    def test_batch_exception_writes_nothing(self):
+        """Тест: при ошибке внутри batch конфигурация не записывается"""
+        with pytest.raises(RuntimeError):
+            with config_manager.batch():
+                config_manager.disable_source('existing')
+                raise RuntimeError("boom")
+
+        assert self.writes == []
+        assert 'enabled' not in self._saved_sources()['existing']
+
+    def test_save_to_bind_mounted_config(self, monkeypatch):
+        """Тест: файл, смонтированный в контейнер отдельно (os.replace дает EBUSY), перезаписывается на месте"""
+        original_replace = os.replace
+
+        def busy_replace(src, dst):
+            if dst == self.config_file:
+                raise OSError(errno.EBUSY, "Device or resource busy", dst)
+            original_replace(src, dst)
+        monkeypatch.setattr(os, 'replace', busy_replace)
+
+        config_manager.disable_source('existing')
+
+        assert self._saved_sources()['existing']['enabled'] is False
+        assert not [name for name in os.listdir(self.temp_dir) if name.endswith('.tmp')]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
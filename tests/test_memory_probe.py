@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for memory_probe.py
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import memory_probe
+from memory_probe import MemoryProbe, current_rss, peak_rss, format_bytes
+
+
+def allocate_info_dicts(count: int):
+    """Имитация больших info dict, которые накапливаются между итерациями"""
+    return [{'id': f"video{i}", 'title': 'x' * 200, 'formats': [{'url': 'y' * 100}]} for i in range(count)]
+
+
+class TestMemoryProbe:
+    """Тесты контроля памяти"""
+
+    def setup_method(self):
+        """Сохраняем накопленные между итерациями объекты"""
+        self.leak = []
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        self.leak.clear()
+
+    def test_rss_readings(self):
+        """Тест: текущий и пиковый RSS процесса"""
+        rss = current_rss()
+        peak = peak_rss()
+        assert peak is not None and peak > 0
+        assert rss is None or rss > 0
+
+    def test_format_bytes(self):
+        """Тест: форматирование размеров и приростов"""
+        assert format_bytes(512) == "512 B"
+        assert format_bytes(-2048) == "-2.0 KB"
+        assert format_bytes(3 * 1024 ** 3) == "3.00 GB"
+
+    def test_reports_top_allocation_growth(self):
+        """Тест: рост выделений между итерациями указывает на место в коде"""
+        probe = MemoryProbe({'enabled': True, 'top': 5})
+        probe.start()
+        try:
+            self.leak.extend(allocate_info_dicts(2000))
+            report = probe.check()
+        finally:
+            probe.stop()
+
+        assert report.iteration == 1
+        assert report.traced_current > 0
+        assert report.top_diffs
+        assert report.top_diffs[0].size_diff > 0
+        assert any(os.path.basename(__file__) in diff.location for diff in report.top_diffs)
+        assert "Память после итерации 1" in report.format()
+        assert not report.ceiling_exceeded
+
+    def test_ceiling_without_tracemalloc(self):
+        """Тест: потолок RSS проверяется без tracemalloc"""
+        probe = MemoryProbe({'max_rss': '1KB'})
+        assert probe.active
+        probe.start()
+
+        report = probe.check()
+        assert report.ceiling_exceeded
+        assert report.traced_current is None
+
+        assert not MemoryProbe({'max_rss': '1000GB'}).check().ceiling_exceeded
+        assert not MemoryProbe().active
+
+    def test_restart_reexecs_with_same_arguments(self):
+        """Тест: перезапуск через os.execv с теми же аргументами"""
+        with patch.object(memory_probe.os, 'execv') as execv, \
+                patch.object(sys, 'argv', ['multi_downloader.py', '--loop']), \
+                patch.dict(os.environ, {memory_probe.RESTART_COUNT_ENV: '2'}):
+            MemoryProbe({'max_rss': '1KB'}).restart()
+            assert os.environ[memory_probe.RESTART_COUNT_ENV] == '3'
+
+        execv.assert_called_once_with(sys.executable, [sys.executable, 'multi_downloader.py', '--loop'])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for metrics.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import urllib.request
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics as metrics_module
+from logging_setup import add_phase_observer, remove_phase_observer, log_context, record_phase
+from metrics import Counter, Histogram, DownloaderMetrics, write_textfile, start_http_server
+from multi_downloader import YtDlpLogger
+
+
+class FakeClock:
+    """Управляемые часы для тестов"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMetrics:
+    """Тесты метрик и формата Prometheus"""
+
+    def setup_method(self):
+        """Создаем временную папку"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_counter_and_histogram_exposition(self):
+        """Тест текстового формата счетчиков и гистограмм"""
+        counter = Counter("test_total", "Test counter", ('source',))
+        counter.inc(source='a"b')
+        counter.inc(2, source='a"b')
+        histogram = Histogram("test_seconds", "Test histogram", (), buckets=(1, 5))
+        histogram.observe(0.5)
+        histogram.observe(3)
+
+        assert counter.render().splitlines() == [
+            "# HELP test_total Test counter",
+            "# TYPE test_total counter",
+            'test_total{source="a\\"b"} 3',
+        ]
+        assert histogram.render().splitlines()[2:] == [
+            'test_seconds_bucket{le="1"} 1',
+            'test_seconds_bucket{le="5"} 2',
+            'test_seconds_bucket{le="+Inf"} 2',
+            'test_seconds_sum 3.5',
+            'test_seconds_count 2',
+        ]
+
+    def test_wrong_labels(self):
+        """Тест: метки должны совпадать с объявленными"""
+        with pytest.raises(ValueError):
+            Counter("test_total", "Test", ('source',)).inc(other='x')
+
+    def test_phase_observer_feeds_metrics(self):
+        """Тест: замеры этапов попадают в гистограммы и счетчики"""
+        downloader_metrics = DownloaderMetrics()
+        add_phase_observer(downloader_metrics.observe_phase)
+        try:
+            with log_context(subscription='sub', source='src'):
+                record_phase('list', 0.3)
+                record_phase('download', 12.0, bytes=4096)
+                record_phase('transcode', 2.5)
+        finally:
+            remove_phase_observer(downloader_metrics.observe_phase)
+
+        assert downloader_metrics.extraction_seconds.count(phase='list') == 1
+        assert downloader_metrics.download_seconds.count() == 1
+        assert downloader_metrics.downloaded_bytes.get() == 4096
+        assert downloader_metrics.transcode_seconds.get() == 2.5
+
+    def test_seconds_since_last_success(self):
+        """Тест: время с последнего успешного опроса источника"""
+        clock = FakeClock()
+        downloader_metrics = DownloaderMetrics(clock=clock)
+        downloader_metrics.source_finished('sub', 'ok_source', True)
+        downloader_metrics.source_finished('sub', 'bad_source', False)
+        clock.now += 90
+
+        text = downloader_metrics.render()
+        assert 'youtube2podcast_source_seconds_since_last_success{subscription="sub",source="ok_source"} 90' in text
+        assert 'youtube2podcast_sources_failed_total{subscription="sub",source="bad_source"} 1' in text
+        assert 'bad_source"} 9' not in text
+
+    def test_rate_limit_counted_from_yt_dlp_messages(self):
+        """Тест: ответы 429 в сообщениях yt-dlp учитываются"""
+        before = metrics_module.metrics.rate_limited.get()
+        ytdlp_logger = YtDlpLogger()
+        ytdlp_logger.warning("[youtube] abc: HTTP Error 429: Too Many Requests. Retrying (1/3)...")
+        ytdlp_logger.error("ERROR: unrelated failure")
+
+        assert metrics_module.metrics.rate_limited.get() == before + 1
+
+    def test_textfile_and_http_endpoint(self):
+        """Тест: метрики в textfile и по HTTP /metrics"""
+        path = os.path.join(self.temp_dir, 'node_exporter', 'youtube2podcast.prom')
+        write_textfile(path)
+        with open(path, encoding='utf-8') as f:
+            assert "# TYPE youtube2podcast_queue_depth gauge" in f.read()
+        assert os.listdir(os.path.dirname(path)) == ['youtube2podcast.prom']
+
+        server = start_http_server(0)
+        try:
+            port = server.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+                assert response.headers['Content-Type'].startswith("text/plain; version=0.0.4")
+                assert b"youtube2podcast_sources_processed_total" in response.read()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
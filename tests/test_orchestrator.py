@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Tests for orchestrator.py
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Source, SourceType, Subscription
+from scheduler import SourceScheduler
+from orchestrator import AsyncOrchestrator
+
+
+def make_scheduler(count: int, interval: int = 10) -> SourceScheduler:
+    sources = [Source(name=f"s{i}", url=f"https://www.youtube.com/@s{i}", source_type=SourceType.CHANNEL,
+                      check_interval=interval) for i in range(count)]
+    scheduler = SourceScheduler()
+    scheduler.sync([Subscription(name="sub", title="sub", description="", sources=sources)])
+    return scheduler
+
+
+class ConcurrencyProbe:
+    """Блокирующая обработка источника, считающая одновременные вызовы"""
+
+    def __init__(self, delay: float = 0.05, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.current = 0
+        self.peak = 0
+        self.processed = []
+        self._lock = threading.Lock()
+
+    def __call__(self, job) -> bool:
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        time.sleep(self.delay)
+        with self._lock:
+            self.current -= 1
+            self.processed.append(job.source.name)
+        return job.source.name not in self.fail
+
+
+class TestAsyncOrchestrator:
+    """Тесты асинхронного оркестратора"""
+
+    def test_wave_is_bounded_by_semaphore(self):
+        """Тест: все наступившие источники обработаны, одновременно - не больше max_concurrent"""
+        scheduler = make_scheduler(7)
+        probe = ConcurrencyProbe(fail={"s3"})
+        waves = []
+        orchestrator = None
+
+        def wave_finished(total, success):
+            waves.append((total, success))
+            orchestrator.stop()
+
+        orchestrator = AsyncOrchestrator(scheduler, probe, max_concurrent=3, on_wave_end=wave_finished,
+                                         idle_interval=0.01)
+        orchestrator.run_forever()
+
+        assert sorted(probe.processed) == sorted(f"s{i}" for i in range(7))
+        assert probe.peak == 3
+        assert waves == [(7, 6)]
+        assert not scheduler.due()
+        assert orchestrator.in_flight == 0
+
+    def test_sources_are_polled_again_when_due(self):
+        """Тест: источник с наступившим сроком запускается снова, пока идет цикл"""
+        scheduler = make_scheduler(2, interval=0)
+        probe = ConcurrencyProbe(delay=0.01)
+        orchestrator = None
+
+        def wave_finished(total, success):
+            if len(probe.processed) >= 6:
+                orchestrator.stop()
+
+        orchestrator = AsyncOrchestrator(scheduler, probe, max_concurrent=2, on_wave_end=wave_finished,
+                                         idle_interval=0.01)
+        orchestrator.run_forever()
+
+        assert probe.processed.count("s0") >= 3
+        assert probe.processed.count("s1") >= 3
+
+    def test_sigterm_stops_waiting_sources(self):
+        """Тест: после SIGTERM ожидающие источники не запускаются, начатые дорабатывают"""
+        scheduler = make_scheduler(5)
+        processed = []
+
+        def process(job):
+            processed.append(job.source.name)
+            os.kill(os.getpid(), signal.SIGTERM)
+            time.sleep(0.05)
+            return True
+
+        orchestrator = AsyncOrchestrator(scheduler, process, max_concurrent=1, idle_interval=0.01)
+        orchestrator.run_forever()
+
+        assert processed == ["s0"]
+        assert not orchestrator.running
+        assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
+
+    def test_sync_error_does_not_stop_loop(self):
+        """Тест: ошибка синхронизации расписания записывается в лог, цикл продолжается"""
+        import orchestrator as orchestrator_module
+
+        scheduler = make_scheduler(1)
+        calls = []
+        orchestrator = None
+
+        def sync():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("config broken")
+            if len(calls) > 3:
+                orchestrator.stop()
+
+        original_delay = orchestrator_module.ERROR_RETRY_BASE
+        orchestrator_module.ERROR_RETRY_BASE = 0.01
+        try:
+            orchestrator = AsyncOrchestrator(scheduler, ConcurrencyProbe(delay=0), sync=sync, idle_interval=0.01)
+            orchestrator.run_forever()
+        finally:
+            orchestrator_module.ERROR_RETRY_BASE = original_delay
+
+        assert len(calls) > 3
+
+    def test_pause_holds_due_sources(self):
+        """Тест: на паузе наступившие источники не запускаются, после снятия - обрабатываются"""
+        scheduler = make_scheduler(2)
+        probe = ConcurrencyProbe(delay=0)
+        paused = [True]
+        ticks = []
+        orchestrator = None
+
+        def sync():
+            ticks.append(len(probe.processed))
+            if len(ticks) == 5:
+                paused[0] = False
+
+        orchestrator = AsyncOrchestrator(scheduler, probe, sync=sync, idle_interval=0.01,
+                                         paused=lambda: paused[0],
+                                         on_wave_end=lambda total, success: orchestrator.stop())
+        orchestrator.run_forever()
+
+        assert ticks[:5] == [0] * 5
+        assert sorted(probe.processed) == ["s0", "s1"]
+
+    def test_running_source_does_not_spin_sync(self):
+        """Тест: пока источник обрабатывается, расписание синхронизируется раз в idle_interval"""
+        scheduler = make_scheduler(1)
+        syncs = []
+        orchestrator = None
+
+        orchestrator = AsyncOrchestrator(scheduler, ConcurrencyProbe(delay=0.5), sync=lambda: syncs.append(1),
+                                         idle_interval=0.1,
+                                         on_wave_end=lambda total, success: orchestrator.stop())
+        orchestrator.run_forever()
+
+        # 0.5 сек обработки при idle_interval 0.1 - около 5 синхронизаций (раньше - десятки)
+        assert 2 <= len(syncs) <= 10
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for profiling.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiling import IterationProfiler, StackSampler, maybe_profile, profile_file_name
+
+
+def busy_function(seconds: float) -> int:
+    """Нагрузка для профилирования"""
+    deadline = time.perf_counter() + seconds
+    count = 0
+    while time.perf_counter() < deadline:
+        count += 1
+    return count
+
+
+class TestProfiling:
+    """Тесты профилирования итераций"""
+
+    def setup_method(self):
+        """Создаем временную папку для профилей"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_profile_file_name(self):
+        """Тест: метка очищается, к имени добавляется время"""
+        name = profile_file_name('tech / channel', 'pstats', datetime(2024, 5, 1, 12, 30, 15))
+        assert name == 'tech_channel-20240501-123015-000000.pstats'
+
+    def test_full_mode_writes_pstats(self):
+        """Тест: cProfile сохраняет .pstats, который читается модулем pstats"""
+        import pstats
+
+        profiler = IterationProfiler('full', self.temp_dir, top=5)
+        with profiler.profile('iteration'):
+            busy_function(0.01)
+
+        assert len(profiler.files) == 1
+        assert profiler.files[0].endswith('.pstats')
+        stats = pstats.Stats(profiler.files[0])
+        assert any(name == 'busy_function' for _, _, name in stats.stats)
+
+    def test_sample_mode_writes_folded_stacks(self):
+        """Тест: сэмплирование находит нагруженную функцию"""
+        profiler = IterationProfiler('sample', self.temp_dir, interval=0.002)
+        with profiler.profile('iteration'):
+            busy_function(0.2)
+
+        with open(profiler.files[0], encoding='utf-8') as f:
+            content = f.read()
+        assert profiler.files[0].endswith('.folded')
+        assert 'busy_function' in content
+
+    def test_sampler_counts(self):
+        """Тест: cumulative учитывает функцию один раз на сэмпл"""
+        sampler = StackSampler()
+        sampler.sample()
+        sampler.sample()
+
+        assert sampler.samples == 2
+        (key, cumulative, own), = [item for item in sampler.top(100) if item[0][2] == 'test_sampler_counts']
+        assert cumulative == 2
+        assert own == 0
+        assert "2 сэмплов" in sampler.format_top()
+
+    def test_profile_saved_on_exception(self):
+        """Тест: профиль сохраняется, даже если итерация упала"""
+        profiler = IterationProfiler('full', self.temp_dir)
+        with pytest.raises(RuntimeError):
+            with maybe_profile(profiler, 'failing'):
+                raise RuntimeError("boom")
+        assert os.path.basename(profiler.files[0]).startswith('failing-')
+
+    def test_disabled_and_unknown_mode(self):
+        """Тест: без профилировщика блок выполняется как есть"""
+        with maybe_profile(None, 'iteration'):
+            pass
+        assert os.listdir(self.temp_dir) == []
+        with pytest.raises(ValueError):
+            IterationProfiler('tracing', self.temp_dir)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
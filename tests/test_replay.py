@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Tests for replay.py
+"""
+
+import os
+import shutil
+import socket
+import sys
+import tempfile
+
+import pytest
+import yaml
+
+# Добавляем корневую директорию и папку бенчмарков в путь для импорта
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+import replay
+from replay import FixtureStore, ReplayYoutubeDL, request_key
+from config import set_config_file, DEFAULT_CONFIG_FILE
+from logging_setup import setup_logging
+from fake_yt_dlp import fake_yt_dlp
+from bench_pipeline import generate_config
+import multi_downloader
+
+
+class ForbiddenYoutubeDL:
+    """YoutubeDL, который нельзя создавать: при воспроизведении сеть не нужна"""
+
+    def __init__(self, params):
+        raise AssertionError("При воспроизведении настоящий YoutubeDL не создается")
+
+
+def snapshot_data(root: str) -> dict:
+    """Файлы в data/ (кроме базы истории и блокировок) и их размеры"""
+    files = {}
+    for directory, dirs, names in os.walk(os.path.join(root, 'data')):
+        dirs[:] = [name for name in dirs if not name.startswith('.')]
+        for name in names:
+            if not name.startswith(('history.db', '.')):
+                path = os.path.join(directory, name)
+                files[os.path.relpath(path, root)] = os.path.getsize(path)
+    return files
+
+
+class TestReplay:
+    """Тесты записи и воспроизведения ответов yt-dlp"""
+
+    def setup_method(self):
+        """Временная рабочая папка с конфигурацией на 1 подписку × 2 источника"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.fixtures_dir = os.path.join(self.temp_dir, 'fixtures')
+        self.original_cwd = os.getcwd()
+        self.original_skip = os.environ.pop('SKIP_DOWNLOAD', None)
+        os.chdir(self.temp_dir)
+        generate_config('config.yaml', subscriptions=1, sources=2, videos=3)
+        set_config_file(os.path.abspath('config.yaml'))
+        setup_logging({'level': 'WARNING'}, verbosity=-1)
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        replay.stop()
+        os.chdir(self.original_cwd)
+        set_config_file(DEFAULT_CONFIG_FILE)
+        setup_logging()
+        if self.original_skip is not None:
+            os.environ['SKIP_DOWNLOAD'] = self.original_skip
+        shutil.rmtree(self.temp_dir)
+
+    def test_request_key_depends_on_options(self):
+        """Тест: ключ различает список из 1 и из N видео"""
+        url = "https://www.youtube.com/@news"
+        assert request_key('extract_info', url, {'playlist_items': '1'}) != \
+            request_key('extract_info', url, {'playlist_items': '1-3'})
+        assert request_key('extract_info', url, {'quiet': True}) == request_key('extract_info', url, {})
+
+    def test_record_then_replay_main(self):
+        """Тест: прогон по фикстурам дает те же файлы, что и записанный прогон"""
+        replay.start_recording(self.fixtures_dir)
+        with fake_yt_dlp(entries=3, audio_bytes=2048) as fake_class:
+            multi_downloader.main()
+        recorded_calls = sum(fake_class.calls.values())
+        recorded = snapshot_data(self.temp_dir)
+        assert recorded_calls > 0
+        assert len(FixtureStore(self.fixtures_dir)) > 0
+        assert any(path.endswith('.mp3') for path in recorded)
+
+        shutil.rmtree('data')
+        replay.start_replay(self.fixtures_dir, latency_scale=0)
+        import yt_dlp
+        original = yt_dlp.YoutubeDL
+        yt_dlp.YoutubeDL = ForbiddenYoutubeDL
+        try:
+            multi_downloader.main()
+        finally:
+            yt_dlp.YoutubeDL = original
+
+        assert snapshot_data(self.temp_dir) == recorded
+
+    def test_replay_does_not_touch_network(self, monkeypatch):
+        """Тест: при воспроизведении (даже с включенной диагностикой сети) сокеты не открываются"""
+        with open('config.yaml', encoding='utf-8') as f:
+            data = yaml.safe_load(f)
+        data['diagnostics'] = {'enabled': True, 'cache_ttl': 0}
+        with open('config.yaml', 'w', encoding='utf-8') as f:
+            yaml.dump(data, f, allow_unicode=True)
+        set_config_file(os.path.abspath('config.yaml'))
+
+        replay.start_recording(self.fixtures_dir)
+        with fake_yt_dlp(entries=3, audio_bytes=2048):
+            multi_downloader.main()
+        shutil.rmtree('data')
+
+        attempts = []
+
+        def forbidden(name):
+            def call(*args, **kwargs):
+                attempts.append(name)
+                raise OSError(f"{name}: сеть при воспроизведении недоступна")
+            return call
+        monkeypatch.setattr(socket.socket, 'connect', forbidden('connect'))
+        monkeypatch.setattr(socket, 'create_connection', forbidden('create_connection'))
+        monkeypatch.setattr(socket, 'getaddrinfo', forbidden('getaddrinfo'))
+        monkeypatch.setattr(socket, 'gethostbyname', forbidden('gethostbyname'))
+        import yt_dlp
+        monkeypatch.setattr(yt_dlp, 'YoutubeDL', ForbiddenYoutubeDL)
+
+        replay.start_replay(self.fixtures_dir, latency_scale=0)
+        multi_downloader.main()
+
+        assert attempts == []
+        assert any(path.endswith('.mp3') for path in snapshot_data(self.temp_dir))
+
+    def test_recorded_error_is_replayed(self):
+        """Тест: записанная ошибка воспроизводится как DownloadError"""
+        import yt_dlp
+
+        store = FixtureStore(self.fixtures_dir)
+        url = "https://www.youtube.com/watch?v=gone"
+        store.save(request_key('extract_info', url, {}), {'latency': 0.5,
+                                                          'error': {'class': 'DownloadError', 'message': 'Video unavailable'}})
+
+        with ReplayYoutubeDL({}, store, latency_scale=0) as ydl:
+            with pytest.raises(yt_dlp.utils.DownloadError, match='Video unavailable'):
+                ydl.extract_info(url, download=False)
+            with pytest.raises(yt_dlp.utils.DownloadError, match='Нет записанного ответа'):
+                ydl.extract_info("https://www.youtube.com/watch?v=unknown", download=False)
+
+    def test_replay_requires_existing_directory(self):
+        """Тест: несуществующая папка фикстур - понятная ошибка"""
+        with pytest.raises(ValueError):
+            replay.start_replay(os.path.join(self.temp_dir, 'missing'))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for scheduler.py and config hot reload
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+import yaml
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Source, SourceType, Subscription, ConfigManager
+from scheduler import SourceScheduler
+
+
+class FakeClock:
+    """Управляемые часы для тестов"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_subscription(*sources, name="sub"):
+    return Subscription(name=name, title=name, description="", sources=list(sources))
+
+
+def make_source(name, interval=10, url=None):
+    return Source(name=name, url=url or f"https://www.youtube.com/@{name}",
+                  source_type=SourceType.CHANNEL, check_interval=interval)
+
+
+class TestSourceScheduler:
+    """Тесты расписания источников"""
+
+    def test_new_sources_are_due_immediately(self):
+        """Тест: новые источники запускаются сразу"""
+        scheduler = SourceScheduler(clock=FakeClock())
+        diff = scheduler.sync([make_subscription(make_source("a"), make_source("b"))])
+
+        assert diff.added == [("sub", "a"), ("sub", "b")]
+        assert [job.source.name for job in scheduler.due()] == ["a", "b"]
+
+    def test_mark_done_uses_check_interval(self):
+        """Тест: следующий опрос через check_interval минут"""
+        clock = FakeClock()
+        scheduler = SourceScheduler(clock=clock)
+        scheduler.sync([make_subscription(make_source("a", interval=5))])
+
+        scheduler.mark_done(("sub", "a"))
+        assert scheduler.due() == []
+        assert scheduler.seconds_until_next() == 300
+
+        clock.now += 300
+        assert len(scheduler.due()) == 1
+
+    def test_sync_reschedules_only_changed_sources(self):
+        """Тест: перепланируются только добавленные и измененные источники"""
+        clock = FakeClock()
+        scheduler = SourceScheduler(clock=clock)
+        scheduler.sync([make_subscription(make_source("a"), make_source("b"), make_source("c"))])
+        for job in scheduler.due():
+            scheduler.mark_done(job.key)
+        untouched = scheduler.get(("sub", "a"))
+
+        clock.now += 60
+        diff = scheduler.sync([make_subscription(
+            make_source("a"),
+            make_source("b", url="https://www.youtube.com/@other"),
+            make_source("d"),
+        )])
+
+        assert diff.added == [("sub", "d")]
+        assert diff.changed == [("sub", "b")]
+        assert diff.removed == [("sub", "c")]
+        assert scheduler.get(("sub", "a")) is untouched
+        assert sorted(job.source.name for job in scheduler.due()) == ["b", "d"]
+
+    def test_disabled_and_filtered_sources_are_skipped(self):
+        """Тест: отключенные и отфильтрованные источники не планируются"""
+        disabled = make_source("b")
+        disabled.enabled = False
+        scheduler = SourceScheduler(clock=FakeClock())
+        scheduler.sync([make_subscription(make_source("a"), disabled, make_source("c"))], source_filter="c")
+
+        assert [job.source.name for job in scheduler.jobs()] == ["c"]
+
+    def test_mark_done_for_removed_source(self):
+        """Тест: завершение обработки удаленного источника игнорируется"""
+        scheduler = SourceScheduler(clock=FakeClock())
+        scheduler.sync([make_subscription(make_source("a"))])
+        scheduler.sync([])
+
+        scheduler.mark_done(("sub", "a"))
+        assert len(scheduler) == 0
+
+
+class TestConfigReload:
+    """Тесты перезагрузки конфигурации"""
+
+    def setup_method(self):
+        """Создаем временный config.yaml"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.temp_dir, 'config.yaml')
+        self._write({'a': {'url': 'https://www.youtube.com/@a'}})
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, sources, mtime_shift=0):
+        data = {'global': {}, 'subscriptions': {'sub': {'title': 'Sub', 'sources': sources}}}
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            yaml.dump(data, f)
+        if mtime_shift:
+            stat = os.stat(self.config_file)
+            os.utime(self.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_shift))
+
+    def test_reload_only_when_file_changes(self):
+        """Тест: перезагрузка только при изменении файла"""
+        manager = ConfigManager(self.config_file)
+        assert manager.reload_if_changed() is False
+
+        self._write({'a': {'url': 'https://www.youtube.com/@a'}, 'b': {'url': 'https://www.youtube.com/@b'}},
+                    mtime_shift=10**9)
+        assert manager.has_changed_on_disk()
+        assert manager.reload_if_changed() is True
+        assert [s.name for s in manager.get_all_enabled_sources()] == ['a', 'b']
+
+    def test_broken_file_keeps_old_config(self):
+        """Тест: ошибка в новом файле не сбрасывает рабочую конфигурацию"""
+        manager = ConfigManager(self.config_file)
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            f.write("subscriptions: [unclosed")
+        stat = os.stat(self.config_file)
+        os.utime(self.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert manager.reload_if_changed() is False
+        assert [s.name for s in manager.get_all_enabled_sources()] == ['a']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
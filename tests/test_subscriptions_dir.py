@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for subscriptions.d support in config.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from unittest.mock import patch
+
+import pytest
+import yaml
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ConfigManager, Subscription
+
+
+class TestSubscriptionsDir:
+    """Тесты папки subscriptions.d"""
+
+    def setup_method(self):
+        """Создаем config.yaml и subscriptions.d с двумя подписками"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.temp_dir, 'config.yaml')
+        self.subscriptions_dir = os.path.join(self.temp_dir, 'subscriptions.d')
+        os.makedirs(self.subscriptions_dir)
+
+        self._dump(self.config_file, {
+            'global': {'check_interval': 15},
+            'subscriptions': {'main': {'sources': {'m': {'url': 'https://www.youtube.com/@m'}}}},
+        })
+        self._dump(self._path('news'), {'title': 'News', 'sources': {'n': {'url': 'https://www.youtube.com/@n'}}})
+        self._dump(self._path('tech'), {'title': 'Tech', 'sources': {'t': {'url': 'https://www.youtube.com/@t'}}})
+
+    def teardown_method(self):
+        """Очистка после каждого теста"""
+        shutil.rmtree(self.temp_dir)
+
+    def _path(self, name):
+        return os.path.join(self.subscriptions_dir, f"{name}.yaml")
+
+    def _dump(self, path, data, mtime_shift=0):
+        with open(path, 'w', encoding='utf-8') as f:
+            yaml.dump(data, f, allow_unicode=True)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_shift))
+
+    def _mtimes(self):
+        return {name: os.stat(os.path.join(self.subscriptions_dir, name)).st_mtime_ns
+                for name in os.listdir(self.subscriptions_dir) if name.endswith('.yaml')}
+
+    def test_subscriptions_are_merged(self):
+        """Тест: подписки из subscriptions.d добавляются к основному файлу"""
+        manager = ConfigManager(self.config_file)
+
+        assert [s.name for s in manager.config.subscriptions] == ['main', 'news', 'tech']
+        assert manager.get_subscription_by_name('news').title == 'News'
+        # Глобальные настройки применяются и к источникам из subscriptions.d
+        assert manager.get_source_by_name('t').check_interval == 15
+
+    def test_save_writes_only_changed_file(self):
+        """Тест: сохранение переписывает только измененный файл"""
+        manager = ConfigManager(self.config_file)
+        main_mtime = os.stat(self.config_file).st_mtime_ns
+        before = self._mtimes()
+
+        manager.disable_source('n')
+
+        after = self._mtimes()
+        assert after['tech.yaml'] == before['tech.yaml']
+        assert after['news.yaml'] != before['news.yaml']
+        assert os.stat(self.config_file).st_mtime_ns == main_mtime
+
+        with open(self._path('news'), encoding='utf-8') as f:
+            assert yaml.safe_load(f)['sources']['n']['enabled'] is False
+
+    def test_new_and_removed_subscriptions(self):
+        """Тест: новая подписка создает файл, удаление подписки удаляет файл"""
+        manager = ConfigManager(self.config_file)
+
+        manager.add_subscription(Subscription(name='music', title='Music', description=''))
+        assert os.path.exists(self._path('music'))
+
+        manager.remove_subscription('tech')
+        assert not os.path.exists(self._path('tech'))
+
+        reloaded = ConfigManager(self.config_file)
+        # Файлы subscriptions.d читаются в алфавитном порядке
+        assert [s.name for s in reloaded.config.subscriptions] == ['main', 'music', 'news']
+
+    def test_reload_parses_only_changed_files(self):
+        """Тест: при перезагрузке разбирается только изменившийся файл"""
+        manager = ConfigManager(self.config_file)
+        self._dump(self._path('news'), {'title': 'Breaking', 'sources': {}}, mtime_shift=10**9)
+
+        import config
+        with patch.object(config.yaml, 'load', wraps=config.yaml.load) as yaml_load:
+            assert manager.reload_if_changed() is True
+        assert yaml_load.call_count == 1
+        assert manager.get_subscription_by_name('news').title == 'Breaking'
+        assert manager.get_subscription_by_name('tech').title == 'Tech'
+
+    def test_reload_keeps_cache_of_unchanged_files(self):
+        """Тест: кеш subscriptions.d не перезаписывается, если файлы подписок не менялись"""
+        manager = ConfigManager(self.config_file)
+        cache_path = os.path.join(self.subscriptions_dir, '.cache')
+        assert os.path.exists(cache_path)
+        writes = []
+        original = manager._write_cache_entry
+        manager._write_cache_entry = lambda path, entry: (writes.append(path), original(path, entry))
+
+        self._dump(self.config_file, {'global': {'check_interval': 20}, 'subscriptions': {}}, mtime_shift=10**9)
+        assert manager.reload_if_changed() is True
+        assert cache_path not in writes
+
+        os.remove(self._path('tech'))
+        assert manager.reload_if_changed() is True
+        assert writes.count(cache_path) == 1
+        assert [s.name for s in ConfigManager(self.config_file).config.subscriptions] == ['news']
+
+    def test_duplicate_subscription_is_skipped(self):
+        """Тест: файл с именем существующей подписки пропускается"""
+        self._dump(self._path('main'), {'title': 'Duplicate', 'sources': {}})
+        manager = ConfigManager(self.config_file)
+
+        assert [s.name for s in manager.config.subscriptions].count('main') == 1
+        assert manager.get_subscription_by_name('main').title == 'Main'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
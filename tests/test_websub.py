@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Tests for websub.py
+"""
+
+import hashlib
+import hmac
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode
+from urllib.request import Request, urlopen
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import websub
+from websub import WebSubSubscriber, parse_notification, topic_for_channel, setup_websub, stop_websub
+from config import Source, SourceType, Subscription
+from scheduler import SourceScheduler
+import multi_downloader
+
+
+CHANNEL_ID = "UC" + "a" * 22
+OTHER_CHANNEL_ID = "UC" + "b" * 22
+
+NOTIFICATION = f"""<?xml version='1.0' encoding='UTF-8'?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+  <link rel="hub" href="https://pubsubhubbub.appspot.com"/>
+  <link rel="self" href="https://www.youtube.com/xml/feeds/videos.xml?channel_id={CHANNEL_ID}"/>
+  <title>YouTube video feed</title>
+  <entry>
+    <id>yt:video:VIDEO000001</id>
+    <yt:videoId>VIDEO000001</yt:videoId>
+    <yt:channelId>{CHANNEL_ID}</yt:channelId>
+    <title>Новый выпуск</title>
+    <link rel="alternate" href="https://www.youtube.com/watch?v=VIDEO000001"/>
+    <published>2026-10-19T08:00:00+00:00</published>
+    <updated>2026-10-19T08:00:05+00:00</updated>
+  </entry>
+</feed>""".encode('utf-8')
+
+DELETED = f"""<?xml version='1.0' encoding='UTF-8'?>
+<feed xmlns:at="http://purl.org/atompub/tombstones/1.0" xmlns="http://www.w3.org/2005/Atom">
+  <at:deleted-entry ref="yt:video:VIDEO000002" when="2026-10-19T09:00:00+00:00">
+    <link href="https://www.youtube.com/watch?v=VIDEO000002"/>
+    <at:by>
+      <name>Channel</name>
+      <uri>https://www.youtube.com/channel/{CHANNEL_ID}</uri>
+    </at:by>
+  </at:deleted-entry>
+</feed>""".encode('utf-8')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class FakeHub:
+    """
+    Локальный хаб WebSub
+
+    Принимает запросы на подписку и отписку, проверяет их запросом с
+    hub.challenge к обработчику подписчика и рассылает уведомления.
+    """
+
+    def __init__(self, lease_seconds: int = 3600):
+        self.lease_seconds = lease_seconds
+        self.requests = []
+        self.verified = []
+        self.secrets = {}
+        self._verifications = []
+        hub = self
+
+        class HubRequestHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode('ascii')
+                params = {name: values[0] for name, values in parse_qs(body).items()}
+                hub.requests.append(params)
+                # Проверка асинхронная, но регистрируется до ответа, чтобы тест мог ее дождаться
+                thread = threading.Thread(target=hub._verify, args=(params,))
+                hub._verifications.append(thread)
+                thread.start()
+                self.send_response(202)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), HubRequestHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/subscribe"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _verify(self, params):
+        challenge = f"challenge-{len(self.requests)}"
+        query = urlencode({'hub.mode': params['hub.mode'], 'hub.topic': params['hub.topic'],
+                           'hub.challenge': challenge, 'hub.lease_seconds': self.lease_seconds})
+        try:
+            with urlopen(f"{params['hub.callback']}?{query}", timeout=5) as response:
+                ok = response.read().decode('utf-8') == challenge
+        except OSError:
+            ok = False
+        if ok:
+            self.verified.append((params['hub.mode'], params['hub.topic']))
+            if params.get('hub.secret'):
+                self.secrets[params['hub.topic']] = params['hub.secret']
+
+    def wait_verifications(self):
+        for thread in self._verifications:
+            thread.join(5)
+
+    def publish(self, callback: str, topic: str, body: bytes, secret: str = None) -> int:
+        headers = {'Content-Type': 'application/atom+xml'}
+        secret = secret if secret is not None else self.secrets.get(topic)
+        if secret:
+            headers['X-Hub-Signature'] = 'sha1=' + hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+        with urlopen(Request(callback, data=body, headers=headers, method='POST'), timeout=5) as response:
+            return response.status
+
+
+class FakeClock:
+    """Управляемые часы для тестов"""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(with_channel: bool = True) -> SourceScheduler:
+    sources = [Source(name='playlist', url='https://www.youtube.com/playlist?list=PL1', source_type=SourceType.PLAYLIST)]
+    if with_channel:
+        sources.append(Source(name='news', url=f'https://www.youtube.com/channel/{CHANNEL_ID}',
+                              source_type=SourceType.CHANNEL))
+        sources.append(Source(name='tech', url='https://www.youtube.com/@tech', source_type=SourceType.CHANNEL))
+    scheduler = SourceScheduler()
+    scheduler.sync([Subscription(name='sub', title='sub', description='', sources=sources)])
+    for job in scheduler.jobs():
+        scheduler.mark_done(job.key)
+    return scheduler
+
+
+class TestParseNotification:
+    """Тесты разбора уведомлений Atom"""
+
+    def test_new_video(self):
+        """Тест: запись уведомления о новом видео"""
+        entries = parse_notification(NOTIFICATION)
+        assert entries == [{'video_id': 'VIDEO000001', 'channel_id': CHANNEL_ID, 'title': 'Новый выпуск',
+                            'published': '2026-10-19T08:00:00+00:00', 'updated': '2026-10-19T08:00:05+00:00',
+                            'deleted': False}]
+
+    def test_deleted_video(self):
+        """Тест: удаленное видео отмечается deleted"""
+        entries = parse_notification(DELETED)
+        assert [(e['video_id'], e['channel_id'], e['deleted']) for e in entries] == [('VIDEO000002', CHANNEL_ID, True)]
+
+
+class TestWebSubSubscriber:
+    """Тесты подписки через локальный хаб"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.temp_dir, 'websub.json')
+        self.port = free_port()
+        self.callback = f"http://127.0.0.1:{self.port}/websub"
+        self.hub = FakeHub().__enter__()
+
+    def teardown_method(self):
+        stop_websub()
+        self.hub.__exit__(None, None, None)
+        shutil.rmtree(self.temp_dir)
+
+    def start_subscriber(self, **settings) -> WebSubSubscriber:
+        return setup_websub(dict({'enabled': True, 'callback_url': self.callback, 'hub': self.hub.url,
+                                  'port': self.port, 'file': self.state_file, 'fallback_interval': 360},
+                                 **settings))
+
+    def test_subscribe_and_push_enqueues_source(self):
+        """Тест: подписка подтверждается, уведомление ставит источник в очередь, опрос становится редким"""
+        subscriber = self.start_subscriber()
+        scheduler = make_scheduler()
+        subscriber.note_channel('https://www.youtube.com/@tech', OTHER_CHANNEL_ID)
+        websub.sync(scheduler)
+
+        assert subscriber.renew() == 2
+        self.hub.wait_verifications()
+        assert sorted(self.hub.verified) == [('subscribe', topic_for_channel(CHANNEL_ID)),
+                                             ('subscribe', topic_for_channel(OTHER_CHANNEL_ID))]
+        assert subscriber.is_active(CHANNEL_ID)
+        # Повторно до истечения срока не подписываемся
+        assert subscriber.renew() == 0
+
+        websub.sync(scheduler)
+        assert scheduler.get(('sub', 'news')).interval == 360 * 60
+        assert scheduler.get(('sub', 'playlist')).interval == 10 * 60
+
+        assert self.hub.publish(self.callback, topic_for_channel(CHANNEL_ID), NOTIFICATION) == 204
+        assert websub.has_notifications()
+        multi_downloader.apply_poll_requests(scheduler)
+        assert [job.source.name for job in scheduler.due()] == ['news']
+
+        # Состояние подписок переживает перезапуск
+        restored = WebSubSubscriber(self.callback, state_file=self.state_file)
+        assert restored.is_active(CHANNEL_ID)
+        assert restored.channel_for('https://www.youtube.com/@tech') == OTHER_CHANNEL_ID
+
+    def test_renewal_and_unsubscribe(self):
+        """Тест: подписка продлевается до истечения, при удалении источника - отписка"""
+        clock = FakeClock()
+        subscriber = WebSubSubscriber(self.callback, hub=self.hub.url, lease_seconds=3600, renew_before=600,
+                                      state_file=self.state_file, clock=clock)
+        subscriber._server = websub.start_http_server(subscriber, self.port)
+        try:
+            subscriber.sync(make_scheduler())
+            assert subscriber.renew() == 1
+            self.hub.wait_verifications()
+
+            clock.now += 3600 - 600 - 1
+            assert subscriber.renew() == 0
+            clock.now += 2
+            assert subscriber.renew() == 1
+            self.hub.wait_verifications()
+            assert self.hub.requests[-1]['hub.mode'] == 'subscribe'
+
+            subscriber.sync(make_scheduler(with_channel=False))
+            assert subscriber.renew() == 1
+            self.hub.wait_verifications()
+            assert self.hub.verified[-1] == ('unsubscribe', topic_for_channel(CHANNEL_ID))
+            assert not subscriber.is_active(CHANNEL_ID)
+        finally:
+            subscriber.close()
+
+    def test_unsigned_notification_is_ignored(self):
+        """Тест: с секретом уведомление с неверной подписью пропускается"""
+        subscriber = self.start_subscriber(secret='s3cret')
+        websub.sync(make_scheduler())
+        subscriber.renew()
+        self.hub.wait_verifications()
+        assert self.hub.secrets[topic_for_channel(CHANNEL_ID)] == 's3cret'
+
+        assert self.hub.publish(self.callback, topic_for_channel(CHANNEL_ID), NOTIFICATION, secret='wrong') == 204
+        assert not websub.has_notifications()
+        self.hub.publish(self.callback, topic_for_channel(CHANNEL_ID), NOTIFICATION)
+        assert websub.take_notifications() == [('sub', 'news')]
+
+    def test_unknown_topic_is_not_confirmed(self):
+        """Тест: проверка подписки на чужой канал отклоняется"""
+        self.start_subscriber()
+        websub.sync(make_scheduler())
+        query = urlencode({'hub.mode': 'subscribe', 'hub.topic': topic_for_channel(OTHER_CHANNEL_ID),
+                           'hub.challenge': 'x'})
+        with pytest.raises(OSError):
+            urlopen(f"{self.callback}?{query}", timeout=5)
+
+    def test_unsolicited_verification_is_rejected(self):
+        """Тест: подтверждение подписки без нашего запроса не делает канал подписанным"""
+        subscriber = self.start_subscriber()
+        websub.sync(make_scheduler())
+        query = urlencode({'hub.mode': 'subscribe', 'hub.topic': topic_for_channel(CHANNEL_ID),
+                           'hub.challenge': 'x', 'hub.lease_seconds': 3600})
+        with pytest.raises(OSError):
+            urlopen(f"{self.callback}?{query}", timeout=5)
+        assert not subscriber.is_active(CHANNEL_ID)
+
+        # Запрошенная подписка подтверждается один раз, повтор проверки отклоняется
+        subscriber.renew()
+        self.hub.wait_verifications()
+        assert subscriber.is_active(CHANNEL_ID)
+        assert subscriber.verify({'hub.mode': 'subscribe', 'hub.topic': topic_for_channel(CHANNEL_ID),
+                                  'hub.challenge': 'x', 'hub.lease_seconds': '999999999'}) is None
+        # Отписку, которую мы не запрашивали, тоже не подтверждаем
+        assert subscriber.verify({'hub.mode': 'unsubscribe', 'hub.topic': topic_for_channel(CHANNEL_ID),
+                                  'hub.challenge': 'x'}) is None
+        assert subscriber.is_active(CHANNEL_ID)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for ytdlp_cache.py
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pytest
+
+# Добавляем корневую директорию в путь для импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp
+from ytdlp_cache import setup_ytdlp_cache, warm_cache, start_warmup, cache_stats
+from metrics import metrics
+from manage_sources import print_cache
+from multi_downloader import create_ydl
+
+
+class FakeYoutubeDL:
+    """YoutubeDL, который при извлечении пишет player JS в cachedir"""
+
+    instances = []
+
+    def __init__(self, params):
+        self.params = params
+        self.extracted = []
+        FakeYoutubeDL.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True):
+        if url.endswith('broken'):
+            raise yt_dlp.utils.DownloadError('network is unreachable')
+        self.extracted.append(url)
+        section = os.path.join(self.params['cachedir'], 'youtube-sigfuncs')
+        os.makedirs(section, exist_ok=True)
+        with open(os.path.join(section, 'js_player.json'), 'w') as f:
+            json.dump({'spec': list(range(64))}, f)
+        return {'id': 'video'}
+
+
+class FakeClock:
+    """Управляемые часы для тестов"""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+class TestYtdlpCache:
+    """Тесты постоянного кеша yt-dlp"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, 'data', '.yt-dlp-cache')
+        FakeYoutubeDL.instances = []
+
+    def teardown_method(self):
+        setup_ytdlp_cache({'enabled': False})
+        shutil.rmtree(self.temp_dir)
+
+    def test_cachedir_is_passed_to_youtube_dl(self, monkeypatch):
+        """Тест: create_ydl передает папку кеша, отключенный кеш не меняет параметры"""
+        monkeypatch.setattr(yt_dlp, 'YoutubeDL', FakeYoutubeDL)
+        assert setup_ytdlp_cache({'dir': self.cache_dir}) == self.cache_dir
+        assert os.path.isdir(self.cache_dir)
+        assert create_ydl({'quiet': True}).params['cachedir'] == self.cache_dir
+
+        setup_ytdlp_cache({'enabled': False})
+        assert 'cachedir' not in create_ydl({'quiet': True}).params
+        assert not warm_cache(create_ydl)
+
+    def test_warmup_only_when_cache_is_empty_or_stale(self, monkeypatch):
+        """Тест: прогрев заполняет пустой кеш и повторяется, только когда кеш устарел"""
+        monkeypatch.setattr(yt_dlp, 'YoutubeDL', FakeYoutubeDL)
+        clock = FakeClock()
+        setup_ytdlp_cache({'dir': self.cache_dir, 'warmup_url': 'https://example.com/watch', 'warmup_max_age': 3600})
+
+        assert warm_cache(create_ydl, clock)
+        assert FakeYoutubeDL.instances[-1].extracted == ['https://example.com/watch']
+        stats = cache_stats(self.cache_dir)
+        assert stats['files'] == 1 and stats['sections'] == {'youtube-sigfuncs': 1}
+        assert metrics.ytdlp_cache_bytes.get() == stats['size']
+        assert metrics.ytdlp_cache_updated.get() == stats['newest']
+
+        assert not warm_cache(create_ydl, clock)
+        clock.now += 3601
+        assert warm_cache(create_ydl, clock)
+        assert len(FakeYoutubeDL.instances) == 2
+
+    def test_failed_warmup_does_not_stop_startup(self, monkeypatch):
+        """Тест: ошибка прогрева только записывается в лог"""
+        monkeypatch.setattr(yt_dlp, 'YoutubeDL', FakeYoutubeDL)
+        setup_ytdlp_cache({'dir': self.cache_dir, 'warmup_url': 'https://example.com/broken'})
+        assert not warm_cache(create_ydl)
+        assert cache_stats(self.cache_dir)['files'] == 0
+
+    def test_warmup_runs_in_background(self, monkeypatch):
+        """Тест: прогрев при запуске идет в фоновом потоке"""
+        monkeypatch.setattr(yt_dlp, 'YoutubeDL', FakeYoutubeDL)
+        assert start_warmup(create_ydl) is None
+
+        setup_ytdlp_cache({'dir': self.cache_dir})
+        thread = start_warmup(create_ydl)
+        assert thread.daemon
+        thread.join(5)
+        assert cache_stats(self.cache_dir)['files'] == 1
+
+    def test_print_cache(self, monkeypatch, capsys):
+        """Тест: manage_sources.py cache выводит размер и разделы кеша"""
+        print_cache(cache_stats(self.cache_dir))
+        assert 'пуст' in capsys.readouterr().out
+
+        monkeypatch.setattr(yt_dlp, 'YoutubeDL', FakeYoutubeDL)
+        setup_ytdlp_cache({'dir': self.cache_dir})
+        warm_cache(create_ydl)
+        print_cache(cache_stats(self.cache_dir))
+        output = capsys.readouterr().out
+        assert 'Файлов: 1' in output
+        assert 'youtube-sigfuncs: 1' in output
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Подписчик WebSub (PubSubHubbub) на уведомления YouTube о новых видео
+
+YouTube публикует ленту загрузок каждого канала через хаб WebSub. Подписчик
+подписывается на ленты каналов из расписания, подтверждает подписку на
+проверочный запрос хаба (hub.challenge), продлевает подписки до истечения
+срока и по уведомлению (Atom) сразу ставит затронутые источники в очередь
+на опрос. Каналы с действующей подпиской опрашиваются редко
+(fallback_interval), плейлисты и каналы без подписки - как обычно.
+
+ID канала берется из URL (/channel/UC...) или запоминается при первом
+опросе источника (yt-dlp возвращает channel_id). Состояние подписок
+хранится в data/websub.json, чтобы перезапуск не требовал переподписки.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from logging_setup import get_logger
+from scheduler import SourceScheduler, SourceKey
+
+
+logger = get_logger('websub')
+
+DEFAULT_HUB = "https://pubsubhubbub.appspot.com/subscribe"
+DEFAULT_ADDRESS = "127.0.0.1"
+DEFAULT_PORT = 9103
+DEFAULT_STATE_FILE = "data/websub.json"
+DEFAULT_LEASE_SECONDS = 432000  # 5 дней
+DEFAULT_RENEW_BEFORE = 86400  # Продлевать за сутки до истечения, секунды
+DEFAULT_FALLBACK_INTERVAL = 360  # Опрос каналов с подпиской, минуты
+RENEW_CHECK_INTERVAL = 60  # Как часто проверять сроки подписок, секунды
+RETRY_DELAY = 600  # Повторная подписка, если хаб не подтвердил запрос, секунды
+
+TOPIC_URL = "https://www.youtube.com/xml/feeds/videos.xml?channel_id={}"
+
+ATOM_NS = {
+    'atom': 'http://www.w3.org/2005/Atom',
+    'yt': 'http://www.youtube.com/xml/schemas/2015',
+    'at': 'http://purl.org/atompub/tombstones/1.0',
+}
+
+_CHANNEL_URL_RE = re.compile(r'youtube\.com/channel/(UC[\w-]{22})')
+_TOPIC_CHANNEL_RE = re.compile(r'[?&]channel_id=(UC[\w-]{22})')
+
+
+def channel_id_from_url(url: str) -> Optional[str]:
+    """ID канала из URL вида https://www.youtube.com/channel/UC... (None для @имен и плейлистов)"""
+    match = _CHANNEL_URL_RE.search(url or '')
+    return match.group(1) if match else None
+
+
+def topic_for_channel(channel_id: str) -> str:
+    return TOPIC_URL.format(channel_id)
+
+
+def parse_notification(body: bytes) -> List[Dict[str, Any]]:
+    """
+    Разбирает уведомление хаба (Atom)
+
+    Returns:
+        Записи с video_id, channel_id, title, published, updated и
+        deleted=True для удаленных видео (at:deleted-entry)
+    """
+    import xml.etree.ElementTree as ET
+
+    root = ET.fromstring(body)
+    entries = []
+    for entry in root.findall('atom:entry', ATOM_NS):
+        entries.append({
+            'video_id': entry.findtext('yt:videoId', '', ATOM_NS),
+            'channel_id': entry.findtext('yt:channelId', '', ATOM_NS),
+            'title': entry.findtext('atom:title', '', ATOM_NS),
+            'published': entry.findtext('atom:published', '', ATOM_NS),
+            'updated': entry.findtext('atom:updated', '', ATOM_NS),
+            'deleted': False,
+        })
+    for deleted in root.findall('at:deleted-entry', ATOM_NS):
+        ref = deleted.get('ref', '')
+        channel = deleted.find('at:by/atom:uri', ATOM_NS)
+        entries.append({
+            'video_id': ref.rsplit(':', 1)[-1],
+            'channel_id': (channel.text or '').rsplit('/', 1)[-1] if channel is not None else '',
+            'title': '',
+            'published': '',
+            'updated': deleted.get('when', ''),
+            'deleted': True,
+        })
+    return entries
+
+
+class WebSubSubscriber:
+    """
+    Подписки на ленты каналов и прием уведомлений
+
+    Расписание (sync) и очередь уведомлений (take_notifications) обслуживает
+    поток цикла; HTTP сервер и поток продления работают с состоянием
+    подписок под блокировкой.
+
+    Args:
+        callback_url: Публичный URL обработчика, доступный хабу
+        hub: URL хаба
+        secret: Секрет для подписи уведомлений (X-Hub-Signature), пусто - без проверки
+        lease_seconds: Запрашиваемый срок подписки, секунды
+        renew_before: За сколько секунд до истечения продлевать подписку
+        fallback_interval: Интервал опроса каналов с подпиской, минуты
+        state_file: Файл состояния подписок
+    """
+
+    def __init__(self, callback_url: str, hub: str = DEFAULT_HUB, secret: str = '',
+                 lease_seconds: int = DEFAULT_LEASE_SECONDS, renew_before: int = DEFAULT_RENEW_BEFORE,
+                 fallback_interval: float = DEFAULT_FALLBACK_INTERVAL, state_file: str = DEFAULT_STATE_FILE,
+                 clock=time.time):
+        self.callback_url = callback_url
+        self.hub = hub
+        self.secret = secret or ''
+        self.lease_seconds = lease_seconds
+        self.renew_before = renew_before
+        self.fallback_interval = fallback_interval
+        self.state_file = state_file
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sources: Dict[str, List[SourceKey]] = {}  # channel_id -> источники расписания
+        self._synced = False
+        self._notifications: List[SourceKey] = []
+        self._stop = threading.Event()
+        self._renew_thread: Optional[threading.Thread] = None
+        self._server = None
+        state = self._load_state()
+        self._channels: Dict[str, str] = state.get('channels', {})  # URL источника -> channel_id
+        self._subscriptions: Dict[str, Dict[str, Any]] = state.get('subscriptions', {})  # channel_id -> состояние
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self) -> None:
+        from feeds import write_atomic
+
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {'channels': self._channels, 'subscriptions': self._subscriptions}
+        write_atomic(self.state_file, json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    def note_channel(self, url: str, channel_id: Optional[str]) -> None:
+        """Запоминает ID канала источника (из ответа yt-dlp)"""
+        if not channel_id or self._channels.get(url) == channel_id:
+            return
+        with self._lock:
+            self._channels[url] = channel_id
+            self._save_state()
+
+    def channel_for(self, url: str) -> Optional[str]:
+        return channel_id_from_url(url) or self._channels.get(url)
+
+    def is_active(self, channel_id: str) -> bool:
+        """Подписка подтверждена хабом и не истекла"""
+        state = self._subscriptions.get(channel_id) or {}
+        return bool(state.get('expires_at')) and state['expires_at'] > self._clock()
+
+    # Поток цикла
+
+    def sync(self, scheduler: SourceScheduler) -> None:
+        """
+        Обновляет список каналов по расписанию и интервалы опроса
+
+        Каналы с действующей подпиской опрашиваются не чаще fallback_interval.
+        """
+        from config import SourceType
+
+        sources: Dict[str, List[SourceKey]] = {}
+        for job in scheduler.jobs():
+            channel_id = self.channel_for(job.source.url) if job.source.source_type == SourceType.CHANNEL else None
+            if channel_id:
+                sources.setdefault(channel_id, []).append(job.key)
+            if channel_id and self.is_active(channel_id):
+                job.interval_override = max(self.fallback_interval * 60, max(job.source.check_interval or 0, 0) * 60)
+            else:
+                job.interval_override = None
+        self._sources = sources
+        self._synced = True
+
+    def has_notifications(self) -> bool:
+        return bool(self._notifications)
+
+    def take_notifications(self) -> List[SourceKey]:
+        with self._lock:
+            notifications, self._notifications = self._notifications, []
+        return notifications
+
+    # Подписки
+
+    def _request_hub(self, mode: str, channel_id: str) -> bool:
+        """Отправляет хабу запрос на подписку или отписку (проверка придет отдельным запросом)"""
+        from urllib.error import URLError
+        from urllib.parse import urlencode
+        from urllib.request import Request, urlopen
+
+        params = {
+            'hub.callback': self.callback_url,
+            'hub.mode': mode,
+            'hub.topic': topic_for_channel(channel_id),
+            'hub.verify': 'async',
+        }
+        if mode == 'subscribe':
+            params['hub.lease_seconds'] = str(self.lease_seconds)
+            if self.secret:
+                params['hub.secret'] = self.secret
+        request = Request(self.hub, data=urlencode(params).encode('ascii'), method='POST',
+                          headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        try:
+            with urlopen(request, timeout=30) as response:
+                return 200 <= response.status < 300
+        except (URLError, OSError) as e:
+            logger.warning(f"⚠️  WebSub: хаб не принял запрос {mode} для канала {channel_id}: {e}")
+            return False
+
+    def renew(self) -> int:
+        """
+        Подписывается на новые каналы, продлевает истекающие подписки и отписывается от удаленных
+
+        Returns:
+            Число отправленных запросов
+        """
+        if not self._synced:
+            # До первой синхронизации расписания все подписки выглядели бы лишними
+            return 0
+        now = self._clock()
+        wanted = set(self._sources)
+        sent = 0
+        for channel_id in sorted(wanted | set(self._subscriptions)):
+            state = self._subscriptions.get(channel_id) or {}
+            if channel_id not in wanted and not self.is_active(channel_id):
+                with self._lock:
+                    self._subscriptions.pop(channel_id, None)
+                    self._save_state()
+                continue
+            if state.get('requested_at') and now - state['requested_at'] < RETRY_DELAY:
+                continue  # Ждем проверочного запроса хаба
+            if channel_id in wanted:
+                # Хаб может выдать срок короче запрошенного - продлеваем не позже середины срока
+                margin = min(self.renew_before, (state.get('lease_seconds') or self.lease_seconds) / 2)
+                if (state.get('expires_at') or 0) - now > margin:
+                    continue
+                mode = 'subscribe'
+            else:
+                mode = 'unsubscribe'
+            # Отмечаем запрос до отправки: проверка хаба может прийти раньше ответа и заменит состояние,
+            # а при ошибке хаба повторная попытка будет не раньше чем через RETRY_DELAY
+            with self._lock:
+                self._subscriptions.setdefault(channel_id, {}).update(requested_at=now, requested_mode=mode)
+                self._save_state()
+            if self._request_hub(mode, channel_id):
+                sent += 1
+        return sent
+
+    def start(self) -> None:
+        """Запускает поток продления подписок"""
+        if self._renew_thread is not None:
+            return
+        self._stop.clear()
+        self._renew_thread = threading.Thread(target=self._renew_loop, name='websub-renew', daemon=True)
+        self._renew_thread.start()
+
+    def _renew_loop(self) -> None:
+        delay = 5  # Первая проверка - вскоре после первой синхронизации расписания
+        while not self._stop.wait(delay):
+            delay = RENEW_CHECK_INTERVAL
+            try:
+                self.renew()
+            except Exception as e:
+                logger.warning(f"⚠️  WebSub: ошибка продления подписок: {e}")
+
+    def close(self) -> None:
+        """Останавливает поток продления и HTTP сервер"""
+        self._stop.set()
+        if self._renew_thread is not None:
+            self._renew_thread.join()
+            self._renew_thread = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # Запросы хаба (потоки HTTP сервера)
+
+    def verify(self, params: Dict[str, str]) -> Optional[str]:
+        """
+        Проверяет запрос подтверждения хаба
+
+        Подтверждаются только подписки и отписки, которые мы запросили и
+        которые еще не подтверждены (WebSub, 5.3): иначе любой, кто достучится
+        до обработчика, мог бы отметить канал подписанным и перевести его на
+        редкий опрос.
+
+        Returns:
+            hub.challenge, который нужно вернуть хабу, или None, если запрос не наш
+        """
+        mode = params.get('hub.mode')
+        match = _TOPIC_CHANNEL_RE.search(params.get('hub.topic', ''))
+        channel_id = match.group(1) if match else None
+        if not channel_id:
+            return None
+        wanted = channel_id in self._sources
+        pending = self._subscriptions.get(channel_id) or {}
+        requested = bool(pending.get('requested_at')) and pending.get('requested_mode', mode) == mode
+
+        if mode in ('subscribe', 'unsubscribe') and not requested:
+            logger.warning(f"⚠️  WebSub: проверка {mode} для канала {channel_id} без нашего запроса отклонена")
+            return None
+        if mode == 'denied':
+            logger.warning(f"⚠️  WebSub: хаб отказал в подписке на канал {channel_id}: {params.get('hub.reason', '')}")
+            with self._lock:
+                self._subscriptions.pop(channel_id, None)
+                self._save_state()
+            return ''
+        if mode == 'subscribe' and wanted:
+            lease = int(params.get('hub.lease_seconds') or self.lease_seconds)
+            with self._lock:
+                self._subscriptions[channel_id] = {'expires_at': self._clock() + lease, 'verified_at': self._clock(),
+                                                   'lease_seconds': lease}
+                self._save_state()
+            logger.info(f"📡 WebSub: подписка на канал {channel_id} подтверждена на {lease // 3600} ч")
+            return params.get('hub.challenge', '')
+        if mode == 'unsubscribe' and not wanted:
+            with self._lock:
+                self._subscriptions.pop(channel_id, None)
+                self._save_state()
+            logger.info(f"📡 WebSub: отписка от канала {channel_id} подтверждена")
+            return params.get('hub.challenge', '')
+        return None
+
+    def receive(self, body: bytes, signature: Optional[str]) -> int:
+        """
+        Обрабатывает уведомление хаба
+
+        Returns:
+            Число источников, поставленных в очередь на опрос
+        """
+        if self.secret:
+            expected = 'sha1=' + hmac.new(self.secret.encode('utf-8'), body, hashlib.sha1).hexdigest()
+            if not signature or not hmac.compare_digest(signature, expected):
+                logger.warning("⚠️  WebSub: уведомление с неверной подписью пропущено")
+                return 0
+        try:
+            entries = parse_notification(body)
+        except Exception as e:
+            logger.warning(f"⚠️  WebSub: не удалось разобрать уведомление: {e}")
+            return 0
+
+        queued = []
+        for entry in entries:
+            if entry['deleted']:
+                logger.debug(f"WebSub: видео {entry['video_id']} удалено")
+                continue
+            for key in self._sources.get(entry['channel_id'], []):
+                if key not in queued:
+                    queued.append(key)
+                logger.info(f"📬 WebSub: новое видео '{entry['title']}' в {key[0]}/{key[1]}")
+        if queued:
+            with self._lock:
+                self._notifications.extend(key for key in queued if key not in self._notifications)
+        return len(queued)
+
+
+def start_http_server(subscriber: WebSubSubscriber, port: int, address: str = DEFAULT_ADDRESS):
+    """Запускает HTTP обработчик запросов хаба в фоновом потоке (любой путь)"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlsplit, parse_qs
+
+    class WebSubRequestHandler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, body: str = '') -> None:
+            data = body.encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            params = {name: values[0] for name, values in parse_qs(urlsplit(self.path).query).items()}
+            challenge = subscriber.verify(params)
+            if challenge is None:
+                self._reply(404)
+            else:
+                self._reply(200, challenge)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            subscriber.receive(body, self.headers.get('X-Hub-Signature'))
+            # Хаб ждет 2xx даже для уведомлений, которые мы пропустили
+            self._reply(204)
+
+        def log_message(self, format, *args):
+            logger.debug(f"websub: {format % args}")
+
+    server = ThreadingHTTPServer((address, port), WebSubRequestHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="websub-http", daemon=True)
+    thread.start()
+    return server
+
+
+# Подписчик текущего процесса (None - WebSub отключен)
+_subscriber: Optional[WebSubSubscriber] = None
+
+
+def setup_websub(settings: Dict[str, Any] = None) -> Optional[WebSubSubscriber]:
+    """
+    Включает прием уведомлений WebSub по секции websub конфигурации
+
+    Args:
+        settings: enabled, callback_url, hub, address, port, secret, lease_seconds,
+                  renew_before, fallback_interval, file
+
+    Returns:
+        Подписчик или None, если WebSub отключен
+    """
+    global _subscriber
+    settings = settings or {}
+    stop_websub()
+    if not settings.get('enabled'):
+        return None
+    if not settings.get('callback_url'):
+        logger.error("❌ WebSub: не задан websub.callback_url - публичный URL, доступный хабу")
+        return None
+
+    if not settings.get('secret'):
+        logger.warning("⚠️  WebSub: websub.secret не задан - уведомления принимаются без проверки подписи, "
+                       "любой, кто достучится до обработчика, может запускать опрос каналов")
+
+    _subscriber = WebSubSubscriber(
+        settings['callback_url'],
+        hub=settings.get('hub') or DEFAULT_HUB,
+        secret=settings.get('secret') or '',
+        lease_seconds=int(settings.get('lease_seconds') or DEFAULT_LEASE_SECONDS),
+        renew_before=int(settings.get('renew_before') or DEFAULT_RENEW_BEFORE),
+        fallback_interval=float(settings.get('fallback_interval') or DEFAULT_FALLBACK_INTERVAL),
+        state_file=settings.get('file') or DEFAULT_STATE_FILE,
+    )
+    address = settings.get('address') or DEFAULT_ADDRESS
+    port = int(settings.get('port', DEFAULT_PORT) or 0)
+    try:
+        _subscriber._server = start_http_server(_subscriber, port, address)
+        logger.info(f"📡 WebSub: уведомления принимаются на {address}:{_subscriber._server.server_address[1]} "
+                    f"({_subscriber.callback_url})")
+    except OSError as e:
+        logger.error(f"❌ WebSub: не удалось запустить обработчик на {address}:{port}: {e}")
+        _subscriber = None
+        return None
+    _subscriber.start()
+    return _subscriber
+
+
+def stop_websub() -> None:
+    global _subscriber
+    if _subscriber is not None:
+        _subscriber.close()
+        _subscriber = None
+
+
+def note_channel(url: str, channel_id: Optional[str]) -> None:
+    """Запоминает ID канала источника, если WebSub включен"""
+    if _subscriber is not None:
+        _subscriber.note_channel(url, channel_id)
+
+
+def sync(scheduler: SourceScheduler) -> None:
+    if _subscriber is not None:
+        _subscriber.sync(scheduler)
+
+
+def has_notifications() -> bool:
+    return _subscriber is not None and _subscriber.has_notifications()
+
+
+def take_notifications() -> List[SourceKey]:
+    return _subscriber.take_notifications() if _subscriber is not None else []
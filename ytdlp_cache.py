@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Постоянный кеш yt-dlp в папке data/ (секция ytdlp_cache)
+
+yt-dlp кеширует player JS YouTube и функции расшифровки подписей (sig/nsig)
+в cachedir, по умолчанию ~/.cache/yt-dlp - в контейнере он теряется при
+каждом перезапуске, и первые извлечения после деплоя медленные и делают
+лишние запросы. Кеш переносится в data/.yt-dlp-cache на постоянном томе,
+а при запуске, если он пуст или устарел, прогревается в фоновом потоке
+одним извлечением warmup_url без загрузки.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from logging_setup import get_logger
+from metrics import metrics
+
+
+logger = get_logger('ytdlp_cache')
+
+DEFAULT_CACHE_DIR = "data/.yt-dlp-cache"
+# Короткое общедоступное видео: извлечение форматов загружает player JS
+DEFAULT_WARMUP_URL = "https://www.youtube.com/watch?v=jNQXAC9IVRw"
+DEFAULT_WARMUP_MAX_AGE = 86400  # секунды
+
+# Папка кеша текущего процесса (None - кеш yt-dlp по умолчанию)
+_cache_dir: Optional[str] = None
+_settings: Dict[str, Any] = {}
+
+
+def cache_stats(path: str) -> Dict[str, Any]:
+    """
+    Размер и возраст кеша yt-dlp
+
+    Returns:
+        path, files, size (байт), oldest и newest (mtime файлов, None для
+        пустого кеша), sections (число файлов по разделам кеша)
+    """
+    stats = {'path': path, 'files': 0, 'size': 0, 'oldest': None, 'newest': None, 'sections': {}}
+    if not os.path.isdir(path):
+        return stats
+    for root, _, files in os.walk(path):
+        section = os.path.relpath(root, path).split(os.sep)[0]
+        for name in files:
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            stats['files'] += 1
+            stats['size'] += stat.st_size
+            stats['oldest'] = min(stats['oldest'] or stat.st_mtime, stat.st_mtime)
+            stats['newest'] = max(stats['newest'] or stat.st_mtime, stat.st_mtime)
+            stats['sections'][section] = stats['sections'].get(section, 0) + 1
+    return stats
+
+
+def describe_stats(stats: Dict[str, Any], now: float = None) -> str:
+    """Краткое описание кеша для логов"""
+    if not stats['files']:
+        return f"{stats['path']}: пуст"
+    age = (now if now is not None else time.time()) - stats['newest']
+    return (f"{stats['path']}: {stats['files']} файлов, {stats['size'] / 1024:.0f} КБ, "
+            f"обновлен {age / 3600:.1f} ч назад")
+
+
+def update_metrics(stats: Dict[str, Any] = None) -> None:
+    """Обновляет метрики размера и времени обновления кеша"""
+    if _cache_dir is None:
+        return
+    stats = stats or cache_stats(_cache_dir)
+    metrics.ytdlp_cache_bytes.set(stats['size'])
+    metrics.ytdlp_cache_files.set(stats['files'])
+    if stats['newest']:
+        metrics.ytdlp_cache_updated.set(stats['newest'])
+
+
+def setup_ytdlp_cache(settings: Dict[str, Any] = None) -> Optional[str]:
+    """
+    Включает постоянный кеш yt-dlp по секции ytdlp_cache конфигурации
+
+    Args:
+        settings: enabled, dir, warmup, warmup_url, warmup_max_age
+
+    Returns:
+        Папка кеша или None, если используется кеш yt-dlp по умолчанию
+    """
+    global _cache_dir, _settings
+    settings = settings or {}
+    _settings = settings
+    _cache_dir = None
+    if not settings.get('enabled', True):
+        return None
+
+    path = settings.get('dir') or DEFAULT_CACHE_DIR
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"⚠️  Не удалось создать папку кеша yt-dlp {path}: {e}")
+        return None
+    _cache_dir = path
+    stats = cache_stats(path)
+    logger.info(f"🗄️  Кеш yt-dlp {describe_stats(stats)}")
+    update_metrics(stats)
+    return _cache_dir
+
+
+def ydl_options() -> Dict[str, Any]:
+    """Параметры YoutubeDL для постоянного кеша (пусто, если он отключен)"""
+    if _cache_dir is None:
+        return {}
+    return {'cachedir': _cache_dir}
+
+
+def warm_cache(create_ydl, clock=time.time) -> bool:
+    """
+    Прогревает кеш извлечением warmup_url, если он пуст или устарел
+
+    Ошибки прогрева не мешают запуску: кеш заполнится при первом опросе.
+
+    Args:
+        create_ydl: Фабрика YoutubeDL (multi_downloader.create_ydl)
+        clock: Источник времени (для тестов)
+
+    Returns:
+        True, если кеш прогревался
+    """
+    if _cache_dir is None or not _settings.get('warmup', True):
+        return False
+    stats = cache_stats(_cache_dir)
+    max_age = _settings.get('warmup_max_age', DEFAULT_WARMUP_MAX_AGE)
+    if stats['files'] and clock() - stats['newest'] < max_age:
+        return False
+
+    url = _settings.get('warmup_url') or DEFAULT_WARMUP_URL
+    logger.info(f"🔥 Прогрев кеша yt-dlp: {url}")
+    started = time.perf_counter()
+    try:
+        with create_ydl({'quiet': True, 'no_warnings': True, 'skip_download': True, 'noplaylist': True}) as ydl:
+            ydl.extract_info(url, download=False)
+    except Exception as e:
+        logger.warning(f"⚠️  Не удалось прогреть кеш yt-dlp: {e}")
+        return False
+
+    stats = cache_stats(_cache_dir)
+    logger.info(f"🔥 Кеш yt-dlp прогрет за {time.perf_counter() - started:.1f} сек, {describe_stats(stats, clock())}")
+    update_metrics(stats)
+    return True
+
+
+def start_warmup(create_ydl) -> Optional[threading.Thread]:
+    """
+    Прогревает кеш в фоновом потоке: запуск и первая итерация его не ждут
+
+    Returns:
+        Поток прогрева или None, если кеш отключен
+    """
+    if _cache_dir is None or not _settings.get('warmup', True):
+        return None
+    thread = threading.Thread(target=warm_cache, args=(create_ydl,), name="ytdlp-cache-warmup", daemon=True)
+    thread.start()
+    return thread